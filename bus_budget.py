@@ -0,0 +1,272 @@
+"""
+Бюджет шины: token bucket по запросам/с и байтам/с на весь канал и доли по категориям
+(управление, телеметрия, спектры, текст дисплея).
+
+Доля категории — гарантия, общий лимит — потолок: в пределах своей доли категория проходит
+всегда, сверх неё — только если в общем бюджете есть запас (его не выбрали другие).
+
+Шейпинг — на уровне очереди, а не транзакции: транзакции только списывают бюджет (charge, можно
+в минус — пачка Clinical batch не рвётся посередине), а worker перед выбором задачи спрашивает
+delay(категория) и, пока категория в долгу, берёт задачи других классов. Отложенные выборки
+учитываются в счётчиках throttled по категории.
+
+Лимиты подстраиваются по измерениям (adapt): канал упал под нагрузкой — лимит ниже нагрузки в момент
+обрыва; долго без обрывов и нагрузка у лимита — лимит растёт, не выше заданного (set_limits).
+Подобранный лимит хранится в профиле устройства (ModbusClient.capability_profile).
+"""
+from __future__ import annotations
+
+import time
+from typing import Optional
+
+CONTROL = "control"
+TELEMETRY = "telemetry"
+SPECTRA = "spectra"
+DISPLAY = "display"
+
+CATEGORIES = (CONTROL, TELEMETRY, SPECTRA, DISPLAY)
+
+DEFAULT_SHARES = {CONTROL: 0.2, TELEMETRY: 0.4, SPECTRA: 0.3, DISPLAY: 0.1}
+
+# Стартовые лимиты: с запасом выше штатного опроса (текст дисплея 10 запросов/с, Clinical batch,
+# спектры), но без всплесков, которые раньше рвали сокет драйвера. Фактическую нагрузку
+# показывает ModbusClient.bus_stats()["usage"] — по ней лимиты уточняются (BusBudget.adapt).
+DEFAULT_REQUESTS_PER_S = 200.0
+DEFAULT_BYTES_PER_S = 16000.0
+# Запас бюджета — на столько секунд работы на полной скорости
+DEFAULT_BURST_S = 0.5
+# Ниже этого adapt лимиты не опускает: штатный опрос должен проходить всегда
+MIN_REQUESTS_PER_S = 20.0
+MIN_BYTES_PER_S = 1600.0
+# Обрыв при нагрузке от этой доли лимита считается перегрузкой канала (при меньшей — причина не в ней)
+ADAPT_LOADED = 0.5
+# Лимит после обрыва — такая доля нагрузки в момент обрыва
+ADAPT_BACKOFF = 0.8
+# Без обрывов ADAPT_STABLE_S секунд при нагрузке у лимита — лимит растёт в ADAPT_STEP раз
+ADAPT_STEP = 1.1
+ADAPT_STABLE_S = 60.0
+
+
+class TokenBucket:
+    """Ведро на rate токенов/с, не больше burst; tokens уходят в минус при заёме сверх доли."""
+
+    __slots__ = ("rate", "burst", "tokens", "stamp")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self.tokens = self.burst
+        self.stamp = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        if now > self.stamp:
+            self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+
+    def wait_for(self, n: float) -> float:
+        """Через сколько секунд наберётся n токенов (0 — уже есть)."""
+        missing = n - self.tokens
+        if missing <= 0:
+            return 0.0
+        return missing / self.rate if self.rate > 0 else float("inf")
+
+
+class _Lane:
+    """Пара вёдер (запросы, байты) и счётчики одной категории."""
+
+    __slots__ = ("requests", "bytes", "sent", "sent_bytes", "throttled", "throttled_time", "borrowed")
+
+    def __init__(self, requests_per_s: float, bytes_per_s: float, burst_s: float):
+        self.requests = TokenBucket(requests_per_s, requests_per_s * burst_s)
+        self.bytes = TokenBucket(bytes_per_s, bytes_per_s * burst_s)
+        self.sent = 0
+        self.sent_bytes = 0
+        # Сколько раз worker откладывал задачи категории и суммарная отсрочка (с)
+        self.throttled = 0
+        self.throttled_time = 0.0
+        # Запросов сверх доли категории (прошли за счёт запаса общего бюджета)
+        self.borrowed = 0
+
+    def refill(self, now: float) -> None:
+        self.requests.refill(now)
+        self.bytes.refill(now)
+
+    # Пачка больше burst ждёт полного ведра и уводит его в минус — иначе не прошла бы никогда
+    def has(self, requests: int, nbytes: int) -> bool:
+        return (
+            self.requests.tokens >= min(requests, self.requests.burst)
+            and self.bytes.tokens >= min(nbytes, self.bytes.burst)
+        )
+
+    def take(self, requests: int, nbytes: int) -> None:
+        self.requests.tokens -= requests
+        self.bytes.tokens -= nbytes
+
+    def wait_for(self, requests: int, nbytes: int) -> float:
+        return max(
+            self.requests.wait_for(min(requests, self.requests.burst)),
+            self.bytes.wait_for(min(nbytes, self.bytes.burst)),
+        )
+
+
+class BusBudget:
+    """
+    Лимит канала: requests_per_s и bytes_per_s (запрос + ожидаемый ответ), доли shares по категориям.
+    max_requests_per_s/max_bytes_per_s — заданные лимиты, выше них adapt не поднимает.
+    Используется только из потока I/O клиента.
+    """
+
+    def __init__(
+        self,
+        requests_per_s: float = DEFAULT_REQUESTS_PER_S,
+        bytes_per_s: float = DEFAULT_BYTES_PER_S,
+        shares: Optional[dict] = None,
+        burst_s: float = DEFAULT_BURST_S,
+    ):
+        self.enabled = True
+        self.max_requests_per_s = float(requests_per_s)
+        self.max_bytes_per_s = float(bytes_per_s)
+        # Обрывов канала, учтённых adapt, и с какого момента (time.monotonic) обрывов не было
+        self.failures = 0
+        self._stable_since = time.monotonic()
+        self.configure(requests_per_s, bytes_per_s, shares, burst_s)
+
+    def configure(
+        self,
+        requests_per_s: float,
+        bytes_per_s: float,
+        shares: Optional[dict] = None,
+        burst_s: float = DEFAULT_BURST_S,
+    ) -> None:
+        """Новые лимиты (счётчики обнуляются)."""
+        self.requests_per_s = float(requests_per_s)
+        self.bytes_per_s = float(bytes_per_s)
+        self.burst_s = burst_s
+        shares = dict(shares or DEFAULT_SHARES)
+        total = sum(shares.values()) or 1.0
+        self.shares = {c: shares.get(c, 0.0) / total for c in CATEGORIES}
+        self._total = _Lane(self.requests_per_s, self.bytes_per_s, burst_s)
+        self._lanes = {
+            c: _Lane(self.requests_per_s * share, self.bytes_per_s * share, burst_s)
+            for c, share in self.shares.items()
+        }
+
+    def set_limits(self, requests_per_s: float, bytes_per_s: float) -> None:
+        """Заданные лимиты (настройка ModbusManager): действуют сразу и ограничивают adapt сверху."""
+        self.max_requests_per_s = float(requests_per_s)
+        self.max_bytes_per_s = float(bytes_per_s)
+        self._stable_since = time.monotonic()
+        self.configure(requests_per_s, bytes_per_s, self.shares, self.burst_s)
+
+    def restore(self, limits: dict) -> None:
+        """Лимиты, подобранные в прошлой сессии (профиль устройства), — не выше заданных."""
+        try:
+            requests_per_s = float(limits["requests_per_s"])
+            bytes_per_s = float(limits["bytes_per_s"])
+        except (KeyError, TypeError, ValueError):
+            return
+        self.configure(
+            min(self.max_requests_per_s, max(MIN_REQUESTS_PER_S, requests_per_s)),
+            min(self.max_bytes_per_s, max(MIN_BYTES_PER_S, bytes_per_s)),
+            self.shares,
+            self.burst_s,
+        )
+
+    def limits(self) -> dict:
+        """Текущие лимиты — для профиля устройства."""
+        return {"requests_per_s": round(self.requests_per_s, 1), "bytes_per_s": round(self.bytes_per_s, 1)}
+
+    def adapt(self, usage: dict, link_failed: bool = False) -> bool:
+        """
+        Подстроить лимиты по фактической нагрузке usage (ModbusClient.bus_stats()["usage"]).
+        link_failed — канал только что признан мёртвым (LinkLiveness): если нагрузка была не ниже
+        ADAPT_LOADED лимита, лимит ставится на ADAPT_BACKOFF от неё. Иначе, если ADAPT_STABLE_S не было
+        обрывов и нагрузка у лимита, лимит растёт в ADAPT_STEP раз до заданного.
+        True — лимиты изменились.
+        """
+        now = time.monotonic()
+        load = max(
+            usage.get("requests_per_s", 0.0) / self.requests_per_s if self.requests_per_s > 0 else 0.0,
+            usage.get("bytes_per_s", 0.0) / self.bytes_per_s if self.bytes_per_s > 0 else 0.0,
+        )
+        if link_failed:
+            self.failures += 1
+            self._stable_since = now
+            if load < ADAPT_LOADED:
+                return False
+            factor = ADAPT_BACKOFF * min(1.0, load)
+        else:
+            if now - self._stable_since < ADAPT_STABLE_S:
+                return False
+            self._stable_since = now
+            if load < ADAPT_LOADED:
+                return False
+            factor = ADAPT_STEP
+        requests_per_s = min(self.max_requests_per_s, max(MIN_REQUESTS_PER_S, self.requests_per_s * factor))
+        bytes_per_s = min(self.max_bytes_per_s, max(MIN_BYTES_PER_S, self.bytes_per_s * factor))
+        if requests_per_s == self.requests_per_s and bytes_per_s == self.bytes_per_s:
+            return False
+        self.configure(requests_per_s, bytes_per_s, self.shares, self.burst_s)
+        return True
+
+    def delay(self, category: str) -> float:
+        """
+        Через сколько секунд категории можно начинать следующую задачу: 0 — в её доле есть запрос
+        и нет долга по байтам или в общем бюджете есть запас; ничего не списывается.
+        """
+        if not self.enabled:
+            return 0.0
+        lane = self._lanes.get(category) or self._lanes[TELEMETRY]
+        total = self._total
+        now = time.monotonic()
+        lane.refill(now)
+        total.refill(now)
+        if lane.has(1, 0) or total.has(1, 0):
+            return 0.0
+        return max(1e-3, min(lane.wait_for(1, 0), total.wait_for(1, 0)))
+
+    def charge(self, category: str, requests: int, nbytes: int) -> None:
+        """Списать отправленные requests запросов и nbytes байт (запрос + ожидаемый ответ); без ожидания."""
+        if not self.enabled:
+            return
+        lane = self._lanes.get(category) or self._lanes[TELEMETRY]
+        total = self._total
+        now = time.monotonic()
+        lane.refill(now)
+        total.refill(now)
+        if lane.has(requests, nbytes):
+            # В пределах доли — проходит всегда, общий бюджет может уйти в минус
+            lane.take(requests, nbytes)
+        else:
+            lane.borrowed += requests
+        total.take(requests, nbytes)
+        lane.sent += requests
+        lane.sent_bytes += nbytes
+
+    def note_throttled(self, category: str, waited: float) -> None:
+        """Задача категории отложена worker'ом на waited секунд."""
+        lane = self._lanes.get(category) or self._lanes[TELEMETRY]
+        lane.throttled += 1
+        lane.throttled_time += waited
+
+    def stats(self) -> dict:
+        """Лимиты и счётчики по категориям (с момента configure)."""
+        return {
+            "enabled": self.enabled,
+            "requests_per_s": self.requests_per_s,
+            "bytes_per_s": self.bytes_per_s,
+            "max_requests_per_s": self.max_requests_per_s,
+            "max_bytes_per_s": self.max_bytes_per_s,
+            "failures": self.failures,
+            "categories": {
+                c: {
+                    "share": self.shares[c],
+                    "sent": lane.sent,
+                    "sent_bytes": lane.sent_bytes,
+                    "throttled": lane.throttled,
+                    "throttled_time": lane.throttled_time,
+                    "borrowed": lane.borrowed,
+                }
+                for c, lane in self._lanes.items()
+            },
+        }
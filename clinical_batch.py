@@ -13,106 +13,66 @@ def _mm():
     return mm
 
 
-def _build_seop_parameters(client: ModbusClient) -> dict:
+def _read_fc04(client: ModbusClient, addresses) -> dict[int, int]:
+    """Одиночные input registers одним read_many: {address: value} только для прочитанных."""
+    addresses = tuple(addresses)
+    res = client.read_many([(a, 1, 4) for a in addresses])
+    return {a: regs[0] for a, regs in zip(addresses, res.values) if regs}
+
+
+def _scaled_section(client: ModbusClient, specs) -> dict:
+    """specs: (address, key, scale); scale None — значение 1:1 (float)."""
     mm = _mm()
-    regs = {
-        "laser_max_temp": mm._read_input_regs(client, 3011),
-        "laser_min_temp": mm._read_input_regs(client, 3021),
-        "cell_max_temp": mm._read_input_regs(client, 3031),
-        "cell_min_temp": mm._read_input_regs(client, 3041),
-        "ramp_temp": mm._read_input_regs(client, 3051),
-        "seop_temp": mm._read_input_regs(client, 3061),
-        "cell_refill_temp": mm._read_input_regs(client, 3071),
-        "loop_time": mm._read_input_regs(client, 3081),
-        "process_duration": mm._read_input_regs(client, 3091),
-        "laser_max_output_power": mm._read_input_regs(client, 3101),
-        "laser_psu_max_current": mm._read_input_regs(client, 3111),
-        "water_chiller_max_temp": mm._read_input_regs(client, 3121),
-        "water_chiller_min_temp": mm._read_input_regs(client, 3131),
-        "xe_concentration": mm._read_input_regs(client, 3141),
-        "water_proton_concentration": mm._read_input_regs(client, 3151),
-        "cell_number": mm._read_input_regs(client, 3171),
-        "refill_cycle": mm._read_input_regs(client, 3181),
-    }
+    raw = _read_fc04(client, (addr for addr, _, _ in specs))
     result: dict[str, Any] = {}
-    if regs["laser_max_temp"]:
-        v = mm._seop_register_to_scaled(regs["laser_max_temp"][0], mm._SEOP_TEMP_SCALE)
-        if v is not None:
-            result["laser_max_temp"] = v
-    if regs["laser_min_temp"]:
-        v = mm._seop_register_to_scaled(regs["laser_min_temp"][0], mm._SEOP_TEMP_SCALE)
-        if v is not None:
-            result["laser_min_temp"] = v
-    if regs["cell_max_temp"]:
-        v = mm._seop_register_to_scaled(regs["cell_max_temp"][0], mm._SEOP_TEMP_SCALE)
-        if v is not None:
-            result["cell_max_temp"] = v
-    if regs["cell_min_temp"]:
-        v = mm._seop_register_to_scaled(regs["cell_min_temp"][0], mm._SEOP_TEMP_SCALE)
-        if v is not None:
-            result["cell_min_temp"] = v
-    if regs["ramp_temp"]:
-        v = mm._seop_register_to_scaled(regs["ramp_temp"][0], mm._SEOP_TEMP_SCALE)
-        if v is not None:
-            result["ramp_temp"] = v
-    if regs["seop_temp"]:
-        v = mm._seop_register_to_scaled(regs["seop_temp"][0], mm._SEOP_TEMP_SCALE)
-        if v is not None:
-            result["seop_temp"] = v
-    if regs["cell_refill_temp"]:
-        v = mm._seop_register_to_scaled(regs["cell_refill_temp"][0], mm._SEOP_TEMP_SCALE)
-        if v is not None:
-            result["cell_refill_temp"] = v
-    if regs["loop_time"]:
-        result["loop_time"] = float(int(regs["loop_time"][0]))
-    if regs["process_duration"]:
-        result["process_duration"] = float(int(regs["process_duration"][0]))
-    if regs["laser_max_output_power"]:
-        v = mm._seop_register_to_scaled(regs["laser_max_output_power"][0], mm._SEOP_POWER_SCALE)
-        if v is not None:
-            result["laser_max_output_power"] = v
-    if regs["laser_psu_max_current"]:
-        v = mm._seop_register_to_scaled(regs["laser_psu_max_current"][0], mm._SEOP_CURRENT_SCALE)
-        if v is not None:
-            result["laser_psu_max_current"] = v
-    if regs["water_chiller_max_temp"]:
-        v = mm._seop_register_to_scaled(regs["water_chiller_max_temp"][0], mm._SEOP_TEMP_SCALE)
-        if v is not None:
-            result["water_chiller_max_temp"] = v
-    if regs["water_chiller_min_temp"]:
-        v = mm._seop_register_to_scaled(regs["water_chiller_min_temp"][0], mm._SEOP_TEMP_SCALE)
-        if v is not None:
-            result["water_chiller_min_temp"] = v
-    if regs["xe_concentration"]:
-        v = mm._seop_register_to_scaled(regs["xe_concentration"][0], mm._SEOP_XE_CONCENTRATION_SCALE)
-        if v is not None:
-            result["xe_concentration"] = v
-    if regs["water_proton_concentration"]:
-        v = mm._seop_register_to_scaled(regs["water_proton_concentration"][0], mm._SEOP_WATER_PROTON_SCALE)
-        if v is not None:
-            result["water_proton_concentration"] = v
-    if regs["cell_number"]:
-        result["cell_number"] = int(regs["cell_number"][0])
-    if regs["refill_cycle"]:
-        result["refill_cycle"] = int(regs["refill_cycle"][0])
+    for addr, key, scale in specs:
+        if addr not in raw:
+            continue
+        if scale is None:
+            result[key] = float(int(raw[addr]))
+        else:
+            v = mm._seop_register_to_scaled(raw[addr], scale)
+            if v is not None:
+                result[key] = v
     return result
 
 
-def _build_calculated_parameters(client: ModbusClient) -> dict:
+def _build_seop_parameters(client: ModbusClient) -> dict:
     mm = _mm()
-    addrs = (4011, 4021, 4031, 4041, 4051, 4061, 4071, 4081, 4091, 4101)
+    result = _scaled_section(client, (
+        (3011, "laser_max_temp", mm._SEOP_TEMP_SCALE),
+        (3021, "laser_min_temp", mm._SEOP_TEMP_SCALE),
+        (3031, "cell_max_temp", mm._SEOP_TEMP_SCALE),
+        (3041, "cell_min_temp", mm._SEOP_TEMP_SCALE),
+        (3051, "ramp_temp", mm._SEOP_TEMP_SCALE),
+        (3061, "seop_temp", mm._SEOP_TEMP_SCALE),
+        (3071, "cell_refill_temp", mm._SEOP_TEMP_SCALE),
+        (3081, "loop_time", None),
+        (3091, "process_duration", None),
+        (3101, "laser_max_output_power", mm._SEOP_POWER_SCALE),
+        (3111, "laser_psu_max_current", mm._SEOP_CURRENT_SCALE),
+        (3121, "water_chiller_max_temp", mm._SEOP_TEMP_SCALE),
+        (3131, "water_chiller_min_temp", mm._SEOP_TEMP_SCALE),
+        (3141, "xe_concentration", mm._SEOP_XE_CONCENTRATION_SCALE),
+        (3151, "water_proton_concentration", mm._SEOP_WATER_PROTON_SCALE),
+        (3171, "cell_number", None),
+        (3181, "refill_cycle", None),
+    ))
+    # Номер ячейки и цикл refill — целые
+    for key in ("cell_number", "refill_cycle"):
+        if key in result:
+            result[key] = int(result[key])
+    return result
+
+
+def _build_calculated_parameters(client: ModbusClient) -> dict:
     keys = (
         "electron_polarization", "xe_polarization", "buildup_rate",
         "electron_polarization_error", "xe_polarization_error", "buildup_rate_error",
         "fitted_xe_polarization_max", "fitted_xe_polarization_max_error",
         "hp_xe_t1", "hp_xe_t1_error",
     )
-    result: dict[str, Any] = {}
-    for addr, key in zip(addrs, keys):
-        r = mm._read_input_regs(client, addr)
-        if r:
-            result[key] = float(int(r[0])) / 100.0
-    return result
+    return _scaled_section(client, [(4011 + 10 * i, key, 100.0) for i, key in enumerate(keys)])
 
 
 def _build_measured_parameters(client: ModbusClient) -> dict:
@@ -153,7 +113,7 @@ def _build_measured_parameters(client: ModbusClient) -> dict:
 
 def _build_additional_parameters(client: ModbusClient) -> dict:
     mm = _mm()
-    specs = (
+    return _scaled_section(client, (
         (6011, "magnet_psu_current_proton_nmr", mm._ADDITIONAL_MAGNET_CURRENT_SCALE),
         (6021, "magnet_psu_current_129xe_nmr", mm._ADDITIONAL_MAGNET_CURRENT_SCALE),
         (6031, "operational_laser_psu_current", mm._ADDITIONAL_LASER_CURRENT_SCALE),
@@ -174,53 +134,22 @@ def _build_additional_parameters(client: ModbusClient) -> dict:
         (6181, "h1_current_sweep_n_scans", None),
         (6191, "baseline_correction_min_frequency", mm._ADDITIONAL_SCALE_10),
         (6201, "baseline_correction_max_frequency", mm._ADDITIONAL_SCALE_10),
-    )
-    result: dict[str, Any] = {}
-    for addr, key, scale in specs:
-        r = mm._read_input_regs(client, addr)
-        if not r:
-            continue
-        if scale is None:
-            result[key] = float(int(r[0]))
-        else:
-            v = mm._seop_register_to_scaled(r[0], scale)
-            if v is not None:
-                result[key] = v
-    return result
+    ))
 
 
 def _build_manual_mode_settings(client: ModbusClient) -> dict:
     mm = _mm()
-    result: dict[str, Any] = {}
-    rf_freq = mm._read_input_regs(client, 6301)
-    if rf_freq:
-        v = mm._seop_register_to_scaled(rf_freq[0], mm._MANUAL_MODE_FREQ_SCALE)
-        if v is not None:
-            result["rf_pulse_frequency"] = v
-    rf_pwr = mm._read_input_regs(client, 6311)
-    if rf_pwr:
-        v = mm._seop_register_to_scaled(rf_pwr[0], mm._MANUAL_MODE_POWER_SCALE)
-        if v is not None:
-            result["rf_pulse_power"] = v
-    for addr, key in ((6321, "rf_pulse_duration"), (6331, "pre_acquisition"),
-                      (6351, "nmr_number_of_scans"), (6361, "nmr_recovery")):
-        r = mm._read_input_regs(client, addr)
-        if r:
-            result[key] = float(int(r[0]))
-    nmr_gain = mm._read_input_regs(client, 6341)
-    if nmr_gain:
-        result["nmr_gain"] = float(int(nmr_gain[0]))
-    center = mm._read_input_regs(client, 6371)
-    if center:
-        v = mm._seop_register_to_scaled(center[0], mm._MANUAL_MODE_FREQ_SCALE)
-        if v is not None:
-            result["center_frequency"] = v
-    span = mm._read_input_regs(client, 6381)
-    if span:
-        v = mm._seop_register_to_scaled(span[0], mm._MANUAL_MODE_FREQ_SCALE)
-        if v is not None:
-            result["frequency_span"] = v
-    return result
+    return _scaled_section(client, (
+        (6301, "rf_pulse_frequency", mm._MANUAL_MODE_FREQ_SCALE),
+        (6311, "rf_pulse_power", mm._MANUAL_MODE_POWER_SCALE),
+        (6321, "rf_pulse_duration", None),
+        (6331, "pre_acquisition", None),
+        (6341, "nmr_gain", None),
+        (6351, "nmr_number_of_scans", None),
+        (6361, "nmr_recovery", None),
+        (6371, "center_frequency", mm._MANUAL_MODE_FREQ_SCALE),
+        (6381, "frequency_span", mm._MANUAL_MODE_FREQ_SCALE),
+    ))
 
 
 def _screen01_io_minimal_read(client: ModbusClient) -> dict:
@@ -251,22 +180,27 @@ def clinical_batch_read(client: ModbusClient, *, light: bool = False) -> dict:
         result = _screen01_io_minimal_read(client)
         return result
 
-    result = mm._screen01_batch_read(client)
-    ok = int(result.get("_ok", 0))
-
-    for key, builder in (
-        ("seop_parameters", _build_seop_parameters),
-        ("calculated_parameters", _build_calculated_parameters),
-        ("measured_parameters", _build_measured_parameters),
-        ("additional_parameters", _build_additional_parameters),
-        ("manual_mode_settings", _build_manual_mode_settings),
-    ):
-        section = builder(client)
-        if section:
-            result[key] = section
-            ok += 1
+    started = time.monotonic()
+    with client.batch_budget(mm._CLINICAL_BATCH_BUDGET_S):
+        result = mm._screen01_batch_read(client)
+        ok = int(result.get("_ok", 0))
+
+        for key, builder in (
+            ("seop_parameters", _build_seop_parameters),
+            ("calculated_parameters", _build_calculated_parameters),
+            ("measured_parameters", _build_measured_parameters),
+            ("additional_parameters", _build_additional_parameters),
+            ("manual_mode_settings", _build_manual_mode_settings),
+        ):
+            section = builder(client)
+            if section:
+                result[key] = section
+                ok += 1
+        if client.budget_exhausted:
+            result["_partial"] = True
 
     result["_ok"] = ok
+    result["_elapsed"] = time.monotonic() - started
     result["_conn"] = client.client is not None and client.client.is_socket_open()
     return result
 
@@ -0,0 +1,36 @@
+"""
+Состояния соединения с XeUS driver и backoff для переподключения.
+
+DISCONNECTED → CONNECTING → WARMUP → READY ⇄ DEGRADED; переходы выполняет _ModbusIoWorker по таймерам.
+"""
+from __future__ import annotations
+
+import random
+
+DISCONNECTED = "disconnected"
+CONNECTING = "connecting"
+WARMUP = "warmup"      # TCP открыт, ждём первый ответ на probe-чтение
+READY = "ready"
+DEGRADED = "degraded"  # сокет открыт, но ответы пропадают / идёт восстановление
+
+# В каких состояниях worker выполняет задачи из очередей (в остальных они ждут)
+TASK_STATES = (READY, DEGRADED)
+
+
+class Backoff:
+    """Экспоненциальная задержка с jitter: base·2ⁿ (не больше cap), случайно урезанная до jitter доли."""
+
+    def __init__(self, base: float = 0.2, cap: float = 5.0, jitter: float = 0.5):
+        self.base = base
+        self.cap = cap
+        self.jitter = jitter
+        self.attempts = 0
+
+    def reset(self) -> None:
+        self.attempts = 0
+
+    def next_delay(self) -> float:
+        """Задержка перед следующей попыткой (секунды)."""
+        delay = min(self.cap, self.base * (2 ** self.attempts))
+        self.attempts += 1
+        return delay * random.uniform(1.0 - self.jitter, 1.0)
@@ -0,0 +1,82 @@
+"""
+Профиль возможностей устройства между сессиями (тёплый старт): фрейминг, карта регистров
+(какой функцией отвечает адрес, каких адресов нет), подобранные лимиты чтения, дыры карты,
+которые склейка чтений обходит (read_planner.ReadHoles), порядок слов float в метаданных,
+лимит шины, подобранный по обрывам канала (bus_budget.BusBudget.adapt).
+Ключ — host:port/unit, профиль действует, только если совпал отпечаток прошивки.
+
+Отпечаток — исход нескольких пробных чтений (FINGERPRINT_READS): есть ли регистр, какой exception
+code, при use_value — и значение (регистр версии прошивки). Одна транзакция на подключение.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_VERSION = 1
+
+# (function, address, count, use_value): FC03 1020 есть не на всех прошивках XeUS — исход чтения их различает
+FINGERPRINT_READS: tuple = ((3, 1020, 1, False),)
+
+
+def device_key(host: str, port: int, unit_id: int) -> str:
+    return f"{host}:{port}/{unit_id}"
+
+
+def fingerprint_of(reads, results) -> Optional[str]:
+    """
+    Отпечаток по результатам read_spans [(registers, exception_code), ...];
+    None — какое-то чтение не получило ответа (по таймауту прошивку не определить).
+    """
+    parts = []
+    for (function, address, count, use_value), (regs, exc_code) in zip(reads, results):
+        if regs is not None:
+            value = ",".join(str(int(r)) for r in regs) if use_value else "ok"
+        elif exc_code is not None:
+            value = f"e{exc_code}"
+        else:
+            return None
+        parts.append(f"{function}:{address}+{count}={value}")
+    return ";".join(parts)
+
+
+def load_device_profiles(path: str) -> dict:
+    """{device_key: профиль}; пустой dict, если файла нет или он не читается."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Не удалось прочитать профили устройств {path}: {e}")
+        return {}
+    if not isinstance(data, dict) or data.get("version") != PROFILE_VERSION:
+        return {}
+    devices = data.get("devices")
+    return devices if isinstance(devices, dict) else {}
+
+
+def load_device_profile(path: str, key: str) -> Optional[dict]:
+    entry = load_device_profiles(path).get(key)
+    return entry if isinstance(entry, dict) else None
+
+
+def save_device_profile(path: str, key: str, profile: dict) -> bool:
+    """Сохранить профиль устройства, не трогая профили других устройств."""
+    devices = load_device_profiles(path)
+    devices[key] = dict(profile, saved=time.time())
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": PROFILE_VERSION, "devices": devices}, f, indent=1)
+        os.replace(tmp, path)
+        return True
+    except OSError as e:
+        logger.warning(f"Не удалось сохранить профиль устройства {path}: {e}")
+        return False
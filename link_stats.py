@@ -0,0 +1,243 @@
+"""
+Статистика канала Modbus: оценка RTT (сглаженное среднее + разброс) для адаптивных таймаутов,
+быстрый повтор запроса по перцентилю задержки и пассивная оценка живости канала по результатам транзакций.
+"""
+from __future__ import annotations
+
+import time
+from array import array
+from typing import Optional
+
+
+class RttEstimator:
+    """
+    Оценка RTT по схеме Jacobson/Karels (как RTO в TCP):
+    srtt += (rtt - srtt) / 8, rttvar += (|rtt - srtt| - rttvar) / 4, timeout = srtt + 4 * rttvar.
+    Подряд идущие таймауты удваивают timeout (до max_timeout), первый ответ сбрасывает множитель.
+    """
+
+    ALPHA = 0.125
+    BETA = 0.25
+    K = 4.0
+
+    def __init__(self, initial_timeout: float = 0.5, min_timeout: float = 0.1, max_timeout: float = 1.0):
+        self.initial_timeout = initial_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.reset()
+
+    def reset(self) -> None:
+        """Новое соединение — начинаем с initial_timeout."""
+        self.srtt: Optional[float] = None
+        self.rttvar = 0.0
+        self.last_rtt: Optional[float] = None
+        self.samples = 0
+        self.timeouts = 0
+        self._backoff = 1
+
+    def sample(self, rtt: float) -> None:
+        """Учесть время ответа (секунды) на запрос, отправленный один раз."""
+        if rtt < 0:
+            return
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar += self.BETA * (abs(rtt - self.srtt) - self.rttvar)
+            self.srtt += self.ALPHA * (rtt - self.srtt)
+        self.last_rtt = rtt
+        self.samples += 1
+        self._backoff = 1
+
+    def on_timeout(self) -> None:
+        """Запрос истёк целиком (полный timeout без ответа)."""
+        self.timeouts += 1
+        self._backoff = min(self._backoff * 2, 8)
+
+    @property
+    def timeout(self) -> float:
+        """Таймаут на следующий запрос."""
+        if self.srtt is None:
+            base = self.initial_timeout
+        else:
+            base = self.srtt + self.K * self.rttvar
+        return min(self.max_timeout, max(self.min_timeout, base * self._backoff))
+
+    def state(self) -> dict:
+        """Снимок для планировщика опроса (секунды)."""
+        return {
+            "srtt": self.srtt,
+            "rttvar": self.rttvar,
+            "last_rtt": self.last_rtt,
+            "timeout": self.timeout,
+            "samples": self.samples,
+            "timeouts": self.timeouts,
+        }
+
+
+class RetryPolicy:
+    """
+    Быстрый повтор запроса: если ответа нет дольше percentile наблюдаемых задержек (p95),
+    кадр отправляется повторно, не дожидаясь полного таймаута. Ответ на любой из двух
+    одинаковых кадров подходит, устаревшие ответы отбрасывает RxBuffer по содержимому.
+    Не больше max_retries повторов на batched-проход (batch_budget).
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 2,
+        percentile: float = 0.95,
+        window: int = 128,
+        min_samples: int = 20,
+        min_delay: float = 0.02,
+    ):
+        self.enabled = True
+        self.max_retries = max_retries
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self._window = array("d", bytes(8 * max(1, window)))
+        self._count = 0
+        self._cached: Optional[float] = None
+        # Повторов осталось в текущем batched-проходе
+        self._left = max_retries
+        # Счётчики (переживают переподключения): повтор отправлен / ответ после повтора / не помог / запрещён лимитом
+        self.retries = 0
+        self.saved = 0
+        self.failed = 0
+        self.denied = 0
+
+    def reset_window(self) -> None:
+        """Новое соединение — задержки старого канала не показательны."""
+        self._count = 0
+        self._cached = None
+
+    def sample(self, rtt: float) -> None:
+        """Время ответа на запрос, отправленный один раз (ответы после повтора неоднозначны — не учитываются)."""
+        window = self._window
+        window[self._count % len(window)] = rtt
+        self._count += 1
+        self._cached = None
+
+    def begin_batch(self) -> int:
+        """Начало batched-прохода: восстановить лимит повторов, вернуть предыдущий остаток."""
+        left, self._left = self._left, self.max_retries
+        return left
+
+    def end_batch(self, left: int) -> None:
+        self._left = left
+
+    def latency(self) -> Optional[float]:
+        """percentile задержки по окну замеров (None — замеров меньше min_samples)."""
+        if self._count < self.min_samples:
+            return None
+        if self._cached is None:
+            n = min(self._count, len(self._window))
+            ordered = sorted(self._window[:n])
+            self._cached = ordered[min(n - 1, int(self.percentile * n))]
+        return self._cached
+
+    def delay(self, timeout: float, in_batch: bool = True) -> Optional[float]:
+        """
+        Через сколько секунд после отправки повторить запрос; None — повтор не нужен
+        (выключено, мало замеров, p95 не короче таймаута или лимит повторов прохода исчерпан).
+        Вне batched-прохода лимит не действует — одиночный запрос повторяется не больше одного раза.
+        """
+        latency = self.latency() if self.enabled else None
+        if latency is None:
+            return None
+        delay = max(self.min_delay, latency)
+        if delay >= timeout / 2:
+            return None
+        if in_batch and self._left <= 0:
+            self.denied += 1
+            return None
+        return delay
+
+    def allow_retry(self, in_batch: bool = True) -> bool:
+        """
+        Повтор сейчас не превысит лимит прохода? Для запросов в полёте одновременно: delay()
+        проверяет лимит при отправке, а повторы случаются позже и могут выбрать его вместе.
+        """
+        if in_batch and self._left <= 0:
+            self.denied += 1
+            return False
+        return True
+
+    def on_retry(self) -> None:
+        self._left -= 1
+        self.retries += 1
+
+    def on_retry_result(self, answered: bool) -> None:
+        if answered:
+            self.saved += 1
+        else:
+            self.failed += 1
+
+    def state(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "max_retries": self.max_retries,
+            "percentile": self.percentile,
+            "latency": self.latency(),
+            "samples": min(self._count, len(self._window)),
+            "retries": self.retries,
+            "saved": self.saved,
+            "failed": self.failed,
+            "denied": self.denied,
+        }
+
+
+class LinkLiveness:
+    """
+    Живость канала по потоку транзакций, без отдельных проверок сокета: время последнего ответа,
+    таймауты подряд, ошибки сокета. Канал мёртв после dead_after_timeouts полных таймаутов подряд
+    (с адаптивным таймаутом это доли секунды) или после ошибки сокета.
+    """
+
+    def __init__(self, dead_after_timeouts: int = 3):
+        self.dead_after_timeouts = dead_after_timeouts
+        self.reset()
+
+    def reset(self) -> None:
+        """Новое соединение."""
+        now = time.monotonic()
+        self.last_response = now
+        self.last_activity = now
+        self.consecutive_timeouts = 0
+        self.socket_error: Optional[str] = None
+
+    def on_response(self) -> None:
+        """Пришёл ответ (в т.ч. exception response — устройство на связи)."""
+        now = time.monotonic()
+        self.last_response = now
+        self.last_activity = now
+        self.consecutive_timeouts = 0
+
+    def on_timeout(self) -> None:
+        """Полный таймаут без ответа (урезанный бюджетом batched-прохода не считается)."""
+        self.last_activity = time.monotonic()
+        self.consecutive_timeouts += 1
+
+    def on_error(self, error: object) -> None:
+        """Ошибка сокета (reset, broken pipe, закрытие устройством)."""
+        self.last_activity = time.monotonic()
+        self.socket_error = str(error)
+
+    @property
+    def dead(self) -> bool:
+        return self.socket_error is not None or self.consecutive_timeouts >= self.dead_after_timeouts
+
+    def idle_for(self) -> float:
+        """Сколько секунд по каналу ничего не отправлялось."""
+        return time.monotonic() - self.last_activity
+
+    def state(self) -> dict:
+        now = time.monotonic()
+        return {
+            "since_response": now - self.last_response,
+            "idle": now - self.last_activity,
+            "consecutive_timeouts": self.consecutive_timeouts,
+            "socket_error": self.socket_error,
+            "dead": self.dead,
+        }
@@ -1,6 +1,7 @@
 import sys
 import os
 import logging
+import multiprocessing
 from PySide6.QtGui import QGuiApplication
 from PySide6.QtQml import QQmlApplicationEngine, qmlRegisterType
 from PySide6.QtCore import QUrl
@@ -20,6 +21,9 @@ logging.basicConfig(
 )
 
 if __name__ == "__main__":
+    # Пул декодирования "process" в собранном PyInstaller приложении: дочерний процесс запускает
+    # тот же exe, и без freeze_support() он поднял бы второй GUI вместо воркера пула
+    multiprocessing.freeze_support()
     os.environ["QT_QUICK_CONTROLS_STYLE"] = "Fusion"
     # Отключаем логирование Qt (включая qt.graphs2d.critical и qt.qpa.fonts)
     # Используем правильный формат для QT_LOGGING_RULES - отключаем все логи qt.graphs2d и qt.qpa.fonts
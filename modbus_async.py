@@ -0,0 +1,795 @@
+"""
+Asyncio транспорт Modbus RTU over TCP (без pymodbus) с окном in-flight запросов.
+
+RTU не несёт transaction id: устройство отвечает строго по порядку, поэтому ответы
+сопоставляются с головой очереди ожидания по function, byte count (и адресу для FC06/FC16).
+FC03/FC04 одной длины по содержимому не различить, поэтому форма каждого истёкшего
+или повторённого запроса запоминается (_stale), и следующий такой кадр отбрасывается,
+прежде чем сопоставляться с головой очереди.
+
+Modbus TCP (MBAP) несёт transaction id: AsyncMbapTransport держит в полёте много запросов
+и принимает ответы в любом порядке. framer="auto" пробует MBAP при подключении и
+откатывается на RTU, если прошивка его не понимает.
+
+AsyncModbusClient — тот же публичный API, что у ModbusClient, чтобы _ModbusIoWorker
+и clinical_batch_read работали с ним без изменений.
+"""
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from collections import deque
+from typing import Optional
+
+from device_profile import load_device_profile
+from link_stats import RetryPolicy, RttEstimator
+from modbus_client import ModbusClient
+from modbus_transport import SocketProfile, TransportStats, configure_socket
+from transaction_trace import CONN_ERROR, CRC_ERROR, EXCEPTION, OK, RETRIED, TIMEOUT, TransactionTrace
+from modbus_codec import (
+    EXCEPTION_MESSAGES,
+    RtuResponse,
+    build_read_frame,
+    build_write_frame,
+    build_write_multiple_frame,
+    decode_mbap,
+    find_frame_start,
+    mbap_frame_length,
+    parse_response,
+    response_length,
+    response_matches,
+    to_mbap,
+)
+
+logger = logging.getLogger(__name__)
+
+# Окно по умолчанию — 1: не все прошивки XeUS driver переваривают несколько запросов подряд
+DEFAULT_INFLIGHT_WINDOW = 1
+# С MBAP ответы сопоставляются по transaction id — окно можно держать широким
+DEFAULT_MBAP_WINDOW = 16
+# Probe MBAP при framer="auto": адрес и сколько ждать ответа, прежде чем откатиться на RTU
+MBAP_PROBE_ADDRESS = 1021
+MBAP_PROBE_TIMEOUT_S = 0.5
+
+
+class _Pending:
+    __slots__ = ("function", "length", "address", "value", "future", "first_byte", "bytes_in", "crc_errors", "tid")
+
+    def __init__(self, function: int, length: int, address: Optional[int], value: Optional[int], future):
+        self.function = function
+        self.length = length
+        self.address = address
+        self.value = value
+        self.future = future
+        # Для трассировки: когда пришли первые байты ответа, сколько байт, сколько кадров с плохим CRC
+        self.first_byte = 0.0
+        self.bytes_in = 0
+        self.crc_errors = 0
+        # Transaction id (только MBAP)
+        self.tid = 0
+
+    def matches(self, frame: bytes) -> bool:
+        """Ответ относится к этому запросу? (exception или ожидаемая длина + эхо адреса для записи)"""
+        return response_matches(frame, self.function, self.length, self.address, self.value)
+
+
+class AsyncRtuTransport:
+    """RTU-over-TCP поверх asyncio streams. Все корутины выполняются в одном event loop."""
+
+    name = "asyncio"
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        unit_id: int,
+        *,
+        window: int = DEFAULT_INFLIGHT_WINDOW,
+        timeout: float = 0.5,
+        rtt: Optional[RttEstimator] = None,
+        trace: Optional[TransactionTrace] = None,
+        profile: Optional[SocketProfile] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+    ):
+        self.host = host
+        self.port = port
+        self.unit_id = unit_id
+        self.window = max(1, int(window))
+        self.timeout = timeout
+        # Общие с клиентом оценка RTT и политика повторов: транспорт поставляет замеры и повторяет кадры
+        self.rtt = rtt
+        self.retry_policy = retry_policy
+        self.trace = trace
+        self.counters = TransportStats()
+        self.profile = profile
+        self.socket_options: dict = {}
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._pending: deque[_Pending] = deque()
+        # Ответы, которые устройство ещё может прислать на истёкшие/повторённые запросы (только RTU):
+        # (function, length, address, value, asyncio.Event, deadline) в порядке отправки. У истёкших
+        # запросов срока нет (Event и deadline — None): зависшее устройство отвечает на очередь запросов
+        # секунды спустя, но по порядку — другой кадр первым снимает запись
+        self._stale: deque = deque()
+        self._buf = bytearray()
+        self._open = False
+
+    async def open(self, connect_timeout: float = 3.0) -> bool:
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), timeout=connect_timeout
+        )
+        sock = self._writer.get_extra_info("socket")
+        if sock is not None:
+            self.socket_options = configure_socket(sock, self.profile)
+        self._slots = asyncio.Semaphore(self.window)
+        self._buf.clear()
+        self._stale.clear()
+        self._open = True
+        self.counters.opens += 1
+        self._reader_task = asyncio.get_running_loop().create_task(self._read_loop())
+        return True
+
+    def is_socket_open(self) -> bool:
+        """Как у pymodbus ModbusTcpClient — для проверок client.client.is_socket_open()."""
+        return self._open and self._writer is not None and not self._writer.is_closing()
+
+    async def aclose(self) -> None:
+        self._open = False
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            self._reader_task = None
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+            self._writer = None
+        self._fail_pending(ConnectionError("Транспорт закрыт"))
+
+    def close(self) -> None:
+        """Синхронное закрытие (из любого потока) — как pymodbus client.close()."""
+        self._open = False
+        writer = self._writer
+        if writer is None:
+            return
+        try:
+            writer.transport.get_loop().call_soon_threadsafe(writer.close)
+        except RuntimeError:
+            pass
+
+    async def request(
+        self,
+        frame: bytes,
+        function: int,
+        response_len: int,
+        *,
+        address: Optional[int] = None,
+        value: Optional[int] = None,
+        timeout: Optional[float] = None,
+        retry_after: Optional[float] = None,
+        in_batch: bool = False,
+    ) -> Optional[RtuResponse]:
+        """
+        Отправить кадр и дождаться ответа. None — таймаут.
+        Одновременно в полёте не больше window запросов. retry_after (RetryPolicy.delay) — через
+        сколько секунд без ответа повторить кадр, не дожидаясь таймаута; ответ на любой из двух подходит.
+        """
+        if timeout is None:
+            timeout = self.timeout
+        policy = self.retry_policy
+        async with self._slots:
+            if not self.is_socket_open():
+                raise ConnectionError("Сокет закрыт")
+            # Второй ответ на прошлый повторённый запрос той же формы не должен достаться этому
+            await self._settle_late_reply(function, response_len, address, value)
+            loop = asyncio.get_running_loop()
+            pending = _Pending(function, response_len, address, value, loop.create_future())
+            wire = self._enqueue(pending, frame)
+            trace = self.trace
+            counters = self.counters
+            sent = loop.time()
+            deadline = sent + timeout
+            retried = False
+            try:
+                self._writer.write(wire)
+                counters.frames_out += 1
+                counters.bytes_out += len(wire)
+                if retry_after is not None and policy is not None and self._can_resend():
+                    done, _ = await asyncio.wait((pending.future,), timeout=retry_after)
+                    if not done and policy.allow_retry(in_batch):
+                        # Кадр или ответ, скорее всего, потерян — повтор до исходного дедлайна
+                        if trace is not None:
+                            trace.record(frame, sent, pending.first_byte, loop.time(), pending.bytes_in, RETRIED)
+                        policy.on_retry()
+                        retried = True
+                        sent = loop.time()
+                        wire = self._resend_wire(pending, frame)
+                        self._writer.write(wire)
+                        counters.frames_out += 1
+                        counters.bytes_out += len(wire)
+                resp = await asyncio.wait_for(pending.future, max(0.0, deadline - loop.time()))
+                now = loop.time()
+                counters.frames_in += 1
+                counters.io_time += now - sent
+                if retried:
+                    policy.on_retry_result(True)
+                    # Если опоздал ответ на первый кадр, ответ на повтор идёт следом (не позже RTO от этого ответа)
+                    rto = self.rtt.timeout if self.rtt is not None else timeout
+                    self._note_stale(pending, 1, now + rto)
+                else:
+                    # Ответ после повтора неоднозначен (на какой кадр?) — в оценки RTT не идёт
+                    if self.rtt is not None:
+                        self.rtt.sample(now - sent)
+                    if policy is not None:
+                        policy.sample(now - sent)
+                if trace is not None:
+                    if resp.is_exception:
+                        trace.record(frame, sent, pending.first_byte, now, pending.bytes_in, EXCEPTION, resp.exception_code)
+                    else:
+                        trace.record(frame, sent, pending.first_byte, now, pending.bytes_in, OK)
+                return resp
+            except asyncio.TimeoutError:
+                if retried:
+                    policy.on_retry_result(False)
+                self._note_stale(pending, 2 if retried else 1)
+                counters.timeouts += 1
+                counters.crc_errors += pending.crc_errors
+                counters.io_time += loop.time() - sent
+                if self.rtt is not None and timeout >= self.rtt.timeout:
+                    self.rtt.on_timeout()
+                if trace is not None:
+                    trace.record(
+                        frame, sent, pending.first_byte, loop.time(), pending.bytes_in,
+                        CRC_ERROR if pending.crc_errors else TIMEOUT,
+                    )
+                return None
+            except (ConnectionError, OSError):
+                counters.errors += 1
+                if trace is not None:
+                    trace.record(frame, sent, pending.first_byte, loop.time(), pending.bytes_in, CONN_ERROR)
+                raise
+            finally:
+                self._dequeue(pending)
+
+    def stats(self) -> dict:
+        """Счётчики транспорта — как у FrameTransport.stats()."""
+        data = self.counters.as_dict()
+        data["transport"] = self.name
+        data["in_flight"] = self._in_flight()
+        if self.socket_options:
+            data["socket_options"] = dict(self.socket_options)
+        return data
+
+    def _in_flight(self) -> int:
+        return len(self._pending)
+
+    def _note_stale(self, pending: _Pending, count: int, deadline: Optional[float] = None) -> None:
+        """
+        Устройство может ещё прислать count ответов на pending. deadline — второй ответ на повторённый
+        запрос: дольше него следующий запрос той же формы его не ждёт (_settle_late_reply).
+        """
+        arrived = asyncio.Event() if deadline is not None else None
+        for _ in range(count):
+            self._stale.append((pending.function, pending.length, pending.address, pending.value, arrived, deadline))
+
+    async def _settle_late_reply(
+        self, function: int, length: int, address: Optional[int], value: Optional[int]
+    ) -> None:
+        """
+        Перед отправкой запроса: если ждём второй ответ на повторённый запрос той же формы (FC04 одного
+        регистра — всегда 7 байт), дождаться его — не дольше RTO от первого ответа. Пришёл — отброшен
+        в _dispatch; не пришёл — ответ на первый кадр был потерян, запись снимается. Запросы другой
+        формы не ждут: второй ответ им не подойдёт.
+        """
+        loop = asyncio.get_running_loop()
+        for entry in list(self._stale):
+            arrived, deadline = entry[4], entry[5]
+            if arrived is None or entry[:4] != (function, length, address, value):
+                continue
+            try:
+                await asyncio.wait_for(arrived.wait(), max(0.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                try:
+                    self._stale.remove(entry)
+                except ValueError:
+                    pass
+
+    def _drop_stale(self, frame: bytes) -> bool:
+        """
+        Кадр — запоздавший ответ из _stale? Другой кадр первым значит, что тот ответ уже не придёт.
+        Если запоздавший ответ потерян, отброшен будет ответ следующего запроса той же формы — он
+        истечёт по таймауту (или его вытянет повтор), но чужое значение никому не достанется.
+        """
+        stale = self._stale
+        while stale:
+            function, length, address, value, arrived, _ = stale.popleft()
+            if arrived is not None:
+                arrived.set()
+            if response_matches(frame, function, length, address, value):
+                logger.debug(f"Отброшен запоздавший ответ FC{frame[1]:02d} ({len(frame)} байт)")
+                return True
+        return False
+
+    def _can_resend(self) -> bool:
+        """
+        Повтор кадра RTU — только при окне 1: ответы идут строго по порядку, и дубль в середине
+        конвейера сдвинул бы сопоставление ответов остальных запросов.
+        """
+        return self.window == 1
+
+    def _resend_wire(self, pending: _Pending, frame: bytes) -> bytes:
+        """Байты повторной отправки: запрос остаётся в ожидании на прежнем месте."""
+        return frame
+
+    def _enqueue(self, pending: _Pending, frame: bytes) -> bytes:
+        """Поставить запрос в ожидание ответа; возвращает байты для отправки."""
+        self._pending.append(pending)
+        return frame
+
+    def _dequeue(self, pending: _Pending) -> None:
+        try:
+            self._pending.remove(pending)
+        except ValueError:
+            pass
+
+    async def _read_loop(self) -> None:
+        error: Exception = ConnectionError("Соединение закрыто устройством")
+        try:
+            while True:
+                data = await self._reader.read(4096)
+                if not data:
+                    break
+                self.counters.recv_calls += 1
+                self.counters.bytes_in += len(data)
+                self._buf += data
+                self._dispatch()
+        except asyncio.CancelledError:
+            raise
+        except (ConnectionError, OSError) as e:
+            error = e
+        finally:
+            self._open = False
+            self._fail_pending(error)
+
+    def _dispatch(self) -> None:
+        buf = self._buf
+        if self._pending and buf and not self._pending[0].first_byte:
+            self._pending[0].first_byte = asyncio.get_running_loop().time()
+        while buf and (self._pending or self._stale):
+            head = self._pending[0] if self._pending else None
+            function = head.function if head is not None else self._stale[0][0]
+            pos = find_frame_start(buf, self.unit_id, function)
+            if pos < 0:
+                # Последний байт может оказаться началом кадра
+                del buf[:-1]
+                return
+            if pos:
+                del buf[:pos]
+            length = response_length(buf)
+            if length is None or len(buf) < length:
+                return
+            frame = bytes(buf[:length])
+            parsed = parse_response(frame, self.unit_id, function)
+            if parsed is None:
+                # CRC не сошёлся — ложное начало кадра, сдвигаемся на байт
+                if head is not None:
+                    head.crc_errors += 1
+                del buf[:1]
+                continue
+            del buf[:length]
+            if self._stale and self._drop_stale(frame):
+                continue
+            if head is None:
+                continue
+            if not head.matches(frame):
+                logger.debug(f"Отброшен устаревший ответ FC{frame[1]:02d} ({length} байт)")
+                continue
+            self._pending.popleft()
+            head.bytes_in = length
+            if not head.future.done():
+                head.future.set_result(parsed)
+        if not self._pending and not self._stale:
+            # Никто не ждёт — всё, что пришло, относится к истёкшим запросам
+            buf.clear()
+
+    def _fail_pending(self, error: Exception) -> None:
+        while self._pending:
+            pending = self._pending.popleft()
+            if not pending.future.done():
+                pending.future.set_exception(error)
+
+
+class AsyncMbapTransport(AsyncRtuTransport):
+    """
+    Modbus TCP (MBAP) поверх asyncio streams: запросы помечаются transaction id,
+    ответы сопоставляются по нему и могут приходить в любом порядке.
+    """
+
+    name = "asyncio-mbap"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._by_tid: dict[int, _Pending] = {}
+        self._next_tid = 0
+
+    def _in_flight(self) -> int:
+        return len(self._by_tid)
+
+    def _can_resend(self) -> bool:
+        return True
+
+    def _note_stale(self, pending: _Pending, count: int, deadline: Optional[float] = None) -> None:
+        # Запоздавший ответ несёт transaction id истёкшего запроса и отбрасывается по нему
+        return
+
+    def _resend_wire(self, pending: _Pending, frame: bytes) -> bytes:
+        # Тот же transaction id: второй ответ придёт, когда запроса уже нет, и будет отброшен
+        return to_mbap(frame, pending.tid)
+
+    def _enqueue(self, pending: _Pending, frame: bytes) -> bytes:
+        tid = self._next_tid
+        while tid in self._by_tid:
+            tid = (tid + 1) & 0xFFFF
+        self._next_tid = (tid + 1) & 0xFFFF
+        pending.tid = tid
+        self._by_tid[tid] = pending
+        return to_mbap(frame, tid)
+
+    def _dequeue(self, pending: _Pending) -> None:
+        if self._by_tid.get(pending.tid) is pending:
+            del self._by_tid[pending.tid]
+
+    def _dispatch(self) -> None:
+        buf = self._buf
+        now = asyncio.get_running_loop().time()
+        while buf:
+            length = mbap_frame_length(buf)
+            if length is None or len(buf) < length:
+                if length is None or length > 0:
+                    return
+                # Заголовок не MBAP — границы кадров потеряны, восстановить нельзя
+                logger.warning(f"MBAP: рассинхронизация потока, отброшено {len(buf)} байт")
+                buf.clear()
+                return
+            adu = bytes(buf[:length])
+            del buf[:length]
+            tid = (adu[0] << 8) | adu[1]
+            pending = self._by_tid.get(tid)
+            if pending is None:
+                logger.debug(f"MBAP: ответ на истёкший запрос tid={tid} отброшен")
+                continue
+            parsed = decode_mbap(adu, self.unit_id, pending.function)
+            if parsed is None or not self._echo_matches(pending, parsed):
+                # Запрос остаётся в ожидании и истечёт по таймауту (в трассировке — crc_error)
+                logger.debug(f"MBAP: ответ tid={tid} не соответствует запросу FC{pending.function:02d}")
+                pending.crc_errors += 1
+                continue
+            del self._by_tid[tid]
+            pending.first_byte = pending.first_byte or now
+            pending.bytes_in = length
+            if not pending.future.done():
+                pending.future.set_result(parsed)
+
+    @staticmethod
+    def _echo_matches(pending: _Pending, parsed: RtuResponse) -> bool:
+        """Для FC06/FC16 — эхо адреса и значения/количества, как в response_matches."""
+        if parsed.is_exception or pending.function not in (6, 16):
+            return True
+        if pending.address is not None and parsed.address != pending.address:
+            return False
+        return pending.value is None or parsed.value == pending.value
+
+    def _fail_pending(self, error: Exception) -> None:
+        pending_all = list(self._by_tid.values())
+        self._by_tid.clear()
+        for pending in pending_all:
+            if not pending.future.done():
+                pending.future.set_exception(error)
+
+
+class AsyncModbusClient(ModbusClient):
+    """
+    ModbusClient с I/O через AsyncRtuTransport / AsyncMbapTransport. Event loop живёт в собственном
+    потоке, синхронные методы (read_input_register, write_register, …) ждут результат корутины.
+
+    framer: "rtu" — RTU over TCP; "tcp" — Modbus TCP (MBAP); "auto" — MBAP, если устройство
+    отвечает на probe при подключении, иначе RTU. Выбранный фрейминг — в active_framer.
+    """
+
+    FRAMERS = ("rtu", "tcp", "auto")
+
+    def __init__(
+        self,
+        host: str = "192.168.4.1",
+        port: int = 503,
+        unit_id: int = 1,
+        framer: str = "rtu",
+        *,
+        inflight_window: int = DEFAULT_INFLIGHT_WINDOW,
+        mbap_window: int = DEFAULT_MBAP_WINDOW,
+        timeout: float = 0.5,
+        socket_profile: Optional[SocketProfile] = None,
+    ):
+        super().__init__(host=host, port=port, unit_id=unit_id, framer=framer, socket_profile=socket_profile)
+        self.inflight_window = max(1, int(inflight_window))
+        self.mbap_window = max(1, int(mbap_window))
+        self.timeout = timeout
+        self.active_framer: Optional[str] = None
+        # Фрейминг из профиля устройства однажды не ответил — дальше только автоопределение
+        self._profile_framer_failed = False
+        self.client: Optional[AsyncRtuTransport] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+
+    # ----- event loop -----
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.new_event_loop()
+            self._loop_thread = threading.Thread(
+                target=self._loop.run_forever, name="ModbusAsyncLoop", daemon=True
+            )
+            self._loop_thread.start()
+        return self._loop
+
+    def _run(self, coro, timeout: float):
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop()).result(timeout)
+
+    def _stop_loop(self) -> None:
+        loop, thread = self._loop, self._loop_thread
+        self._loop = None
+        self._loop_thread = None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=1.0)
+        if not loop.is_running():
+            loop.close()
+
+    # ----- подключение -----
+    def connect(self) -> bool:
+        """Подключение asyncio транспортом (без фиксированной задержки — pymodbus не участвует)."""
+        self._close_transport()
+        self.active_framer = None
+        transport = None
+        framer = self.framer
+        if framer == "auto" and self.profile_path is not None and not self._profile_framer_failed:
+            # Фрейминг, который устройство приняло в прошлой сессии, — без probe MBAP при каждом старте
+            profile = load_device_profile(self.profile_path, self.device_key)
+            if profile is not None and profile.get("framer") in ("rtu", "tcp"):
+                framer = profile["framer"]
+                logger.info(f"Фрейминг из профиля устройства: {framer}")
+        if framer in ("tcp", "auto"):
+            transport = self._open_transport("tcp")
+            if transport is not None and framer == "auto" and not self._probe_mbap(transport):
+                logger.info(f"{self.host}:{self.port} не отвечает по Modbus TCP (MBAP), переходим на RTU")
+                try:
+                    self._run(transport.aclose(), 2.0)
+                except Exception:
+                    pass
+                transport = None
+        # framer == "tcp" из профиля при self.framer == "auto": устройство больше не принимает MBAP — RTU
+        if transport is None and (framer != "tcp" or self.framer == "auto"):
+            transport = self._open_transport("rtu")
+        if transport is None:
+            self._connected = False
+            return False
+        self.client = transport
+        self.active_framer = "tcp" if isinstance(transport, AsyncMbapTransport) else "rtu"
+        self._connected = True
+        self.rtt.reset()
+        self.retry_policy.reset_window()
+        self.liveness.reset()
+        if not self._warm_start() and framer != self.framer:
+            # Фрейминг из профиля не подошёл — следующее подключение снова через probe MBAP
+            logger.info("Нет ответа во фрейминге из профиля, при переподключении — автоопределение")
+            self._profile_framer_failed = True
+        for plan in self._read_plans.values():
+            plan.reset()
+        self.register_map.on_connect()
+        logger.info(
+            f"Успешно подключено к Modbus устройству {self.host}:{self.port} "
+            f"(asyncio {'MBAP' if self.active_framer == 'tcp' else 'RTU'}, окно {transport.window})"
+        )
+        return True
+
+    def capability_profile(self) -> dict:
+        profile = super().capability_profile()
+        profile["framer"] = self.active_framer or self.framer
+        return profile
+
+    def _open_transport(self, framer: str) -> Optional[AsyncRtuTransport]:
+        if framer == "tcp":
+            cls, window, name = AsyncMbapTransport, max(self.inflight_window, self.mbap_window), "MBAP"
+        else:
+            cls, window, name = AsyncRtuTransport, self.inflight_window, "RTU"
+        logger.info(f"Попытка подключения к {self.host}:{self.port} (asyncio {name}, окно {window})")
+        transport = cls(
+            self.host, self.port, self.unit_id, window=window, timeout=self.timeout, rtt=self.rtt,
+            trace=self.trace, profile=self.socket_profile, retry_policy=self.retry_policy,
+        )
+        try:
+            self._run(transport.open(), 5.0)
+        except Exception as e:
+            logger.warning(f"Не удалось подключиться к {self.host}:{self.port} (asyncio {name}): {e}")
+            return None
+        return transport
+
+    def _probe_mbap(self, transport: AsyncMbapTransport) -> bool:
+        """Понимает ли прошивка MBAP: любой валидный ответ (в т.ч. exception response) — да."""
+        frame = build_read_frame(self.unit_id, 4, MBAP_PROBE_ADDRESS, 1)
+        try:
+            resp = self._run(
+                transport.request(frame, 4, 7, timeout=MBAP_PROBE_TIMEOUT_S), MBAP_PROBE_TIMEOUT_S + 1.0
+            )
+        except (ConnectionError, OSError, concurrent.futures.TimeoutError) as e:
+            logger.debug(f"MBAP probe: {e}")
+            return False
+        return resp is not None
+
+    def _close_transport(self) -> None:
+        transport, self.client = self.client, None
+        if transport is not None and self._loop is not None:
+            try:
+                self._run(transport.aclose(), 2.0)
+            except Exception:
+                pass
+
+    def disconnect(self):
+        """Отключение от Modbus устройства и остановка event loop"""
+        try:
+            self._close_transport()
+        finally:
+            self._connected = False
+            self._stop_loop()
+
+    # ----- транзакции -----
+    def _transact(
+        self, frame: bytes, function: int, response_len: int, *, timeout: Optional[float] = None, **match
+    ) -> Optional[RtuResponse]:
+        if self.client is None or not self.client.is_socket_open():
+            self._connected = False
+            return None
+        self._charge(1, len(frame) + response_len)
+        if timeout is None:
+            timeout = self._request_timeout()
+            if timeout is None:
+                return None
+        rto = self.rtt.timeout
+        in_batch = self._batch_deadline is not None
+        retry_after = self.retry_policy.delay(timeout, in_batch)
+        try:
+            resp = self._run(
+                self.client.request(
+                    frame, function, response_len, timeout=timeout, retry_after=retry_after, in_batch=in_batch, **match
+                ),
+                timeout + 1.0,
+            )
+        except (ConnectionError, OSError) as e:
+            logger.debug(f"Ошибка соединения (asyncio FC{function:02d}): {e}")
+            self.liveness.on_error(e)
+            self._connected = False
+            return None
+        except concurrent.futures.TimeoutError:
+            self.liveness.on_timeout()
+            return None
+        self._observe_liveness(resp, timeout >= rto)
+        return resp
+
+    def _observe_liveness(self, resp, full_timeout: bool) -> None:
+        if isinstance(resp, BaseException):
+            if isinstance(resp, (ConnectionError, OSError)):
+                self.liveness.on_error(resp)
+        elif resp is not None:
+            self.liveness.on_response()
+        elif full_timeout:
+            self.liveness.on_timeout()
+
+    async def _gather_reads(self, spans: list, timeout: float) -> list:
+        transport = self.client
+        in_batch = self._batch_deadline is not None
+        # Лимит повторов прохода проверяется ещё раз в момент повтора (allow_retry) — запросы в полёте вместе
+        retry_after = self.retry_policy.delay(timeout, in_batch)
+        coros = [
+            transport.request(
+                build_read_frame(self.unit_id, fn, address, count), fn, 5 + 2 * count, timeout=timeout,
+                retry_after=retry_after, in_batch=in_batch,
+            )
+            for fn, address, count in spans
+        ]
+        return await asyncio.gather(*coros, return_exceptions=True)
+
+    def read_spans(self, spans: list) -> list:
+        """Все диапазоны уходят сразу, в полёте одновременно до inflight_window запросов."""
+        if not spans:
+            return []
+        if self.client is None or not self.client.is_socket_open():
+            self._connected = False
+            return [(None, None)] * len(spans)
+        # Бюджет шины — на всю пачку сразу: 8 байт запроса + 5 + 2 * count ответа на диапазон
+        self._charge(len(spans), sum(13 + 2 * count for _, _, count in spans))
+        timeout = None if self._budget_exhausted else self._request_timeout()
+        if timeout is None:
+            return [(None, None)] * len(spans)
+        rto = self.rtt.timeout
+        try:
+            results = self._run(self._gather_reads(list(spans), timeout), (timeout + 1.0) * len(spans))
+        except concurrent.futures.TimeoutError:
+            self.liveness.on_timeout()
+            return [(None, None)] * len(spans)
+        for resp in results:
+            self._observe_liveness(resp, timeout >= rto)
+        return [self._span_result(fn, a, c, r) for (fn, a, c), r in zip(spans, results)]
+
+    def read_holding_register(self, address: int) -> Optional[int]:
+        regs, _ = self.read_span(3, address, 1)
+        return regs[0] if regs else None
+
+    def read_input_register(self, address: int) -> Optional[int]:
+        regs, _ = self.read_span(4, address, 1)
+        return regs[0] if regs else None
+
+    def read_input_registers(self, address: int, count: int) -> Optional[list]:
+        regs, _ = self.read_span(4, address, count)
+        return regs
+
+    def read_input_registers_direct(self, address: int, quantity: int, *, max_chunk: Optional[int] = None) -> Optional[list]:
+        """Чанки по max_chunk (или лимиту span_limits), отправляются конвейером; отсутствующий чанк пропускается."""
+        if quantity <= 0:
+            return []
+        if self.client is None or not self.client.is_socket_open():
+            self._connected = False
+            return None
+        spans = []
+        offset = 0
+        while offset < quantity:
+            chunk = min(max_chunk or self.max_span_for(4, address + offset, 10), quantity - offset)
+            spans.append((4, address + offset, chunk))
+            offset += chunk
+        out: list[int] = []
+        for regs, _ in self.read_spans(spans):
+            if regs:
+                out.extend(regs)
+        return out
+
+    def _read_register_direct_generic(self, address: int, function: int = 4) -> Optional[int]:
+        regs, _ = self.read_span(function, address, 1)
+        return regs[0] if regs else None
+
+    def write_register(self, address: int, value: int) -> bool:
+        value = int(value) & 0xFFFF
+        logger.info(f"Запись в регистр {address} значение {value}, unit_id={self.unit_id} (asyncio)")
+        resp = self._transact(
+            build_write_frame(self.unit_id, address, value), 6, 8, address=address, value=value
+        )
+        if resp is None:
+            logger.warning(f"Нет ответа на запись в регистр {address}")
+            return False
+        if resp.is_exception:
+            exc_code = resp.exception_code
+            logger.warning(
+                f"Регистр {address} вернул Modbus exception code={exc_code} "
+                f"({EXCEPTION_MESSAGES.get(exc_code, exc_code)})"
+            )
+            return False
+        return True
+
+    def write_register_direct(self, address: int, value: int) -> bool:
+        return self.write_register(address, value)
+
+    def write_registers(self, address: int, values) -> bool:
+        values = [int(v) & 0xFFFF for v in values]
+        if not values:
+            return True
+        resp = self._transact(
+            build_write_multiple_frame(self.unit_id, address, values), 16, 8, address=address, value=len(values)
+        )
+        if resp is None or resp.is_exception:
+            logger.warning(f"Ошибка записи FC16 {address}+{len(values)} {values}: {resp}")
+            return False
+        return True
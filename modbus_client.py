@@ -2,8 +2,34 @@
 Modbus клиент для работы с XeUS driver
 Поддерживает Modbus RTU over TCP/IP
 """
-from pymodbus.client.tcp import ModbusTcpClient
-from typing import Optional, Callable
+from contextlib import contextmanager
+from typing import Optional
+from bus_budget import TELEMETRY, BusBudget
+from connection_state import Backoff
+from device_profile import FINGERPRINT_READS, device_key, fingerprint_of, load_device_profile, save_device_profile
+from link_stats import LinkLiveness, RetryPolicy, RttEstimator
+from modbus_codec import (
+    EXCEPTION_MESSAGES,
+    RegisterBlock,
+    RtuResponse,
+    build_read_frame,
+    build_write_frame,
+    build_write_multiple_frame,
+    crc16,
+)
+from read_planner import DEFAULT_GAP_TOLERANCE, DEFAULT_MAX_SPAN, ReadHoles, ReadManyResult, ReadPlan, plan_writes
+from register_map import RegisterAvailability
+from span_tuner import SpanLimits, tune_span_limits
+from modbus_transport import (
+    TRANSPORTS,
+    FrameTransport,
+    LoopbackTransport,
+    PymodbusTransport,
+    RegisterBank,
+    SocketProfile,
+    SocketTransport,
+)
+from transaction_trace import CONN_ERROR, CRC_ERROR, EXCEPTION, OK, RECONNECT, RETRIED, TIMEOUT, TransactionTrace
 import logging
 import socket
 import time
@@ -21,8 +47,20 @@ logger.setLevel(logging.INFO) # Для нашего логгера оставл
 
 class ModbusClient:
     """Класс для работы с Modbus RTU over TCP/IP клиентом"""
-    
-    def __init__(self, host: str = "192.168.4.1", port: int = 503, unit_id: int = 1, framer: str = "rtu"):
+
+    # _transact собирает кадры RTU сам — фрейминг транспорта другим быть не может
+    FRAMERS = ("rtu",)
+    
+    def __init__(
+        self,
+        host: str = "192.168.4.1",
+        port: int = 503,
+        unit_id: int = 1,
+        framer: str = "rtu",
+        transport: str = "pymodbus",
+        register_bank: Optional[RegisterBank] = None,
+        socket_profile: Optional[SocketProfile] = None,
+    ):
         """
         Инициализация Modbus клиента
         
@@ -30,16 +68,65 @@ class ModbusClient:
             host: IP адрес устройства (по умолчанию 192.168.4.1)
             port: Порт Modbus (по умолчанию 503)
             unit_id: ID устройства Modbus (по умолчанию 1)
-            framer: Тип фрейминга - "rtu" для RTU over TCP/IP, "tcp" для стандартного TCP (по умолчанию "rtu")
+            framer: Тип фрейминга из FRAMERS; кадры _transact — только RTU over TCP/IP ("rtu"),
+                Modbus TCP (MBAP) — в AsyncModbusClient
+            transport: "pymodbus" (по умолчанию), "socket" (свой TCP сокет) или "loopback" (register_bank в памяти)
+            register_bank: Регистры для loopback транспорта
+            socket_profile: Опции TCP сокета (по умолчанию DEFAULT_SOCKET_PROFILE)
         """
         self.host = host
         self.port = port
         self.unit_id = unit_id
+        if framer not in self.FRAMERS:
+            raise ValueError(
+                f"Фрейминг '{framer}' не поддерживается {type(self).__name__} (допустимо: {', '.join(self.FRAMERS)})"
+            )
         self.framer = framer
-        self.client: Optional[ModbusTcpClient] = None
+        if transport not in TRANSPORTS:
+            raise ValueError(f"Неизвестный транспорт: {transport}")
+        self.transport_kind = transport
+        self.register_bank = register_bank
+        self.socket_profile = socket_profile
+        self.client: Optional[FrameTransport] = None
         self._connected = False
         # Последний регистр, который читался перед разрывом соединения
         self._last_read_register: Optional[int] = None
+        # Склейка адресов в batched-чтении (read_planner): допустимый пропуск и максимальная длина запроса
+        self.read_gap_tolerance = DEFAULT_GAP_TOLERANCE
+        self.max_read_span = DEFAULT_MAX_SPAN
+        # Подобранный лимит одного чтения по областям адресов (span_tuner); вместо max_read_span, где есть
+        self.span_limits = SpanLimits()
+        # Пропуски, в которых нашлись дыры карты (read_planner): склейка их обходит и после переподключения
+        self.read_holes = ReadHoles()
+        # Ключ — имя плана (read_plan) или кортеж записей spec (read_many)
+        self._read_plans: dict[object, ReadPlan] = {}
+        # Какой функцией отвечает адрес / какие адреса отсутствуют (read_learned)
+        self.register_map = RegisterAvailability()
+        # Таймаут ответа: начальный (до первых замеров), дальше — адаптивный по оценке RTT соединения
+        self.timeout = 0.5
+        self.rtt = RttEstimator(initial_timeout=self.timeout)
+        # Повтор запроса после p95 задержки вместо полного таймаута (не больше N на batched-проход)
+        self.retry_policy = RetryPolicy()
+        # Живость канала по результатам транзакций (worker решает по ней о переподключении и keep-alive)
+        self.liveness = LinkLiveness()
+        # Дедлайн текущего batched-прохода (batch_budget) и признак, что бюджет исчерпан
+        self._batch_deadline: Optional[float] = None
+        self._budget_exhausted = False
+        # Немедленное переподключение из _transact_checked не чаще, чем позволяет backoff
+        self._reconnect_backoff = Backoff()
+        self._reconnect_not_before = 0.0
+        # Трассировка последних транзакций (адрес, тайминги, байты, исход) — trace_snapshot / dump_trace
+        self.trace = TransactionTrace()
+        # Бюджет шины (запросы/с, байты/с) с долями по категориям; категорию задаёт bus_category()
+        self.bus_budget = BusBudget()
+        self._bus_category = TELEMETRY
+        # Порядок слов float по назначению ("ir_meta" → "CDAB"), подобранный по данным устройства
+        self.float_orders: dict[str, str] = {}
+        # Профиль возможностей между сессиями (device_profile): файл, отпечаток прошивки, применён ли
+        self.profile_path: Optional[str] = None
+        self.fingerprint_reads = FINGERPRINT_READS
+        self.fingerprint: Optional[str] = None
+        self._profile_applied = False
 
     def clear_problematic_registers(self) -> None:
         """No-op (legacy)."""
@@ -56,173 +143,141 @@ class ModbusClient:
         Returns:
             True если подключение успешно, False в противном случае
         """
+        # Закрываем существующее подключение, если есть
+        if self.client is not None:
+            try:
+                self.client.close()
+            except Exception:
+                pass
+            self.client = None
+
+        logger.info(
+            f"Попытка подключения к {self.host}:{self.port} "
+            f"(транспорт '{self.transport_kind}', фреймер '{self.framer}')"
+        )
+        transport = self._create_transport()
         try:
-            # Закрываем существующее подключение, если есть
-            if self.client is not None:
-                try:
-                    self.client.close()
-                except:
-                    pass
-                self.client = None
-            
-            # Создаем новый клиент
-            # Для RTU over TCP может использоваться "socket" фреймер
-            # Если это не работает, можно попробовать стандартный "tcp"
-            logger.info(f"Попытка подключения к {self.host}:{self.port} с фреймером '{self.framer}'")
-            
-            # Определяем какой фреймер использовать
-            # В тесте используется framer='rtu', который работает стабильно
-            if self.framer == "rtu":
-                # Используем 'rtu' напрямую, как в тесте test_pymodbus.py
-                framers_to_try = ["rtu"]  # Используем 'rtu' как в тесте
-            elif self.framer == "tcp":
-                framers_to_try = ["tcp"]
-            else:
-                framers_to_try = [self.framer]
-            
-            last_error = None
-            for actual_framer in framers_to_try:
-                try:
-                    logger.info(f"Попытка подключения с фреймером '{actual_framer}'")
-                    # Настраиваем таймауты для избежания блокировки UI
-                    # Уменьшаем количество повторных попыток, но оставляем достаточный таймаут для записи
-                    
-                    # Используем настройки как в тесте test_pymodbus.py
-                    # В тесте не указаны timeout и retries, используем значения по умолчанию
-                    # Трассировка пакетов отключена для уменьшения логов
-                    self.client = ModbusTcpClient(
-                        host=self.host, 
-                        port=self.port, 
-                        framer=actual_framer,
-                        timeout=0.5  # Уменьшаем таймаут до 0.5с для быстрой реакции на обрывы
-                    )
-                    
-                    # Настраиваем TCP keep-alive на уровне сокета после подключения
-                    # Это нужно сделать после connect(), когда сокет уже создан
-                    
-                    # Пытаемся подключиться
-                    connection_result = self.client.connect()
-                    logger.info(f"Результат connect() с фреймером '{actual_framer}': {connection_result}")
-                    
-                    if connection_result:
-                        # Проверяем, что сокет действительно открыт
-                        if self.client.is_socket_open():
-                            # Настраиваем TCP keep-alive на уровне сокета
-                            try:
-                                import socket
-                                sock = None
-                                
-                                # Пробуем разные способы доступа к сокету в pymodbus
-                                if hasattr(self.client, 'socket') and self.client.socket:
-                                    sock = self.client.socket
-                                elif hasattr(self.client, 'transport'):
-                                    # Пробуем разные атрибуты транспорта
-                                    transport = self.client.transport
-                                    if hasattr(transport, 'socket') and transport.socket:
-                                        sock = transport.socket
-                                    elif hasattr(transport, '_socket') and transport._socket:
-                                        sock = transport._socket
-                                    elif hasattr(transport, 'sock') and transport.sock:
-                                        sock = transport.sock
-                                    elif hasattr(transport, '_sock') and transport._sock:
-                                        sock = transport._sock
-                                    # Пробуем получить сокет через get_socket или подобный метод
-                                    elif hasattr(transport, 'get_socket'):
-                                        try:
-                                            sock = transport.get_socket()
-                                        except:
-                                            pass
-                                
-                                if sock:
-                                    # Включаем TCP keep-alive
-                                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
-                                    # Проверяем, что keep-alive включен
-                                    keepalive_enabled = sock.getsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE)
-                                    logger.info(f"TCP SO_KEEPALIVE установлен: {keepalive_enabled}")
-                                    
-                                    # Настраиваем параметры keep-alive (Linux/Mac)
-                                    try:
-                                        # Для Linux используем TCP_KEEPIDLE, TCP_KEEPINTVL, TCP_KEEPCNT
-                                        if hasattr(socket, 'TCP_KEEPIDLE'):
-                                            # TCP_KEEPIDLE - время до первого keep-alive пакета (2 секунды)
-                                            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 2)
-                                            # TCP_KEEPINTVL - интервал между keep-alive пакетами (2 секунды)
-                                            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 2)
-                                            # TCP_KEEPCNT - количество попыток перед закрытием (3)
-                                            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 3)
-                                            logger.info("TCP keep-alive настроен (Linux): пинг каждые 2 секунды")
-                                        elif hasattr(socket, 'TCP_KEEPALIVE'):
-                                            # Для macOS используем TCP_KEEPALIVE (если доступен)
-                                            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPALIVE, 2)
-                                            logger.info("TCP keep-alive настроен (macOS): используем TCP_KEEPALIVE")
-                                        else:
-                                            # На macOS без специальных опций keep-alive управляется системой
-                                            # Интервал по умолчанию обычно около 75 секунд, но мы будем использовать
-                                            # периодические Modbus запросы для поддержания соединения
-                                            logger.info("TCP keep-alive включен (macOS): интервал управляется системой, используем Modbus keep-alive")
-                                    except (AttributeError, OSError) as e:
-                                        # На Mac может не быть TCP_KEEPIDLE, используем только SO_KEEPALIVE
-                                        logger.info(f"Расширенные опции keep-alive не поддерживаются: {e}, используем только SO_KEEPALIVE + Modbus keep-alive")
-                                else:
-                                    logger.warning("Не удалось найти сокет для настройки keep-alive. Доступные атрибуты клиента: " + 
-                                                  str([attr for attr in dir(self.client) if not attr.startswith('_')]))
-                                    # Пробуем получить сокет через другой способ
-                                    if hasattr(self.client, 'transport'):
-                                        logger.debug(f"Атрибуты transport: {[attr for attr in dir(self.client.transport) if not attr.startswith('__')]}")
-                            except Exception as e:
-                                logger.warning(f"Не удалось настроить TCP keep-alive: {e}", exc_info=True)
-                            
-                            self._connected = True
-                            # При успешном переподключении очищаем список проблемных регистров
-                            # чтобы попробовать прочитать их снова
-                            logger.info(f"Успешно подключено к Modbus устройству {self.host}:{self.port} с фреймером '{actual_framer}'")
-                            # Добавляем небольшую задержку после подключения, чтобы устройство успело инициализироваться
-                            # Первый пакет может теряться, если отправить его сразу после подключения
-                            import time
-                            time.sleep(0.2)  # 200ms задержка после подключения
-                            logger.debug("Задержка после подключения завершена, готовы к работе")
-                            return True
-                        else:
-                            logger.warning(f"Сокет не открыт после подключения с фреймером '{actual_framer}'")
-                            try:
-                                self.client.close()
-                            except:
-                                pass
-                            self.client = None
-                    else:
-                        logger.warning(f"connect() вернул False с фреймером '{actual_framer}'")
-                        try:
-                            self.client.close()
-                        except:
-                            pass
-                        self.client = None
-                except Exception as e:
-                    last_error = e
-                    logger.warning(f"Ошибка при подключении с фреймером '{actual_framer}': {e}")
-                    if self.client is not None:
-                        try:
-                            self.client.close()
-                        except:
-                            pass
-                        self.client = None
-                    continue
-            
-            # Если все попытки не удались
-            logger.error(f"Не удалось подключиться к {self.host}:{self.port} ни с одним из фреймеров: {framers_to_try}")
-            if last_error:
-                logger.error(f"Последняя ошибка: {last_error}")
-            self._connected = False
-            return False
+            ok = transport.open(self.timeout)
         except Exception as e:
-            logger.error(f"Исключение при подключении к {self.host}:{self.port}: {e}", exc_info=True)
+            logger.warning(f"Ошибка при подключении к {self.host}:{self.port} ({self.transport_kind}): {e}")
+            ok = False
+        if not ok:
+            try:
+                transport.close()
+            except Exception:
+                pass
+            logger.error(f"Не удалось подключиться к {self.host}:{self.port} (транспорт '{self.transport_kind}')")
             self._connected = False
-            if self.client is not None:
-                try:
-                    self.client.close()
-                except:
-                    pass
-                self.client = None
             return False
+
+        self.client = transport
+        self._connected = True
+        self.rtt.reset()
+        self.retry_policy.reset_window()
+        self.liveness.reset()
+        # Профиль с прошлой сессии — до on_connect карты регистров и склейки планов
+        self._warm_start()
+        # При успешном переподключении заново склеиваем диапазоны batched-чтения
+        # чтобы попробовать прочитать их снова
+        for plan in self._read_plans.values():
+            plan.reset()
+        self.register_map.on_connect()
+        logger.info(f"Успешно подключено к Modbus устройству {self.host}:{self.port} (транспорт '{self.transport_kind}')")
+        # Паузы после подключения нет: готовность устройства подтверждает probe()
+        # (warm-up в _ModbusIoWorker), первый потерянный пакет — это просто неудачный probe
+        return True
+
+    @property
+    def device_key(self) -> str:
+        return device_key(self.host, self.port, self.unit_id)
+
+    def _warm_start(self) -> bool:
+        """
+        Отпечаток прошивки (одна транзакция) и, при первом подключении, профиль возможностей
+        с прошлой сессии. Сменилась прошивка между подключениями — изученное сбрасывается.
+
+        Returns:
+            False — устройство не ответило на чтение отпечатка
+        """
+        reads = self.fingerprint_reads
+        if not reads:
+            return True
+        fingerprint = fingerprint_of(reads, self.read_spans([(fn, a, c) for fn, a, c, _ in reads]))
+        if fingerprint is None:
+            logger.debug("Отпечаток прошивки не получен (нет ответа), профиль не применяем")
+            return False
+        if self.fingerprint is not None and fingerprint != self.fingerprint:
+            logger.info(f"Прошивка устройства сменилась ({self.fingerprint} → {fingerprint}), сбрасываем изученные возможности")
+            self._forget_capabilities()
+        self.fingerprint = fingerprint
+        if self._profile_applied or self.profile_path is None:
+            return True
+        self._profile_applied = True
+        profile = load_device_profile(self.profile_path, self.device_key)
+        if profile is None:
+            return True
+        if profile.get("fingerprint") != fingerprint:
+            logger.info(f"Профиль {self.device_key} снят с другой прошивки ({profile.get('fingerprint')}), не применяем")
+            return True
+        self.apply_profile(profile)
+        return True
+
+    def apply_profile(self, profile: dict) -> None:
+        """Применить профиль возможностей (карта регистров, лимиты чтения, дыры склейки, порядок слов float, лимит шины)."""
+        self.register_map.update_from_dict(profile.get("register_map") or {})
+        self.span_limits.update_from_dict(profile.get("span_limits") or {})
+        self.read_holes.update_from_dict(profile.get("read_holes") or {})
+        orders = profile.get("float_orders")
+        if isinstance(orders, dict):
+            self.float_orders = {str(k): str(v) for k, v in orders.items()}
+        limits = profile.get("bus_budget")
+        if isinstance(limits, dict):
+            self.bus_budget.restore(limits)
+        logger.info(
+            f"Профиль устройства {self.device_key}: карта {len(self.register_map)} записей, "
+            f"лимиты {self.span_limits.to_dict()}, дыр склейки {len(self.read_holes)}, float {self.float_orders}, "
+            f"шина {self.bus_budget.requests_per_s:.0f} запросов/с"
+        )
+
+    def _forget_capabilities(self) -> None:
+        self.register_map = RegisterAvailability(self.register_map.reprobe_interval)
+        self.span_limits.clear()
+        self.read_holes.clear()
+        self.float_orders.clear()
+
+    def capability_profile(self) -> dict:
+        """Изученные возможности устройства для сохранения (device_profile)."""
+        return {
+            "fingerprint": self.fingerprint,
+            "framer": self.framer,
+            "register_map": self.register_map.to_dict(),
+            "span_limits": self.span_limits.to_dict(),
+            "read_holes": self.read_holes.to_dict(),
+            "float_orders": dict(self.float_orders),
+            "bus_budget": self.bus_budget.limits(),
+        }
+
+    def save_profile(self) -> bool:
+        """Сохранить профиль в profile_path (только если отпечаток прошивки известен)."""
+        if self.profile_path is None or self.fingerprint is None:
+            return False
+        return save_device_profile(self.profile_path, self.device_key, self.capability_profile())
+
+    def _create_transport(self) -> FrameTransport:
+        """Транспорт под transport_kind; счётчики старого транспорта сохраняются в transport_stats()."""
+        if self.transport_kind == "loopback":
+            if self.register_bank is None:
+                self.register_bank = RegisterBank(unit_id=self.unit_id)
+            return LoopbackTransport(self.register_bank)
+        if self.transport_kind == "socket":
+            return SocketTransport(self.host, self.port, self.socket_profile)
+        return PymodbusTransport(self.host, self.port, framer=self.framer, profile=self.socket_profile)
+
+    def transport_stats(self) -> dict:
+        """Счётчики текущего транспорта (кадры, байты, таймауты, CRC, время в I/O)."""
+        if self.client is None:
+            return {"transport": self.transport_kind}
+        return self.client.stats()
     
     def disconnect(self):
         """Отключение от Modbus устройства"""
@@ -245,16 +300,23 @@ class ModbusClient:
         # Реальное состояние подключения проверяется асинхронно через таймер в ModbusManager
         return self._connected
     
-    def _reconnect(self, max_retries: int = 3) -> bool:
+    def _reconnect(self, max_retries: int = 1) -> bool:
         """
-        Автоматическое переподключение при разрыве соединения
+        Автоматическое переподключение при разрыве соединения — без пауз между попытками.
+        После неудачи следующая попытка разрешается не раньше, чем через backoff-задержку;
+        периодические повторы делает _ModbusIoWorker по таймеру (reconnectClient).
         
         Args:
-            max_retries: Максимальное количество попыток переподключения
+            max_retries: Количество немедленных попыток
             
         Returns:
             True если переподключение успешно, False в противном случае
         """
+        now = time.monotonic()
+        if now < self._reconnect_not_before:
+            logger.debug("Переподключение отложено (backoff)")
+            self._connected = False
+            return False
         logger.info(f"Попытка автоматического переподключения (максимум {max_retries} попыток)...")
         
         # Закрываем старое соединение
@@ -266,25 +328,44 @@ class ModbusClient:
             self.client = None
         self._connected = False
         
-        # Пробуем переподключиться
         for attempt in range(1, max_retries + 1):
             try:
                 logger.info(f"Попытка переподключения {attempt}/{max_retries}...")
                 if self.connect():
                     logger.info(f"✓ Успешно переподключено после {attempt} попытки")
+                    self._reconnect_backoff.reset()
+                    self._reconnect_not_before = 0.0
                     return True
-                else:
-                    logger.warning(f"Попытка переподключения {attempt} не удалась")
-                    if attempt < max_retries:
-                        time.sleep(0.3 * attempt)  # Увеличиваем задержку с каждой попыткой
+                logger.warning(f"Попытка переподключения {attempt} не удалась")
             except Exception as e:
                 logger.warning(f"Ошибка при попытке переподключения {attempt}: {e}")
-                if attempt < max_retries:
-                    time.sleep(0.3 * attempt)
         
+        self._reconnect_not_before = time.monotonic() + self._reconnect_backoff.next_delay()
         logger.error(f"Не удалось переподключиться после {max_retries} попыток")
         return False
-    
+
+    def reset_reconnect_backoff(self) -> None:
+        """Снять backoff-задержку (явное подключение пользователем / плановый повтор worker-а)."""
+        self._reconnect_backoff.reset()
+        self._reconnect_not_before = 0.0
+
+    def probe(self, address: int = 1021) -> bool:
+        """
+        Warm-up проверка после подключения: отвечает ли устройство по Modbus.
+        Любой валидный ответ (в т.ч. exception response) означает, что канал готов.
+        """
+        if self.client is None or not self.client.is_socket_open():
+            return False
+        try:
+            resp = self._transact(build_read_frame(self.unit_id, 4, address, 1), 4, 7)
+        except socket.timeout:
+            return False
+        except (ConnectionError, OSError) as e:
+            logger.debug(f"Probe {address}: ошибка соединения: {e}")
+            self._connected = False
+            return False
+        return resp is not None
+
     def read_holding_register(self, address: int) -> Optional[int]:
         """
         Чтение holding register
@@ -295,99 +376,22 @@ class ModbusClient:
         Returns:
             Значение регистра или None в случае ошибки
         """
-        
-        # Сохраняем адрес регистра для отслеживания проблем
-        self._last_read_register = address
-        
-        # Проверяем соединение, но не блокируем чтение если сокет открыт
-        if self.client is None:
-            logger.warning("Клиент не инициализирован")
-            return None
-        if not self.client.is_socket_open():
-            logger.debug(f"Сокет закрыт при чтении регистра {address}")
-            self._connected = False
-            return None
-        
-        try:
-            # Сбрасываем мусор из сокета, чтобы не прочитать старые ответы
-            self._flush_socket()
-
-            # Таймаут устанавливается при создании клиента, не передается в read_holding_registers
-            result = self.client.read_holding_registers(
-                address, 
-                count=1, 
-                device_id=self.unit_id
-            )
-            if result.isError():
-                error_str = str(result)
-                if "No response" in error_str or "timeout" in error_str.lower():
-                    logger.debug(f"Таймаут при чтении регистра {address}")
-                else:
-                    logger.debug(f"Ошибка чтения регистра {address}: {result}")
-                return None
-            value = None
-            if result.registers:
-                if len(result.registers) == 1:
-                    value = result.registers[0]
-                else:
-                    logger.warning(f"⚠️ Ошибка длины ответа holding регистра {address}: запрошено 1, получено {len(result.registers)}. Игнорируем.")
-                    return None
-            
-            return value
-        except (ConnectionError, OSError) as e:
-            error_str = str(e)
-            error_code = getattr(e, 'errno', None)
-            logger.warning(f"Ошибка соединения при чтении holding регистра {address}: {e} (errno={error_code})")
-            # При ошибках соединения (Connection reset, Broken pipe и т.д.) пробуем переподключиться
-            if error_code in (54, 32, 104, 107):  # Connection reset, Broken pipe, Connection reset by peer, Transport endpoint is not connected
-                # Запоминаем проблемный регистр
-                logger.info("Обнаружен разрыв соединения, пробуем переподключиться...")
-                if self._reconnect():
-                    try:
-                        result = self.client.read_holding_registers(
-                            address, count=1, device_id=self.unit_id
-                        )
-                        if not (hasattr(result, "isError") and result.isError()) and result.registers:
-                            return result.registers[0]
-                    except Exception:
-                        pass
-                    return None
-            self._connected = False
-            return None
-        except Exception as e:
-            # Не логируем таймауты как критические ошибки
-            error_str = str(e)
-            # При ошибке "CLOSING CONNECTION" pymodbus сам закрывает соединение
-            # Мы только обновляем флаг, но НЕ закрываем соединение повторно
-            if "CLOSING CONNECTION" in error_str:
-                logger.debug(f"pymodbus закрыл соединение из-за отсутствия ответа при чтении регистра {address}")
-                # Проверяем реальное состояние сокета и обновляем флаг
-                try:
-                    if self.client is not None and not self.client.is_socket_open():
-                        self._connected = False
-                        # НЕ закрываем соединение - pymodbus уже закрыл его
-                except:
-                    self._connected = False
-            # Не помечаем как отключенное при обычных таймаутах - сокет может быть еще открыт
-            elif "No response" in error_str or "timeout" in error_str.lower():
-                logger.debug(f"Таймаут при чтении регистра {address} (соединение может быть еще открыто)")
-                # При таймауте НЕ закрываем соединение - оно может быть еще активным
-            else:
-                logger.debug(f"Исключение при чтении регистра {address}: {e}")
-            return None
-    
+        regs, _ = self.read_span(3, address, 1)
+        return regs[0] if regs else None
+
     def write_register(self, address: int, value: int) -> bool:
         """
-        Запись значения в регистр
+        Запись значения в регистр (функция 06)
         
         Args:
             address: Адрес регистра
             value: Значение для записи
             
         Returns:
-            True если запись успешна, False в противном случае
+            True если запись успешна (устройство вернуло эхо адреса и значения), False в противном случае
         """
-        # Проверяем соединение, но не блокируем запись если сокет открыт
+        self._last_read_register = address
+        
         if self.client is None:
             logger.warning("Клиент не инициализирован")
             return False
@@ -396,90 +400,29 @@ class ModbusClient:
             self._connected = False
             return False
         
-        try:
-            logger.info(f"Запись в регистр {address} значение {value}, unit_id={self.unit_id}, framer={self.framer}")
-            # Проверяем, что сокет открыт перед записью
-            if not self.client.is_socket_open():
-                logger.error(f"Сокет закрыт перед записью в регистр {address}, требуется переподключение")
-                self._connected = False
-                return False
-            
-            # Сбрасываем мусор из сокета, чтобы не прочитать старые ответы
-            self._flush_socket()
-            
-            # Для socket framer (Modbus RTU over TCP) unit_id должен быть указан
-            # В документации указан Slave ID = 1, поэтому используем unit_id=1
-            # Функция 06 (Write Single Register) используется по умолчанию в write_register
-            logger.debug(f"Попытка записи: address={address} (0x{address:04X}), value={value} (0x{value:04X}), device_id={self.unit_id}")
-            logger.info(f"Используется функция 06 (Write Single Register) для записи в регистр {address}")
-            result = self.client.write_register(
-                address, 
-                value, 
-                device_id=self.unit_id
-            )
-            if hasattr(result, 'isError') and result.isError():
-                error_str = str(result)
-                error_code = getattr(result, 'exception_code', 'N/A')
-                error_message = getattr(result, 'message', 'N/A')
-                logger.error(f"Ошибка записи в регистр {address} значение {value}: {error_str}")
-                logger.error(f"  Код ошибки: {error_code}, Сообщение: {error_message}")
-                if "No response" in error_str or "timeout" in error_str.lower():
-                    logger.warning(f"Таймаут при записи в регистр {address} значение {value}")
-                return False
-            
-            # Проверяем, что запись действительно успешна и пришел ответ с правильной функцией (06)
-            if hasattr(result, 'function_code'):
-                if result.function_code != 6:
-                    logger.error(f"❌ ОШИБКА ЗАПИСИ: Ожидалась функция 6, получена {result.function_code}. Ответ: {result}")
+        value = int(value) & 0xFFFF
+        logger.info(f"Запись в регистр {address} значение {value}, unit_id={self.unit_id}, framer={self.framer}")
+        frame = build_write_frame(self.unit_id, address, value)
+        # Первый пакет может потеряться — при таймауте отправляем запрос ещё раз
+        for attempt in range(2):
+            resp = self._transact_checked(frame, 6, 8, f"записи в регистр {address}", address=address, value=value)
+            if resp is None:
+                if not self._connected:
                     return False
-                logger.info(f"Успешно записано в регистр {address} значение {value}, function_code={result.function_code}")
-            else:
-                # Если function_code нет, это подозрительно для pymodbus responses
-                logger.warning(f"Успешно записано в регистр {address}, но отсутствует function_code в ответе. Ответ: {result}")
-            
+                logger.debug(f"Таймаут при записи в регистр {address} (попытка {attempt + 1}/2)")
+                continue
+            if resp.is_exception:
+                exc_code = resp.exception_code
+                logger.error(
+                    f"Ошибка записи в регистр {address} значение {value}: "
+                    f"exception code={exc_code} ({EXCEPTION_MESSAGES.get(exc_code, exc_code)})"
+                )
+                return False
+            logger.info(f"Успешно записано в регистр {address} значение {value}")
             return True
-        except (ConnectionError, OSError) as e:
-            error_str = str(e)
-            error_code = getattr(e, 'errno', None)
-            logger.warning(f"Ошибка соединения при записи в регистр {address}: {e} (errno={error_code})")
-            # При ошибках соединения (Connection reset, Broken pipe и т.д.) пробуем переподключиться
-            if error_code in (54, 32, 104, 107):  # Connection reset, Broken pipe, Connection reset by peer, Transport endpoint is not connected
-                logger.info("Обнаружен разрыв соединения, пробуем переподключиться...")
-                if self._reconnect():
-                    # После успешного переподключения пробуем повторить запрос
-                    try:
-                        result = self.client.write_register(
-                            address, 
-                            value, 
-                            device_id=self.unit_id
-                        )
-                        if not (hasattr(result, 'isError') and result.isError()):
-                            return True
-                    except Exception as e2:
-                        logger.warning(f"Ошибка при повторной записи после переподключения: {e2}")
-            self._connected = False
-            return False
-        except Exception as e:
-            error_str = str(e)
-            logger.error(f"Исключение при записи в регистр {address} значение {value}: {e}")
-            # При ошибке "CLOSING CONNECTION" pymodbus сам закрывает соединение
-            # Мы только обновляем флаг, но НЕ закрываем соединение повторно
-            if "CLOSING CONNECTION" in error_str:
-                logger.warning(f"pymodbus закрыл соединение из-за отсутствия ответа при записи в регистр {address}")
-                self._connected = False
-                # НЕ закрываем соединение - pymodbus уже закрыл его
-                # Проверяем реальное состояние сокета
-                try:
-                    if self.client is not None and not self.client.is_socket_open():
-                        self.client = None
-                except:
-                    pass
-            # Не помечаем как отключенное при обычных таймаутах - соединение может быть еще открыто
-            elif "No response" in error_str or "timeout" in error_str.lower():
-                logger.warning(f"Таймаут при записи в регистр {address} (соединение может быть еще открыто)")
-                # При таймауте НЕ закрываем соединение - оно может быть еще активным
-            return False
-    
+        logger.warning(f"Таймаут при записи в регистр {address} значение {value}")
+        return False
+
     def write_holding_register(self, address: int, value: int) -> bool:
         """
         Запись значения в holding register (алиас для write_register)
@@ -503,74 +446,45 @@ class ModbusClient:
         Returns:
             Значение регистра или None в случае ошибки
         """
-        
-        # Сохраняем адрес регистра для отслеживания проблем
-        self._last_read_register = address
-        
-        # Проверяем соединение, но не блокируем чтение если сокет открыт
-        if self.client is None:
-            logger.warning("Клиент не инициализирован")
-            return None
-        if not self.client.is_socket_open():
-            logger.debug(f"Сокет закрыт при чтении input регистра {address}")
-            self._connected = False
-            return None
-        
-        try:
-            logger.debug(f"Чтение input регистра {address} (0x{address:04X}), unit_id={self.unit_id}")
-            
-            # Сбрасываем мусор из сокета, чтобы не прочитать старые ответы
-            self._flush_socket()
-            
-            # Используем точно такой же вызов, как в test_pymodbus.py
-            result = self.client.read_input_registers(
-                address=address, 
-                count=1, 
-                device_id=self.unit_id
-            )
-            if result.isError():
-                error_str = str(result)
-                # В тесте ошибки просто логируются, соединение не разрывается
-                logger.debug(f"Ошибка чтения input регистра {address}: {result}")
-                # Добавляем в проблемные, но НЕ разрываем соединение (как в тесте)
-                return None
-            value = None
-            if result.registers:
-                if len(result.registers) == 1:
-                    value = result.registers[0]
-                else:
-                    logger.warning(f"⚠️ Ошибка длины ответа регистра {address}: запрошено 1, получено {len(result.registers)}. Игнорируем.")
-                    return None
-            
-            logger.debug(f"Прочитано из input регистра {address} (0x{address:04X}): значение = {value}")
-            return value
-        except (ConnectionError, OSError) as e:
-            # В тесте исключения просто логируются, соединение не разрывается
-            error_str = str(e)
-            error_code = getattr(e, 'errno', None)
-            logger.debug(f"Исключение при чтении input регистра {address}: {e} (errno={error_code})")
-            # Добавляем в проблемные, но НЕ разрываем соединение (как в тесте)
-            return None
-        except Exception as e:
-            # Не логируем таймауты как критические ошибки
-            error_str = str(e)
-            # При ошибке "CLOSING CONNECTION" pymodbus сам закрывает соединение
-            if "CLOSING CONNECTION" in error_str:
-                logger.debug(f"Соединение закрыто при чтении input регистра {address}")
-            else:
-                logger.error(f"Неожиданная ошибка при чтении input регистра {address}: {e}")
-            self._connected = False
-            return None
-        except Exception as e:
-            # В тесте исключения просто логируются, соединение не разрывается
-            error_str = str(e)
-            logger.debug(f"Исключение при чтении input регистра {address}: {e}")
-            # Добавляем в проблемные, но НЕ разрываем соединение (как в тесте)
-            return None
+        regs, _ = self.read_span(4, address, 1)
+        return regs[0] if regs else None
 
     def read_input_registers(self, address: int, count: int) -> Optional[list]:
-        """Чтение нескольких input registers через pymodbus (функция 04)."""
-        if count < 1:
+        """Чтение нескольких input registers (функция 04)."""
+        regs, _ = self.read_span(4, address, count)
+        return regs
+
+    def read_span(self, function: int, address: int, count: int) -> tuple[Optional[list], Optional[int]]:
+        """
+        Чтение непрерывного диапазона FC03/FC04 (одиночные чтения и планировщик read_planner).
+
+        Returns:
+            (registers, None) при успехе, (None, exception_code) при Modbus exception,
+            (None, None) при таймауте / обрыве.
+        """
+        resp = self._read_response(function, address, count)
+        return self._span_result(function, address, count, resp)
+
+    def read_block(self, function: int, address: int, count: int) -> Optional[RegisterBlock]:
+        """
+        Чтение диапазона как RegisterBlock — байты ответа без разбора в список
+        (спектры: uint16 и float любого порядка слов одним struct.unpack_from).
+        """
+        resp = self._read_response(function, address, count)
+        regs, _ = self._span_result(function, address, count, resp)
+        if regs is None or resp.payload is None:
+            return None
+        return RegisterBlock(resp.payload)
+
+    def read_input_block(self, address: int, count: int) -> Optional[RegisterBlock]:
+        """read_block для input registers (FC04)."""
+        return self.read_block(4, address, count)
+
+    def _read_response(self, function: int, address: int, count: int):
+        """Один FC03/FC04 запрос → RtuResponse (или None при таймауте / обрыве / исчерпанном бюджете)."""
+        if count < 1 or function not in (3, 4):
+            return None
+        if self._budget_exhausted:
             return None
 
         self._last_read_register = address
@@ -579,104 +493,141 @@ class ModbusClient:
             logger.warning("Клиент не инициализирован")
             return None
         if not self.client.is_socket_open():
-            logger.debug(f"Сокет закрыт при чтении input регистров {address}")
+            logger.debug(f"Сокет закрыт при чтении FC{function:02d} {address}+{count}")
             self._connected = False
             return None
 
-        try:
-            self._flush_socket()
-            result = self.client.read_input_registers(
-                address=address,
-                count=count,
-                device_id=self.unit_id,
-            )
-            if result.isError():
-                logger.debug(f"Ошибка чтения input регистров {address} count={count}: {result}")
-                return None
-            if not result.registers or len(result.registers) < count:
-                logger.warning(
-                    f"⚠️ Неполный ответ input регистров {address}: "
-                    f"запрошено {count}, получено {len(result.registers) if result.registers else 0}"
-                )
-                return None
-            return [int(r) for r in result.registers[:count]]
-        except (ConnectionError, OSError) as e:
-            logger.debug(f"Исключение при чтении input регистров {address}: {e}")
-            return None
-        except Exception as e:
-            error_str = str(e)
-            if "CLOSING CONNECTION" in error_str:
-                logger.debug(f"Соединение закрыто при чтении input регистров {address}")
+        what = f"чтении FC{function:02d} {address}+{count}"
+        return self._transact_checked(build_read_frame(self.unit_id, function, address, count), function, 5 + 2 * count, what)
+
+    def _span_result(self, function: int, address: int, count: int, resp) -> tuple[Optional[list], Optional[int]]:
+        """Ответ (или исключение из конвейера) → (registers, exception_code), как у read_span."""
+        if isinstance(resp, BaseException):
+            logger.debug(f"Ошибка чтения FC{function:02d} {address}+{count}: {resp}")
+            if isinstance(resp, (ConnectionError, OSError)):
+                self._connected = False
+            return None, None
+        if resp is None:
+            logger.debug(f"Нет ответа при чтении FC{function:02d} {address}+{count}")
+            return None, None
+        if resp.is_exception:
+            exc_code = resp.exception_code
+            if exc_code in (2, 3):
+                logger.debug(f"FC{function:02d} {address}+{count}: регистр отсутствует (код {exc_code})")
             else:
-                logger.error(f"Неожиданная ошибка при чтении input регистров {address}: {e}")
-            self._connected = False
-            return None
-    
-    def _get_socket(self):
+                logger.debug(f"FC{function:02d} {address}+{count}: exception {exc_code} ({EXCEPTION_MESSAGES.get(exc_code, exc_code)})")
+            if count == 1:
+                self.register_map.observe(function, address, False, exc_code)
+            return None, exc_code
+        return resp.registers, None
+
+    def read_learned(self, address: int, count: int = 1, functions: tuple[int, ...] = (4, 3)) -> Optional[list]:
         """
-        Получение сокета из pymodbus клиента
-        
+        Чтение с fallback по функциям (по умолчанию FC04, затем FC03) через карту register_map:
+        ответившая функция запоминается и дальше используется сразу, Illegal Data Address — пропускается.
+        Отказ чтения нескольких регистров в карту не идёт: Illegal Data Address может относиться
+        к любому адресу диапазона, а не к первому.
+
         Returns:
-            Сокет или None если не удалось получить
+            Список регистров или None, если ни одна функция не ответила
         """
-        if self.client is None:
-            return None
-        
-        sock = None
-        if hasattr(self.client, 'socket') and self.client.socket:
-            sock = self.client.socket
-        elif hasattr(self.client, 'transport'):
-            transport = self.client.transport
-            if hasattr(transport, 'socket') and transport.socket:
-                sock = transport.socket
-            elif hasattr(transport, '_socket') and transport._socket:
-                sock = transport._socket
-            elif hasattr(transport, 'sock') and transport.sock:
-                sock = transport.sock
-            elif hasattr(transport, '_sock') and transport._sock:
-                sock = transport._sock
-        
-        return sock
-    
+        for function in self.register_map.functions_for(address, functions):
+            regs, exc_code = self.read_span(function, address, count)
+            if regs is not None and len(regs) >= count:
+                self.register_map.observe(function, address, True)
+                return regs
+            if exc_code is not None and count == 1:
+                self.register_map.observe(function, address, False, exc_code)
+        return None
+
+    def read_spans(self, spans: list) -> list:
+        """
+        Чтение нескольких диапазонов [(function, address, count), ...] → [(registers, exception_code), ...].
+        Здесь — последовательно; транспорты с конвейером (modbus_async) отправляют их пачкой.
+        """
+        return [self.read_span(function, address, count) for function, address, count in spans]
+
+    def read_plan(self, name: str, wanted) -> ReadPlan:
+        """
+        План batched-чтения по имени (кэшируется на клиенте, уточняется по ответам устройства).
+
+        Args:
+            name: Ключ плана (например, "screen01")
+            wanted: Итерируемое (address, function) или (address, function, count)
+        """
+        plan = self._read_plans.get(name)
+        if plan is None:
+            plan = ReadPlan(
+                wanted, gap_tolerance=self.read_gap_tolerance, max_span=self.max_read_span, span_limit=self.max_span_for,
+                holes=self.read_holes,
+            )
+            self._read_plans[name] = plan
+        return plan
+
+    def max_span_for(self, function: int, address: int, default: Optional[int] = None) -> int:
+        """Сколько регистров читать одним запросом с address: подобранный лимит области или default (max_read_span)."""
+        return self.span_limits.limit(function, address, self.max_read_span if default is None else default)
+
+    def tune_read_spans(self, probes) -> dict[str, int]:
+        """
+        Подобрать лимиты одного чтения двоичным поиском (span_tuner) и пересклеить планы.
+        Долго и может рвать сокет — только из потока I/O, вне опроса.
+
+        Args:
+            probes: (function, address) — начало заведомо существующих адресов, по одному на область
+        """
+        found = tune_span_limits(self.read_span, self._recover_after_probe, probes, self.span_limits)
+        for plan in self._read_plans.values():
+            plan.reset()
+        return found
+
+    def _recover_after_probe(self) -> bool:
+        """Связь после неудачного пробного чтения: при обрыве — переподключение (с учётом backoff)."""
+        if self._connected and self.client is not None and self.client.is_socket_open():
+            return True
+        logger.info("Соединение оборвалось при подборе диапазона, переподключаемся")
+        return self._reconnect()
+
+    def read_many(self, spec) -> ReadManyResult:
+        """
+        Batched-чтение набора записей одним проходом: соединение проверяется один раз,
+        записи склеиваются в диапазоны read_planner и отправляются через read_spans.
+
+        Args:
+            spec: Итерируемое (address, count, function) или (address, count) — тогда FC04
+
+        Returns:
+            ReadManyResult: значения и статус по каждой записи в порядке spec, summary() — сводка ошибок
+        """
+        entries = [(int(e[0]), max(1, int(e[1])), int(e[2]) if len(e) > 2 else 4) for e in spec]
+        key = tuple(entries)
+        if self.client is None or not self.client.is_socket_open():
+            self._connected = False
+            return ReadManyResult(entries)
+        plan = self._read_plans.get(key)
+        if plan is None:
+            plan = ReadPlan(
+                [(address, function, count) for address, count, function in entries],
+                gap_tolerance=self.read_gap_tolerance,
+                max_span=self.max_read_span,
+                span_limit=self.max_span_for,
+                holes=self.read_holes,
+            )
+            self._read_plans[key] = plan
+        result = ReadManyResult.from_plan(entries, plan.execute(self), plan)
+        if not result.all_ok:
+            summary = result.summary()
+            logger.debug(
+                f"read_many: {summary['ok']}/{summary['total']} ok, missing={len(summary['missing'])}, "
+                f"exception={ {code: len(e) for code, e in summary['exception'].items()} }, "
+                f"no_response={len(summary['no_response'])}"
+            )
+        return result
+
     def _crc16_modbus(self, data: bytes) -> int:
-        """Расчет CRC16 для Modbus RTU"""
-        crc = 0xFFFF
-        for byte in data:
-            crc ^= byte
-            for _ in range(8):
-                if crc & 0x0001:
-                    crc >>= 1
-                    crc ^= 0xA001
-                else:
-                    crc >>= 1
-        return crc
-    
-    def _build_read_frame_1021(self) -> bytes:
-        """Формирование Modbus RTU фрейма для чтения регистра 1021 (функция 04)"""
-        address = 1021
-        addr_high = (address >> 8) & 0xFF
-        addr_low = address & 0xFF
-        
-        frame = bytes([self.unit_id, 4, addr_high, addr_low, 0x00, 0x01])
-        crc = self._crc16_modbus(frame)
-        crc_low = crc & 0xFF
-        crc_high = (crc >> 8) & 0xFF
-        return frame + bytes([crc_low, crc_high])
-    
-    def _build_write_frame_1021(self, value: int) -> bytes:
-        """Формирование Modbus RTU фрейма для записи в регистр 1021 (функция 06)"""
-        address = 1021
-        addr_high = (address >> 8) & 0xFF
-        addr_low = address & 0xFF
-        value_high = (value >> 8) & 0xFF
-        value_low = value & 0xFF
-        
-        frame = bytes([self.unit_id, 6, addr_high, addr_low, value_high, value_low])
-        crc = self._crc16_modbus(frame)
-        crc_low = crc & 0xFF
-        crc_high = (crc >> 8) & 0xFF
-        return frame + bytes([crc_low, crc_high])
-    
+        """Расчет CRC16 для Modbus RTU (табличный, см. modbus_codec)"""
+        return crc16(data)
+
     def _check_modbus_exception(self, resp: bytes, register_name: str = "register") -> Optional[dict]:
         """
         Проверяет ответ на Modbus exception response.
@@ -687,300 +638,243 @@ class ModbusClient:
         if len(resp) < 3:
             return None
         
-        fn = resp[1] if len(resp) > 1 else 0
+        fn = resp[1]
         if fn & 0x80:  # Modbus exception response
-            exc_code = resp[2] if len(resp) > 2 else None
-            error_messages = {
-                1: "Illegal Function",
-                2: "Illegal Data Address",
-                3: "Illegal Data Value",
-                4: "Slave Device Failure",
-                5: "Acknowledge",
-                6: "Slave Device Busy",
-                8: "Memory Parity Error"
-            }
-            error_msg = error_messages.get(exc_code, f"Unknown error ({exc_code})")
+            exc_code = resp[2]
             return {
                 'is_exception': True,
                 'function': fn & 0x7F,
                 'error_code': exc_code,
-                'error_message': error_msg,
+                'error_message': EXCEPTION_MESSAGES.get(exc_code, f"Unknown error ({exc_code})"),
                 'register_name': register_name
             }
         return None
-    
-    def _read_register_direct_generic(self, address: int, build_frame_func: Callable[[], bytes], 
-                                       parse_response_func: Callable[[bytes], Optional[int]]) -> Optional[int]:
+
+    def _transact(
+        self,
+        frame: bytes,
+        function: int,
+        response_len: int,
+        *,
+        address: Optional[int] = None,
+        value: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> Optional[RtuResponse]:
+        """
+        Одна транзакция RTU: отправка кадра и ожидание ответа в постоянном приёмном буфере.
+        Устаревшие ответы (на истёкшие запросы) отбрасываются по содержимому, без flush сокета.
+
+        Returns:
+            Разобранный ответ (в т.ч. exception response) или None по таймауту.
+            ConnectionError/OSError пробрасываются — решение о переподключении за вызывающим.
+        """
+        self._charge(1, len(frame) + response_len)
+        if timeout is None:
+            timeout = self._request_timeout()
+            if timeout is None:
+                return None
+        rto = self.rtt.timeout
+        transport = self.client
+        if transport is None:
+            raise ConnectionError("Сокет недоступен")
+        trace = self.trace
+        policy = self.retry_policy
+        try:
+            # Второй ответ на прошлый повторённый запрос той же формы не должен достаться этому
+            transport.settle_late_reply(self.unit_id, function, response_len, address, value)
+        except OSError as e:
+            self.liveness.on_error(e)
+            raise
+        sent = time.monotonic()
+        deadline = sent + timeout
+        retry_after = policy.delay(timeout, self._batch_deadline is not None)
+        retried = False
+        try:
+            transport.send(frame)
+            if retry_after is not None:
+                resp = transport.receive(self.unit_id, function, response_len, address, value, deadline=sent + retry_after)
+                if resp is None:
+                    # Кадр или ответ, скорее всего, потерян — повтор до исходного дедлайна
+                    trace.record(frame, sent, transport.rx_first_byte, time.monotonic(), transport.rx_bytes, RETRIED)
+                    policy.on_retry()
+                    retried = True
+                    sent = time.monotonic()
+                    transport.send(frame)
+            if retry_after is None or retried:
+                resp = transport.receive(self.unit_id, function, response_len, address, value, deadline=deadline)
+            if retried and resp is not None:
+                # Если опоздал ответ на первый кадр, ответ на повтор идёт следом (не позже RTO от этого ответа)
+                transport.expect_late_reply(function, response_len, address, value, time.monotonic() + rto)
+        except socket.timeout:
+            # sendall не успел за таймаут сокета
+            trace.record(frame, sent, transport.rx_first_byte, time.monotonic(), transport.rx_bytes, TIMEOUT)
+            self.liveness.on_timeout()
+            raise
+        except OSError as e:
+            trace.record(frame, sent, transport.rx_first_byte, time.monotonic(), transport.rx_bytes, CONN_ERROR)
+            self.liveness.on_error(e)
+            raise
+        now = time.monotonic()
+        if retried:
+            policy.on_retry_result(resp is not None)
+        if resp is not None:
+            if not retried:
+                # Ответ после повтора неоднозначен (на какой кадр?) — в оценки RTT не идёт
+                self.rtt.sample(now - sent)
+                policy.sample(now - sent)
+            self.liveness.on_response()
+            if resp.is_exception:
+                trace.record(frame, sent, transport.rx_first_byte, now, transport.rx_bytes, EXCEPTION, resp.exception_code)
+            else:
+                trace.record(frame, sent, transport.rx_first_byte, now, transport.rx_bytes, OK)
+            return resp
+        trace.record(
+            frame, sent, transport.rx_first_byte, now, transport.rx_bytes,
+            CRC_ERROR if transport.rx_crc_error else TIMEOUT,
+        )
+        if timeout >= rto:
+            self.rtt.on_timeout()
+            self.liveness.on_timeout()
+        else:
+            # Ожидание урезано бюджетом batched-прохода — это не потеря ответа
+            self._budget_exhausted = True
+        return None
+
+    @contextmanager
+    def batch_budget(self, seconds: float):
+        """
+        Бюджет времени на batched-проход. Когда он исчерпан, запросы больше не отправляются
+        (read_span сразу возвращает (None, None)), и batch отдаёт частичный результат —
+        проверяйте budget_exhausted внутри блока. Вложенный бюджет не продлевает внешний.
+        """
+        outer_deadline, outer_exhausted = self._batch_deadline, self._budget_exhausted
+        deadline = time.monotonic() + seconds
+        if outer_deadline is not None:
+            deadline = min(deadline, outer_deadline)
+        self._batch_deadline = deadline
+        self._budget_exhausted = False
+        # Лимит повторов — на внешний проход, вложенный бюджет его не обновляет
+        outer_retries = self.retry_policy.begin_batch() if outer_deadline is None else None
+        try:
+            yield self
+        finally:
+            self._batch_deadline = outer_deadline
+            self._budget_exhausted = outer_exhausted
+            if outer_retries is not None:
+                self.retry_policy.end_batch(outer_retries)
+
+    @contextmanager
+    def bus_category(self, category: str):
+        """Запросы внутри блока расходуют долю бюджета шины category (bus_budget.CATEGORIES)."""
+        outer, self._bus_category = self._bus_category, category
+        try:
+            yield self
+        finally:
+            self._bus_category = outer
+
+    def _charge(self, requests: int, nbytes: int) -> None:
+        """Списать запросы с бюджета шины текущей категории; задачи откладывает worker (BusBudget.delay)."""
+        self.bus_budget.charge(self._bus_category, requests, nbytes)
+
+    def bus_stats(self, window: float = 10.0) -> dict:
+        """Бюджет шины и счётчики по категориям + фактическая нагрузка за последние window секунд (по трассировке)."""
+        stats = self.bus_budget.stats()
+        stats["usage"] = self.trace.rate(window)
+        return stats
+
+    @property
+    def budget_exhausted(self) -> bool:
+        """Текущий batch_budget исчерпан (часть запросов не отправлялась)."""
+        return self._budget_exhausted
+
+    def _request_timeout(self) -> Optional[float]:
+        """Таймаут следующего запроса: RTT-оценка, урезанная остатком бюджета. None — бюджет исчерпан."""
+        timeout = self.rtt.timeout
+        if self._batch_deadline is not None:
+            remaining = self._batch_deadline - time.monotonic()
+            if remaining <= 0.001:
+                self._budget_exhausted = True
+                return None
+            timeout = min(timeout, remaining)
+        return timeout
+
+    def link_state(self) -> dict:
+        """Оценка RTT (srtt/rttvar/timeout, секунды) и живость соединения — для адаптации интервалов опроса."""
+        state = self.rtt.state()
+        state["liveness"] = self.liveness.state()
+        state["retry"] = self.retry_policy.state()
+        return state
+
+    def trace_snapshot(self, last: Optional[int] = None) -> list[dict]:
+        """Последние транзакции из кольцевого буфера трассировки (от старых к новым)."""
+        return self.trace.snapshot(last)
+
+    def dump_trace(self, path: str) -> bool:
+        """Сохранить трассировку транзакций в файл (JSON Lines)."""
+        return self.trace.dump(path)
+
+    def _transact_checked(self, frame: bytes, function: int, response_len: int, what: str, **match) -> Optional[RtuResponse]:
+        """_transact с обработкой обрыва: при reset/broken pipe — переподключение и один повтор."""
+        try:
+            return self._transact(frame, function, response_len, **match)
+        except socket.timeout:
+            # sendall не успел за таймаут — сокет жив, просто нет ответа
+            return None
+        except (ConnectionError, OSError) as e:
+            error_code = getattr(e, 'errno', None)
+            logger.warning(f"Ошибка соединения при {what}: {e} (errno={error_code})")
+            # Connection reset, Broken pipe, Connection reset by peer, Transport endpoint is not connected
+            if error_code in (54, 32, 104, 107) or error_code is None:
+                logger.info("Обнаружен разрыв соединения, пробуем переподключиться...")
+                self.trace.mark_last(RECONNECT)
+                if self._reconnect():
+                    try:
+                        return self._transact(frame, function, response_len, **match)
+                    except (ConnectionError, OSError) as e2:
+                        logger.warning(f"Ошибка при повторе после переподключения ({what}): {e2}")
+            self._connected = False
+            return None
+
+    def _read_register_direct_generic(self, address: int, function: int = 4) -> Optional[int]:
         """
-        Общий метод для чтения регистра через прямой сокет с логикой из test_modbus.py.
+        Общий метод для чтения одного регистра через прямой сокет.
+        Кадр собирается и разбирается через modbus_codec (см. read_span).
         
         Args:
             address: Адрес регистра
-            build_frame_func: Функция для построения фрейма запроса
-            parse_response_func: Функция для парсинга ответа
+            function: Функция чтения (04 — input, 03 — holding)
         
         Returns:
             Значение регистра или None при ошибке
         """
+        regs, _ = self.read_span(function, address, 1)
+        return regs[0] if regs else None
+
+    def read_register_1021_direct(self) -> Optional[int]:
+        """Чтение регистра 1021 через прямой сокет (функция 04) - реализация как в test_modbus.py"""
+        return self._read_register_direct_generic(1021)
+
+    def write_register_1021_direct(self, value: int) -> bool:
+        """Запись в регистр 1021 через прямой сокет (функция 06)
         
-        # Сохраняем адрес регистра для отслеживания проблем
-        self._last_read_register = address
+        Args:
+            value: Полное значение для записи в регистр
+        """
+        return self.write_register_direct(1021, value)
+
+    def set_relay_1021(self, relay_num: int, state: bool) -> bool:
+        """Установка состояния реле в регистре 1021
         
-        if self.client is None or not self.client.is_socket_open():
-            return None
+        Args:
+            relay_num: Номер реле (1-8)
+            state: True - включить, False - выключить
         
-        read_frame = build_frame_func()
-        
-        # Отправляем запрос 2 раза (первый может потеряться) - как в test_modbus.py
-        for attempt in range(2):
-            max_retries = 3
-            retry_count = 0
-            success = False
-            parsed = None
-            
-            while retry_count < max_retries and not success:
-                try:
-                    # Получаем сокет из pymodbus клиента
-                    sock = self._get_socket()
-                    if sock is None:
-                        logger.warning(f"Не удалось получить сокет для прямого чтения регистра {address}")
-                        return None
-                    
-                    sock.sendall(read_frame)
-                    time.sleep(0.1)  # Задержка как в test_modbus.py
-                    
-                    # Читаем ответ с таймаутом
-                    resp = b''
-                    try:
-                        sock.settimeout(1.0)  # Увеличиваем таймаут до 1 секунды как в test_modbus.py
-                        while True:
-                            chunk = sock.recv(256)
-                            if not chunk:
-                                break
-                            resp += chunk
-                            # Проверяем, не закончился ли фрейм
-                            if len(resp) >= 7:
-                                byte_count = resp[2] if len(resp) > 2 else 0
-                                expected_length = 3 + byte_count + 2
-                                if len(resp) >= expected_length:
-                                    break
-                    except socket.timeout:
-                        pass  # Таймаут - возможно, все данные уже получены
-                    finally:
-                        sock.settimeout(2.0)  # Возвращаем обычный таймаут
-                    
-                    if resp:
-                        # Проверяем на Modbus exception response
-                        exception_info = self._check_modbus_exception(resp, str(address))
-                        if exception_info:
-                            exc_code = exception_info['error_code']
-                            # Если это ошибка адреса или значения - регистр отсутствует или недоступен
-                            # НЕ разрываем соединение - это нормальная ситуация (как в pymodbus)
-                            if exc_code in (2, 3):  # Illegal Data Address или Illegal Data Value
-                                logger.debug(f"Регистр {address} вернул Modbus exception code={exc_code} ({exception_info['error_message']}) - регистр отсутствует или недоступен")
-                                return None  # Просто возвращаем None, соединение остается активным
-                            else:
-                                # Другие Modbus exceptions - тоже не разрываем соединение
-                                logger.debug(f"Регистр {address} вернул Modbus exception code={exc_code} ({exception_info['error_message']})")
-                                return None
-                        
-                        parsed = parse_response_func(resp)
-                        if parsed is not None:
-                            # Успешное чтение - возвращаем значение (может быть 0, это нормально)
-                            # Если значение 0, это может быть пустой регистр, но соединение не разрываем
-                            # (как в pymodbus - он возвращает 0 для пустого регистра и не разрывает соединение)
-                            # Возвращаем значение, даже если оно 0 - это нормальное поведение
-                            success = True
-                            break
-                        else:
-                            # Ошибка парсинга (не Modbus exception, а проблема с CRC или форматом ответа)
-                            # Это может быть реальная проблема, но не обязательно разрывать соединение
-                            # Логируем и возвращаем None, но не разрываем соединение
-                            logger.debug(f"Регистр {address}: ошибка парсинга ответа (возможно, некорректный формат или CRC)")
-                            # Не добавляем в проблемные и не разрываем соединение - просто возвращаем None
-                            return None
-                    else:
-                        # Пустой ответ (timeout при чтении)
-                        # Это может быть нормально - устройство может не отвечать на некоторые регистры
-                        # Не разрываем соединение, просто возвращаем None (как pymodbus)
-                        logger.debug(f"Регистр {address}: пустой ответ (timeout при чтении)")
-                        return None
-                        
-                except (ConnectionError, OSError) as e:
-                    error_code = getattr(e, 'errno', None)
-                    retry_count += 1
-                    logger.warning(f"⚠️ Ошибка соединения при чтении регистра {address}: {e} (errno={error_code})")
-                    
-                    if retry_count < max_retries:
-                        logger.info(f"Переподключение (попытка {retry_count}/{max_retries-1})...")
-                        # Закрываем старое соединение и переподключаемся
-                        try:
-                            if self.client is not None:
-                                self.client.close()
-                        except:
-                            pass
-                        
-                        if self._reconnect():
-                            time.sleep(0.3)  # Задержка после переподключения как в test_modbus.py
-                            logger.info("✓ Переподключено, повтор запроса...")
-                            continue  # Повторяем попытку
-                        else:
-                            logger.error("❌ Ошибка переподключения")
-                            if retry_count >= max_retries:
-                                return None
-                    else:
-                        logger.error(f"❌ Не удалось переподключиться после {max_retries} попыток")
-                        return None
-                except Exception as e:
-                    logger.error(f"Ошибка при чтении регистра {address}: {e}")
-                    return None
-            
-            if success and parsed is not None:
-                return parsed
-            
-            if attempt < 1:  # Не ждем после последней отправки
-                time.sleep(0.5)  # Задержка между попытками как в test_modbus.py
-        
-        # Если обе попытки не удались
-        return None
-    
-    def _parse_read_response_1021(self, resp: bytes) -> Optional[int]:
-        """Расшифровка ответа на запрос чтения регистра 1021"""
-        if len(resp) < 5:
-            return None
-        
-        if resp[0] != self.unit_id:
-            return None
-        
-        # Проверяем на Modbus exception response
-        exception_info = self._check_modbus_exception(resp, "1021")
-        if exception_info:
-            exc_code = exception_info['error_code']
-            if exc_code in (2, 3):  # Illegal Data Address или Illegal Data Value
-                logger.debug(f"Регистр 1021 вернул Modbus exception code={exc_code} ({exception_info['error_message']}) - регистр отсутствует")
-            else:
-                logger.warning(f"Регистр 1021 вернул Modbus exception code={exc_code} ({exception_info['error_message']})")
-            return None
-        
-        fn = resp[1]
-        if fn != 4:
-            return None
-        
-        if len(resp) < 7:
-            return None
-        
-        value_high = resp[3]
-        value_low = resp[4]
-        value = (value_high << 8) | value_low
-        
-        # Проверяем CRC
-        received_crc = (resp[-1] << 8) | resp[-2]
-        data_for_crc = resp[:-2]
-        calculated_crc = self._crc16_modbus(data_for_crc)
-        
-        if received_crc == calculated_crc:
-            return value
-        else:
-            logger.warning(f"CRC не совпадает для регистра 1021: получен {received_crc:04X}, ожидался {calculated_crc:04X}")
-            return None  # Не возвращаем некорректные данные
-    
-    def read_register_1021_direct(self) -> Optional[int]:
-        """Чтение регистра 1021 через прямой сокет (функция 04) - реализация как в test_modbus.py"""
-        return self._read_register_direct_generic(1021, self._build_read_frame_1021, self._parse_read_response_1021)
-    
-    def write_register_1021_direct(self, value: int) -> bool:
-        """Запись в регистр 1021 через прямой сокет (функция 06)
-        
-        Args:
-            value: Полное значение для записи в регистр
-        """
-        address = 1021
-
-        # Сохраняем адрес регистра для отслеживания проблем
-        self._last_read_register = address
-
-        if self.client is None or not self.client.is_socket_open():
-            return False
-        
-        try:
-            # Получаем сокет из pymodbus клиента
-            sock = self._get_socket()
-            if sock is None:
-                logger.warning("Не удалось получить сокет для прямой записи в регистр 1021")
-                return False
-            
-            # Отправляем запрос дважды
-            write_frame = self._build_write_frame_1021(value)
-            success = False
-            
-            for i in range(2):
-                try:
-                    sock.sendall(write_frame)
-                    time.sleep(0.01)  # Минимальная задержка для быстрой записи
-                    resp = sock.recv(256)
-                    if resp and len(resp) >= 8:
-                        # Проверяем, что ответ соответствует запросу
-                        if resp[0] == self.unit_id and resp[1] == 6:
-                            success = True
-                            break
-                except (ConnectionError, OSError) as e:
-                    error_code = getattr(e, 'errno', None)
-                    if i == 0:
-                        logger.debug(f"Первая попытка записи в регистр 1021 не удалась (это нормально): {e}")
-                    else:
-                        # При разрыве соединения пробуем переподключиться
-                        if error_code in (54, 32, 104, 107):  # Connection reset, Broken pipe, Connection reset by peer, Transport endpoint is not connected
-                            logger.warning(f"Разрыв соединения при записи в регистр 1021: {e}, пробуем переподключиться...")
-                            if self._reconnect():
-                                # После переподключения пробуем повторить запрос
-                                try:
-                                    # Получаем новый сокет после переподключения
-                                    sock = self._get_socket()
-                                    if sock:
-                                        sock.sendall(write_frame)
-                                        time.sleep(0.01)
-                                        resp = sock.recv(256)
-                                        if resp and len(resp) >= 8:
-                                            if resp[0] == self.unit_id and resp[1] == 6:
-                                                return True
-                                except Exception as e2:
-                                    logger.warning(f"Ошибка при повторной записи после переподключения: {e2}")
-                        raise
-                if i < 1:
-                    time.sleep(0.05)  # Минимальная задержка между попытками для быстрой записи
-            
-            return success
-        except (ConnectionError, OSError) as e:
-            error_code = getattr(e, 'errno', None)
-            logger.warning(f"Ошибка соединения при записи в регистр 1021: {e} (errno={error_code})")
-            # При разрыве соединения пробуем переподключиться
-            if error_code in (54, 32, 104, 107):  # Connection reset, Broken pipe, Connection reset by peer, Transport endpoint is not connected
-                logger.info("Обнаружен разрыв соединения, пробуем переподключиться...")
-                if self._reconnect():
-                    # После переподключения пробуем повторить запрос
-                    try:
-                        return self.write_register_1021_direct(value)
-                    except Exception as e2:
-                        logger.warning(f"Ошибка при повторной записи после переподключения: {e2}")
-            self._connected = False
-            return False
-        except Exception as e:
-            logger.error(f"Ошибка при записи в регистр 1021 через прямой сокет: {e}")
-            return False
-    
-    def set_relay_1021(self, relay_num: int, state: bool) -> bool:
-        """Установка состояния реле в регистре 1021
-        
-        Args:
-            relay_num: Номер реле (1-8)
-            state: True - включить, False - выключить
-        
-        Returns:
-            True если успешно, False в противном случае
-        """
-        if relay_num < 1 or relay_num > 8:
-            logger.error(f"Номер реле должен быть от 1 до 8, получен {relay_num}")
-            return False
+        Returns:
+            True если успешно, False в противном случае
+        """
+        if relay_num < 1 or relay_num > 8:
+            logger.error(f"Номер реле должен быть от 1 до 8, получен {relay_num}")
+            return False
         
         current_value = None
         for attempt in range(3):
@@ -1009,155 +903,18 @@ class ModbusClient:
         
         return self.write_register(1021, new_value)
     
-    def _build_read_frame_1111(self) -> bytes:
-        """Формирование Modbus RTU фрейма для чтения регистра 1111 (функция 04)"""
-        address = 1111
-        addr_high = (address >> 8) & 0xFF
-        addr_low = address & 0xFF
-        
-        frame = bytes([self.unit_id, 4, addr_high, addr_low, 0x00, 0x01])
-        crc = self._crc16_modbus(frame)
-        crc_low = crc & 0xFF
-        crc_high = (crc >> 8) & 0xFF
-        return frame + bytes([crc_low, crc_high])
-    
-    def _build_write_frame_1111(self, value: int) -> bytes:
-        """Формирование Modbus RTU фрейма для записи в регистр 1111 (функция 06)"""
-        address = 1111
-        addr_high = (address >> 8) & 0xFF
-        addr_low = address & 0xFF
-        value_high = (value >> 8) & 0xFF
-        value_low = value & 0xFF
-        
-        frame = bytes([self.unit_id, 6, addr_high, addr_low, value_high, value_low])
-        crc = self._crc16_modbus(frame)
-        crc_low = crc & 0xFF
-        crc_high = (crc >> 8) & 0xFF
-        return frame + bytes([crc_low, crc_high])
-    
-    def _parse_read_response_1111(self, resp: bytes) -> Optional[int]:
-        """Расшифровка ответа на запрос чтения регистра 1111"""
-        if len(resp) < 5:
-            return None
-        
-        if resp[0] != self.unit_id:
-            return None
-        
-        # Проверяем на Modbus exception response
-        exception_info = self._check_modbus_exception(resp, "1111")
-        if exception_info:
-            exc_code = exception_info['error_code']
-            if exc_code in (2, 3):  # Illegal Data Address или Illegal Data Value
-                logger.debug(f"Регистр 1111 вернул Modbus exception code={exc_code} ({exception_info['error_message']}) - регистр отсутствует")
-            else:
-                logger.warning(f"Регистр 1111 вернул Modbus exception code={exc_code} ({exception_info['error_message']})")
-            return None
-        
-        fn = resp[1]
-        if fn != 4:
-            return None
-        
-        if len(resp) < 7:
-            return None
-        
-        value_high = resp[3]
-        value_low = resp[4]
-        value = (value_high << 8) | value_low
-        
-        # Проверяем CRC
-        received_crc = (resp[-1] << 8) | resp[-2]
-        data_for_crc = resp[:-2]
-        calculated_crc = self._crc16_modbus(data_for_crc)
-        
-        if received_crc == calculated_crc:
-            return value
-        else:
-            logger.warning(f"CRC не совпадает для регистра 1111: получен {received_crc:04X}, ожидался {calculated_crc:04X}")
-            return None  # Не возвращаем некорректные данные
-    
     def read_register_1111_direct(self) -> Optional[int]:
         """Чтение регистра 1111 через прямой сокет (функция 04) - реализация как в test_modbus.py"""
-        return self._read_register_direct_generic(1111, self._build_read_frame_1111, self._parse_read_response_1111)
-    
+        return self._read_register_direct_generic(1111)
+
     def write_register_1111_direct(self, value: int) -> bool:
         """Запись в регистр 1111 через прямой сокет (функция 06)
         
         Args:
             value: Полное значение для записи в регистр
         """
-        address = 1111
-
-        # Сохраняем адрес регистра для отслеживания проблем
-        self._last_read_register = address
+        return self.write_register_direct(1111, value)
 
-        if self.client is None or not self.client.is_socket_open():
-            return False
-        
-        try:
-            # Получаем сокет из pymodbus клиента
-            sock = self._get_socket()
-            if sock is None:
-                logger.warning("Не удалось получить сокет для прямой записи в регистр 1111")
-                return False
-            
-            # Отправляем запрос дважды
-            write_frame = self._build_write_frame_1111(value)
-            success = False
-            
-            for i in range(2):
-                try:
-                    sock.sendall(write_frame)
-                    time.sleep(0.01)  # Минимальная задержка для быстрой записи для избежания блокировки UI
-                    resp = sock.recv(256)
-                    if resp and len(resp) >= 8:
-                        # Проверяем, что ответ соответствует запросу
-                        if resp[0] == self.unit_id and resp[1] == 6:
-                            success = True
-                            break
-                except (ConnectionError, OSError) as e:
-                    error_code = getattr(e, 'errno', None)
-                    if i == 0:
-                        logger.debug(f"Первая попытка записи в регистр 1111 не удалась (это нормально): {e}")
-                    else:
-                        # При разрыве соединения пробуем переподключиться
-                        if error_code in (54, 32, 104, 107):  # Connection reset, Broken pipe, Connection reset by peer, Transport endpoint is not connected
-                            logger.warning(f"Разрыв соединения при записи в регистр 1111: {e}, пробуем переподключиться...")
-                            if self._reconnect():
-                                # После переподключения пробуем повторить запрос
-                                try:
-                                    sock = self._get_socket()
-                                    if sock:
-                                        sock.sendall(write_frame)
-                                        time.sleep(0.01)
-                                        resp = sock.recv(256)
-                                        if resp and len(resp) >= 8:
-                                            if resp[0] == self.unit_id and resp[1] == 6:
-                                                return True
-                                except Exception as e2:
-                                    logger.warning(f"Ошибка при повторной записи после переподключения: {e2}")
-                        raise
-                if i < 1:
-                    time.sleep(0.05)  # Минимальная задержка между попытками для быстрой записи
-            
-            return success
-        except (ConnectionError, OSError) as e:
-            error_code = getattr(e, 'errno', None)
-            logger.warning(f"Ошибка соединения при записи в регистр 1111: {e} (errno={error_code})")
-            # При разрыве соединения пробуем переподключиться
-            if error_code in (54, 32, 104, 107):  # Connection reset, Broken pipe, Connection reset by peer, Transport endpoint is not connected
-                logger.info("Обнаружен разрыв соединения, пробуем переподключиться...")
-                if self._reconnect():
-                    # После переподключения пробуем повторить запрос
-                    try:
-                        return self.write_register_1111_direct(value)
-                    except Exception as e2:
-                        logger.warning(f"Ошибка при повторной записи после переподключения: {e2}")
-            self._connected = False
-            return False
-        except Exception as e:
-            logger.error(f"Ошибка при записи в регистр 1111 через прямой сокет: {e}")
-            return False
-    
     def set_valve_1111(self, valve_bit: int, state: bool) -> bool:
         """Установка состояния клапана в регистре 1111
         
@@ -1198,274 +955,29 @@ class ModbusClient:
         
         return result
     
-    def _build_read_frame_1511(self) -> bytes:
-        """Формирование Modbus RTU фрейма для чтения регистра 1511 (функция 04)"""
-        address = 1511
-        addr_high = (address >> 8) & 0xFF
-        addr_low = address & 0xFF
-        
-        frame = bytes([self.unit_id, 4, addr_high, addr_low, 0x00, 0x01])
-        crc = self._crc16_modbus(frame)
-        crc_low = crc & 0xFF
-        crc_high = (crc >> 8) & 0xFF
-        return frame + bytes([crc_low, crc_high])
-    
-    def _parse_read_response_1511(self, resp: bytes) -> Optional[int]:
-        """Расшифровка ответа на запрос чтения регистра 1511"""
-        if len(resp) < 5:
-            return None
-        
-        if resp[0] != self.unit_id:
-            return None
-        
-        # Проверяем на Modbus exception response
-        exception_info = self._check_modbus_exception(resp, "1511")
-        if exception_info:
-            exc_code = exception_info['error_code']
-            if exc_code in (2, 3):  # Illegal Data Address или Illegal Data Value
-                logger.debug(f"Регистр 1511 вернул Modbus exception code={exc_code} ({exception_info['error_message']}) - регистр отсутствует")
-            else:
-                logger.warning(f"Регистр 1511 вернул Modbus exception code={exc_code} ({exception_info['error_message']})")
-            return None
-        
-        fn = resp[1]
-        if fn != 4:
-            return None
-        
-        if len(resp) < 7:
-            return None
-        
-        value_high = resp[3]
-        value_low = resp[4]
-        value = (value_high << 8) | value_low
-        
-        # Проверяем CRC
-        received_crc = (resp[-1] << 8) | resp[-2]
-        data_for_crc = resp[:-2]
-        calculated_crc = self._crc16_modbus(data_for_crc)
-        
-        if received_crc == calculated_crc:
-            return value
-        else:
-            logger.warning(f"CRC не совпадает для регистра 1511: получен {received_crc:04X}, ожидался {calculated_crc:04X}")
-            return None  # Не возвращаем некорректные данные
-    
     def read_register_1511_direct(self) -> Optional[int]:
         """Чтение регистра 1511 (температура Water Chiller) через прямой сокет (функция 04) - реализация как в test_modbus.py"""
-        return self._read_register_direct_generic(1511, self._build_read_frame_1511, self._parse_read_response_1511)
-    
-    def _build_write_frame_1531(self, value: int) -> bytes:
-        """Формирование Modbus RTU фрейма для записи в регистр 1531 (функция 06)"""
-        address = 1531
-        addr_high = (address >> 8) & 0xFF
-        addr_low = address & 0xFF
-        value_high = (value >> 8) & 0xFF
-        value_low = value & 0xFF
-        
-        frame = bytes([self.unit_id, 6, addr_high, addr_low, value_high, value_low])
-        crc = self._crc16_modbus(frame)
-        crc_low = crc & 0xFF
-        crc_high = (crc >> 8) & 0xFF
-        return frame + bytes([crc_low, crc_high])
-    
+        return self._read_register_direct_generic(1511)
+
     def write_register_1531_direct(self, value: int) -> bool:
         """Запись в регистр 1531 (установка температуры Water Chiller) через прямой сокет (функция 06)
         
         Args:
             value: Значение для записи (температура × 10, например 175 для 17.5°C)
         """
-        if self.client is None or not self.client.is_socket_open():
-            return False
-        
-        try:
-            # Получаем сокет из pymodbus клиента
-            sock = self._get_socket()
-            if sock is None:
-                logger.warning("Не удалось получить сокет для прямой записи в регистр 1531")
-                return False
+        return self.write_register_direct(1531, value)
 
-            self._flush_socket()
-            
-            # Отправляем запрос дважды
-            write_frame = self._build_write_frame_1531(value)
-            logger.debug(f"Запись в регистр 1531: отправляем фрейм {write_frame.hex().upper()}")
-            success = False
-            
-            for i in range(2):
-                try:
-                    sock.sendall(write_frame)
-                    time.sleep(0.01)  # Минимальная задержка для быстрой записи для избежания блокировки UI
-                    resp = sock.recv(256)
-                    if resp:
-                        logger.debug(f"Ответ на запись в регистр 1531 (попытка {i+1}): {resp.hex().upper()}")
-                        if len(resp) >= 8:
-                            # Проверяем, что ответ соответствует запросу
-                            if resp[0] == self.unit_id and resp[1] == 6:
-                                # Проверяем, что адрес и значение совпадают
-                                resp_addr = (resp[2] << 8) | resp[3]
-                                resp_value = (resp[4] << 8) | resp[5]
-                                if resp_addr == 1531 and resp_value == value:
-                                    logger.debug(f"✅ Запись в регистр 1531 подтверждена: адрес={resp_addr}, значение={resp_value}")
-                                    success = True
-                                    break
-                                else:
-                                    logger.warning(f"Ответ не соответствует запросу: адрес={resp_addr} (ожидался 1531), значение={resp_value} (ожидалось {value})")
-                            else:
-                                logger.warning(f"Неожиданный ответ: unit_id={resp[0]}, функция={resp[1]}")
-                        else:
-                            logger.warning(f"Ответ слишком короткий: {len(resp)} байт")
-                    else:
-                        logger.warning(f"Пустой ответ на запись в регистр 1531 (попытка {i+1})")
-                except (ConnectionError, OSError) as e:
-                    if i == 0:
-                        logger.debug(f"Первая попытка записи в регистр 1531 не удалась (это нормально): {e}")
-                    else:
-                        logger.error(f"Ошибка при записи в регистр 1531: {e}")
-                        raise
-                if i < 1:
-                    time.sleep(0.05)  # Минимальная задержка между попытками для быстрой записи
-            
-            if not success:
-                logger.error(f"❌ Не удалось записать в регистр 1531 после 2 попыток")
-            
-            return success
-        except Exception as e:
-            logger.error(f"Ошибка при записи в регистр 1531 через прямой сокет: {e}")
-            return False
-    
-    def _build_write_frame_1331(self, value: int) -> bytes:
-        """Формирование Modbus RTU фрейма для записи в регистр 1331 (функция 06)"""
-        address = 1331
-        addr_high = (address >> 8) & 0xFF
-        addr_low = address & 0xFF
-        value_high = (value >> 8) & 0xFF
-        value_low = value & 0xFF
-        
-        frame = bytes([self.unit_id, 6, addr_high, addr_low, value_high, value_low])
-        crc = self._crc16_modbus(frame)
-        crc_low = crc & 0xFF
-        crc_high = (crc >> 8) & 0xFF
-        return frame + bytes([crc_low, crc_high])
-    
     def write_register_1331_direct(self, value: int) -> bool:
         """Запись в регистр 1331 (установка температуры Magnet PSU) через прямой сокет (функция 06)
         
         Args:
             value: Значение для записи (температура * 100, например 2300 для 23.00°C)
         """
-        if self.client is None or not self.client.is_socket_open():
-            return False
-        
-        try:
-            # Получаем сокет из pymodbus клиента
-            sock = self._get_socket()
-            if sock is None:
-                logger.warning("Не удалось получить сокет для прямой записи в регистр 1331")
-                return False
-            
-            # Отправляем запрос дважды
-            write_frame = self._build_write_frame_1331(value)
-            logger.debug(f"Запись в регистр 1331: отправляем фрейм {write_frame.hex().upper()}")
-            success = False
-            
-            for i in range(2):
-                try:
-                    sock.sendall(write_frame)
-                    time.sleep(0.01)  # Минимальная задержка для быстрой записи для избежания блокировки UI
-                    resp = sock.recv(256)
-                    if resp:
-                        logger.debug(f"Ответ на запись в регистр 1331 (попытка {i+1}): {resp.hex().upper()}")
-                        if len(resp) >= 8:
-                            # Проверяем, что ответ соответствует запросу
-                            if resp[0] == self.unit_id and resp[1] == 6:
-                                # Проверяем, что адрес и значение совпадают
-                                resp_addr = (resp[2] << 8) | resp[3]
-                                resp_value = (resp[4] << 8) | resp[5]
-                                if resp_addr == 1331 and resp_value == value:
-                                    logger.debug(f"✅ Запись в регистр 1331 подтверждена: адрес={resp_addr}, значение={resp_value}")
-                                    success = True
-                                    break
-                                else:
-                                    logger.warning(f"Ответ не соответствует запросу: адрес={resp_addr} (ожидался 1331), значение={resp_value} (ожидалось {value})")
-                            else:
-                                logger.warning(f"Неожиданный ответ: unit_id={resp[0]}, функция={resp[1]}")
-                        else:
-                            logger.warning(f"Ответ слишком короткий: {len(resp)} байт")
-                    else:
-                        logger.warning(f"Пустой ответ на запись в регистр 1331 (попытка {i+1})")
-                except (ConnectionError, OSError) as e:
-                    if i == 0:
-                        logger.debug(f"Первая попытка записи в регистр 1331 не удалась (это нормально): {e}")
-                    else:
-                        logger.error(f"Ошибка при записи в регистр 1331: {e}")
-                        raise
-                if i < 1:
-                    time.sleep(0.05)  # Минимальная задержка между попытками для быстрой записи
-            
-            if not success:
-                logger.error(f"❌ Не удалось записать в регистр 1331 после 2 попыток")
-            
-            return success
-        except Exception as e:
-            logger.error(f"Ошибка при записи в регистр 1331 через прямой сокет: {e}")
-            return False
-    
-    def _build_write_frame_register(self, address: int, value: int) -> bytes:
-        """Формирование Modbus RTU фрейма для записи в регистр (функция 06)"""
-        addr_high = (address >> 8) & 0xFF
-        addr_low = address & 0xFF
-        value_high = (value >> 8) & 0xFF
-        value_low = value & 0xFF
-
-        frame = bytes([self.unit_id, 6, addr_high, addr_low, value_high, value_low])
-        crc = self._crc16_modbus(frame)
-        crc_low = crc & 0xFF
-        crc_high = (crc >> 8) & 0xFF
-        return frame + bytes([crc_low, crc_high])
+        return self.write_register_direct(1331, value)
 
     def write_register_direct(self, address: int, value: int) -> bool:
         """Запись в регистр через прямой сокет (функция 06). Значение — uint16 (например, A×100)."""
-
-        if self.client is None or not self.client.is_socket_open():
-            return False
-
-        try:
-            sock = self._get_socket()
-            if sock is None:
-                logger.warning(f"Не удалось получить сокет для прямой записи в регистр {address}")
-                return False
-
-            write_frame = self._build_write_frame_register(address, value)
-            logger.debug(f"Запись в регистр {address}: отправляем фрейм {write_frame.hex().upper()}")
-            success = False
-
-            for i in range(2):
-                try:
-                    sock.sendall(write_frame)
-                    time.sleep(0.01)
-                    resp = sock.recv(256)
-                    if resp and len(resp) >= 8:
-                        if resp[0] == self.unit_id and resp[1] == 6:
-                            resp_addr = (resp[2] << 8) | resp[3]
-                            resp_value = (resp[4] << 8) | resp[5]
-                            if resp_addr == address and resp_value == value:
-                                logger.debug(f"✅ Запись в регистр {address} подтверждена: {resp_value}")
-                                success = True
-                                break
-                except (ConnectionError, OSError) as e:
-                    if i == 0:
-                        logger.debug(f"Первая попытка записи в регистр {address} не удалась (это нормально): {e}")
-                    else:
-                        raise
-                if i < 1:
-                    time.sleep(0.05)
-
-            if not success:
-                logger.error(f"❌ Не удалось записать в регистр {address} после 2 попыток")
-            return success
-        except Exception as e:
-            logger.error(f"Ошибка при записи в регистр {address} через прямой сокет: {e}")
-            return False
+        return self.write_register(address, value)
 
     def write_register_1221_direct(self, value: int) -> bool:
         """Запись setpoint напряжения Laser PSU (регистр 1221, V×100)."""
@@ -1482,784 +994,62 @@ class ModbusClient:
     def write_register_1251_direct(self, value: int) -> bool:
         """Запись on/off Laser PSU (регистр 1251: 1=вкл, 0=выкл)."""
         return self.write_register_direct(1251, value)
-    
-    def _build_write_frame_1421(self, value: int) -> bytes:
-        """Формирование Modbus RTU фрейма для записи в регистр 1421 (функция 06)"""
-        address = 1421
-        addr_high = (address >> 8) & 0xFF
-        addr_low = address & 0xFF
-        value_high = (value >> 8) & 0xFF
-        value_low = value & 0xFF
-        
-        # Формируем фрейм: Unit ID, Function Code, Address High, Address Low, Value High, Value Low
-        frame = bytes([self.unit_id, 0x06, addr_high, addr_low, value_high, value_low])
-        
-        # Вычисляем CRC16
-        crc = self._crc16_modbus(frame)
-        crc_low = crc & 0xFF
-        crc_high = (crc >> 8) & 0xFF
-        
-        return frame + bytes([crc_low, crc_high])
-    
+
     def write_register_1421_direct(self, value: int) -> bool:
         """Запись в регистр 1421 (установка температуры SEOP Cell) через прямой сокет (функция 06)
         
         Args:
             value: Значение для записи (температура * 100, например 2300 для 23.00°C)
         """
-        if self.client is None or not self.client.is_socket_open():
-            return False
-        
-        try:
-            sock = self.client.socket
-            if sock is None:
-                logger.warning("Не удалось получить сокет для прямой записи в регистр 1421")
-                return False
-            
-            # Отправляем запрос дважды
-            write_frame = self._build_write_frame_1421(value)
-            logger.debug(f"Запись в регистр 1421: отправляем фрейм {write_frame.hex().upper()}")
-            success = False
-            
-            for i in range(2):
-                try:
-                    sock.sendall(write_frame)
-                    time.sleep(0.05)
-                    resp = sock.recv(256)
-                    if resp:
-                        logger.debug(f"Ответ на запись в регистр 1421 (попытка {i+1}): {resp.hex().upper()}")
-                        if len(resp) >= 8:
-                            # Проверяем, что ответ соответствует запросу
-                            if resp[0] == self.unit_id and resp[1] == 6:
-                                # Проверяем, что адрес и значение совпадают
-                                resp_addr = (resp[2] << 8) | resp[3]
-                                resp_value = (resp[4] << 8) | resp[5]
-                                if resp_addr == 1421 and resp_value == value:
-                                    logger.debug(f"✅ Запись в регистр 1421 подтверждена: адрес={resp_addr}, значение={resp_value}")
-                                    success = True
-                                    break
-                                else:
-                                    logger.warning(f"Ответ не соответствует запросу: адрес={resp_addr} (ожидался 1421), значение={resp_value} (ожидалось {value})")
-                            else:
-                                logger.warning(f"Неожиданный ответ: unit_id={resp[0]}, функция={resp[1]}")
-                        else:
-                            logger.warning(f"Ответ слишком короткий: {len(resp)} байт")
-                    else:
-                        logger.warning(f"Пустой ответ на запись в регистр 1421 (попытка {i+1})")
-                except (ConnectionError, OSError) as e:
-                    if i == 0:
-                        logger.debug(f"Первая попытка записи в регистр 1421 не удалась (это нормально): {e}")
-                    else:
-                        logger.error(f"Ошибка при записи в регистр 1421: {e}")
-                        raise
-                if i < 1:
-                    time.sleep(0.05)  # Минимальная задержка между попытками для быстрой записи
-            
-            if not success:
-                logger.error(f"❌ Не удалось записать в регистр 1421 после 2 попыток")
-            
-            return success
-        except Exception as e:
-            logger.error(f"Ошибка при записи в регистр 1421 через прямой сокет: {e}")
-            return False
-    
-    def _build_read_frame_1411(self) -> bytes:
-        """Формирование Modbus RTU фрейма для чтения регистра 1411 (функция 04)"""
-        address = 1411
-        addr_high = (address >> 8) & 0xFF
-        addr_low = address & 0xFF
-        
-        frame = bytes([self.unit_id, 4, addr_high, addr_low, 0x00, 0x01])
-        crc = self._crc16_modbus(frame)
-        crc_low = crc & 0xFF
-        crc_high = (crc >> 8) & 0xFF
-        return frame + bytes([crc_low, crc_high])
-    
-    def _build_read_frame_1421(self) -> bytes:
-        """Формирование Modbus RTU фрейма для чтения регистра 1421 (функция 04)"""
-        address = 1421
-        addr_high = (address >> 8) & 0xFF
-        addr_low = address & 0xFF
-        
-        frame = bytes([self.unit_id, 4, addr_high, addr_low, 0x00, 0x01])
-        crc = self._crc16_modbus(frame)
-        crc_low = crc & 0xFF
-        crc_high = (crc >> 8) & 0xFF
-        return frame + bytes([crc_low, crc_high])
-    
-    def _parse_read_response_1421(self, resp: bytes) -> Optional[int]:
-        """Расшифровка ответа на запрос чтения регистра 1421"""
-        if len(resp) < 7:
-            logger.debug(f"Регистр 1421: ответ слишком короткий: {len(resp)} байт")
-            return None
-        
-        if resp[0] != self.unit_id or resp[1] != 4:
-            return None
-        
-        value_high = resp[3]
-        value_low = resp[4]
-        value = (value_high << 8) | value_low
-        
-        # Проверяем CRC
-        received_crc = (resp[-1] << 8) | resp[-2]
-        data_for_crc = resp[:-2]
-        calculated_crc = self._crc16_modbus(data_for_crc)
-        
-        if received_crc == calculated_crc:
-            return value
-        else:
-            logger.warning(f"CRC не совпадает для регистра 1421: получен {received_crc:04X}, ожидался {calculated_crc:04X}")
-            return None  # Не возвращаем некорректные данные
-    
-    def _parse_read_response_1411(self, resp: bytes) -> Optional[int]:
-        """Расшифровка ответа на запрос чтения регистра 1411"""
-        if len(resp) < 5:
-            logger.debug(f"Регистр 1411: ответ слишком короткий: {len(resp)} байт")
-            return None
-        
-        if resp[0] != self.unit_id:
-            logger.warning(f"Регистр 1411: неправильный unit_id: получен {resp[0]}, ожидался {self.unit_id}")
-            return None
-        
-        # Проверяем на Modbus exception response
-        exception_info = self._check_modbus_exception(resp, "1411")
-        if exception_info:
-            exc_code = exception_info['error_code']
-            if exc_code in (2, 3):  # Illegal Data Address или Illegal Data Value
-                logger.debug(f"Регистр 1411 вернул Modbus exception code={exc_code} ({exception_info['error_message']}) - регистр отсутствует")
-            else:
-                logger.warning(f"Регистр 1411 вернул Modbus exception code={exc_code} ({exception_info['error_message']})")
-            return None
-        
-        fn = resp[1]
-        if fn != 4:
-            return None
-        
-        if len(resp) < 7:
-            logger.debug(f"Регистр 1411: ответ слишком короткий: {len(resp)} байт")
-            return None
-        
-        # Логируем полный ответ для отладки
-        hex_resp = ' '.join(f'{b:02X}' for b in resp)
-        logger.debug(f"Регистр 1411: полный ответ: {hex_resp}, длина: {len(resp)}")
-        
-        if resp[1] != 4:
-            logger.warning(f"Регистр 1411: неправильная функция: получена {resp[1]}, ожидалась 4")
-            return None
-        
-        value_high = resp[3]
-        value_low = resp[4]
-        value = (value_high << 8) | value_low
-        
-        # Проверяем CRC
-        received_crc = (resp[-1] << 8) | resp[-2]
-        data_for_crc = resp[:-2]
-        calculated_crc = self._crc16_modbus(data_for_crc)
-        
-        logger.debug(f"Регистр 1411: значение={value} (0x{value:04X}), получен CRC={received_crc:04X}, ожидался={calculated_crc:04X}")
-        
-        if received_crc == calculated_crc:
-            return value
-        else:
-            logger.warning(f"Регистр 1411: CRC не совпадает - получен {received_crc:04X}, ожидался {calculated_crc:04X}")
-            logger.warning(f"  Полный ответ: {hex_resp}, данные для CRC: {' '.join(f'{b:02X}' for b in data_for_crc)}")
-            # НЕ возвращаем значение при несовпадении CRC - это может быть неправильный ответ
-            return None
-    
+        return self.write_register_direct(1421, value)
+
     def read_register_1411_direct(self) -> Optional[int]:
         """Чтение регистра 1411 (температура SEOP Cell) через прямой сокет (функция 04) - реализация как в test_modbus.py"""
-        return self._read_register_direct_generic(1411, self._build_read_frame_1411, self._parse_read_response_1411)
-    
+        return self._read_register_direct_generic(1411)
+
     def read_register_1421_direct(self) -> Optional[int]:
         """Чтение регистра 1421 (setpoint SEOP Cell) через прямой сокет (функция 04)"""
-        address = 1421
+        return self._read_register_direct_generic(1421)
 
-        # Сохраняем адрес регистра для отслеживания проблем
-        self._last_read_register = address
+    def read_register_1341_direct(self) -> Optional[int]:
+        """Чтение регистра 1341 (ток Magnet PSU) через прямой сокет (функция 04) - реализация как в test_modbus.py"""
+        return self._read_register_direct_generic(1341)
 
-        if self.client is None or not self.client.is_socket_open():
-            return None
-        
-        try:
-            # Получаем сокет из pymodbus клиента
-            sock = self._get_socket()
-            if sock is None:
-                logger.warning("Не удалось получить сокет для прямого чтения регистра 1421")
-                return None
-            
-            # Устанавливаем таймаут на сокет для чтения
-            try:
-                sock.settimeout(2.0)  # 2 секунды таймаут
-            except Exception:
-                pass
-            
-            # Отправляем запрос дважды (первый может потеряться)
-            read_frame = self._build_read_frame_1421()
-            parsed = None
-            
-            for i in range(2):
-                try:
-                    sock.sendall(read_frame)
-                    time.sleep(0.05)  # Задержка для стабильности
-                    resp = sock.recv(256)
-                    if resp:
-                        parsed = self._parse_read_response_1421(resp)
-                        if parsed is not None:
-                            break
-                except (ConnectionError, OSError, socket.timeout) as e:
-                    if i == 0:
-                        logger.debug(f"Первая попытка чтения регистра 1421 не удалась (это нормально): {e}")
-                    else:
-                        logger.warning(f"Вторая попытка чтения регистра 1421 не удалась: {e}")
-                if i < 1:
-                    time.sleep(0.1)  # Задержка между попытками
-            
-            return parsed
-        except (ConnectionError, OSError) as e:
-            error_code = getattr(e, 'errno', None)
-            logger.warning(f"Ошибка соединения при чтении регистра 1421: {e} (errno={error_code})")
-            # При разрыве соединения пробуем переподключиться
-            if error_code in (54, 32, 104, 107):  # Connection reset, Broken pipe, Connection reset by peer, Transport endpoint is not connected
-                logger.info("Обнаружен разрыв соединения, пробуем переподключиться...")
-                if self._reconnect():
-                    # После переподключения пробуем повторить запрос
-                    try:
-                        return self.read_register_1421_direct()
-                    except Exception as e2:
-                        logger.warning(f"Ошибка при повторном чтении после переподключения: {e2}")
-            self._connected = False
-            return None
-        except Exception as e:
-            logger.error(f"Ошибка при чтении регистра 1421 через прямой сокет: {e}")
-            return None
-    
-    def _build_read_frame_1341(self) -> bytes:
-        """Формирование Modbus RTU фрейма для чтения регистра 1341 (функция 04)"""
-        address = 1341
-        addr_high = (address >> 8) & 0xFF
-        addr_low = address & 0xFF
-        
-        frame = bytes([self.unit_id, 4, addr_high, addr_low, 0x00, 0x01])
-        crc = self._crc16_modbus(frame)
-        crc_low = crc & 0xFF
-        crc_high = (crc >> 8) & 0xFF
-        return frame + bytes([crc_low, crc_high])
-    
-    def _parse_read_response_1341(self, resp: bytes) -> Optional[int]:
-        """Расшифровка ответа на запрос чтения регистра 1341"""
-        if len(resp) < 5:
-            return None
-        
-        if resp[0] != self.unit_id:
-            return None
-        
-        # Проверяем на Modbus exception response
-        exception_info = self._check_modbus_exception(resp, "1341")
-        if exception_info:
-            exc_code = exception_info['error_code']
-            if exc_code in (2, 3):  # Illegal Data Address или Illegal Data Value
-                logger.debug(f"Регистр 1341 вернул Modbus exception code={exc_code} ({exception_info['error_message']}) - регистр отсутствует")
-            else:
-                logger.warning(f"Регистр 1341 вернул Modbus exception code={exc_code} ({exception_info['error_message']})")
-            return None
-        
-        fn = resp[1]
-        if fn != 4:
-            return None
-        
-        if len(resp) < 7:
-            return None
-        
-        value_high = resp[3]
-        value_low = resp[4]
-        value = (value_high << 8) | value_low
-        
-        # Проверяем CRC
-        received_crc = (resp[-1] << 8) | resp[-2]
-        data_for_crc = resp[:-2]
-        calculated_crc = self._crc16_modbus(data_for_crc)
-        
-        if received_crc == calculated_crc:
-            return value
-        else:
-            logger.warning(f"CRC не совпадает для регистра 1341: получен {received_crc:04X}, ожидался {calculated_crc:04X}")
-            return None  # Не возвращаем некорректные данные
-    
-    def read_register_1341_direct(self) -> Optional[int]:
-        """Чтение регистра 1341 (ток Magnet PSU) через прямой сокет (функция 04) - реализация как в test_modbus.py"""
-        return self._read_register_direct_generic(1341, self._build_read_frame_1341, self._parse_read_response_1341)
-    
-
-    def _build_read_frame_1251(self) -> bytes:
-        """Формирование Modbus RTU фрейма для чтения регистра 1251 (функция 04)"""
-        address = 1251
-        addr_high = (address >> 8) & 0xFF
-        addr_low = address & 0xFF
-        
-        frame = bytes([self.unit_id, 4, addr_high, addr_low, 0x00, 0x01])
-        crc = self._crc16_modbus(frame)
-        crc_low = crc & 0xFF
-        crc_high = (crc >> 8) & 0xFF
-        return frame + bytes([crc_low, crc_high])
-    
-    def _parse_read_response_1251(self, resp: bytes) -> Optional[int]:
-        """Расшифровка ответа на запрос чтения регистра 1251"""
-        if len(resp) < 5:
-            return None
-        
-        if resp[0] != self.unit_id:
-            return None
-        
-        # Проверяем на Modbus exception response
-        exception_info = self._check_modbus_exception(resp, "1251")
-        if exception_info:
-            exc_code = exception_info['error_code']
-            if exc_code in (2, 3):  # Illegal Data Address или Illegal Data Value
-                logger.debug(f"Регистр 1251 вернул Modbus exception code={exc_code} ({exception_info['error_message']}) - регистр отсутствует")
-            else:
-                logger.warning(f"Регистр 1251 вернул Modbus exception code={exc_code} ({exception_info['error_message']})")
-            return None
-        
-        fn = resp[1]
-        if fn != 4:
-            return None
-        
-        if len(resp) < 7:
-            return None
-        
-        value_high = resp[3]
-        value_low = resp[4]
-        value = (value_high << 8) | value_low
-        
-        # Проверяем CRC
-        received_crc = (resp[-1] << 8) | resp[-2]
-        data_for_crc = resp[:-2]
-        calculated_crc = self._crc16_modbus(data_for_crc)
-        
-        if received_crc == calculated_crc:
-            return value
-        else:
-            logger.warning(f"CRC не совпадает для регистра 1251: получен {received_crc:04X}, ожидался {calculated_crc:04X}")
-            return None  # Не возвращаем некорректные данные
-    
-    def read_register_1251_direct(self) -> Optional[int]:
-        """Чтение регистра 1251 через прямой сокет (функция 04) - реализация как в test_modbus.py"""
-        return self._read_register_direct_generic(1251, self._build_read_frame_1251, self._parse_read_response_1251)
-    
-
-    def _build_read_frame_1611(self) -> bytes:
-        """Формирование Modbus RTU фрейма для чтения регистра 1611 (функция 04)"""
-        address = 1611
-        addr_high = (address >> 8) & 0xFF
-        addr_low = address & 0xFF
-        
-        frame = bytes([self.unit_id, 4, addr_high, addr_low, 0x00, 0x01])
-        crc = self._crc16_modbus(frame)
-        crc_low = crc & 0xFF
-        crc_high = (crc >> 8) & 0xFF
-        return frame + bytes([crc_low, crc_high])
-    
-    def _parse_read_response_1611(self, resp: bytes) -> Optional[int]:
-        """Расшифровка ответа на запрос чтения регистра 1611"""
-        if len(resp) < 5:
-            return None
-        
-        if resp[0] != self.unit_id:
-            return None
-        
-        # Проверяем на Modbus exception response
-        exception_info = self._check_modbus_exception(resp, "1611")
-        if exception_info:
-            exc_code = exception_info['error_code']
-            if exc_code in (2, 3):  # Illegal Data Address или Illegal Data Value
-                logger.debug(f"Регистр 1611 вернул Modbus exception code={exc_code} ({exception_info['error_message']}) - регистр отсутствует")
-            else:
-                logger.warning(f"Регистр 1611 вернул Modbus exception code={exc_code} ({exception_info['error_message']})")
-            return None
-        
-        fn = resp[1]
-        if fn != 4:
-            return None
-        
-        if len(resp) < 7:
-            return None
-        
-        value_high = resp[3]
-        value_low = resp[4]
-        value = (value_high << 8) | value_low
-        
-        # Проверяем CRC
-        received_crc = (resp[-1] << 8) | resp[-2]
-        data_for_crc = resp[:-2]
-        calculated_crc = self._crc16_modbus(data_for_crc)
-        
-        if received_crc == calculated_crc:
-            return value
-        else:
-            # Логируем полный ответ для отладки только на уровне debug
-            hex_resp = ' '.join(f'{b:02X}' for b in resp)
-            hex_data = ' '.join(f'{b:02X}' for b in data_for_crc)
-            logger.debug(f"Регистр 1611: CRC не совпадает - получен {received_crc:04X}, ожидался {calculated_crc:04X}")
-            logger.debug(f"  Полный ответ: {hex_resp}, длина: {len(resp)}, данные для CRC: {hex_data}")
-            # Не возвращаем некорректные данные при ошибке CRC
-            return None
-    
-    def read_register_1611_direct(self) -> Optional[int]:
-        """Чтение регистра 1611 через прямой сокет (функция 04) - реализация как в test_modbus.py"""
-        return self._read_register_direct_generic(1611, self._build_read_frame_1611, self._parse_read_response_1611)
-    
-
-    def _build_write_frame_1621(self, value: int) -> bytes:
-        """Формирование Modbus RTU фрейма для записи в регистр 1621 (функция 06)"""
-        address = 1621
-        addr_high = (address >> 8) & 0xFF
-        addr_low = address & 0xFF
-        value_high = (value >> 8) & 0xFF
-        value_low = value & 0xFF
-        
-        # Формируем фрейм: Unit ID, Function Code, Address High, Address Low, Value High, Value Low
-        frame = bytes([self.unit_id, 0x06, addr_high, addr_low, value_high, value_low])
-        
-        # Вычисляем CRC16
-        crc = self._crc16_modbus(frame)
-        crc_low = crc & 0xFF
-        crc_high = (crc >> 8) & 0xFF
-        
-        return frame + bytes([crc_low, crc_high])
-    
-    def write_register_1621_direct(self, value: int) -> bool:
-        """Запись в регистр 1621 (установка давления Xenon) через прямой сокет (функция 06)
+    def read_register_1251_direct(self) -> Optional[int]:
+        """Чтение регистра 1251 через прямой сокет (функция 04) - реализация как в test_modbus.py"""
+        return self._read_register_direct_generic(1251)
+
+    def read_register_1611_direct(self) -> Optional[int]:
+        """Чтение регистра 1611 через прямой сокет (функция 04) - реализация как в test_modbus.py"""
+        return self._read_register_direct_generic(1611)
+
+    def write_register_1621_direct(self, value: int) -> bool:
+        """Запись в регистр 1621 (установка давления Xenon) через прямой сокет (функция 06)
         
         Args:
             value: Значение для записи (Torr × 10, например 20000 для 2000.00)
         """
-        if self.client is None or not self.client.is_socket_open():
-            return False
-        
-        try:
-            sock = self.client.socket
-            if sock is None:
-                logger.warning("Не удалось получить сокет для прямой записи в регистр 1621")
-                return False
-            
-            # Отправляем запрос дважды
-            write_frame = self._build_write_frame_1621(value)
-            logger.debug(f"Запись в регистр 1621: отправляем фрейм {write_frame.hex().upper()}")
-            success = False
-            
-            for i in range(2):
-                try:
-                    sock.sendall(write_frame)
-                    time.sleep(0.05)
-                    resp = sock.recv(256)
-                    if resp:
-                        logger.debug(f"Ответ на запись в регистр 1621 (попытка {i+1}): {resp.hex().upper()}")
-                        if len(resp) >= 8:
-                            # Проверяем, что ответ соответствует запросу
-                            if resp[0] == self.unit_id and resp[1] == 6:
-                                # Проверяем, что адрес и значение совпадают
-                                resp_addr = (resp[2] << 8) | resp[3]
-                                resp_value = (resp[4] << 8) | resp[5]
-                                if resp_addr == 1621 and resp_value == value:
-                                    logger.debug(f"✅ Запись в регистр 1621 подтверждена: адрес={resp_addr}, значение={resp_value}")
-                                    success = True
-                                    break
-                                else:
-                                    logger.warning(f"Ответ не соответствует запросу: адрес={resp_addr} (ожидался 1621), значение={resp_value} (ожидалось {value})")
-                            else:
-                                logger.warning(f"Неожиданный ответ: unit_id={resp[0]}, функция={resp[1]}")
-                        else:
-                            logger.warning(f"Ответ слишком короткий: {len(resp)} байт")
-                    else:
-                        logger.warning(f"Пустой ответ на запись в регистр 1621 (попытка {i+1})")
-                except (ConnectionError, OSError) as e:
-                    if i == 0:
-                        logger.debug(f"Первая попытка записи в регистр 1621 не удалась (это нормально): {e}")
-                    else:
-                        logger.error(f"Ошибка при записи в регистр 1621: {e}")
-                        raise
-                if i < 1:
-                    time.sleep(0.05)  # Минимальная задержка между попытками для быстрой записи
-            
-            if not success:
-                logger.error(f"❌ Не удалось записать в регистр 1621 после 2 попыток")
-            
-            return success
-        except Exception as e:
-            logger.error(f"Ошибка при записи в регистр 1621 через прямой сокет: {e}")
-            return False
-    
-    def _build_write_frame_1661(self, value: int) -> bytes:
-        """Формирование Modbus RTU фрейма для записи в регистр 1661 (функция 06)"""
-        address = 1661
-        addr_high = (address >> 8) & 0xFF
-        addr_low = address & 0xFF
-        value_high = (value >> 8) & 0xFF
-        value_low = value & 0xFF
-        
-        frame = bytes([self.unit_id, 6, addr_high, addr_low, value_high, value_low])
-        crc = self._crc16_modbus(frame)
-        crc_low = crc & 0xFF
-        crc_high = (crc >> 8) & 0xFF
-        return frame + bytes([crc_low, crc_high])
-    
+        return self.write_register_direct(1621, value)
+
     def write_register_1661_direct(self, value: int) -> bool:
         """Запись в регистр 1661 (установка давления N2) через прямой сокет (функция 06)
         
         Args:
             value: Значение для записи (Torr × 10, например 11520 для 1152.00)
         """
-        if self.client is None or not self.client.is_socket_open():
-            return False
-        
-        try:
-            # Получаем сокет из pymodbus клиента
-            sock = self._get_socket()
-            if sock is None:
-                logger.warning("Не удалось получить сокет для прямой записи в регистр 1661")
-                return False
-            
-            # Отправляем запрос дважды
-            write_frame = self._build_write_frame_1661(value)
-            logger.debug(f"Запись в регистр 1661: отправляем фрейм {write_frame.hex().upper()}")
-            success = False
-            
-            for i in range(2):
-                try:
-                    sock.sendall(write_frame)
-                    time.sleep(0.01)  # Минимальная задержка для быстрой записи для избежания блокировки UI
-                    resp = sock.recv(256)
-                    if resp:
-                        logger.debug(f"Ответ на запись в регистр 1661 (попытка {i+1}): {resp.hex().upper()}")
-                        if len(resp) >= 8:
-                            # Проверяем, что ответ соответствует запросу
-                            if resp[0] == self.unit_id and resp[1] == 6:
-                                # Проверяем, что адрес и значение совпадают
-                                resp_addr = (resp[2] << 8) | resp[3]
-                                resp_value = (resp[4] << 8) | resp[5]
-                                if resp_addr == 1661 and resp_value == value:
-                                    logger.debug(f"✅ Запись в регистр 1661 подтверждена: адрес={resp_addr}, значение={resp_value}")
-                                    success = True
-                                    break
-                                else:
-                                    logger.warning(f"Ответ не соответствует запросу: адрес={resp_addr} (ожидался 1661), значение={resp_value} (ожидалось {value})")
-                            else:
-                                logger.warning(f"Неожиданный ответ: unit_id={resp[0]}, функция={resp[1]}")
-                        else:
-                            logger.warning(f"Ответ слишком короткий: {len(resp)} байт")
-                    else:
-                        logger.warning(f"Пустой ответ на запись в регистр 1661 (попытка {i+1})")
-                except (ConnectionError, OSError) as e:
-                    if i == 0:
-                        logger.debug(f"Первая попытка записи в регистр 1661 не удалась (это нормально): {e}")
-                    else:
-                        logger.error(f"Ошибка при записи в регистр 1661: {e}")
-                        raise
-                if i < 1:
-                    time.sleep(0.05)  # Минимальная задержка между попытками для быстрой записи
-            
-            if not success:
-                logger.error(f"❌ Не удалось записать в регистр 1661 после 2 попыток")
-            
-            return success
-        except Exception as e:
-            logger.error(f"Ошибка при записи в регистр 1661 через прямой сокет: {e}")
-            return False
-    
-    def _build_read_frame_1651(self) -> bytes:
-        """Формирование Modbus RTU фрейма для чтения регистра 1651 (функция 04)"""
-        address = 1651
-        addr_high = (address >> 8) & 0xFF
-        addr_low = address & 0xFF
-        
-        frame = bytes([self.unit_id, 4, addr_high, addr_low, 0x00, 0x01])
-        crc = self._crc16_modbus(frame)
-        crc_low = crc & 0xFF
-        crc_high = (crc >> 8) & 0xFF
-        return frame + bytes([crc_low, crc_high])
-    
-    def _parse_read_response_1651(self, resp: bytes) -> Optional[int]:
-        """Расшифровка ответа на запрос чтения регистра 1651"""
-        if len(resp) < 5:
-            return None
-        
-        if resp[0] != self.unit_id:
-            return None
-        
-        # Проверяем на Modbus exception response
-        exception_info = self._check_modbus_exception(resp, "1651")
-        if exception_info:
-            exc_code = exception_info['error_code']
-            if exc_code in (2, 3):  # Illegal Data Address или Illegal Data Value
-                logger.debug(f"Регистр 1651 вернул Modbus exception code={exc_code} ({exception_info['error_message']}) - регистр отсутствует")
-            else:
-                logger.warning(f"Регистр 1651 вернул Modbus exception code={exc_code} ({exception_info['error_message']})")
-            return None
-        
-        fn = resp[1]
-        if fn != 4:
-            return None
-        
-        if len(resp) < 7:
-            return None
-        
-        value_high = resp[3]
-        value_low = resp[4]
-        value = (value_high << 8) | value_low
-        
-        # Проверяем CRC
-        received_crc = (resp[-1] << 8) | resp[-2]
-        data_for_crc = resp[:-2]
-        calculated_crc = self._crc16_modbus(data_for_crc)
-        
-        if received_crc == calculated_crc:
-            return value
-        else:
-            # Логируем полный ответ для отладки только на уровне debug
-            hex_resp = ' '.join(f'{b:02X}' for b in resp)
-            hex_data = ' '.join(f'{b:02X}' for b in data_for_crc)
-            logger.debug(f"Регистр 1651: CRC не совпадает - получен {received_crc:04X}, ожидался {calculated_crc:04X}")
-            logger.debug(f"  Полный ответ: {hex_resp}, длина: {len(resp)}, данные для CRC: {hex_data}")
-            # Не возвращаем некорректные данные при ошибке CRC
-            return None
-    
+        return self.write_register_direct(1661, value)
+
     def read_register_1651_direct(self) -> Optional[int]:
         """Чтение регистра 1651 через прямой сокет (функция 04) - реализация как в test_modbus.py"""
-        return self._read_register_direct_generic(1651, self._build_read_frame_1651, self._parse_read_response_1651)
-    
+        return self._read_register_direct_generic(1651)
 
-    def _build_read_frame_1701(self) -> bytes:
-        """Формирование Modbus RTU фрейма для чтения регистра 1701 (функция 04)"""
-        address = 1701
-        addr_high = (address >> 8) & 0xFF
-        addr_low = address & 0xFF
-        
-        frame = bytes([self.unit_id, 4, addr_high, addr_low, 0x00, 0x01])
-        crc = self._crc16_modbus(frame)
-        crc_low = crc & 0xFF
-        crc_high = (crc >> 8) & 0xFF
-        return frame + bytes([crc_low, crc_high])
-    
-    def _parse_read_response_1701(self, resp: bytes) -> Optional[int]:
-        """Расшифровка ответа на запрос чтения регистра 1701"""
-        if len(resp) < 5:
-            return None
-        
-        if resp[0] != self.unit_id:
-            return None
-        
-        # Проверяем на Modbus exception response
-        exception_info = self._check_modbus_exception(resp, "1701")
-        if exception_info:
-            exc_code = exception_info['error_code']
-            if exc_code in (2, 3):  # Illegal Data Address или Illegal Data Value
-                logger.debug(f"Регистр 1701 вернул Modbus exception code={exc_code} ({exception_info['error_message']}) - регистр отсутствует")
-            else:
-                logger.warning(f"Регистр 1701 вернул Modbus exception code={exc_code} ({exception_info['error_message']})")
-            return None
-        
-        fn = resp[1]
-        if fn != 4:
-            return None
-        
-        if len(resp) < 7:
-            return None
-        
-        value_high = resp[3]
-        value_low = resp[4]
-        value = (value_high << 8) | value_low
-        
-        # Проверяем CRC
-        received_crc = (resp[-1] << 8) | resp[-2]
-        data_for_crc = resp[:-2]
-        calculated_crc = self._crc16_modbus(data_for_crc)
-        
-        if received_crc == calculated_crc:
-            return value
-        else:
-            # Логируем полный ответ для отладки только на уровне debug
-            hex_resp = ' '.join(f'{b:02X}' for b in resp)
-            hex_data = ' '.join(f'{b:02X}' for b in data_for_crc)
-            logger.debug(f"Регистр 1701: CRC не совпадает - получен {received_crc:04X}, ожидался {calculated_crc:04X}")
-            logger.debug(f"  Полный ответ: {hex_resp}, длина: {len(resp)}, данные для CRC: {hex_data}")
-            # Не возвращаем некорректные данные при ошибке CRC
-            return None
-    
     def read_register_1701_direct(self) -> Optional[int]:
         """Чтение регистра 1701 через прямой сокет (функция 04) - реализация как в test_modbus.py"""
-        return self._read_register_direct_generic(1701, self._build_read_frame_1701, self._parse_read_response_1701)
-    
+        return self._read_register_direct_generic(1701)
 
-    def _build_read_frame_1131(self) -> bytes:
-        """Формирование Modbus RTU фрейма для чтения регистра 1131 (функция 04)"""
-        address = 1131
-        addr_high = (address >> 8) & 0xFF
-        addr_low = address & 0xFF
-        
-        frame = bytes([self.unit_id, 4, addr_high, addr_low, 0x00, 0x01])
-        crc = self._crc16_modbus(frame)
-        crc_low = crc & 0xFF
-        crc_high = (crc >> 8) & 0xFF
-        return frame + bytes([crc_low, crc_high])
-    
-    def _build_write_frame_1131(self, value: int) -> bytes:
-        """Формирование Modbus RTU фрейма для записи в регистр 1131 (функция 06)"""
-        address = 1131
-        addr_high = (address >> 8) & 0xFF
-        addr_low = address & 0xFF
-        value_high = (value >> 8) & 0xFF
-        value_low = value & 0xFF
-        
-        frame = bytes([self.unit_id, 6, addr_high, addr_low, value_high, value_low])
-        crc = self._crc16_modbus(frame)
-        crc_low = crc & 0xFF
-        crc_high = (crc >> 8) & 0xFF
-        return frame + bytes([crc_low, crc_high])
-    
-    def _parse_read_response_1131(self, resp: bytes) -> Optional[int]:
-        """Расшифровка ответа на запрос чтения регистра 1131"""
-        if len(resp) < 5:
-            return None
-        
-        if resp[0] != self.unit_id:
-            return None
-        
-        # Проверяем на Modbus exception response
-        exception_info = self._check_modbus_exception(resp, "1131")
-        if exception_info:
-            exc_code = exception_info['error_code']
-            if exc_code in (2, 3):  # Illegal Data Address или Illegal Data Value
-                logger.debug(f"Регистр 1131 вернул Modbus exception code={exc_code} ({exception_info['error_message']}) - регистр отсутствует")
-            else:
-                logger.warning(f"Регистр 1131 вернул Modbus exception code={exc_code} ({exception_info['error_message']})")
-            return None
-        
-        fn = resp[1]
-        if fn != 4:
-            return None
-        
-        if len(resp) < 7:
-            return None
-        
-        value_high = resp[3]
-        value_low = resp[4]
-        value = (value_high << 8) | value_low
-        
-        # Проверяем CRC
-        received_crc = (resp[-1] << 8) | resp[-2]
-        data_for_crc = resp[:-2]
-        calculated_crc = self._crc16_modbus(data_for_crc)
-        
-        if received_crc == calculated_crc:
-            return value
-        else:
-            logger.debug(f"Регистр 1131: CRC не совпадает - получен {received_crc:04X}, ожидался {calculated_crc:04X}")
-            return None  # Не возвращаем некорректные данные
-    
     def read_register_1131_direct(self) -> Optional[int]:
         """Чтение регистра 1131 через прямой сокет (функция 04) - реализация как в test_modbus.py"""
-        return self._read_register_direct_generic(1131, self._build_read_frame_1131, self._parse_read_response_1131)
-    
+        return self._read_register_direct_generic(1131)
 
     def write_register_1131_direct(self, value: int) -> bool:
         """Запись в регистр 1131 через прямой сокет (функция 06)
@@ -2267,62 +1057,8 @@ class ModbusClient:
         Args:
             value: Полное значение для записи в регистр
         """
-        address = 1131
-
-        # Сохраняем адрес регистра для отслеживания проблем
-        self._last_read_register = address
+        return self.write_register_direct(1131, value)
 
-        if self.client is None or not self.client.is_socket_open():
-            return False
-        
-        try:
-            # Получаем сокет из pymodbus клиента
-            sock = self._get_socket()
-            if sock is None:
-                logger.warning("Не удалось получить сокет для прямой записи в регистр 1131")
-                return False
-            
-            # Отправляем запрос дважды
-            write_frame = self._build_write_frame_1131(value)
-            success = False
-            
-            for i in range(2):
-                try:
-                    sock.sendall(write_frame)
-                    time.sleep(0.01)  # Минимальная задержка для быстрой записи для избежания блокировки UI
-                    resp = sock.recv(256)
-                    if resp and len(resp) >= 8:
-                        # Проверяем, что ответ соответствует запросу
-                        if resp[0] == self.unit_id and resp[1] == 6:
-                            success = True
-                            break
-                except (ConnectionError, OSError) as e:
-                    if i == 0:
-                        logger.debug(f"Первая попытка записи в регистр 1131 не удалась (это нормально): {e}")
-                    else:
-                        raise
-                if i < 1:
-                    time.sleep(0.05)  # Минимальная задержка между попытками для быстрой записи
-            
-            return success
-        except (ConnectionError, OSError) as e:
-            error_code = getattr(e, 'errno', None)
-            logger.warning(f"Ошибка соединения при записи в регистр 1131: {e} (errno={error_code})")
-            # При разрыве соединения пробуем переподключиться
-            if error_code in (54, 32, 104, 107):  # Connection reset, Broken pipe, Connection reset by peer, Transport endpoint is not connected
-                logger.info("Обнаружен разрыв соединения, пробуем переподключиться...")
-                if self._reconnect():
-                    # После переподключения пробуем повторить запрос
-                    try:
-                        return self.write_register_1131_direct(value)
-                    except Exception as e2:
-                        logger.warning(f"Ошибка при повторной записи после переподключения: {e2}")
-            self._connected = False
-            return False
-        except Exception as e:
-            logger.error(f"Ошибка при записи в регистр 1131 через прямой сокет: {e}")
-            return False
-    
     def read_fan_registers(self) -> Optional[tuple]:
         """Чтение регистров 1131 (fans 1–16) и 1132 (fans 17–18) одним запросом (pymodbus)."""
         regs = self.read_input_registers(1131, 2)
@@ -2330,43 +1066,46 @@ class ModbusClient:
             return None
         return int(regs[0]), int(regs[1])
 
-    def _build_write_frame_registers(self, address: int, values: list) -> bytes:
-        """Modbus RTU: запись нескольких holding/input registers (функция 16)."""
-        count = len(values)
-        byte_count = count * 2
-        frame = bytes([
-            self.unit_id, 16,
-            (address >> 8) & 0xFF, address & 0xFF,
-            (count >> 8) & 0xFF, count & 0xFF,
-            byte_count,
-        ])
-        for v in values:
-            v16 = int(v) & 0xFFFF
-            frame += bytes([(v16 >> 8) & 0xFF, v16 & 0xFF])
-        crc = self._crc16_modbus(frame)
-        return frame + bytes([crc & 0xFF, (crc >> 8) & 0xFF])
-
     def write_fan_registers_direct(self, reg_1131: int, reg_1132: int) -> bool:
-        """Запись 1131 и 1132 одним пакетом (FC16 через pymodbus)."""
-        reg_1131 = int(reg_1131) & 0xFFFF
-        reg_1132 = int(reg_1132) & 0xFFFF
+        """Запись 1131 и 1132 одним пакетом (FC16)."""
+        return self.write_registers(1131, [reg_1131, reg_1132])
 
+    def write_registers(self, address: int, values) -> bool:
+        """
+        Запись подряд идущих регистров одним пакетом (FC16).
+        Подтверждение — эхо адреса и количества регистров.
+        """
+        values = [int(v) & 0xFFFF for v in values]
+        if not values:
+            return True
         if self.client is None or not self.client.is_socket_open():
             return False
 
-        try:
-            self._flush_socket()
-            result = self.client.write_registers(
-                1131, [reg_1131, reg_1132], device_id=self.unit_id
-            )
-            if hasattr(result, 'isError') and result.isError():
-                logger.warning(f"Ошибка записи fans 1131={reg_1131}, 1132={reg_1132}: {result}")
-                return False
-            logger.debug(f"✅ Запись fans 1131={reg_1131}, 1132={reg_1132} (pymodbus FC16)")
-            return True
-        except Exception as e:
-            logger.warning(f"Не удалось записать 1131/1132 через pymodbus FC16: {e}")
+        frame = build_write_multiple_frame(self.unit_id, address, values)
+        what = f"записи FC16 {address}+{len(values)}"
+        resp = self._transact_checked(frame, 16, 8, what, address=address, value=len(values))
+        if resp is None or resp.is_exception:
+            logger.warning(f"Ошибка {what} {values}: {resp}")
             return False
+        logger.debug(f"✅ Запись {address}..{address + len(values) - 1} = {values} (FC16)")
+        return True
+
+    def write_many(self, values: dict[int, int]) -> dict[int, bool]:
+        """
+        Запись набора регистров {address: value}: соседние адреса — одним FC16, одиночные — FC06.
+
+        Returns:
+            {address: успех} для каждого адреса
+        """
+        result: dict[int, bool] = {}
+        for address, run in plan_writes(values):
+            if len(run) == 1:
+                ok = self.write_register(address, run[0])
+            else:
+                ok = self.write_registers(address, run)
+            for offset in range(len(run)):
+                result[address + offset] = ok
+        return result
 
     def set_fan_1131(self, fan_bit: int, state: bool) -> bool:
         """Установка состояния вентилятора в регистре 1131
@@ -2394,115 +1133,11 @@ class ModbusClient:
 
     def read_register_1132_direct(self) -> Optional[int]:
         """Чтение регистра 1132 через прямой сокет (функция 04) — fans 17+18."""
-        return self._read_register_direct_generic(1132, self._build_read_frame_1132, self._parse_read_response_1132)
+        return self._read_register_direct_generic(1132)
 
     def write_register_1132_direct(self, value: int) -> bool:
         """Запись в регистр 1132 через прямой сокет (функция 06) — fans 17+18."""
-        address = 1132
-
-        self._last_read_register = address
-
-        if self.client is None or not self.client.is_socket_open():
-            return False
-
-        try:
-            sock = self._get_socket()
-            if sock is None:
-                logger.warning("Не удалось получить сокет для прямой записи в регистр 1132")
-                return False
-
-            write_frame = self._build_write_frame_1132(value)
-            success = False
-
-            for i in range(2):
-                try:
-                    sock.sendall(write_frame)
-                    time.sleep(0.01)
-                    resp = sock.recv(256)
-                    if resp and len(resp) >= 8:
-                        if resp[0] == self.unit_id and resp[1] == 6:
-                            success = True
-                            break
-                except (ConnectionError, OSError) as e:
-                    if i == 0:
-                        logger.debug(f"Первая попытка записи в регистр 1132 не удалась (это нормально): {e}")
-                    else:
-                        raise
-                if i < 1:
-                    time.sleep(0.05)
-
-            return success
-        except (ConnectionError, OSError) as e:
-            error_code = getattr(e, 'errno', None)
-            logger.warning(f"Ошибка соединения при записи в регистр 1132: {e} (errno={error_code})")
-            if error_code in (54, 32, 104, 107):
-                logger.info("Обнаружен разрыв соединения, пробуем переподключиться...")
-                if self._reconnect():
-                    try:
-                        return self.write_register_1132_direct(value)
-                    except Exception as e2:
-                        logger.warning(f"Ошибка при повторной записи после переподключения: {e2}")
-            self._connected = False
-            return False
-        except Exception as e:
-            logger.error(f"Ошибка при записи в регистр 1132 через прямой сокет: {e}")
-            return False
-
-    def _build_read_frame_1132(self) -> bytes:
-        """Формирование Modbus RTU фрейма для чтения регистра 1132 (функция 04)"""
-        address = 1132
-        addr_high = (address >> 8) & 0xFF
-        addr_low = address & 0xFF
-
-        frame = bytes([self.unit_id, 4, addr_high, addr_low, 0x00, 0x01])
-        crc = self._crc16_modbus(frame)
-        crc_low = crc & 0xFF
-        crc_high = (crc >> 8) & 0xFF
-        return frame + bytes([crc_low, crc_high])
-
-    def _build_write_frame_1132(self, value: int) -> bytes:
-        """Формирование Modbus RTU фрейма для записи в регистр 1132 (функция 06)"""
-        address = 1132
-        addr_high = (address >> 8) & 0xFF
-        addr_low = address & 0xFF
-        value_high = (value >> 8) & 0xFF
-        value_low = value & 0xFF
-
-        frame = bytes([self.unit_id, 6, addr_high, addr_low, value_high, value_low])
-        crc = self._crc16_modbus(frame)
-        crc_low = crc & 0xFF
-        crc_high = (crc >> 8) & 0xFF
-        return frame + bytes([crc_low, crc_high])
-
-    def _parse_read_response_1132(self, resp: bytes) -> Optional[int]:
-        """Расшифровка ответа на запрос чтения регистра 1132"""
-        if len(resp) < 5:
-            return None
-
-        if resp[0] != self.unit_id:
-            return None
-
-        exception_info = self._check_modbus_exception(resp, "1132")
-        if exception_info:
-            exc_code = exception_info['error_code']
-            if exc_code in (2, 3):
-                logger.debug(f"Регистр 1132 вернул Modbus exception code={exc_code} ({exception_info['error_message']}) - регистр отсутствует")
-            else:
-                logger.warning(f"Регистр 1132 вернул Modbus exception code={exc_code} ({exception_info['error_message']})")
-            return None
-
-        if resp[1] != 4 or len(resp) < 7:
-            return None
-
-        value = (resp[3] << 8) | resp[4]
-
-        received_crc = (resp[-1] << 8) | resp[-2]
-        calculated_crc = self._crc16_modbus(resp[:-2])
-
-        if received_crc == calculated_crc:
-            return value
-        logger.debug(f"Регистр 1132: CRC не совпадает - получен {received_crc:04X}, ожидался {calculated_crc:04X}")
-        return None
+        return self.write_register_direct(1132, value)
 
     def set_laser_fans_1131(self, state: bool) -> bool:
         """Laser Fan: fans 17 и 18 в регистре 1132 (биты 0 и 1)."""
@@ -2521,168 +1156,15 @@ class ModbusClient:
 
         return self.write_fan_registers_direct(reg_1131, new_1132)
 
-    def _flush_socket(self):
-        """Вычитывание и сброс всех данных из входного буфера сокета"""
-        if self.client is None:
-            return
-        sock = self._get_socket()
-        if sock is None:
-            return
-        
-        try:
-            # Получаем текущий таймаут
-            old_timeout = sock.gettimeout()
-            # Ставим 0 (non-blocking)
-            sock.settimeout(0)
-            
-            total_flushed = 0
-            while True:
-                try:
-                    data = sock.recv(4096)
-                    if not data:
-                        break
-                    total_flushed += len(data)
-                except BlockingIOError:
-                    # Больше данных нет
-                    break
-                except socket.error:
-                    break
-            
-            if total_flushed > 0:
-                logger.debug(f"🗑️ Сброшено {total_flushed} байт мусора из сокета перед операцией")
-                
-        except Exception as e:
-            logger.debug(f"Ошибка при сбросе сокета: {e}")
-        finally:
-            # Возвращаем старый таймаут
-            try:
-                sock.settimeout(old_timeout)
-            except:
-                pass
-
     # ===== Generic direct multi-read (IR/NMR) =====
-    def _get_underlying_socket(self):
-        """
-        Возвращает реальный socket из pymodbus клиента (если возможно).
-        """
-        if self.client is None:
-            return None
-        if hasattr(self.client, 'socket') and self.client.socket:
-            return self.client.socket
-        if hasattr(self.client, 'transport'):
-            transport = self.client.transport
-            for attr in ('socket', '_socket', 'sock', '_sock'):
-                if hasattr(transport, attr):
-                    s = getattr(transport, attr)
-                    if s:
-                        return s
-            if hasattr(transport, 'get_socket'):
-                try:
-                    return transport.get_socket()
-                except Exception:
-                    return None
-        return None
 
-    def _build_read_frame_generic(self, function: int, address: int, quantity: int) -> bytes:
-        """Формирование Modbus RTU фрейма для чтения (обычно функция 04)"""
-        addr_high = (address >> 8) & 0xFF
-        addr_low = address & 0xFF
-        qty_high = (quantity >> 8) & 0xFF
-        qty_low = quantity & 0xFF
-        frame = bytes([self.unit_id, function, addr_high, addr_low, qty_high, qty_low])
-        crc = self._crc16_modbus(frame)
-        crc_low = crc & 0xFF
-        crc_high = (crc >> 8) & 0xFF
-        return frame + bytes([crc_low, crc_high])
-
-    def _find_frame_start(self, data: bytes, function: int) -> int:
-        """
-        В ответах иногда может быть мусор в начале; ищем unit_id + function.
-        """
-        if not data:
-            return 0
-        for i in range(max(0, len(data) - 4)):
-            if data[i] == self.unit_id and (data[i + 1] == function or data[i + 1] == (function | 0x80)):
-                return i
-        return 0
-
-    def _parse_read_multiple_response(self, resp: bytes, function: int) -> Optional[list]:
-        """
-        Парсинг ответа Modbus RTU (function 04) на чтение нескольких регистров.
-        Возвращает список uint16 значений или None при ошибке.
-        """
-        if not resp or len(resp) < 5:
-            return None
-
-        start_idx = self._find_frame_start(resp, function)
-        if start_idx > 0:
-            resp = resp[start_idx:]
-
-        if len(resp) < 5:
-            return None
-
-        unit_id = resp[0]
-        fn = resp[1]
-        if unit_id != self.unit_id:
-            return None
-
-        # Modbus exception response
-        if fn & 0x80:
-            exc_code = resp[2] if len(resp) > 2 else None
-            error_messages = {
-                1: "Illegal Function",
-                2: "Illegal Data Address",
-                3: "Illegal Data Value",
-                4: "Slave Device Failure",
-                5: "Acknowledge",
-                6: "Slave Device Busy",
-                8: "Memory Parity Error"
-            }
-            error_msg = error_messages.get(exc_code, f"Unknown error ({exc_code})")
-            # Для ошибок типа "Illegal Data Address" (код 2 или 3) просто логируем и возвращаем None
-            # Это нормально - регистр может отсутствовать, не нужно разрывать соединение
-            if exc_code in (2, 3):  # Illegal Data Address или Illegal Data Value
-                logger.debug(f"Modbus exception response: function={fn & 0x7F} code={exc_code} ({error_msg}) - регистр отсутствует или недоступен")
-            else:
-                logger.warning(f"Modbus exception response: function={fn & 0x7F} code={exc_code} ({error_msg})")
-            return None
-
-        if fn != function:
-            return None
-
-        byte_count = resp[2]
-        expected_len = 3 + byte_count + 2
-        if len(resp) < expected_len:
-            # Обрезанный ответ — лучше считать ошибкой
-            return None
-
-        received_crc = (resp[expected_len - 1] << 8) | resp[expected_len - 2]
-        calculated_crc = self._crc16_modbus(resp[: expected_len - 2])
-        if received_crc != calculated_crc:
-            # Пытаемся определить адрес регистра из ответа (если возможно)
-            # Если это начало ответа, адрес может быть в предыдущем запросе
-            # Для простоты логируем общую ошибку CRC
-            logger.warning(
-                f"CRC mismatch: got=0x{received_crc:04X} expected=0x{calculated_crc:04X} (addr multi-read)"
-            )
-            # Если CRC не совпадает, это может быть признаком проблемного регистра
-            # Но мы не знаем точный адрес из ответа, поэтому просто возвращаем None
-            return None
-
-        registers = []
-        data = resp[3 : 3 + byte_count]
-        for i in range(0, len(data), 2):
-            if i + 1 >= len(data):
-                break
-            registers.append((data[i] << 8) | data[i + 1])
-        return registers
-
-    def read_input_registers_direct(self, address: int, quantity: int, *, max_chunk: int = 10) -> Optional[list]:
+    def read_input_registers_direct(self, address: int, quantity: int, *, max_chunk: Optional[int] = None) -> Optional[list]:
         """
         Чтение input registers (function 04) через прямой сокет.
 
-        Важно: устройство может "ронять" сокет при больших запросах, поэтому по умолчанию
-        читаем чанками по 10 регистров.
+        Важно: устройство может "ронять" сокет при больших запросах, поэтому без подобранного
+        лимита области (span_limits) читаем чанками по 10 регистров. Отсутствующий чанк
+        (exception / таймаут) пропускается.
         """
         if quantity <= 0:
             return []
@@ -2693,116 +1175,21 @@ class ModbusClient:
             self._connected = False
             return None
 
-        sock = self._get_underlying_socket()
-        if sock is None:
-            logger.warning("Не удалось получить сокет для direct multi-read")
-            return None
-
-        # Читаем чанками по max_chunk
         out: list[int] = []
-        remaining = quantity
         current_addr = address
-
-        # Используем чуть более длинный timeout на время пакетного чтения
-        prev_timeout = None
-        try:
-            try:
-                prev_timeout = sock.gettimeout()
-            except Exception:
-                prev_timeout = None
-            try:
-                sock.settimeout(0.5)
-            except Exception:
-                pass
-
-            while remaining > 0:
-                chunk = min(max_chunk, remaining)
-                frame = self._build_read_frame_generic(4, current_addr, chunk)
-
-                parsed = None
-                for attempt in range(2):
-                    try:
-                        sock.sendall(frame)
-                        # Убираем задержку для ускорения чтения множественных регистров
-                        # time.sleep(0.01)  # Убрано для ускорения
-
-                        resp = b""
-                        # Собираем ответ до полного фрейма
-                        deadline = time.time() + 0.8
-                        while time.time() < deadline:
-                            try:
-                                part = sock.recv(1024)
-                            except socket.timeout:
-                                break
-                            except (ConnectionError, OSError):
-                                parsed = None
-                                break
-                            if not part:
-                                break
-                            resp += part
-                            # Если есть заголовок — можно понять ожидаемую длину
-                            start_idx = self._find_frame_start(resp, 4)
-                            frame_start = resp[start_idx:]
-                            if len(frame_start) >= 3:
-                                bc = frame_start[2]
-                                need = 3 + bc + 2
-                                if len(frame_start) >= need:
-                                    break
-
-                        parsed = self._parse_read_multiple_response(resp, 4)
-                        if parsed is not None and len(parsed) >= chunk:
-                            parsed = parsed[:chunk]
-                            break
-                        # Проверяем на Modbus exception response
-                        if resp and len(resp) >= 3:
-                            fn = resp[1] if len(resp) > 1 else 0
-                            if fn & 0x80:  # Modbus exception response
-                                exc_code = resp[2] if len(resp) > 2 else None
-                                if exc_code in (2, 3):  # Illegal Data Address или Illegal Data Value
-                                    logger.debug(f"Регистр {current_addr} (qty={chunk}) вернул Modbus exception code={exc_code} - регистр отсутствует, пропускаем")
-                                    # Для отсутствующих регистров возвращаем пустой список для этого чанка
-                                    parsed = []
-                                    break
-                    except (ConnectionError, OSError, socket.timeout) as e:
-                        # первая попытка может не удаться — повторяем один раз
-                        if attempt == 1:
-                            error_code = getattr(e, 'errno', None)
-                            # Для ошибок соединения пробуем переподключиться
-                            if error_code in (54, 32, 104, 107):
-                                logger.warning(f"Разрыв соединения при чтении регистров {current_addr}-{current_addr+chunk-1}: {e}, пробуем переподключиться...")
-                                if self._reconnect():
-                                    try:
-                                        sock = self._get_underlying_socket()
-                                        if sock:
-                                            sock.settimeout(0.5)
-                                            continue  # Повторяем попытку после переподключения
-                                    except Exception as e2:
-                                        logger.warning(f"Ошибка при повторном чтении после переподключения: {e2}")
-                            else:
-                                logger.warning(f"Direct multi-read failed at addr={current_addr} qty={chunk}: {e}")
-                        time.sleep(0.01)  # Уменьшаем задержку между попытками с 0.02 до 0.01
-
-                if parsed is None:
-                    # Если не удалось прочитать и это не Modbus exception - считаем, что соединение нестабильно
-                    # Но не разрываем соединение сразу - возможно, это временная проблема
-                    logger.debug(f"Не удалось прочитать регистры {current_addr}-{current_addr+chunk-1}, пропускаем чанк")
-                    # Возвращаем пустой список для этого чанка вместо разрыва соединения
-                    parsed = []
-                elif len(parsed) == 0:
-                    # Пустой ответ - регистр отсутствует, это нормально
-                    logger.debug(f"Регистр {current_addr} (qty={chunk}) вернул пустой ответ - регистр отсутствует, пропускаем")
-
-                out.extend(parsed)
-                current_addr += chunk
-                remaining -= chunk
-                # Уменьшаем задержку для ускорения чтения множественных регистров
-                time.sleep(0.001)  # 1 мс вместо 10 мс
-
-            return out
-        finally:
-            if prev_timeout is not None:
-                try:
-                    sock.settimeout(prev_timeout)
-                except Exception:
-                    pass
-
+        remaining = quantity
+        while remaining > 0:
+            chunk = min(max_chunk or self.max_span_for(4, current_addr, 10), remaining)
+            frame = build_read_frame(self.unit_id, 4, current_addr, chunk)
+            what = f"чтении регистров {current_addr}-{current_addr + chunk - 1}"
+            # Потерянный кадр повторяет _transact по retry_policy (после p95 задержки, а не полного таймаута)
+            resp = self._transact_checked(frame, 4, 5 + 2 * chunk, what)
+            if resp is None:
+                logger.debug(f"Не удалось прочитать регистры {current_addr}-{current_addr+chunk-1}, пропускаем чанк")
+            elif resp.is_exception:
+                logger.debug(f"Регистр {current_addr} (qty={chunk}) вернул Modbus exception code={resp.exception_code} - регистр отсутствует, пропускаем")
+            else:
+                out.extend(resp.registers)
+            current_addr += chunk
+            remaining -= chunk
+        return out
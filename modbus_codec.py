@@ -0,0 +1,424 @@
+"""
+Modbus RTU codec: табличный CRC16, сборка кадров запросов и единый разбор ответов FC03/04/06/16.
+Для Modbus TCP те же кадры оборачиваются в заголовок MBAP (to_mbap / decode_mbap).
+Без сокетов и pymodbus — только байты.
+"""
+from __future__ import annotations
+
+import struct
+import sys
+from array import array
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+
+def _make_crc_table() -> tuple[int, ...]:
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 0x0001 else crc >> 1
+        table.append(crc)
+    return tuple(table)
+
+
+_CRC_TABLE = _make_crc_table()
+
+EXCEPTION_MESSAGES = {
+    1: "Illegal Function",
+    2: "Illegal Data Address",
+    3: "Illegal Data Value",
+    4: "Slave Device Failure",
+    5: "Acknowledge",
+    6: "Slave Device Busy",
+    8: "Memory Parity Error",
+}
+
+
+def crc16(data) -> int:
+    """CRC16 Modbus (полином 0xA001), по таблице — один lookup на байт."""
+    crc = 0xFFFF
+    table = _CRC_TABLE
+    for byte in data:
+        crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+    return crc
+
+
+def with_crc(pdu: bytes) -> bytes:
+    """Дописывает CRC (младший байт первым)."""
+    crc = crc16(pdu)
+    return pdu + bytes((crc & 0xFF, crc >> 8))
+
+
+@lru_cache(maxsize=512)
+def build_read_frame(unit_id: int, function: int, address: int, quantity: int) -> bytes:
+    """Кадр FC03/FC04. Кэшируется: фиксированные опросы собираются один раз."""
+    return with_crc(bytes((
+        unit_id, function,
+        (address >> 8) & 0xFF, address & 0xFF,
+        (quantity >> 8) & 0xFF, quantity & 0xFF,
+    )))
+
+
+@lru_cache(maxsize=512)
+def build_write_frame(unit_id: int, address: int, value: int) -> bytes:
+    """Кадр FC06 (Write Single Register)."""
+    value &= 0xFFFF
+    return with_crc(bytes((
+        unit_id, 6,
+        (address >> 8) & 0xFF, address & 0xFF,
+        (value >> 8) & 0xFF, value & 0xFF,
+    )))
+
+
+def build_write_multiple_frame(unit_id: int, address: int, values) -> bytes:
+    """Кадр FC16 (Write Multiple Registers)."""
+    count = len(values)
+    frame = bytearray((
+        unit_id, 16,
+        (address >> 8) & 0xFF, address & 0xFF,
+        (count >> 8) & 0xFF, count & 0xFF,
+        count * 2,
+    ))
+    for v in values:
+        v16 = int(v) & 0xFFFF
+        frame += bytes(((v16 >> 8) & 0xFF, v16 & 0xFF))
+    return with_crc(bytes(frame))
+
+
+def response_length(data, offset: int = 0) -> Optional[int]:
+    """
+    Полная длина кадра ответа, начинающегося с offset (по заголовку),
+    или None, если заголовок ещё не пришёл / функция неизвестна.
+    """
+    if len(data) - offset < 3:
+        return None
+    fn = data[offset + 1]
+    if fn & 0x80:
+        return 5
+    if fn in (3, 4):
+        return 3 + data[offset + 2] + 2
+    if fn in (6, 16):
+        return 8
+    return None
+
+
+def find_frame_start(data, unit_id: int, function: int, start: int = 0) -> int:
+    """
+    Индекс первого кандидата unit_id + function (или function | 0x80), -1 если нет.
+    В ответах иногда бывает мусор в начале — по этому признаку ресинхронизируемся.
+    """
+    exc = function | 0x80
+    for i in range(start, len(data) - 1):
+        if data[i] == unit_id and (data[i + 1] == function or data[i + 1] == exc):
+            return i
+    return -1
+
+
+class RtuResponse(NamedTuple):
+    """
+    Разобранный ответ: registers/payload для FC03/04 (payload — байты данных как на шине),
+    address/value для FC06 (value — quantity для FC16).
+    """
+    function: int
+    exception_code: Optional[int] = None
+    registers: Optional[list] = None
+    address: Optional[int] = None
+    value: Optional[int] = None
+    payload: Optional[bytes] = None
+
+    @property
+    def is_exception(self) -> bool:
+        return self.exception_code is not None
+
+
+def parse_response(data, unit_id: int, function: int) -> Optional[RtuResponse]:
+    """
+    Единый разбор ответа FC03/04/06/16 (и exception response) с проверкой CRC.
+    Мусор до кадра пропускается; None — если полного валидного кадра нет.
+    """
+    pos = find_frame_start(data, unit_id, function)
+    while pos >= 0:
+        length = response_length(data, pos)
+        if length is not None and pos + length <= len(data):
+            frame = data[pos:pos + length]
+            received_crc = frame[-2] | (frame[-1] << 8)
+            if crc16(frame[:-2]) == received_crc:
+                return decode_frame(frame)
+        pos = find_frame_start(data, unit_id, function, pos + 1)
+    return None
+
+
+def response_matches(
+    frame,
+    function: int,
+    length: int,
+    address: Optional[int] = None,
+    value: Optional[int] = None,
+) -> bool:
+    """
+    Относится ли (CRC-валидный) кадр к запросу: exception той же функции, либо та же
+    функция и ожидаемая длина (byte count), а для FC06/FC16 — эхо адреса и значения/количества.
+    """
+    fn = frame[1]
+    if fn == (function | 0x80):
+        return True
+    if fn != function or len(frame) != length:
+        return False
+    if address is not None and ((frame[2] << 8) | frame[3]) != address:
+        return False
+    if value is not None and ((frame[4] << 8) | frame[5]) != value:
+        return False
+    return True
+
+
+def decode_frame(frame) -> RtuResponse:
+    """Разбор уже выделенного кадра с проверенным CRC."""
+    fn = frame[1]
+    if fn & 0x80:
+        return RtuResponse(function=fn & 0x7F, exception_code=frame[2])
+    if fn in (3, 4):
+        payload = bytes(frame[3:3 + frame[2]])
+        registers = list(struct.unpack_from(f">{len(payload) // 2}H", payload))
+        return RtuResponse(function=fn, registers=registers, payload=payload)
+    return RtuResponse(
+        function=fn,
+        address=(frame[2] << 8) | frame[3],
+        value=(frame[4] << 8) | frame[5],
+    )
+
+
+# ----- Modbus TCP (MBAP) -----
+# Заголовок MBAP: transaction id, protocol id (0), длина (unit id + PDU); дальше unit id + PDU без CRC
+MBAP_HEADER_LEN = 6
+
+
+def to_mbap(frame: bytes, transaction_id: int) -> bytes:
+    """RTU кадр запроса (с CRC) → MBAP ADU с заданным transaction id."""
+    return struct.pack(">HHH", transaction_id & 0xFFFF, 0, len(frame) - 2) + frame[:-2]
+
+
+def mbap_frame_length(data) -> Optional[int]:
+    """
+    Полная длина MBAP ADU в начале data; None — заголовок ещё не пришёл.
+    -1 — заголовок невалиден (protocol id ≠ 0 или длина вне 2..254): поток рассинхронизирован.
+    """
+    if len(data) < MBAP_HEADER_LEN:
+        return None
+    protocol = (data[2] << 8) | data[3]
+    length = (data[4] << 8) | data[5]
+    if protocol != 0 or not 2 <= length <= 254:
+        return -1
+    return MBAP_HEADER_LEN + length
+
+
+def decode_mbap(adu, unit_id: int, function: int) -> Optional[RtuResponse]:
+    """
+    Разбор ответа MBAP (без CRC — целостность обеспечивает TCP).
+    None — ответ не от unit_id, не на function или с несогласованным byte count.
+    """
+    body = adu[MBAP_HEADER_LEN:]
+    if len(body) < 3 or body[0] != unit_id:
+        return None
+    fn = body[1]
+    if fn == (function | 0x80):
+        return RtuResponse(function=function, exception_code=body[2])
+    if fn != function:
+        return None
+    if fn in (3, 4):
+        if body[2] != len(body) - 3 or body[2] % 2:
+            return None
+    elif len(body) != 6:
+        return None
+    return decode_frame(body)
+
+
+# Порядок байт float из двух регистров (A,B — байты первого регистра, C,D — второго)
+FLOAT_ORDERS = ("ABCD", "BADC", "CDAB", "DCBA")
+
+
+class RegisterBlock:
+    """
+    Регистры FC03/FC04 поверх байтов ответа (big-endian, как на шине): uint16 и float32
+    в любом порядке слов разбираются одним struct.unpack_from, без списков на каждый регистр.
+    ABCD/DCBA читаются прямо из raw, BADC/CDAB — из одной копии с переставленными байтами в словах.
+    """
+
+    __slots__ = ("raw", "_swapped")
+
+    def __init__(self, raw):
+        self.raw = raw
+        self._swapped: Optional[bytes] = None
+
+    @classmethod
+    def from_registers(cls, registers) -> "RegisterBlock":
+        return cls(struct.pack(f">{len(registers)}H", *registers))
+
+    @classmethod
+    def join(cls, blocks) -> "RegisterBlock":
+        """Склеить блоки (stripes спектра) в один — одна копия байтов."""
+        return cls(b"".join(bytes(b.raw) for b in blocks))
+
+    def __len__(self) -> int:
+        return len(self.raw) // 2
+
+    def registers(self, start: int = 0, count: Optional[int] = None) -> tuple:
+        """uint16 регистры [start, start + count)."""
+        if count is None:
+            count = len(self) - start
+        return struct.unpack_from(f">{count}H", self.raw, start * 2)
+
+    def array(self) -> array:
+        """Все регистры как array('H') (машинный порядок байт)."""
+        words = array("H", bytes(self.raw))
+        if sys.byteorder == "little":
+            words.byteswap()
+        return words
+
+    def _byteswapped(self) -> bytes:
+        if self._swapped is None:
+            words = array("H", bytes(self.raw))
+            words.byteswap()
+            self._swapped = words.tobytes()
+        return self._swapped
+
+    def floats(self, order: str = "ABCD", start: int = 0, count: Optional[int] = None) -> tuple:
+        """
+        float32 из пар регистров, начиная с регистра start; count — число float.
+        CDAB — порядок STM32 (u.w[0], u.w[1]) у NMR/PXE.
+        """
+        if count is None:
+            count = (len(self) - start) // 2
+        if order == "ABCD":
+            return struct.unpack_from(f">{count}f", self.raw, start * 2)
+        if order == "DCBA":
+            return struct.unpack_from(f"<{count}f", self.raw, start * 2)
+        if order == "BADC":
+            return struct.unpack_from(f">{count}f", self._byteswapped(), start * 2)
+        if order == "CDAB":
+            return struct.unpack_from(f"<{count}f", self._byteswapped(), start * 2)
+        raise ValueError(f"Неизвестный порядок float: {order}")
+
+    def float_at(self, start: int, order: str = "ABCD") -> float:
+        return self.floats(order, start, 1)[0]
+
+
+class RxBuffer:
+    """
+    Постоянный приёмный буфер сокета: recv_into прямо в свободный хвост (без конкатенации),
+    кадры вынимаются через memoryview. Чужие/устаревшие ответы отбрасываются по содержимому
+    (response_matches), мусор — ресинхронизацией по unit_id + function.
+    """
+
+    def __init__(self, capacity: int = 4096):
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self._start = 0
+        self._end = 0
+        # Счётчик отброшенных устаревших кадров (ответы на запросы, истёкшие по таймауту)
+        self.stale_frames = 0
+        # Кандидаты в кадр с несошедшимся CRC (шум на линии или ложное начало кадра)
+        self.crc_errors = 0
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def clear(self) -> None:
+        self._start = self._end = 0
+
+    def _compact(self) -> None:
+        pending = self._end - self._start
+        if self._start:
+            self._buf[:pending] = bytes(self._view[self._start:self._end])
+        self._start, self._end = 0, pending
+        if self._end == len(self._buf):
+            # Буфер целиком забит мусором без единого кадра — оставляем последнюю половину
+            keep = len(self._buf) // 2
+            self._buf[:keep] = bytes(self._view[self._end - keep:self._end])
+            self._end = keep
+
+    def fill(self, sock) -> int:
+        """Один recv_into в свободный хвост буфера. 0 — соединение закрыто устройством."""
+        if self._end == len(self._buf):
+            self._compact()
+        n = sock.recv_into(self._view[self._end:])
+        self._end += n
+        return n
+
+    def feed(self, data) -> None:
+        """Дописать байты без сокета (loopback транспорт)."""
+        if len(self._buf) - self._end < len(data):
+            self._compact()
+        n = min(len(data), len(self._buf) - self._end)
+        self._buf[self._end:self._end + n] = data[:n]
+        self._end += n
+
+    def drop_stale(
+        self,
+        unit_id: int,
+        function: int,
+        length: int,
+        address: Optional[int] = None,
+        value: Optional[int] = None,
+    ) -> Optional[bool]:
+        """
+        Первый кадр буфера — запоздавший ответ такой формы? True — отброшен; False — первым идёт
+        другой кадр (устройство отвечает по порядку — запоздавшего ответа уже не будет);
+        None — целого кадра ещё нет.
+        """
+        data = self._view[self._start:self._end]
+        if len(data) < 2:
+            return None
+        if data[0] != unit_id or data[1] not in (function, function | 0x80):
+            return False
+        frame_len = response_length(data)
+        if frame_len is None or len(data) < frame_len:
+            return None
+        frame = data[:frame_len]
+        if crc16(frame[:-2]) != (frame[-2] | (frame[-1] << 8)) or not response_matches(
+            frame, function, length, address, value
+        ):
+            return False
+        self._start += frame_len
+        self.stale_frames += 1
+        if self._start == self._end:
+            self.clear()
+        return True
+
+    def take_frame(
+        self,
+        unit_id: int,
+        function: int,
+        length: int,
+        address: Optional[int] = None,
+        value: Optional[int] = None,
+    ) -> Optional[RtuResponse]:
+        """Вынуть ответ на текущий запрос, если он уже целиком в буфере."""
+        view = self._view
+        while self._start < self._end:
+            data = view[self._start:self._end]
+            pos = find_frame_start(data, unit_id, function)
+            if pos < 0:
+                # Последний байт может оказаться началом кадра
+                self._start = self._end - 1
+                return None
+            self._start += pos
+            data = view[self._start:self._end]
+            frame_len = response_length(data)
+            if frame_len is None or len(data) < frame_len:
+                return None
+            frame = data[:frame_len]
+            if crc16(frame[:-2]) != (frame[-2] | (frame[-1] << 8)):
+                # Ложное начало кадра
+                self.crc_errors += 1
+                self._start += 1
+                continue
+            self._start += frame_len
+            if not response_matches(frame, function, length, address, value):
+                self.stale_frames += 1
+                continue
+            resp = decode_frame(frame)
+            if self._start == self._end:
+                self.clear()
+            return resp
+        return None
@@ -1,12 +1,28 @@
 """
 QML-модель для управления Modbus подключением
 """
-from PySide6.QtCore import QObject, Signal, Property, QTimer, Slot, QThread
+from PySide6.QtCore import QObject, Signal, Property, QTimer, Slot, QThread, QStandardPaths, Qt
 from modbus_client import ModbusClient
+from modbus_codec import RegisterBlock
+from device_profile import device_key
+from modbus_async import AsyncModbusClient, DEFAULT_INFLIGHT_WINDOW
 from clinical_batch import clinical_batch_read
+from spectrum_decode import DecodeJob, DecodePool, decode_ir_spectrum, decode_nmr_spectrum, decode_pxe_chart
+from bus_budget import CONTROL, DEFAULT_BYTES_PER_S, DEFAULT_REQUESTS_PER_S, DISPLAY, SPECTRA, TELEMETRY
+from connection_state import Backoff, CONNECTING, DEGRADED, DISCONNECTED, READY, TASK_STATES, WARMUP
+from task_scheduler import (
+    BULK_SPECTRA,
+    CONTROL_POLLS,
+    DISPLAY_TEXT,
+    INTERACTIVE_READS,
+    TELEMETRY_POLLS,
+    USER_WRITES,
+    ServiceScheduler,
+)
 import logging
-from collections import deque
+import math
 from typing import Callable, Optional, Any
+import os
 import time
 
 logger = logging.getLogger(__name__)
@@ -123,42 +139,32 @@ def _measured_ir_value_to_registers(value: float) -> tuple[int, int]:
 
 
 def _read_measured_ir_uint32(client, low_register: int) -> Optional[float]:
-    high_addr = low_register - 1
-    regs = client.read_input_registers(high_addr, 2)
+    # FC04 или FC03 — какая ответила, запоминает client.register_map
+    regs = client.read_learned(low_register - 1, 2)
     if regs and len(regs) >= 2:
-        v = _measured_ir_registers_to_value(regs[0], regs[1])
-        if v is not None:
-            return v
-    high = client.read_holding_register(high_addr)
-    low = client.read_holding_register(low_register)
-    if high is not None and low is not None:
-        return _measured_ir_registers_to_value(high, low)
+        return _measured_ir_registers_to_value(regs[0], regs[1])
     return None
 
 
 def _read_measured_scalar_register(client, register: int) -> Optional[float]:
-    val = client.read_input_register(register)
-    if val is not None:
-        return float(int(val))
-    val = client.read_holding_register(register)
-    if val is not None:
-        return float(int(val))
+    regs = client.read_learned(register)
+    if regs:
+        return float(int(regs[0]))
     return None
 
 
 def _read_input_regs(client, address: int, count: int = 1) -> Optional[list]:
-    """Чтение input registers через pymodbus; для count=1 возвращает [value] или None."""
+    """Чтение input registers (FC04); для count=1 возвращает [value] или None."""
     if count <= 1:
         val = client.read_input_register(address)
         return [val] if val is not None else None
     return client.read_input_registers(address, count)
 
 
-def _write_measured_ir_uint32(client, low_register: int, value: float) -> bool:
+def _measured_ir_write_values(low_register: int, value: float) -> dict[int, int]:
+    """{high, low} для записи uint32 — соседние регистры, worker отправит их одним FC16."""
     high, low = _measured_ir_value_to_registers(value)
-    ok_high = bool(client.write_holding_register(low_register - 1, high))
-    ok_low = bool(client.write_holding_register(low_register, low))
-    return ok_high and ok_low
+    return {low_register - 1: high, low_register: low}
 
 
 # Additional Parameters (6011-6201)
@@ -192,10 +198,35 @@ def _alicat_torr_to_register(torr: float) -> int:
     return int(round(torr * _ALICAT_TORR_SCALE))
 
 
+# Бюджет времени на один batched-проход: по истечении batch возвращается частично (_partial),
+# вместо того чтобы один пропавший регистр держал весь проход под таймаутом
+_SCREEN01_BATCH_BUDGET_S = 0.6
+_CLINICAL_BATCH_BUDGET_S = 1.2
+
+# Screen01: (address, function[, count]) — read_planner склеивает их в несколько FC04/FC03 диапазонов
+_SCREEN01_READS: tuple = (
+    (1020, 3),
+    (1021, 4), (1111, 4), (1131, 4, 2),
+    (1211, 4), (1221, 4), (1231, 4), (1241, 4), (1251, 4),
+    (1301, 4), (1311, 4), (1321, 4), (1331, 3), (1341, 4),
+    (1411, 4), (1421, 3), (1431, 4),
+    (1511, 4), (1521, 4), (1531, 3), (1541, 4),
+    (1611, 4), (1621, 3), (1651, 4), (1661, 3),
+    (1701, 4),
+    (1811, 4), (1821, 4), (1831, 4), (1841, 4),
+)
+
+
+# Пробы подбора лимита чтения (span_tuner), по одной на область. Регистры идут через 10: область,
+# где диапазон задевает дыру карты (exception 2), подбор пропускает, а не занижает её лимит
+_SPAN_TUNE_PROBES: tuple = ((4, 1021), (4, 3011), (4, 4011), (4, 5010), (4, 6011))
+
+
 def _screen01_batch_read(client: ModbusClient) -> dict:
     """
     Один проход всех регистров Screen01: одно соединение, все чтения подряд без sleep.
     Логика как в screen01_read_all.py — ошибки отдельных регистров не рвут сокет.
+    Регистры читаются склеенными диапазонами FC04/FC03 (read_planner), а не по одному.
     """
     result: dict = {"_conn": False, "_ok": 0}
 
@@ -207,93 +238,108 @@ def _screen01_batch_read(client: ModbusClient) -> dict:
             result[key] = val
             result["_ok"] = int(result["_ok"]) + 1
 
-    v1020 = client.read_holding_register(1020)
-    if v1020 is None:
-        v1020 = client.read_input_register(1020)
+    started = time.monotonic()
+    with client.batch_budget(_SCREEN01_BATCH_BUDGET_S):
+        regs = client.read_plan("screen01", _SCREEN01_READS).execute(client)
+        v1020 = regs.get((3, 1020))
+        if v1020 is None:
+            # FC03 1020 отсутствует на части прошивок — дальше сразу FC04 (register_map)
+            v1020_regs = client.read_learned(1020, functions=(3, 4))
+            v1020 = v1020_regs[0] if v1020_regs else None
+        if client.budget_exhausted:
+            result["_partial"] = True
+    result["_elapsed"] = time.monotonic() - started
+
+    def _ir(address: int) -> Optional[int]:
+        return regs.get((4, address))
+
+    def _hr(address: int) -> Optional[int]:
+        return regs.get((3, address))
+
     _raw("1020", v1020)
 
-    _raw("1021", client.read_input_register(1021))
+    _raw("1021", _ir(1021))
     if "1021" in result:
         result["1021_t"] = time.time()
-    _raw("1111", client.read_input_register(1111))
+    _raw("1111", _ir(1111))
     if "1111" in result:
         result["1111_t"] = time.time()
 
-    fan_regs = client.read_input_registers(1131, 2)
-    if fan_regs is not None and len(fan_regs) >= 2:
-        result["1131"] = {"1131": fan_regs[0], "1132": fan_regs[1]}
+    fan_1131, fan_1132 = _ir(1131), _ir(1132)
+    if fan_1131 is not None and fan_1132 is not None:
+        result["1131"] = {"1131": fan_1131, "1132": fan_1132}
         result["1131_t"] = time.time()
         result["_ok"] = int(result["_ok"]) + 1
 
     ps: dict = {}
-    laser_voltage = _psu_voltage_register_to_volts(client.read_input_register(1211))
+    laser_voltage = _psu_voltage_register_to_volts(_ir(1211))
     if laser_voltage is not None:
         ps["laser_voltage"] = laser_voltage
-    laser_voltage_sp = _psu_voltage_register_to_volts(client.read_input_register(1221))
+    laser_voltage_sp = _psu_voltage_register_to_volts(_ir(1221))
     if laser_voltage_sp is not None:
         ps["laser_voltage_setpoint"] = laser_voltage_sp
-    laser_current = _laser_psu_register_to_amps(client.read_input_register(1231))
+    laser_current = _laser_psu_register_to_amps(_ir(1231))
     if laser_current is not None:
         ps["laser_current"] = laser_current
-    laser_current_sp = _laser_psu_register_to_amps(client.read_input_register(1241))
+    laser_current_sp = _laser_psu_register_to_amps(_ir(1241))
     if laser_current_sp is not None:
         ps["laser_current_setpoint"] = laser_current_sp
-    laser_state_reg = client.read_input_register(1251)
+    laser_state_reg = _ir(1251)
     if laser_state_reg is not None:
         ps["laser_state"] = bool(int(laser_state_reg) & 0x01)
 
-    magnet_voltage = _psu_voltage_register_to_volts(client.read_input_register(1301))
+    magnet_voltage = _psu_voltage_register_to_volts(_ir(1301))
     if magnet_voltage is not None:
         ps["magnet_voltage"] = magnet_voltage
-    magnet_voltage_sp = _psu_voltage_register_to_volts(client.read_input_register(1311))
+    magnet_voltage_sp = _psu_voltage_register_to_volts(_ir(1311))
     if magnet_voltage_sp is not None:
         ps["magnet_voltage_setpoint"] = magnet_voltage_sp
-    magnet_current = _laser_psu_register_to_amps(client.read_input_register(1321))
+    magnet_current = _laser_psu_register_to_amps(_ir(1321))
     if magnet_current is not None:
         ps["magnet_current"] = magnet_current
-    magnet_current_sp = _laser_psu_register_to_amps(client.read_holding_register(1331))
+    magnet_current_sp = _laser_psu_register_to_amps(_hr(1331))
     if magnet_current_sp is not None:
         ps["magnet_current_setpoint"] = magnet_current_sp
-    magnet_state_reg = client.read_input_register(1341)
+    magnet_state_reg = _ir(1341)
     if magnet_state_reg is not None:
         ps["magnet_state"] = bool(int(magnet_state_reg) & 0x01)
     if ps:
         result["power_supply"] = ps
         result["_ok"] = int(result["_ok"]) + 1
 
-    _raw("1331", client.read_holding_register(1331))
-    _raw("1341", client.read_input_register(1341))
+    _raw("1331", _hr(1331))
+    _raw("1341", _ir(1341))
 
     pid: dict = {}
-    temp1411 = client.read_input_register(1411)
+    temp1411 = _ir(1411)
     if temp1411 is not None:
         pid["temperature"] = float(temp1411) / 10.0
-    state1431 = client.read_input_register(1431)
+    state1431 = _ir(1431)
     if state1431 is not None:
         pid["state"] = bool(int(state1431) & 0x01)
     if pid:
         result["pid_controller"] = pid
         result["_ok"] = int(result["_ok"]) + 1
 
-    _raw("1421", client.read_holding_register(1421))
+    _raw("1421", _hr(1421))
 
     wc: dict = {}
-    inlet = client.read_input_register(1511)
+    inlet = _ir(1511)
     if inlet is not None:
         t = _water_chiller_inlet_temp_register_to_celsius(inlet)
         if t is not None:
             wc["inlet_temperature"] = t
-    outlet = client.read_input_register(1521)
+    outlet = _ir(1521)
     if outlet is not None:
         t = _water_chiller_outlet_temp_register_to_celsius(outlet)
         if t is not None:
             wc["outlet_temperature"] = t
-    sp1531 = client.read_holding_register(1531)
+    sp1531 = _hr(1531)
     if sp1531 is not None:
         sp = _water_chiller_setpoint_register_to_celsius(sp1531)
         if sp is not None:
             wc["setpoint"] = sp
-    state1541 = client.read_input_register(1541)
+    state1541 = _ir(1541)
     if state1541 is not None:
         wc["state"] = bool(int(state1541) & 0x01)
     if wc:
@@ -301,22 +347,22 @@ def _screen01_batch_read(client: ModbusClient) -> dict:
         result["_ok"] = int(result["_ok"]) + 1
 
     alicats: dict = {}
-    xenon_value = client.read_input_register(1611)
+    xenon_value = _ir(1611)
     if xenon_value is not None:
         torr = _alicat_register_to_torr(xenon_value)
         if torr is not None:
             alicats["xenon_pressure"] = torr
-    xenon_sp = client.read_holding_register(1621)
+    xenon_sp = _hr(1621)
     if xenon_sp is not None:
         torr = _alicat_register_to_torr(xenon_sp)
         if torr is not None:
             alicats["xenon_setpoint"] = torr
-    n2_value = client.read_input_register(1651)
+    n2_value = _ir(1651)
     if n2_value is not None:
         torr = _alicat_register_to_torr(n2_value)
         if torr is not None:
             alicats["n2_pressure"] = torr
-    n2_sp = client.read_holding_register(1661)
+    n2_sp = _hr(1661)
     if n2_sp is not None:
         torr = _alicat_register_to_torr(n2_sp)
         if torr is not None:
@@ -325,19 +371,19 @@ def _screen01_batch_read(client: ModbusClient) -> dict:
         result["alicats"] = alicats
         result["_ok"] = int(result["_ok"]) + 1
 
-    _raw("1701", client.read_input_register(1701))
+    _raw("1701", _ir(1701))
 
     laser: dict = {}
-    beam = client.read_input_register(1811)
+    beam = _ir(1811)
     if beam is not None:
         laser["beam_state"] = bool(int(beam) & 0x01)
-    mpd = client.read_input_register(1821)
+    mpd = _ir(1821)
     if mpd is not None:
         laser["mpd"] = float(mpd)
-    out_pwr = client.read_input_register(1831)
+    out_pwr = _ir(1831)
     if out_pwr is not None:
         laser["output_power"] = float(out_pwr)
-    temp1841 = client.read_input_register(1841)
+    temp1841 = _ir(1841)
     if temp1841 is not None:
         t = _laser_temp_register_to_celsius(temp1841)
         if t is not None:
@@ -350,10 +396,26 @@ def _screen01_batch_read(client: ModbusClient) -> dict:
     return result
 
 
+class _WriteTask:
+    """Задача записи: произвольная func или набор регистров values {address: value} (склеиваются в FC16)."""
+
+    __slots__ = ("key", "func", "values", "meta")
+
+    def __init__(self, key: str, func: Optional[Callable[[], bool]], values: Optional[dict], meta: object):
+        self.key = key
+        self.func = func
+        self.values = values
+        self.meta = meta
+
+
 class _ModbusIoWorker(QObject):
     """
     Выполняет блокирующие Modbus операции в отдельном потоке.
 
+    Состояние соединения (connection_state): DISCONNECTED → CONNECTING → WARMUP → READY ⇄ DEGRADED.
+    Повторы подключения и warm-up probe идут по single-shot таймерам (без sleep в потоке),
+    задачи из очередей выполняются только в READY/DEGRADED.
+
     Важно: никаких обращений к QML/GUI здесь быть не должно.
     """
 
@@ -361,19 +423,149 @@ class _ModbusIoWorker(QObject):
     disconnected = Signal()
     readFinished = Signal(str, object)  # key, value
     writeFinished = Signal(str, bool, object)  # key, success, meta
+    connectionStateChanged = Signal(str, str)  # state, reason
+    writeRejected = Signal(str, str)  # key, reason
+    # Внутренний: результат декодирования спектра из потока пула — в поток worker'а (key, поколение, payload)
+    _decodeDone = Signal(str, int, object)
+
+    _MAX_RECONNECT_ATTEMPTS = 5
+    _WARMUP_PROBES = 3
+    _WARMUP_RETRY_MS = 100
+    # Keep-alive probe — только если по каналу ничего не отправлялось дольше этого
+    _KEEPALIVE_IDLE_MS = 1000
+    # Задачи выполняются подряд, пока не истечёт квант, и только потом — возврат в event loop
+    _DRAIN_SLICE_MS = 5
+    # Как часто писать в лог статистику обработки очереди (задач/с, накладные event loop)
+    _DRAIN_STATS_INTERVAL_S = 60.0
 
     def __init__(self, parent: Optional[QObject] = None):
         super().__init__(parent)
         self._client: Optional[ModbusClient] = None
 
-        self._read_queue: deque = deque()
-        self._write_queue: deque = deque()  # приоритетные задачи (записи)
+        # Классы обслуживания: чтения (key → func) и записи (key → _WriteTask) со старением и сроками
+        self._scheduler = ServiceScheduler()
+        self._write_queue = self._scheduler.queue(USER_WRITES)
+        # Поколение опроса (setGeneration): чтение в очереди хранится как (func, поколение постановки)
+        self._generation = 0
         self._processing = False
         self._last_spectrum: dict[str, Any] = {}
+        # False — одна задача на тик таймера (прежний режим, для сравнения статистики)
+        self.drain_mode = True
+        # Пул декодирования спектров (DecodeJob); None — декодируем в этом же потоке
+        self.decode_pool: Optional[DecodePool] = None
+        # Статистика очереди: когда таймер взведён (для накладных event loop), задачи, пробуждения, время
+        self._armed_at = 0.0
+        self._reset_drain_stats()
+        # Бюджет шины: через сколько секунд освободится ближайшая отложенная категория (0 — ничего не отложено)
+        self._shape_wait = 0.0
+
+        self._state = DISCONNECTED
+        self._backoff = Backoff()
+        self._reconnecting = False  # True — восстановление после обрыва (с повторами), False — подключение из UI
+        self._warmup_attempts = 0
 
         self._task_timer = QTimer(self)
         self._task_timer.setSingleShot(True)
         self._task_timer.timeout.connect(self._process_one)
+        self._decodeDone.connect(self._onDecodeDone, Qt.ConnectionType.QueuedConnection)
+
+        self._connect_timer = QTimer(self)
+        self._connect_timer.setSingleShot(True)
+        self._connect_timer.timeout.connect(self._attemptConnect)
+
+        self._warmup_timer = QTimer(self)
+        self._warmup_timer.setSingleShot(True)
+        self._warmup_timer.timeout.connect(self._warmupProbe)
+
+        self._keepalive_timer = QTimer(self)
+        self._keepalive_timer.setSingleShot(True)
+        self._keepalive_timer.timeout.connect(self._keepAlive)
+
+    # Задачи сеанса, а не экрана: смена поколения опроса их не снимает
+    _SESSION_READ_KEYS = frozenset(("bulk_check", "span_tune"))
+    # Чтения состояния реле/клапанов/вентиляторов — опрос управления, остальное — телеметрия
+    _CONTROL_POLL_KEYS = frozenset(("screen01", "1020", "1021", "1111", "1131", "bulk_check"))
+
+    @classmethod
+    def _read_class(cls, key: str, priority: bool) -> str:
+        """Класс обслуживания задачи чтения (priority — из enqueueReadPriority)."""
+        if key in ("ir", "nmr", "pxe", "span_tune"):
+            return BULK_SPECTRA
+        if key == "display_text":
+            return DISPLAY_TEXT
+        if priority:
+            return INTERACTIVE_READS
+        if key in cls._CONTROL_POLL_KEYS:
+            return CONTROL_POLLS
+        return TELEMETRY_POLLS
+
+    @staticmethod
+    def _bus_category(key: str) -> str:
+        """Категория бюджета шины для задачи чтения."""
+        if key in ("ir", "nmr", "pxe"):
+            return SPECTRA
+        if key == "display_text":
+            return DISPLAY
+        if key in ("bulk_check", "span_tune"):
+            return CONTROL
+        return TELEMETRY
+
+    def _set_state(self, state: str, reason: str = ""):
+        if state == self._state:
+            return
+        logger.info(f"Соединение: {self._state} → {state}" + (f" ({reason})" if reason else ""))
+        self._state = state
+        self.connectionStateChanged.emit(state, reason)
+
+    def _kick(self):
+        # Таймер, взведённый на ожидание бюджета шины, перевзводится: новая задача может быть из другой категории
+        if self._scheduler and not self._processing and (not self._task_timer.isActive() or self._shape_wait):
+            self._arm()
+
+    def _arm(self):
+        """Следующий квант обработки очереди — после возврата в event loop."""
+        self._shape_wait = 0.0
+        self._armed_at = time.perf_counter()
+        self._task_timer.start(0)
+
+    def _arm_shaped(self, wait: float):
+        """Все классы с задачами выбрали бюджет шины — квант через wait секунд (в накладные не входит)."""
+        self._shape_wait = wait
+        self._armed_at = 0.0
+        self._task_timer.start(max(1, math.ceil(wait * 1000)))
+
+    def _admit(self, name: str, key, value) -> bool:
+        """Бюджет шины: категория задачи в долгу — класс откладывается (next_class берёт следующий)."""
+        if self._client is None:
+            return True
+        category = CONTROL if name == USER_WRITES else self._bus_category(key)
+        wait = self._client.bus_budget.delay(category)
+        if wait <= 0:
+            return True
+        self._client.bus_budget.note_throttled(category, wait)
+        self._shape_wait = wait if not self._shape_wait else min(self._shape_wait, wait)
+        return False
+
+    def _reset_drain_stats(self):
+        self._stats_since = time.perf_counter()
+        self._stats_tasks = 0
+        self._stats_wakeups = 0
+        self._stats_busy = 0.0
+        self._stats_overhead = 0.0
+
+    def drain_stats(self) -> dict:
+        """Задач/с, задач на пробуждение и накладные event loop (от взвода таймера до начала кванта)."""
+        elapsed = max(1e-9, time.perf_counter() - self._stats_since)
+        wakeups = max(1, self._stats_wakeups)
+        return {
+            "drain_mode": self.drain_mode,
+            "tasks": self._stats_tasks,
+            "tasks_per_s": self._stats_tasks / elapsed,
+            "tasks_per_wakeup": self._stats_tasks / wakeups,
+            "busy_ratio": self._stats_busy / elapsed,
+            "loop_overhead_ms": self._stats_overhead / wakeups * 1000.0,
+            "loop_overhead_per_task_ms": self._stats_overhead / max(1, self._stats_tasks) * 1000.0,
+        }
 
     @Slot(object)
     def setClient(self, client: Optional[ModbusClient]):
@@ -381,92 +573,430 @@ class _ModbusIoWorker(QObject):
 
     @Slot()
     def connectClient(self):
-        """Подключение в worker-потоке (может блокировать)."""
+        """Подключение из UI: одна попытка, затем warm-up probe."""
         if self._client is None:
             self.connectFinished.emit(False, "Modbus client is not initialized")
             return
+        self._connect_timer.stop()
+        self._warmup_timer.stop()
+        self._reconnecting = False
+        self._backoff.reset()
+        self._attemptConnect()
+
+    @Slot()
+    def reconnectClient(self):
+        """Восстановление после обрыва: повторы с экспоненциальным backoff + jitter по таймеру."""
+        if self._client is None:
+            self.connectFinished.emit(False, "Modbus client is not initialized")
+            return
+        if self._state in (CONNECTING, WARMUP) or self._connect_timer.isActive():
+            return  # уже восстанавливаемся
+        self._reconnecting = True
+        self._backoff.reset()
+        self._set_state(CONNECTING, "reconnect")
+        self._connect_timer.start(0)
+
+    @Slot()
+    def _attemptConnect(self):
+        if self._client is None:
+            return
+        self._set_state(CONNECTING)
         try:
+            if self._reconnecting:
+                self._client.reset_reconnect_backoff()
             ok = bool(self._client.connect())
-            if ok:
-                self.connectFinished.emit(True, "")
-            else:
-                self.connectFinished.emit(False, "Connection Failed")
+            error = "" if ok else "Connection Failed"
         except Exception as e:
-            self.connectFinished.emit(False, str(e))
+            ok = False
+            error = str(e)
+        if ok:
+            self._warmup_attempts = 0
+            self._set_state(WARMUP)
+            self._warmup_timer.start(0)
+            return
+        if self._reconnecting and self._backoff.attempts < self._MAX_RECONNECT_ATTEMPTS:
+            delay_ms = int(self._backoff.next_delay() * 1000)
+            logger.info(
+                f"Переподключение не удалось, повтор через {delay_ms} мс "
+                f"({self._backoff.attempts}/{self._MAX_RECONNECT_ATTEMPTS})"
+            )
+            self._connect_timer.start(delay_ms)
+            return
+        self._reconnecting = False
+        self._set_state(DISCONNECTED, error)
+        self._reject_pending_writes(error or "not connected")
+        self.connectFinished.emit(False, error)
+
+    @Slot()
+    def _warmupProbe(self):
+        """Первый запрос после подключения — вместо фиксированной паузы."""
+        if self._client is None or self._state != WARMUP:
+            return
+        if self._client.probe():
+            self._finish_connect(READY, "")
+            return
+        self._warmup_attempts += 1
+        if self._warmup_attempts < self._WARMUP_PROBES and self._client.is_connected():
+            self._warmup_timer.start(self._WARMUP_RETRY_MS * self._warmup_attempts)
+            return
+        # TCP открыт, но устройство молчит — работаем, пока задачи не покажут обратное
+        self._finish_connect(DEGRADED, "warm-up probe failed")
+
+    def _finish_connect(self, state: str, reason: str):
+        self._reconnecting = False
+        self._backoff.reset()
+        self._set_state(state, reason)
+        self.connectFinished.emit(True, "")
+        self._kick()
+        self._schedule_keepalive()
+
+    def _schedule_keepalive(self):
+        """Keep-alive по простою канала: таймер до момента, когда простой достигнет порога."""
+        if self._client is None or self._state not in TASK_STATES:
+            return
+        idle_ms = int(self._client.liveness.idle_for() * 1000)
+        self._keepalive_timer.start(max(0, self._KEEPALIVE_IDLE_MS - idle_ms))
+
+    @Slot()
+    def _keepAlive(self):
+        """Канал простаивал — один дешёвый запрос, чтобы обрыв обнаружился без ожидания опроса."""
+        if self._client is None or self._state not in TASK_STATES:
+            return
+        if self._scheduler or self._processing:
+            return  # задачи сами покажут, жив ли канал; таймер перезапустит _process_one
+        if self._client.liveness.idle_for() * 1000 >= self._KEEPALIVE_IDLE_MS:
+            self._update_link_state(self._client.probe())
+        self._schedule_keepalive()
+
+    def _reject_pending_writes(self, reason: str):
+        while self._write_queue:
+            _, task = self._write_queue.pop()
+            self.writeRejected.emit(task.key, reason)
+            self.writeFinished.emit(task.key, False, task.meta)
 
     @Slot()
     def disconnectClient(self):
         """Отключение в worker-потоке."""
         try:
             # На отключение очищаем очереди, чтобы не выполнять старые задачи.
-            self._read_queue.clear()
-            self._write_queue.clear()
+            self._connect_timer.stop()
+            self._warmup_timer.stop()
+            self._keepalive_timer.stop()
+            self._reconnecting = False
+            self._scheduler.clear()
             if self._client is not None:
                 self._client.disconnect()
         finally:
+            self._set_state(DISCONNECTED, "disconnect")
             self.disconnected.emit()
 
     @Slot(str, object)
     def enqueueRead(self, key: str, func: Callable[[], Any]):
-        if any(k == key for k, _ in self._read_queue):
-            return
-        self._read_queue.append((key, func))
-        if not self._task_timer.isActive() and not self._processing:
-            self._task_timer.start(0)
+        # Ключ уже ждёт в очереди — остаётся на своём месте, но с новым замыканием
+        self._scheduler.push(self._read_class(key, False), key, (func, self._read_generation(key)))
+        self._kick()
 
     @Slot(str, object)
     def enqueueReadPriority(self, key: str, func: Callable[[], Any]):
-        """Поставить задачу чтения в начало очереди (для IR/NMR спектров)."""
-        self._read_queue = deque((k, f) for k, f in self._read_queue if k != key)
-        self._read_queue.appendleft((key, func))
-        if not self._task_timer.isActive() and not self._processing:
-            self._task_timer.start(0)
+        """Поставить задачу чтения в более срочный класс (проверка после записи, connect/resume)."""
+        self._scheduler.push(self._read_class(key, True), key, (func, self._read_generation(key)))
+        self._kick()
+
+    def _read_generation(self, key: str) -> Optional[int]:
+        return None if key in self._SESSION_READ_KEYS else self._generation
+
+    @Slot(int)
+    def setGeneration(self, generation: int):
+        """
+        Новое поколение опроса (смена экрана, пауза, переподключение): чтения прежних поколений
+        снимаются из очереди, не выполняясь. Флаги in-flight в GUI-потоке сброшены при смене поколения.
+        """
+        if generation <= self._generation:
+            return
+        self._generation = generation
+        dropped = self._scheduler.discard(
+            lambda name, key, value: name != USER_WRITES and value[1] is not None and value[1] < generation
+        )
+        if dropped:
+            logger.debug(
+                f"Поколение опроса {generation}: сняты устаревшие чтения {', '.join(key for _, key, _ in dropped)}"
+            )
+
+    @Slot(float, float)
+    def setBusLimits(self, requests_per_s: float, bytes_per_s: float):
+        """Заданные лимиты шины (потолок для подстройки по обрывам канала)."""
+        if self._client is not None:
+            self._client.bus_budget.set_limits(requests_per_s, bytes_per_s)
+
+    def _adapt_bus_budget(self, link_failed: bool):
+        """Подстроить лимит шины по фактической нагрузке (и обрыву канала); подобранный уходит в профиль."""
+        client = self._client
+        if client is None:
+            return
+        budget = client.bus_budget
+        usage = client.bus_stats()["usage"]
+        if budget.adapt(usage, link_failed):
+            logger.info(
+                f"Лимит шины {budget.requests_per_s:.0f} запросов/с, {budget.bytes_per_s:.0f} байт/с "
+                f"(нагрузка {usage['requests_per_s']:.0f} запросов/с, {usage['bytes_per_s']:.0f} байт/с"
+                f"{', обрыв канала' if link_failed else ''})"
+            )
+
+    @Slot(str)
+    def cancelRead(self, key: str):
+        """Убрать ещё не выполненное чтение из очереди."""
+        self._scheduler.remove(key)
 
     @Slot(str, object, object)
     def enqueueWrite(self, key: str, func: Callable[[], bool], meta: object = None):
-        # Записи имеют приоритет
-        self._write_queue.append((key, func, meta))
-        if not self._task_timer.isActive() and not self._processing:
-            self._task_timer.start(0)
+        self._enqueue_write_task(_WriteTask(key, func, None, meta))
+
+    @Slot(str, object, object)
+    def enqueueRegisterWrite(self, key: str, values: dict, meta: object = None):
+        """Запись регистров {address: value}: соседние адреса из очереди уходят одним FC16."""
+        self._enqueue_write_task(_WriteTask(key, None, dict(values), meta))
+
+    def _enqueue_write_task(self, task: _WriteTask):
+        if self._state == DISCONNECTED:
+            # Некуда писать и никто не переподключается — отклоняем сразу, а не копим
+            self.writeRejected.emit(task.key, "not connected")
+            self.writeFinished.emit(task.key, False, task.meta)
+            return
+        # Last-write-wins: новое значение заменяет ещё не отправленную запись того же ключа/адреса
+        if not self._write_queue.push(task.key, task):
+            logger.debug(f"Запись {task.key} заменила ожидающую в очереди")
+        if task.values:
+            self._drop_superseded_addresses(task)
+        # Записи имеют приоритет; во время CONNECTING/WARMUP ждут в очереди до READY
+        if self._state not in TASK_STATES:
+            logger.info(f"Запись {task.key} отложена до восстановления соединения ({self._state})")
+        self._kick()
+
+    def _drop_superseded_addresses(self, task: _WriteTask):
+        """Адреса task убираются из остальных ожидающих записей регистров (пустые записи выпадают)."""
+        stale = []
+        for _, pending in self._write_queue.items():
+            if pending is task:
+                continue
+            if pending.values:
+                for address in task.values:
+                    pending.values.pop(address, None)
+                if not pending.values:
+                    stale.append(pending)
+        for pending in stale:
+            self._write_queue.remove(pending.key)
+
+    def _run_register_writes(self):
+        """Все записи регистров подряд с головы очереди — одним write_many (FC16 для соседних адресов)."""
+        tasks = []
+        while self._write_queue and self._write_queue.peek()[1].values is not None:
+            tasks.append(self._scheduler.pop(USER_WRITES)[1])
+        merged: dict[int, int] = {}
+        for task in tasks:
+            merged.update(task.values)
+        try:
+            if self._client is not None:
+                with self._client.bus_category(CONTROL):
+                    results = self._client.write_many(merged)
+            else:
+                results = {}
+        except Exception:
+            logger.exception("Modbus register write task failed")
+            results = {}
+        ok_all = True
+        for task in tasks:
+            ok = all(results.get(address, False) for address in task.values)
+            ok_all = ok_all and ok
+            self.writeFinished.emit(task.key, ok, task.meta)
+        return ok_all
 
     @Slot()
     def _process_one(self):
+        """
+        Квант обработки очереди: задачи подряд, пока очередь не пуста и не истёк _DRAIN_SLICE_MS
+        (drain_mode=False — ровно одна задача), затем возврат в event loop.
+        """
         if self._processing:
             # на всякий случай
             self._task_timer.start(1)
             return
 
-        if not self._write_queue and not self._read_queue:
+        if self._state not in TASK_STATES:
+            # Очереди сохраняются; _finish_connect() запустит обработку
             return
 
+        if not self._scheduler:
+            return
+
+        started = time.perf_counter()
+        if self._armed_at:
+            self._stats_overhead += started - self._armed_at
+            self._armed_at = 0.0
+        self._stats_wakeups += 1
+        deadline = started + self._DRAIN_SLICE_MS / 1000.0
         self._processing = True
         try:
-            if self._write_queue:
-                key, func, meta = self._write_queue.popleft()
-                try:
-                    ok = bool(func())
-                except Exception:
-                    logger.exception("Modbus write task failed")
-                    ok = False
-                self.writeFinished.emit(key, ok, meta)
-            else:
-                key, func = self._read_queue.popleft()
-                try:
-                    value = func()
-                except Exception:
-                    logger.exception("Modbus read task failed")
-                    value = None
-                if key in ("ir", "nmr", "pxe"):
-                    # Большой dict через QueuedConnection даёт SIGSEGV — кладём в слот потока.
-                    self._last_spectrum[key] = value
-                    self.readFinished.emit(key, bool(value is not None))
-                else:
-                    self.readFinished.emit(key, value)
+            while True:
+                ok_result = self._run_next_task()
+                if ok_result is None:
+                    break  # задачи сняты по сроку или отложены до бюджета шины
+                self._stats_tasks += 1
+                self._update_link_state(ok_result)
+                if (
+                    not self.drain_mode
+                    or self._state not in TASK_STATES
+                    or not self._scheduler
+                    or time.perf_counter() >= deadline
+                ):
+                    break
         finally:
             self._processing = False
-            # Быстро вычерпываем очередь, но даем event loop шанс обработать события.
-            if self._write_queue or self._read_queue:
-                self._task_timer.start(0)
+            now = time.perf_counter()
+            self._stats_busy += now - started
+            if now - self._stats_since >= self._DRAIN_STATS_INTERVAL_S:
+                stats = self.drain_stats()
+                logger.info(
+                    f"Очередь Modbus: {stats['tasks_per_s']:.1f} задач/с, {stats['tasks_per_wakeup']:.1f} задач "
+                    f"на квант, накладные event loop {stats['loop_overhead_ms']:.2f} мс на квант "
+                    f"({stats['loop_overhead_per_task_ms']:.2f} мс на задачу), занятость {stats['busy_ratio']:.0%}"
+                )
+                self._log_scheduler_stats()
+                self._reset_drain_stats()
+                self._adapt_bus_budget(False)
+            # Очередь не пуста — следующий квант после событий event loop (сигналы, таймеры)
+            if self._scheduler and self._shape_wait:
+                self._arm_shaped(self._shape_wait)
+            elif self._scheduler:
+                self._arm()
+            else:
+                self._schedule_keepalive()
+
+    def _run_next_task(self) -> Optional[bool]:
+        """
+        Одна задача класса, выбранного планировщиком. True — задача прошла успешно,
+        None — выполнять нечего (оставшиеся задачи сняты по сроку или их категории выбрали
+        бюджет шины — тогда _shape_wait > 0).
+        """
+        client = self._client
+        self._shape_wait = 0.0
+        name = self._scheduler.next_class(self._on_task_expired, self._admit)
+        if name is None:
+            return None
+        if name == USER_WRITES and self._write_queue.peek()[1].values is not None:
+            return self._run_register_writes()
+        if name == USER_WRITES:
+            _, task = self._scheduler.pop(USER_WRITES)
+            try:
+                with client.bus_category(CONTROL):
+                    ok = bool(task.func())
+            except Exception:
+                logger.exception("Modbus write task failed")
+                ok = False
+            self.writeFinished.emit(task.key, ok, task.meta)
+            return ok
+        key, (func, _) = self._scheduler.pop(name)
+        try:
+            with client.bus_category(self._bus_category(key)):
+                value = func()
+        except Exception:
+            logger.exception("Modbus read task failed")
+            value = None
+        if isinstance(value, DecodeJob):
+            self._decode_spectrum(key, value)
+            return True
+        if key in ("ir", "nmr", "pxe"):
+            # Большой dict через QueuedConnection даёт SIGSEGV — кладём в слот потока.
+            self._last_spectrum[key] = value
+            self.readFinished.emit(key, bool(value is not None))
+        else:
+            self.readFinished.emit(key, value)
+        return value is not None
+
+    def _decode_spectrum(self, key: str, job: DecodeJob):
+        """
+        Регистры спектра прочитаны — декодирование уходит в пул, а поток I/O сразу берёт
+        следующую задачу. Готовый payload возвращается в поток worker'а queued-сигналом
+        _decodeDone вместе с поколением опроса на момент отправки в пул (_onDecodeDone).
+        """
+        generation = self._generation
+
+        def done(future):
+            if future.cancelled():
+                return
+            try:
+                payload = future.result()
+            except Exception:
+                logger.exception(f"Decoding {key} spectrum failed")
+                payload = None
+            self._decodeDone.emit(key, generation, payload)
+
+        if self.decode_pool is None:
+            try:
+                payload = job.run()
+            except Exception:
+                logger.exception(f"Decoding {key} spectrum failed")
+                payload = None
+            self._onDecodeDone(key, generation, payload)
+            return
+        self.decode_pool.submit(job).add_done_callback(done)
+
+    @Slot(str, int, object)
+    def _onDecodeDone(self, key: str, generation: int, payload: object):
+        """
+        Спектр декодирован (в потоке worker'а). Готов уже после смены поколения опроса (пауза,
+        смена экрана, отключение) — отбрасывается, как снятое из очереди чтение.
+        """
+        if generation != self._generation:
+            logger.debug(f"Спектр {key} декодирован для поколения опроса {generation}, текущее {self._generation} — отброшен")
+            return
+        self._last_spectrum[key] = payload
+        self.readFinished.emit(key, payload is not None)
+
+    def _on_task_expired(self, name: str, key: str, value: Any):
+        """Задача не дождалась шины до срока класса — отвечаем как на неудачу, не отправляя запрос."""
+        logger.debug(f"Задача {key} ({name}) снята по сроку, не отправлялась")
+        if name == USER_WRITES:
+            self.writeRejected.emit(key, "deadline expired")
+            self.writeFinished.emit(key, False, value.meta)
+        elif key in ("ir", "nmr", "pxe"):
+            self._last_spectrum.pop(key, None)
+            self.readFinished.emit(key, False)
+        else:
+            self.readFinished.emit(key, None)
+
+    def scheduler_stats(self) -> dict:
+        return self._scheduler.stats()
+
+    def _log_scheduler_stats(self):
+        parts = []
+        for name, stats in self._scheduler.stats().items():
+            if stats["served"] or stats["expired"] or stats["discarded"]:
+                parts.append(
+                    f"{name}: {stats['served']} (снято по сроку {stats['expired']}, устаревших {stats['discarded']}, "
+                    f"ожидание ср. {stats['wait_avg_ms']:.0f} / макс. {stats['wait_max_ms']:.0f} мс)"
+                )
+        if parts:
+            logger.info("Классы задач Modbus: " + "; ".join(parts))
+        self._scheduler.reset_stats()
+
+    def _update_link_state(self, ok: bool):
+        """
+        READY ⇄ DEGRADED по результату задачи. Потеря сокета или мёртвый канал (liveness: таймауты
+        подряд / ошибка сокета) — восстановление по таймеру.
+        """
+        if self._client is None or self._state not in TASK_STATES:
+            return
+        liveness = self._client.liveness
+        if not self._client.is_connected() or liveness.dead:
+            reason = liveness.socket_error or (
+                f"{liveness.consecutive_timeouts} timeouts in a row" if liveness.dead else "link lost"
+            )
+            self._keepalive_timer.stop()
+            self._adapt_bus_budget(True)
+            self._set_state(DEGRADED, reason)
+            self.reconnectClient()
+        elif ok and self._state == DEGRADED:
+            self._set_state(READY)
 
 
 class ModbusManager(QObject):
@@ -475,6 +1005,9 @@ class ModbusManager(QObject):
     _POLL_INTERVAL_FAST_MS = 100
     _POLL_INTERVAL_NORMAL_MS = 150
     _POLL_INTERVAL_SLOW_MS = 500
+    # Пул декодирования спектров: "thread" или "process" (см. spectrum_decode.DecodePool)
+    _DECODE_POOL_KIND = "thread"
+    _DECODE_POOL_WORKERS = 2
 
     _REGISTER_KEY_TO_ADDRESS = {
         "1021": 1021,
@@ -646,14 +1179,27 @@ class ModbusManager(QObject):
     pxeChartChanged = Signal('QVariantMap')  # payload: {samples,fit_type,x_min,x_max,y_min,y_max,points,...}; QML overlay uses fit_type 0/1/3
     # Logging signal for Clinicalmode screen
     logMessageChanged = Signal(str)  # log message to display in logs TextArea
+    # Состояние соединения (connection_state): disconnected/connecting/warmup/ready/degraded
+    linkStateChanged = Signal(str)
 
     # Внутренние сигналы (НЕ для QML): отправка задач в worker-поток
     _workerSetClient = Signal(object)
     _workerConnect = Signal()
+    _workerReconnect = Signal()  # восстановление после обрыва (backoff в worker)
     _workerDisconnect = Signal()
     _workerEnqueueRead = Signal(str, object)
-    _workerEnqueueReadPriority = Signal(str, object)  # для IR/NMR — в начало очереди
+    _workerEnqueueReadPriority = Signal(str, object)  # интерактивные чтения — более срочный класс
     _workerEnqueueWrite = Signal(str, object, object)
+    _workerEnqueueRegisterWrite = Signal(str, object, object)  # key, {address: value}, meta
+    _workerSetGeneration = Signal(int)  # поколение опроса: чтения прежних поколений снимаются
+    _workerSetBusLimits = Signal(float, float)  # requests_per_s, bytes_per_s
+    # Второй канал (отдельное TCP соединение + свой worker) для IR/NMR/PXE
+    _bulkSetClient = Signal(object)
+    _bulkConnect = Signal()
+    _bulkDisconnect = Signal()
+    _bulkEnqueueRead = Signal(str, object)
+    _bulkSetGeneration = Signal(int)
+    _bulkSetBusLimits = Signal(float, float)
     
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -662,7 +1208,6 @@ class ModbusManager(QObject):
         self._connection_in_progress = False
         self._reconnect_polling_stopped = False
         self._last_modbus_ok_time = 0.0
-        self._last_reconnect_attempt_time = 0.0
         self._status_text = "Disconnected"
         self._connection_button_text = "Connect"  # Текст кнопки подключения: "Connect" или "Disconnect"
         # Список проблемных регистров, которые вызывают разрыв соединения
@@ -878,18 +1423,37 @@ class ModbusManager(QObject):
         self._register_cache = {}  # address -> value
         # Флаг паузы опросов (чтобы при переключении экранов не блокировать UI)
         self._polling_paused = False
-        # Время последнего возобновления опроса (для игнорирования проверки соединения сразу после возобновления)
-        self._polling_resumed_time = 0.0
+        # Поколение опроса: растёт при смене экрана, паузе, переподключении и отключении
+        self._poll_generation = 0
+        # Идёт подбор диапазона чтения (tuneReadSpans); опрос поставлен на паузу им самим
+        self._span_tuning = False
+        self._span_tune_paused = False
         
         # Статичные параметры подключения к XeUS driver
         self._host = "192.168.4.1"
         self._port = 503
         self._unit_id = 1
-        
-        # Таймер для периодической проверки подключения и keep-alive
-        self._connection_check_timer = QTimer(self)
-        self._connection_check_timer.timeout.connect(self._check_connection)
-        self._connection_check_timer.setInterval(500)  # Проверка каждые 0.5 секунды + keep-alive
+        # Транспорт: "pymodbus" (по умолчанию), "socket" (свой TCP сокет без pymodbus)
+        # или "asyncio" (modbus_async, конвейер до _inflight_window запросов)
+        self._io_transport = "pymodbus"
+        self._inflight_window = DEFAULT_INFLIGHT_WINDOW
+        # Фрейминг: "rtu" (по умолчанию), "tcp" (Modbus TCP / MBAP) или "auto" (probe MBAP, иначе RTU).
+        # MBAP поддерживает только asyncio транспорт — при "tcp"/"auto" он выбирается автоматически.
+        self._framer = "rtu"
+        # Лимиты шины на канал (busRequestsPerSecond/busBytesPerSecond): потолок, ниже него клиент
+        # подстраивает лимит по обрывам канала и хранит подобранный в профиле устройства
+        self._bus_requests_per_s = DEFAULT_REQUESTS_PER_S
+        self._bus_bytes_per_s = DEFAULT_BYTES_PER_S
+        self._link_state = DISCONNECTED
+        # Второе соединение для спектров (dualChannel): управление не ждёт за многосекундным чтением stripes.
+        # _bulk_ready — канал поднят и проверен; устройства, не держащие два соединения, — в _bulk_unsupported.
+        self._dual_channel = False
+        self._bulk_client: Optional[ModbusClient] = None
+        self._bulk_ready = False
+        self._bulk_link_state = DISCONNECTED
+        self._bulk_unsupported: set[str] = set()
+        
+        # Живость соединения и keep-alive — в worker-потоке по результатам транзакций (LinkLiveness)
         self._connection_fail_count = 0  # Счетчик неудачных проверок
         
         # Таймер для синхронизации состояний устройств
@@ -1102,7 +1666,6 @@ class ModbusManager(QObject):
 
         # Список таймеров для паузы/возобновления опросов
         self._polling_timers = [
-            self._connection_check_timer,
             self._sync_timer,
             self._screen01_batch_timer,
             self._seop_parameters_timer,
@@ -1112,26 +1675,53 @@ class ModbusManager(QObject):
             self._manual_mode_settings_timer,
         ]
         
+        # Декодирование спектров — вне потоков I/O, общий пул для обоих каналов
+        self._decode_pool = DecodePool(self._DECODE_POOL_KIND, self._DECODE_POOL_WORKERS)
+
         # Worker-поток для Modbus I/O (чтобы UI не подвисал)
         self._io_thread = QThread(self)
         self._io_worker = _ModbusIoWorker()
+        self._io_worker.decode_pool = self._decode_pool
         self._io_worker.moveToThread(self._io_thread)
 
         # Подключаем внутренние сигналы к worker слотам (queued connection автоматически, т.к. другой поток)
         self._workerSetClient.connect(self._io_worker.setClient)
         self._workerConnect.connect(self._io_worker.connectClient)
+        self._workerReconnect.connect(self._io_worker.reconnectClient)
         self._workerDisconnect.connect(self._io_worker.disconnectClient)
         self._workerEnqueueRead.connect(self._io_worker.enqueueRead)
         self._workerEnqueueReadPriority.connect(self._io_worker.enqueueReadPriority)
         self._workerEnqueueWrite.connect(self._io_worker.enqueueWrite)
+        self._workerEnqueueRegisterWrite.connect(self._io_worker.enqueueRegisterWrite)
+        self._workerSetGeneration.connect(self._io_worker.setGeneration)
+        self._workerSetBusLimits.connect(self._io_worker.setBusLimits)
 
         # Результаты от worker обратно в GUI-поток
         self._io_worker.connectFinished.connect(self._onWorkerConnectFinished)
         self._io_worker.disconnected.connect(self._onWorkerDisconnected)
         self._io_worker.readFinished.connect(self._onWorkerReadFinished)
         self._io_worker.writeFinished.connect(self._onWorkerWriteFinished)
+        self._io_worker.connectionStateChanged.connect(self._onWorkerConnectionState)
+        self._io_worker.writeRejected.connect(self._onWorkerWriteRejected)
 
         self._io_thread.start()
+
+        # Worker второго канала (спектры) — свой поток, чтобы управление шло параллельно
+        self._bulk_thread = QThread(self)
+        self._bulk_worker = _ModbusIoWorker()
+        self._bulk_worker.decode_pool = self._decode_pool
+        self._bulk_worker.moveToThread(self._bulk_thread)
+        self._bulkSetClient.connect(self._bulk_worker.setClient)
+        self._bulkConnect.connect(self._bulk_worker.connectClient)
+        self._bulkDisconnect.connect(self._bulk_worker.disconnectClient)
+        self._bulkEnqueueRead.connect(self._bulk_worker.enqueueRead)
+        self._bulkSetGeneration.connect(self._bulk_worker.setGeneration)
+        self._bulkSetBusLimits.connect(self._bulk_worker.setBusLimits)
+        self._bulk_worker.connectFinished.connect(self._onBulkConnectFinished)
+        self._bulk_worker.connectionStateChanged.connect(self._onBulkConnectionState)
+        self._bulk_worker.readFinished.connect(self._onWorkerReadFinished)
+        self._bulk_thread.start()
+
         self.destroyed.connect(self._shutdownIoThread)
     
     @Property(str, notify=statusTextChanged)
@@ -1312,6 +1902,7 @@ class ModbusManager(QObject):
         if self._clinical_foreground == active:
             return
         self._clinical_foreground = active
+        self._bump_poll_generation("clinical foreground" if active else "screen01")
         self.clinicalForegroundChanged.emit(active)
         clinical_timers = self._clinical_individual_timers()
         if active:
@@ -1406,6 +1997,7 @@ class ModbusManager(QObject):
         if self._polling_paused:
             return
         self._polling_paused = True
+        self._bump_poll_generation("pause")
         for t in self._polling_timers:
             t.stop()
         if self._clinical_batch_timer.isActive():
@@ -1421,15 +2013,6 @@ class ModbusManager(QObject):
             return
         self._polling_paused = False
         
-        # Запоминаем время возобновления опроса, чтобы игнорировать проверку соединения
-        # в течение 10 секунд после возобновления (время на стабилизацию соединения)
-        self._polling_resumed_time = time.time()
-        
-        # Обновляем время последнего успешного ответа, чтобы не срабатывала проверка соединения
-        # сразу после возобновления опроса (время паузы не должно учитываться)
-        if self._last_modbus_ok_time > 0:
-            self._last_modbus_ok_time = time.time()
-        
         # Добавляем небольшую задержку перед возобновлением опроса, чтобы соединение стабилизировалось
         # Используем QTimer для неблокирующей задержки
         def startPollingAfterDelay():
@@ -2032,6 +2615,197 @@ class ModbusManager(QObject):
             self._modbus_client = None
             logger.info(f"Установлен unit_id: {value}")
     
+    @Property(str)
+    def ioTransport(self):
+        """Транспорт Modbus: pymodbus, socket или asyncio"""
+        return self._io_transport
+    
+    @ioTransport.setter
+    def ioTransport(self, value: str):
+        value = str(value).lower()
+        if value not in ("pymodbus", "socket", "asyncio"):
+            logger.warning(f"Неизвестный транспорт '{value}', остаётся '{self._io_transport}'")
+            return
+        if self._io_transport != value:
+            if self._is_connected:
+                self.disconnect()
+            self._io_transport = value
+            self._modbus_client = None
+            logger.info(f"Установлен транспорт: {value}")
+    
+    @Property(str, notify=linkStateChanged)
+    def linkState(self):
+        """Состояние соединения: disconnected, connecting, warmup, ready или degraded"""
+        return self._link_state
+    
+    @Property(int)
+    def inFlightWindow(self):
+        """Сколько запросов asyncio транспорт держит в полёте одновременно (1 — без конвейера)"""
+        return self._inflight_window
+    
+    @inFlightWindow.setter
+    def inFlightWindow(self, value: int):
+        value = max(1, int(value))
+        if self._inflight_window != value:
+            if self._is_connected:
+                self.disconnect()
+            self._inflight_window = value
+            self._modbus_client = None
+            logger.info(f"Установлено окно in-flight: {value}")
+    
+    @Property(str)
+    def modbusFramer(self):
+        """Фрейминг Modbus: rtu, tcp (MBAP, ответы по transaction id) или auto"""
+        return self._framer
+    
+    @modbusFramer.setter
+    def modbusFramer(self, value: str):
+        value = str(value).lower()
+        if value not in ("rtu", "tcp", "auto"):
+            logger.warning(f"Неизвестный фрейминг '{value}', остаётся '{self._framer}'")
+            return
+        if self._framer != value:
+            if self._is_connected:
+                self.disconnect()
+            self._framer = value
+            self._modbus_client = None
+            logger.info(f"Установлен фрейминг: {value}")
+    
+    @Property(float)
+    def busRequestsPerSecond(self):
+        """Лимит шины, запросов/с на канал (по обрывам канала клиент может опустить его ниже)"""
+        return self._bus_requests_per_s
+    
+    @busRequestsPerSecond.setter
+    def busRequestsPerSecond(self, value: float):
+        value = max(1.0, float(value))
+        if self._bus_requests_per_s != value:
+            self._bus_requests_per_s = value
+            self._applyBusLimits()
+    
+    @Property(float)
+    def busBytesPerSecond(self):
+        """Лимит шины, байт/с на канал (запрос + ответ)"""
+        return self._bus_bytes_per_s
+    
+    @busBytesPerSecond.setter
+    def busBytesPerSecond(self, value: float):
+        value = max(1.0, float(value))
+        if self._bus_bytes_per_s != value:
+            self._bus_bytes_per_s = value
+            self._applyBusLimits()
+    
+    def _applyBusLimits(self) -> None:
+        """Новые лимиты — клиентам в их worker-потоках (бюджет шины используется только оттуда)."""
+        logger.info(f"Установлен лимит шины: {self._bus_requests_per_s:.0f} запросов/с, {self._bus_bytes_per_s:.0f} байт/с")
+        if self._modbus_client is not None:
+            self._workerSetBusLimits.emit(self._bus_requests_per_s, self._bus_bytes_per_s)
+        if self._bulk_client is not None:
+            self._bulkSetBusLimits.emit(self._bus_requests_per_s, self._bus_bytes_per_s)
+    
+    @Property(bool)
+    def dualChannel(self):
+        """Отдельное TCP соединение для IR/NMR/PXE (если устройство принимает два соединения)"""
+        return self._dual_channel
+    
+    @dualChannel.setter
+    def dualChannel(self, value: bool):
+        value = bool(value)
+        if self._dual_channel == value:
+            return
+        self._dual_channel = value
+        logger.info(f"Второй канал для спектров: {'включён' if value else 'выключен'}")
+        if value and self._is_connected:
+            self._startBulkChannel()
+        elif not value:
+            self._stopBulkChannel()
+    
+    def _create_modbus_client(self) -> ModbusClient:
+        """Клиент под выбранный транспорт (настройки на устройство: host/port/unit_id/окно/фрейминг)."""
+        if self._io_transport != "asyncio" and self._framer != "rtu":
+            # ModbusClient шлёт только кадры RTU — MBAP/auto умеет лишь asyncio транспорт
+            logger.warning(
+                f"Фрейминг '{self._framer}' поддерживает только транспорт asyncio — "
+                f"выбранный '{self._io_transport}' заменён на asyncio"
+            )
+        if self._io_transport == "asyncio" or self._framer != "rtu":
+            client = AsyncModbusClient(
+                host=self._host,
+                port=self._port,
+                unit_id=self._unit_id,
+                framer=self._framer,
+                inflight_window=self._inflight_window,
+            )
+        else:
+            client = ModbusClient(
+                host=self._host,
+                port=self._port,
+                unit_id=self._unit_id,
+                framer="rtu",
+                transport=self._io_transport,
+            )
+        client.bus_budget.set_limits(self._bus_requests_per_s, self._bus_bytes_per_s)
+        # Профиль возможностей с прошлой сессии (фрейминг, карта регистров, лимиты чтения, порядок float,
+        # лимит шины) клиент применяет при подключении, если совпал отпечаток прошивки
+        client.profile_path = self._device_profile_path()
+        return client
+
+    def _device_key(self) -> str:
+        return device_key(self._host, self._port, self._unit_id)
+
+    @staticmethod
+    def _device_profile_path() -> str:
+        base = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppDataLocation)
+        return os.path.join(base or os.path.expanduser("~"), "device_profiles.json")
+
+    def _saveDeviceProfile(self) -> None:
+        client = self._modbus_client
+        if client is None:
+            return
+        client.save_profile()
+
+    @Slot()
+    def tuneReadSpans(self):
+        """
+        Подобрать максимальный диапазон одного чтения по областям адресов — только по явной команде.
+        Сотни пробных чтений и возможные переподключения занимают worker целиком, поэтому опрос
+        на это время ставится на паузу (устаревшие чтения снимаются) и возобновляется по результату.
+        """
+        client = self._modbus_client
+        if client is None or not self._is_connected or self._span_tuning:
+            return
+        self._span_tuning = True
+        self._span_tune_paused = not self._polling_paused
+        if self._span_tune_paused:
+            self.pausePolling()
+        logger.info("Подбор максимального диапазона чтения (опрос приостановлен)...")
+        self._enqueue_read("span_tune", lambda: client.tune_read_spans(_SPAN_TUNE_PROBES))
+
+    def _finishSpanTuning(self) -> None:
+        if not self._span_tuning:
+            return
+        self._span_tuning = False
+        if self._span_tune_paused:
+            self._span_tune_paused = False
+            if self._is_connected:
+                self.resumePolling()
+            else:
+                self._polling_paused = False
+                self.pollingPausedChanged.emit(False)
+
+    @Slot(result=str)
+    def dumpTransactionTrace(self) -> str:
+        """Сохранить трассировку последних транзакций в AppData; путь к файлу или пустая строка."""
+        client = self._modbus_client
+        if client is None:
+            return ""
+        base = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppDataLocation)
+        path = os.path.join(base or os.path.expanduser("~"), time.strftime("modbus_trace_%Y%m%d_%H%M%S.jsonl"))
+        if not client.dump_trace(path):
+            return ""
+        logger.info(f"Трассировка транзакций сохранена: {path} ({len(client.trace)} записей)")
+        return path
+    
     @Slot()
     def toggleConnection(self):
         """Переключение состояния подключения"""
@@ -2058,12 +2832,7 @@ class ModbusManager(QObject):
             self.disconnect()
 
         # Создаем новый клиент (сам connect() будет выполнен в worker-потоке)
-        self._modbus_client = ModbusClient(
-            host=self._host,
-            port=self._port,
-            unit_id=self._unit_id,
-            framer="rtu"
-        )
+        self._modbus_client = self._create_modbus_client()
 
         self._connection_in_progress = True
         self._status_text = "Connecting"
@@ -2082,7 +2851,6 @@ class ModbusManager(QObject):
             logger.info("Отключение от Modbus устройства")
             self._connection_in_progress = False
             self._reconnect_polling_stopped = False
-            self._connection_check_timer.stop()
             self._clear_setpoint_user_interaction_flags()
             self._sync_timer.stop()  # Останавливаем синхронизацию
             self._relay_1021_timer.stop()  # Останавливаем чтение регистра 1021
@@ -2103,12 +2871,16 @@ class ModbusManager(QObject):
             self._vacuum_pressure_timer.stop()  # Останавливаем чтение давления Vacuum
             self._fan_1131_timer.stop()  # Останавливаем чтение регистра 1131 (fans)
             self._ui_update_timer.stop()  # Останавливаем таймер обновления UI
-            self._reset_periodic_read_flags()
+            self._bump_poll_generation("disconnect")
+            # Очередь worker'а очищается — результата подбора диапазона не будет
+            self._finishSpanTuning()
             # Очищаем кэш при отключении
             self._pending_relay_updates.clear()
             self._pending_fan_updates.clear()
             self._pending_valve_updates.clear()
             
+            self._saveDeviceProfile()
+            self._stopBulkChannel()
             # Отключение Modbus делаем в worker-потоке (чтобы UI не блокировался)
             self._workerDisconnect.emit()
             self._workerSetClient.emit(None)
@@ -2240,11 +3012,7 @@ class ModbusManager(QObject):
         self._connection_button_text = "Disconnect"
         self._connection_fail_count = 0
         self._sync_fail_count = 0
-        # Устанавливаем время последнего успешного ответа при подключении
-        # Это дает время на первые чтения регистров перед проверкой соединения
         self._last_modbus_ok_time = time.time()
-        # Обновляем время возобновления опроса, чтобы не срабатывала проверка соединения сразу после переподключения
-        self._polling_resumed_time = time.time()
         # Запоминаем время подключения для применения начальных значений без задержки
         self._connection_time = time.time()
         # Сбрасываем флаги, которые могут блокировать применение значений при первом подключении
@@ -2263,20 +3031,110 @@ class ModbusManager(QObject):
         self._emitCachedStates()
 
         self._startPollingTimersAfterConnect()
+        if self._dual_channel:
+            self._startBulkChannel()
 
         logger.info("Успешное подключение к Modbus устройству (I/O в фоне)")
 
+    def _startBulkChannel(self) -> None:
+        """Открыть второе соединение для спектров; в работу оно идёт после проверки обоих каналов."""
+        if self._bulk_client is not None or self._device_key() in self._bulk_unsupported:
+            return
+        self._bulk_ready = False
+        self._bulk_client = self._create_modbus_client()
+        logger.info("Открываем второй канал для спектров")
+        self._bulkSetClient.emit(self._bulk_client)
+        self._bulkConnect.emit()
+
+    def _stopBulkChannel(self) -> None:
+        if self._bulk_client is None:
+            return
+        self._bulk_ready = False
+        self._bulk_client = None
+        # Задачи в очереди второго канала теряются — спектры можно запросить заново
+        self._ir_request_in_flight = False
+        self._nmr_request_in_flight = False
+        self._pxe_request_in_flight = False
+        self._bulkDisconnect.emit()
+        self._bulkSetClient.emit(None)
+
+    def _degradeToSingleChannel(self, reason: str) -> None:
+        """Устройство не держит два соединения — до конца сессии спектры идут основным каналом."""
+        logger.warning(f"Второй канал недоступен ({reason}), спектры читаются основным соединением")
+        self._bulk_unsupported.add(self._device_key())
+        self._stopBulkChannel()
+
+    @Slot(bool, str)
+    def _onBulkConnectFinished(self, success: bool, error_message: str):
+        if self._bulk_client is None:
+            return
+        if not success:
+            self._degradeToSingleChannel(error_message or "второе соединение отклонено")
+            return
+        if self._bulk_link_state != READY:
+            self._degradeToSingleChannel("нет ответа по второму соединению")
+            return
+        # Некоторые прошивки принимают второе соединение, но бросают первое — проверяем основной канал
+        client = self._modbus_client
+        if client is None:
+            return
+        self._enqueue_read("bulk_check", lambda: True if client.probe() else None)
+
+    @Slot(str, str)
+    def _onBulkConnectionState(self, state: str, reason: str):
+        self._bulk_link_state = state
+        if state == DISCONNECTED and self._bulk_client is not None and self._bulk_ready:
+            # Второй канал потерян и не восстановился — возвращаемся к одному соединению
+            logger.warning(f"Второй канал отключён ({reason}), спектры читаются основным соединением")
+            self._stopBulkChannel()
+
+    def _spectrum_client(self) -> Optional[ModbusClient]:
+        """Клиент для IR/NMR/PXE: второй канал, если он поднят, иначе основной."""
+        if self._bulk_ready and self._bulk_client is not None:
+            return self._bulk_client
+        return self._modbus_client
+
+    def _enqueue_spectrum_read(self, key: str, client: ModbusClient, func: Callable[[], Any]) -> None:
+        """Задача спектра — в очередь того канала, чьим клиентом она читает."""
+        if client is self._bulk_client and self._bulk_ready:
+            self._bulkEnqueueRead.emit(key, func)
+        else:
+            self._enqueue_read(key, func)
+
+    def _pop_spectrum(self, key: str) -> Any:
+        payload = self._io_worker._last_spectrum.pop(key, None)
+        if payload is None:
+            payload = self._bulk_worker._last_spectrum.pop(key, None)
+        return payload
+
     @Slot()
     def _onWorkerDisconnected(self):
         # Состояние UI уже сбрасывается в disconnect(), тут оставляем как защиту.
         logger.info("Worker подтвердил отключение Modbus")
 
+    def _adaptBatchInterval(self, timer: QTimer, batch: object) -> None:
+        """
+        Интервал batched-опроса под реальную скорость канала: не чаще, чем проход успевает
+        завершиться (время прохода × 1.25), в пределах FAST..SLOW. Частичный проход
+        (_partial — бюджет исчерпан) сам по себе длится весь бюджет и отодвигает опрос к SLOW.
+        """
+        elapsed = batch.get("_elapsed") if isinstance(batch, dict) else None
+        if elapsed is None:
+            return
+        interval = int(elapsed * 1000 * 1.25)
+        interval = max(self._POLL_INTERVAL_FAST_MS, min(self._POLL_INTERVAL_SLOW_MS, interval))
+        if abs(interval - timer.interval()) >= 20:
+            logger.debug(f"Интервал batched-опроса: {timer.interval()} → {interval} мс (проход {elapsed * 1000:.0f} мс)")
+            timer.setInterval(interval)
+
     @Slot(str, object)
     def _onWorkerReadFinished(self, key: str, value: object):
         if key == "clinical":
             if isinstance(value, dict) and (value.get("_conn") or value.get("_ok", 0) > 0):
                 self._last_modbus_ok_time = time.time()
                 self._connection_fail_count = 0
+            if not self._display_text_polling:
+                self._adaptBatchInterval(self._clinical_batch_timer, value)
             self._applyClinicalBatch(value)
             return
 
@@ -2291,11 +3149,27 @@ class ModbusManager(QObject):
             if isinstance(value, dict) and (value.get("_conn") or value.get("_ok", 0) > 0):
                 self._last_modbus_ok_time = time.time()
                 self._connection_fail_count = 0
+            self._adaptBatchInterval(self._screen01_batch_timer, value)
             self._applyScreen01Batch(value)
             return
 
+        if key == "span_tune":
+            if value:
+                logger.info(f"Лимиты диапазона чтения: {value}")
+                self._saveDeviceProfile()
+            self._finishSpanTuning()
+            return
+
+        if key == "bulk_check":
+            if value is None:
+                self._degradeToSingleChannel("основное соединение перестало отвечать")
+            elif self._bulk_client is not None:
+                self._bulk_ready = True
+                logger.info("Второй канал для спектров готов")
+            return
+
         if key == "ir":
-            payload = self._io_worker._last_spectrum.pop("ir", None)
+            payload = self._pop_spectrum("ir")
             self._ir_request_in_flight = False
             if payload is None:
                 logger.info("IR spectrum read returned None")
@@ -2307,7 +3181,7 @@ class ModbusManager(QObject):
             return
 
         if key == "nmr":
-            payload = self._io_worker._last_spectrum.pop("nmr", None)
+            payload = self._pop_spectrum("nmr")
             self._nmr_request_in_flight = False
             if payload is None:
                 logger.debug("NMR spectrum read returned None")
@@ -2318,7 +3192,7 @@ class ModbusManager(QObject):
             return
 
         if key == "pxe":
-            payload = self._io_worker._last_spectrum.pop("pxe", None)
+            payload = self._pop_spectrum("pxe")
             self._pxe_request_in_flight = False
             if payload is None:
                 logger.debug("PXE chart read returned None")
@@ -2402,6 +3276,24 @@ class ModbusManager(QObject):
             # Это могут быть "fire-and-forget" задачи; игнорируем.
             return
 
+    @Slot(str, str)
+    def _onWorkerConnectionState(self, state: str, reason: str):
+        """Переход состояния соединения в worker-потоке."""
+        if state == self._link_state:
+            return
+        self._link_state = state
+        if state == DEGRADED and reason:
+            logger.warning(f"Соединение деградировало: {reason}")
+        elif state == CONNECTING and reason == "reconnect" and self._is_connected:
+            logger.warning("Канал Modbus не отвечает, переподключаемся (в фоне)")
+            self._pausePollingForReconnect()
+        self.linkStateChanged.emit(state)
+
+    @Slot(str, str)
+    def _onWorkerWriteRejected(self, key: str, reason: str):
+        """Запись не отправлена: соединения нет и восстановление не идёт."""
+        logger.warning(f"Запись {key} отклонена: {reason}")
+
     @Slot(str, bool, object)
     def _onWorkerWriteFinished(self, key: str, success: bool, meta: object):
         # Сбрасываем флаг "запись в процессе" после завершения записи
@@ -2477,12 +3369,19 @@ class ModbusManager(QObject):
         try:
             # Пытаемся попросить worker закрыть соединение
             try:
+                self._saveDeviceProfile()
                 self._workerDisconnect.emit()
             except Exception:
                 pass
             if hasattr(self, "_io_thread") and self._io_thread.isRunning():
                 self._io_thread.quit()
                 self._io_thread.wait(1500)
+            if hasattr(self, "_bulk_thread") and self._bulk_thread.isRunning():
+                self._bulkDisconnect.emit()
+                self._bulk_thread.quit()
+                self._bulk_thread.wait(1500)
+            if hasattr(self, "_decode_pool"):
+                self._decode_pool.shutdown()
         except Exception:
             pass
 
@@ -2494,7 +3393,7 @@ class ModbusManager(QObject):
             logger.exception("Failed to enqueue read task")
 
     def _enqueue_read_priority(self, key: str, func: Callable[[], Any]) -> None:
-        """Поставить задачу чтения в начало очереди (IR/NMR спектры)."""
+        """Поставить интерактивное чтение (проверка после записи, connect/resume) в более срочный класс."""
         try:
             self._workerEnqueueReadPriority.emit(key, func)
         except Exception:
@@ -2525,6 +3424,16 @@ class ModbusManager(QObject):
             if key.startswith("relay:") or key.startswith("fan:") or key.startswith("valve:"):
                 self._write_in_progress = False
 
+    def _enqueue_register_write(self, key: str, values: dict, meta: object = None) -> None:
+        """
+        Поставить запись регистров {address: value} в worker-поток.
+        Ожидающая запись того же ключа/адреса заменяется (last-write-wins), соседние адреса уходят одним FC16.
+        """
+        try:
+            self._workerEnqueueRegisterWrite.emit(key, values, meta)
+        except Exception:
+            logger.exception("Failed to enqueue register write task")
+
     def _clear_reading_flag_for_key(self, key: str) -> None:
         flag = self._READ_KEY_TO_FLAG.get(key)
         if flag:
@@ -2539,6 +3448,21 @@ class ModbusManager(QObject):
         setattr(self, flag_attr, True)
         return True
 
+    def _bump_poll_generation(self, reason: str) -> None:
+        """
+        Новое поколение опроса: worker'ы снимают из очередей чтения прежних поколений не выполняя,
+        поэтому их флаги in-flight сбрасываются здесь — иначе опрос этих ключей больше не запустится.
+        Ответ чтения, которое уже выполнялось, придёт как обычно и просто сбросит флаг ещё раз.
+        """
+        self._poll_generation += 1
+        self._reset_periodic_read_flags()
+        self._ir_request_in_flight = False
+        self._nmr_request_in_flight = False
+        self._pxe_request_in_flight = False
+        self._workerSetGeneration.emit(self._poll_generation)
+        self._bulkSetGeneration.emit(self._poll_generation)
+        logger.debug(f"Поколение опроса {self._poll_generation} ({reason})")
+
     def _reset_periodic_read_flags(self):
         """Сброс флагов in-flight чтений (после disconnect / перед новым connect)."""
         for flag in self._READ_KEY_TO_FLAG.values():
@@ -3279,22 +4203,6 @@ class ModbusManager(QObject):
         binary_str = format(low_byte, '08b')
         self.externalRelaysChanged.emit(low_byte, binary_str)
 
-    def _registers_to_float_ir(self, reg1: int, reg2: int) -> float:
-        """
-        IR float decode как в test_modbus.registers_to_float_ir:
-        swap byte1<->byte2 и byte3<->byte4.
-        """
-        import struct
-        byte1 = (reg1 >> 8) & 0xFF
-        byte2 = reg1 & 0xFF
-        byte3 = (reg2 >> 8) & 0xFF
-        byte4 = reg2 & 0xFF
-        swapped = bytes([byte2, byte1, byte4, byte3])
-        try:
-            return float(struct.unpack(">f", swapped)[0])
-        except Exception:
-            return 0.0
-
     def _applyIrSpectrum(self, value: object):
         """
         Применяет результат чтения IR спектра (GUI поток) и дергает сигнал для QML графика.
@@ -3308,6 +4216,12 @@ class ModbusManager(QObject):
             f"x=[{value.get('x_min')},{value.get('x_max')}] y=[{value.get('y_min')},{value.get('y_max')}] "
             f"status={value.get('status')}"
         )
+        # Порядок float метаданных, подобранный декодером, — в профиль устройства
+        order = value.get("meta_float_key")
+        if order:
+            for client in (self._modbus_client, self._bulk_client):
+                if client is not None:
+                    client.float_orders["ir_meta"] = order
         self._ir_last = value
         self.irSpectrumChanged.emit(value)
     
@@ -3360,25 +4274,22 @@ class ModbusManager(QObject):
         self._ir_request_in_flight = True
         logger.info("IR spectrum request queued")
 
-        client = self._modbus_client
+        client = self._spectrum_client()
 
         def task():
-            import math
-            import struct
             # Читаем 400..414 (метаданные) одним блоком — иначе иногда "плывут" поля.
-            meta = client.read_input_registers(400, 15)
-            if meta is None or len(meta) < 15:
-                logger.info(f"IR spectrum: meta read failed or short: {None if meta is None else len(meta)}")
+            meta_block = client.read_input_block(400, 15)
+            if meta_block is None or len(meta_block) < 15:
+                logger.info(f"IR spectrum: meta read failed or short: {None if meta_block is None else len(meta_block)}")
                 return None
 
-            # pymodbus, не прямой сокет: read_input_registers_direct давал SIGSEGV на живой шине.
+            # read_input_block (один FC04 на stripe), не *_direct чанками: тот давал SIGSEGV на живой шине.
             # Драйвер: IR_CHART_ARRAYSIZE=64, IR_CHART_ARRAYS=58. Один запрос с 420 даёт только
             # первые min(qty,64) точек; остальные — отдельные FC04 со start=421, 422, ...
-            status = int(meta[0])
             ir_chart_data = 420
             ir_chart_arraysize = 64
             ir_chart_arrays = 58
-            n_points = status
+            n_points = int(meta_block.registers(0, 1)[0])
             max_points = ir_chart_arrays * ir_chart_arraysize
             if n_points < 2:
                 logger.info(f"IR spectrum: pointsN={n_points}, skip")
@@ -3388,339 +4299,28 @@ class ModbusManager(QObject):
                 n_points = max_points
 
             n_stripes = (n_points + ir_chart_arraysize - 1) // ir_chart_arraysize
-            data_regs: list[int] = [0] * n_points
+            stripes = []
             for k in range(n_stripes):
                 start_idx = k * ir_chart_arraysize
                 qty = min(ir_chart_arraysize, n_points - start_idx)
-                stripe = client.read_input_registers(ir_chart_data + k, qty)
+                stripe = client.read_input_block(ir_chart_data + k, qty)
                 if stripe is None or len(stripe) < qty:
                     logger.info(
                         f"IR spectrum: stripe {k} addr={ir_chart_data + k} qty={qty} "
                         f"failed or short: {None if stripe is None else len(stripe)}"
                     )
                     return None
-                data_regs[start_idx:start_idx + qty] = [int(v) for v in stripe[:qty]]
-
-            if sum(1 for v in data_regs if v != 0) == 0:
-                logger.info("IR spectrum: data all zeros, skip apply")
-                return None
-
-            logger.info(
-                f"IR spectrum: pointsN={n_points} stripes={n_stripes} "
-                f"raw meta[0..4]={meta[0:5]} meta_hex={[hex(int(x)) for x in meta[0:5]]} "
-                f"data_length={len(data_regs)} data_first10={data_regs[0:10]} data_last10={data_regs[-10:] if len(data_regs) >= 10 else data_regs} "
-                f"data_nonzero_count={sum(1 for v in data_regs if int(v) != 0)}"
-            )
-            # Метаданные IR (как в test_modbus): устройство реально хранит x/y range в регистрах
-            # 401-408, но порядок слов/байт может отличаться. Подбираем вариант по x_min/x_max,
-            # чтобы далее декодировать остальные float (y_min/y_max/res_freq/freq/integral) в том же формате.
-
-            def _float_variants_from_regs(reg1: int, reg2: int) -> dict:
-                """
-                Декодируем float из двух uint16 во всех популярных Modbus byte/word order.
-                A,B = bytes of reg1 (hi,lo); C,D = bytes of reg2 (hi,lo)
-                Variants: ABCD, BADC (swap bytes in words), CDAB (swap words), DCBA (full reverse)
-                """
-                A = (reg1 >> 8) & 0xFF
-                B = reg1 & 0xFF
-                C = (reg2 >> 8) & 0xFF
-                D = reg2 & 0xFF
-                orders = {
-                    "ABCD": bytes([A, B, C, D]),
-                    "BADC": bytes([B, A, D, C]),
-                    "CDAB": bytes([C, D, A, B]),
-                    "DCBA": bytes([D, C, B, A]),
-                }
-                out: dict[str, float] = {}
-                for k, bb in orders.items():
-                    try:
-                        v = float(struct.unpack(">f", bb)[0])
-                    except Exception:
-                        continue
-                    if math.isfinite(v):
-                        out[k] = v
-                return out
-
-            def _float_from_regs_with_key(reg1: int, reg2: int, key: str) -> float:
-                vmap = _float_variants_from_regs(reg1, reg2)
-                return float(vmap.get(key, float("nan")))
-
-            # Определяем формат метаданных по x_min/x_max (401-404)
-            xmin_r1, xmin_r2 = int(meta[1]), int(meta[2])
-            xmax_r1, xmax_r2 = int(meta[3]), int(meta[4])
-            x_min_variants = _float_variants_from_regs(xmin_r1, xmin_r2)
-            x_max_variants = _float_variants_from_regs(xmax_r1, xmax_r2)
-            common_keys = sorted(set(x_min_variants.keys()) & set(x_max_variants.keys()))
-
-            meta_float_key = None
-            x_min = float("nan")
-            x_max = float("nan")
-            candidates = []
-            for k in common_keys:
-                xv0 = float(x_min_variants[k])
-                xv1 = float(x_max_variants[k])
-                if not (math.isfinite(xv0) and math.isfinite(xv1)):
-                    continue
-                if xv1 <= xv0:
-                    continue
-                if abs(xv0) > 1e6 or abs(xv1) > 1e6:
-                    continue
-                rng = xv1 - xv0
-                if rng <= 0 or rng > 1e6:
-                    continue
-                # IR обычно 792..798 (range ~6). Если несколько кандидатов — выбираем ближе к этому.
-                score = abs(rng - 6.0) + 0.1 * abs(xv0 - 792.0) + 0.1 * abs(xv1 - 798.0)
-                candidates.append((score, k, xv0, xv1))
-            if candidates:
-                candidates.sort(key=lambda t: t[0])
-                _, meta_float_key, x_min, x_max = candidates[0]
-            else:
-                # fallback (старое поведение)
-                x_min = 792.0
-                x_max = 798.0
-
-            # Декодируем остальные float-метаданные в том же формате, если удалось подобрать ключ
-            y_min_meta = float("nan")
-            y_max_meta = float("nan")
-            res_freq = float("nan")
-            freq = float("nan")
-            integral = float("nan")
-
-            y_min_r1, y_min_r2 = int(meta[5]), int(meta[6])
-            y_max_r1, y_max_r2 = int(meta[7]), int(meta[8])
-            res_r1, res_r2 = int(meta[9]), int(meta[10])
-            freq_r1, freq_r2 = int(meta[11]), int(meta[12])
-            int_r1, int_r2 = int(meta[13]), int(meta[14])
-
-            if meta_float_key:
-                y_min_meta = _float_from_regs_with_key(y_min_r1, y_min_r2, meta_float_key)
-                y_max_meta = _float_from_regs_with_key(y_max_r1, y_max_r2, meta_float_key)
-                res_freq = _float_from_regs_with_key(res_r1, res_r2, meta_float_key)
-                freq = _float_from_regs_with_key(freq_r1, freq_r2, meta_float_key)
-                integral = _float_from_regs_with_key(int_r1, int_r2, meta_float_key)
-
-                # Иногда отдельные поля могут приехать "битые". Тогда добираем res_freq/freq
-                # из вариантов, которые попадают в диапазон X.
-                def _pick_any_in_range(reg1: int, reg2: int, lo: float, hi: float) -> float:
-                    vmap = _float_variants_from_regs(reg1, reg2)
-                    in_range = [v for v in vmap.values() if lo <= v <= hi]
-                    if not in_range:
-                        return float("nan")
-                    # выбираем ближе к центру диапазона
-                    mid = (lo + hi) / 2.0
-                    in_range.sort(key=lambda v: abs(v - mid))
-                    return float(in_range[0])
-
-                if not (math.isfinite(res_freq) and x_min <= res_freq <= x_max):
-                    rf2 = _pick_any_in_range(res_r1, res_r2, x_min, x_max)
-                    if math.isfinite(rf2):
-                        res_freq = rf2
-                if not (math.isfinite(freq) and x_min <= freq <= x_max):
-                    f2 = _pick_any_in_range(freq_r1, freq_r2, x_min, x_max)
-                    if math.isfinite(f2):
-                        freq = f2
-            else:
-                # Fallback: старый IR байтсвап (для некоторых полей может быть неверно, но лучше чем NaN)
-                y_min_meta = self._registers_to_float_ir(y_min_r1, y_min_r2)
-                y_max_meta = self._registers_to_float_ir(y_max_r1, y_max_r2)
-
-                # Для палок пробуем подобрать вариант, который попадает в диапазон X
-                def _pick_variant_in_range(variants: dict, lo: float, hi: float) -> float:
-                    if not variants:
-                        return float("nan")
-                    in_range = [(k, v) for k, v in variants.items() if lo <= v <= hi]
-                    if not in_range:
-                        return float("nan")
-                    mid = (lo + hi) / 2.0
-                    in_range.sort(key=lambda kv: abs(kv[1] - mid))
-                    return float(in_range[0][1])
-
-                res_variants = _float_variants_from_regs(res_r1, res_r2)
-                freq_variants = _float_variants_from_regs(freq_r1, freq_r2)
-                res_freq = _pick_variant_in_range(res_variants, x_min, x_max)
-                freq = _pick_variant_in_range(freq_variants, x_min, x_max)
-                if not math.isfinite(res_freq):
-                    res_freq = self._registers_to_float_ir(res_r1, res_r2)
-                if not math.isfinite(freq):
-                    freq = self._registers_to_float_ir(freq_r1, freq_r2)
-
-                integral = self._registers_to_float_ir(int_r1, int_r2)
-
-            # y values (raw uint16 from device) — все pointsN точек, как aseq->points[]
-            y_values_raw_u16 = [int(v) for v in data_regs[:n_points]]
-            if not y_values_raw_u16:
-                logger.debug("IR spectrum: y_values empty (no points)")
-                return None
-
-            # Алгоритм обработки IR данных (как на устройстве):
-            # 1. Умножаем на 100 и делим на 65535 - получаем float массив
-            # 2. Вычисляем среднее значение: количество точек делим на 5, 
-            #    суммируем первые n/5 точек, делим на n/5
-            # 3. От каждой точки отнимаем среднее - данные смещаются в ноль
-            
-            # Шаг 1: Преобразуем uint16 в float (умножаем на 100, делим на 65535)
-            points_float = [float(v) * 100.0 / 65535.0 for v in y_values_raw_u16]
-            
-            # Шаг 2: Вычисляем среднее m по первым n*0.2 точкам (20%) - как в устройстве: n = pointsN * 0.2
-            n = len(points_float)
-            n_avg = int(n * 0.2)  # pointsN * 0.2 (как в устройстве)
-            if n_avg == 0:
-                n_avg = 1  # Минимум 1 точка
-            
-            m = 0.0
-            for i in range(n_avg):
-                m += points_float[i]
-            m /= float(n_avg)
-            
-            logger.debug(f"IR spectrum: baseline correction - n={n}, n_avg={n_avg}, baseline={m:.6f}")
-            
-            # Шаг 3: От каждой точки отнимаем m и обновляем массив на месте (как в устройстве)
-            # Одновременно ищем максимум max и его индекс imax
-            max_val = 0.0
-            imax = 0
-            for i in range(n):
-                f = points_float[i] - m
-                points_float[i] = f  # Обновляем массив на месте (как pointsAvg[i] = f в устройстве)
-                if f > max_val:
-                    max_val = f
-                    imax = i
-            
-            # Теперь points_float содержит обработанные данные (после baseline correction)
-            # Шаг 4: Масштабирование для отображения (подбираем коэффициент)
-            # На устройстве значения от -40 до 60, у нас после baseline correction примерно -0.1 до 0.13
-            # Если max ≈ 0.13 должен стать ≈ 60, то коэффициент ≈ 60/0.13 ≈ 460-470
-            # Используем коэффициент 460 для получения диапазона примерно -40 до 60
-            scale_factor = 460.0
-            
-            y_values = [v * scale_factor for v in points_float]
-            max_scaled = max_val * scale_factor
-            
-            logger.debug(f"IR spectrum: after baseline correction - max={max_val:.6f} at index={imax}")
-            logger.debug(f"IR spectrum: after scaling (factor={scale_factor}) - max={max_scaled:.6f}, range=[{min(y_values):.6f}, {max(y_values):.6f}]")
-            
-            # Сохраняем raw значения для диагностики
-            y_values_raw_i16 = y_values_raw_u16  # Для совместимости с существующим кодом
-
-            # Собираем точки для графика (x равномерно от x_min до x_max)
-            # Все pointsN точек растягиваем на [x_min, x_max]
-            points = []
-            if len(y_values) >= 2 and x_max != x_min and status > 0:
-                # Растягиваем все точки на весь диапазон от x_min до x_max
-                # Используем status для вычисления шага, но распределяем точки равномерно
-                for i, y in enumerate(y_values):
-                    if len(y_values) > 1:
-                        x_coord = x_min + (x_max - x_min) * float(i) / float(len(y_values) - 1)
-                    else:
-                        x_coord = x_min
-                    points.append({"x": x_coord, "y": float(y)})
-            elif len(y_values) >= 2 and x_max != x_min:
-                # Fallback: если status невалиден, используем старую формулу
-                step = (x_max - x_min) / float(len(y_values) - 1)
-                for i, y in enumerate(y_values):
-                    points.append({"x": x_min + step * i, "y": float(y)})
-            else:
-                for i, y in enumerate(y_values):
-                    points.append({"x": float(i), "y": float(y)})
-
-            # Для оси Y используем диапазон из обработанных данных (после baseline correction)
-            if y_values:
-                y_min_data = float(min(y_values))
-                y_max_data = float(max(y_values))
-                if math.isfinite(y_min_data) and math.isfinite(y_max_data):
-                    y_min = y_min_data
-                    y_max = y_max_data
-                    y_range = y_max - y_min
-                    if y_range > 0:
-                        pad = y_range * 0.1
-                        y_min = y_min - pad
-                        y_max = y_max + pad
-                    logger.debug(f"IR spectrum: using processed data range for Y axis: [{y_min:.6f}, {y_max:.6f}] (after baseline correction)")
-                else:
-                    y_min = 0.0
-                    y_max = 1.0
-                    logger.debug("IR spectrum: processed data range invalid, using fallback")
-            else:
-                y_min = 0.0
-                y_max = 1.0
-
-            for name, val in (
-                ("x_min", x_min),
-                ("x_max", x_max),
-                ("y_min", y_min),
-                ("y_max", y_max),
-                ("res_freq", res_freq),
-                ("freq", freq),
-                ("integral", integral),
-            ):
-                if not math.isfinite(val):
-                    logger.debug(f"IR spectrum: {name} is not finite: {val}")
-
-            # Вычисляем min/max из обработанных данных для логирования
-            y_min_processed = float(min(y_values)) if y_values else 0.0
-            y_max_processed = float(max(y_values)) if y_values else 1.0
-            
-            # Форматируем метаданные для логирования
-            y_min_meta_str = f"{y_min_meta:.6f}" if math.isfinite(y_min_meta) else "nan"
-            y_max_meta_str = f"{y_max_meta:.6f}" if math.isfinite(y_max_meta) else "nan"
-            
-            logger.debug(
-                f"IR spectrum decoded: status={status} x=[{x_min:.6f},{x_max:.6f}] "
-                f"y_axis=[{y_min:.6f},{y_max:.6f}] (autoscale from processed data) "
-                f"y_processed_range=[{y_min_processed:.6f},{y_max_processed:.6f}] "
-                f"y_min_meta={y_min_meta_str} y_max_meta={y_max_meta_str} "
-                f"baseline={m:.6f} "
-                f"points={len(points)} (pointsN={n_points}) raw_u16_range=[{min(y_values_raw_u16) if y_values_raw_u16 else 'n/a'},{max(y_values_raw_u16) if y_values_raw_u16 else 'n/a'}] "
-                f"first10_y_values={y_values[:10]} last10_y_values={y_values[-10:]}"
+                stripes.append(stripe)
+            # Декодирование (порядок float, baseline, payload) — в пуле, шина сразу свободна
+            return DecodeJob(
+                decode_ir_spectrum,
+                bytes(meta_block.raw),
+                RegisterBlock.join(stripes).raw,
+                n_points,
+                client.float_orders.get("ir_meta"),
             )
 
-            # Возвращаем только простые типы (int/float/str/list/dict), чтобы конвертировалось в QVariantMap
-            import json
-            result = {
-                "status": status,
-                "x_min": float(x_min),
-                "x_max": float(x_max),
-                "y_min": float(y_min),
-                "y_max": float(y_max),
-                "res_freq": float(res_freq),
-                "freq": float(freq),
-                "integral": float(integral),
-                "meta_float_key": meta_float_key,
-                "x_min_regs": [xmin_r1, xmin_r2],
-                "x_max_regs": [xmax_r1, xmax_r2],
-                "y_min_regs": [y_min_r1, y_min_r2],
-                "y_max_regs": [y_max_r1, y_max_r2],
-                "y_min_meta": float(y_min_meta) if math.isfinite(y_min_meta) else None,
-                "y_max_meta": float(y_max_meta) if math.isfinite(y_max_meta) else None,
-                # Диагностика декодирования "палок" (409-410 / 411-412)
-                "res_freq_regs": [res_r1, res_r2],
-                "freq_regs": [freq_r1, freq_r2],
-                "x_min_variants": {k: float(v) for k, v in x_min_variants.items()},
-                "x_max_variants": {k: float(v) for k, v in x_max_variants.items()},
-                "res_freq_variants": {k: float(v) for k, v in _float_variants_from_regs(res_r1, res_r2).items()},
-                "freq_variants": {k: float(v) for k, v in _float_variants_from_regs(freq_r1, freq_r2).items()},
-                "data_raw_u16": y_values_raw_u16,
-                "data_raw_i16": y_values_raw_i16,
-                "data": y_values,
-                # JSON-версии для надежного парсинга в QML (иногда QVariantList ведет себя странно)
-                "data_json": json.dumps(y_values),
-                "points": points,
-            }
-            
-            if len(result["data"]) != n_points:
-                logger.error(f"IR spectrum: result.data length mismatch: {len(result['data'])} != {n_points}")
-            if len(result["points"]) != n_points:
-                logger.error(f"IR spectrum: result.points length mismatch: {len(result['points'])} != {n_points}")
-            try:
-                data_json_parsed = json.loads(result["data_json"])
-                if len(data_json_parsed) != n_points:
-                    logger.error(f"IR spectrum: result.data_json length mismatch: {len(data_json_parsed)} != {n_points}")
-            except Exception as e:
-                logger.error(f"IR spectrum: failed to verify data_json: {e}")
-            
-            logger.info(f"IR spectrum: returning payload with {len(result['data'])} data points, {len(result['points'])} graph points")
-            return result
-
-        self._enqueue_read("ir", task)
+        self._enqueue_spectrum_read("ir", client, task)
         return True
 
     @Slot(result=bool)
@@ -3734,7 +4334,7 @@ class ModbusManager(QObject):
           NMR_CHART_ARRAYS=256. Stripe k is FC04 start=120+k, qty<=64:
           j = (baseAddr - 120) * 64 + (addr - baseAddr),
           FFT[j>>1] words are u.w[j&1] (STM32 little-endian = Modbus CDAB).
-        pymodbus read_input_registers only — not *_direct (SIGSEGV).
+        client.read_input_block per stripe — not *_direct (SIGSEGV). Decoding runs in the decode pool.
         """
         if not self._is_connected or self._modbus_client is None:
             logger.info("NMR spectrum request ignored: not connected")
@@ -3745,35 +4345,19 @@ class ModbusManager(QObject):
         self._nmr_request_in_flight = True
         logger.info("NMR spectrum request queued")
 
-        client = self._modbus_client
+        client = self._spectrum_client()
 
         def task():
-            import math
-            import struct
-            import json
-
-            def _float_from_regs_cdab(reg1: int, reg2: int) -> float:
-                # STM32 u.w[0], u.w[1] → IEEE big-endian bytes CDAB
-                C = (reg2 >> 8) & 0xFF
-                D = reg2 & 0xFF
-                A = (reg1 >> 8) & 0xFF
-                B = reg1 & 0xFF
-                try:
-                    v = float(struct.unpack(">f", bytes([C, D, A, B]))[0])
-                except Exception:
-                    return float("nan")
-                return v if math.isfinite(v) else float("nan")
-
             # 100..116 (17 regs) — consecutive switch(addr), not striped
-            meta = client.read_input_registers(100, 17)
-            if meta is None or len(meta) < 17:
-                logger.info(f"NMR spectrum: meta read failed or short: {None if meta is None else len(meta)}")
+            meta_block = client.read_input_block(100, 17)
+            if meta_block is None or len(meta_block) < 17:
+                logger.info(f"NMR spectrum: meta read failed or short: {None if meta_block is None else len(meta_block)}")
                 return None
 
             nmr_chart_data = 120
             nmr_chart_arraysize = 64
             nmr_chart_arrays = 256
-            n_points = int(meta[0])
+            n_points = int(meta_block.registers(0, 1)[0])
             max_points = (nmr_chart_arrays * nmr_chart_arraysize) // 2
             if n_points < 2:
                 logger.info(f"NMR spectrum: samplesN={n_points}, skip")
@@ -3784,101 +4368,22 @@ class ModbusManager(QObject):
 
             n_regs = n_points * 2
             n_stripes = (n_regs + nmr_chart_arraysize - 1) // nmr_chart_arraysize
-            data_regs: list[int] = [0] * n_regs
+            stripes = []
             for k in range(n_stripes):
                 start_idx = k * nmr_chart_arraysize
                 qty = min(nmr_chart_arraysize, n_regs - start_idx)
-                stripe = client.read_input_registers(nmr_chart_data + k, qty)
+                stripe = client.read_input_block(nmr_chart_data + k, qty)
                 if stripe is None or len(stripe) < qty:
                     logger.info(
                         f"NMR spectrum: stripe {k} addr={nmr_chart_data + k} qty={qty} "
                         f"failed or short: {None if stripe is None else len(stripe)}"
                     )
                     return None
-                data_regs[start_idx:start_idx + qty] = [int(v) for v in stripe[:qty]]
-
-            data_values = [
-                _float_from_regs_cdab(data_regs[i], data_regs[i + 1])
-                for i in range(0, n_regs, 2)
-            ]
-            finite_y = [v for v in data_values if math.isfinite(v)]
-            if not finite_y or all(v == 0.0 for v in finite_y):
-                logger.info("NMR spectrum: data all zeros/invalid, skip apply")
-                return None
-
+                stripes.append(stripe)
+            logger.debug(f"NMR spectrum: samplesN={n_points} stripes={n_stripes} read, decoding")
+            return DecodeJob(decode_nmr_spectrum, bytes(meta_block.raw), RegisterBlock.join(stripes).raw, n_points)
 
-            x_min = _float_from_regs_cdab(int(meta[1]), int(meta[2]))
-            x_max = _float_from_regs_cdab(int(meta[3]), int(meta[4]))
-            y_min_meta = _float_from_regs_cdab(int(meta[5]), int(meta[6]))
-            y_max_meta = _float_from_regs_cdab(int(meta[7]), int(meta[8]))
-            freq = _float_from_regs_cdab(int(meta[9]), int(meta[10]))
-            ampl = _float_from_regs_cdab(int(meta[11]), int(meta[12]))
-            integral = _float_from_regs_cdab(int(meta[13]), int(meta[14]))
-            t2 = _float_from_regs_cdab(int(meta[15]), int(meta[16]))
-
-            logger.info(
-                f"NMR spectrum: samplesN={n_points} stripes={n_stripes} "
-                f"x=[{x_min},{x_max}] freq={freq} ampl={ampl} "
-                f"data_first5={data_values[:5]} data_last5={data_values[-5:]}"
-            )
-
-            n = len(data_values)
-            if not (math.isfinite(x_min) and math.isfinite(x_max) and x_max > x_min):
-                # Driver X is freqStep*ptMin .. freqStep*(ptMin+n-1); keep a display fallback.
-                logger.info(f"NMR spectrum: invalid x range [{x_min},{x_max}], using 38000..44000")
-                x_min = 38000.0
-                x_max = 44000.0
-
-            y_data_min = float(min(finite_y))
-            y_data_max = float(max(finite_y))
-            # LCD PaintNMR: ymin=0, ymax=resultAmpl. Autoscale from data; keep 0 floor when non-negative.
-            y_axis_min = 0.0 if y_data_min >= 0.0 else y_data_min
-            y_axis_max = y_data_max
-            if math.isfinite(ampl) and ampl > y_axis_max:
-                y_axis_max = float(ampl)
-            y_range = y_axis_max - y_axis_min
-            if y_range <= 0:
-                y_axis_max = y_axis_min + 1.0
-                y_range = 1.0
-            pad = y_range * 0.1
-            if y_axis_min < 0.0:
-                y_axis_min -= pad
-            y_axis_max += pad
-
-            points = []
-            if n >= 2:
-                for i, y in enumerate(data_values):
-                    yi = float(y) if math.isfinite(y) else 0.0
-                    x = x_min + (x_max - x_min) * float(i) / float(n - 1)
-                    points.append({"x": x, "y": yi})
-            else:
-                for i, y in enumerate(data_values):
-                    yi = float(y) if math.isfinite(y) else 0.0
-                    points.append({"x": float(i), "y": yi})
-
-            result = {
-                "samples": n_points,
-                "x_min": float(x_min),
-                "x_max": float(x_max),
-                "y_min": float(y_axis_min),
-                "y_max": float(y_axis_max),
-                "y_min_meta": float(y_min_meta) if math.isfinite(y_min_meta) else None,
-                "y_max_meta": float(y_max_meta) if math.isfinite(y_max_meta) else None,
-                "freq": float(freq) if math.isfinite(freq) else None,
-                "ampl": float(ampl) if math.isfinite(ampl) else None,
-                "integral": float(integral) if math.isfinite(integral) else None,
-                "t2": float(t2) if math.isfinite(t2) else None,
-                "data": [float(v) if math.isfinite(v) else 0.0 for v in data_values],
-                "data_json": json.dumps([float(v) if math.isfinite(v) else 0.0 for v in data_values]),
-                "points": points,
-            }
-            logger.info(
-                f"NMR spectrum: returning payload with {len(result['data'])} data points, "
-                f"{len(result['points'])} graph points"
-            )
-            return result
-
-        self._enqueue_read("nmr", task)
+        self._enqueue_spectrum_read("nmr", client, task)
         return True
 
     @Slot(result=bool)
@@ -3894,7 +4399,7 @@ class ModbusManager(QObject):
           PXE_CHART_ARRAYSIZE=94, PXE_CHART_ARRAYS=1
           j = (baseAddr - DATA) * 94 + (addr - baseAddr), j < (n << 1)
           u.f = PXeChartData[(j >> 1)]; value = u.w[j & 1] (STM32 = Modbus CDAB)
-        pymodbus read_input_registers only — not *_direct. Not priority. One in-flight.
+        client.read_input_block per stripe — not *_direct. Not priority. One in-flight.
         """
         if not self._is_connected or self._modbus_client is None:
             logger.info("PXE chart request ignored: not connected")
@@ -3905,48 +4410,32 @@ class ModbusManager(QObject):
         self._pxe_request_in_flight = True
         logger.info("PXE chart request queued")
 
-        client = self._modbus_client
+        client = self._spectrum_client()
 
         def task():
-            import math
-            import struct
-            import json
-
-            def _float_from_regs_cdab(reg1: int, reg2: int) -> float:
-                C = (reg2 >> 8) & 0xFF
-                D = reg2 & 0xFF
-                A = (reg1 >> 8) & 0xFF
-                B = reg1 & 0xFF
-                try:
-                    v = float(struct.unpack(">f", bytes([C, D, A, B]))[0])
-                except Exception:
-                    return float("nan")
-                return v if math.isfinite(v) else float("nan")
-
-            def _read_stripes(base_addr: int, n_regs: int, axis: str) -> Optional[list]:
+            def _read_stripes(base_addr: int, n_regs: int, axis: str) -> Optional[bytes]:
                 arraysize = 94  # PXE_CHART_ARRAYSIZE
-                data_regs: list[int] = [0] * n_regs
                 n_stripes = (n_regs + arraysize - 1) // arraysize
+                stripes = []
                 for k in range(n_stripes):
                     start_idx = k * arraysize
                     qty = min(arraysize, n_regs - start_idx)
-                    stripe = client.read_input_registers(base_addr + k, qty)
+                    stripe = client.read_input_block(base_addr + k, qty)
                     if stripe is None or len(stripe) < qty:
                         logger.info(
                             f"PXE chart: {axis} stripe {k} addr={base_addr + k} qty={qty} "
                             f"failed or short: {None if stripe is None else len(stripe)}"
                         )
                         return None
-                    data_regs[start_idx:start_idx + qty] = [int(v) for v in stripe[:qty]]
-                return data_regs
+                    stripes.append(stripe)
+                return RegisterBlock.join(stripes).raw
 
-            meta = client.read_input_registers(500, 2)
-            if meta is None or len(meta) < 2:
-                logger.info(f"PXE chart: meta read failed or short: {None if meta is None else len(meta)}")
+            meta_block = client.read_input_block(500, 2)
+            if meta_block is None or len(meta_block) < 2:
+                logger.info(f"PXE chart: meta read failed or short: {None if meta_block is None else len(meta_block)}")
                 return None
 
-            n_points = int(meta[0])
-            fit_type = int(meta[1])
+            n_points, fit_type = meta_block.registers(0, 2)
             pxe_chart_n = 47
             if n_points < 1:
                 logger.info(f"PXE chart: samplesN={n_points}, skip")
@@ -3956,128 +4445,26 @@ class ModbusManager(QObject):
                 n_points = pxe_chart_n
 
             n_regs = n_points * 2
-            regs_x = _read_stripes(520, n_regs, "X")
-            if regs_x is None:
+            x_raw = _read_stripes(520, n_regs, "X")
+            if x_raw is None:
                 return None
-            regs_y = _read_stripes(521, n_regs, "Y")
-            if regs_y is None:
+            y_raw = _read_stripes(521, n_regs, "Y")
+            if y_raw is None:
                 return None
+            return DecodeJob(decode_pxe_chart, n_points, fit_type, x_raw, y_raw)
 
-            data_x = [
-                _float_from_regs_cdab(regs_x[i], regs_x[i + 1])
-                for i in range(0, n_regs, 2)
-            ]
-            data_y = [
-                _float_from_regs_cdab(regs_y[i], regs_y[i + 1])
-                for i in range(0, n_regs, 2)
-            ]
-
-            pairs = [
-                (float(x), float(y))
-                for x, y in zip(data_x, data_y)
-                if math.isfinite(x) and math.isfinite(y)
-            ]
-            if not pairs:
-                logger.info("PXE chart: no finite X/Y points, skip apply")
-                return None
-
-            # PaintExp: xmin=data_x[0], xmax=data_x[n-1]; Draw() autoscales Y from data.
-            x_min = pairs[0][0]
-            x_max = pairs[-1][0]
-            if not (math.isfinite(x_min) and math.isfinite(x_max) and x_max > x_min):
-                xs = [p[0] for p in pairs]
-                x_min = float(min(xs))
-                x_max = float(max(xs))
-            if x_max <= x_min:
-                x_max = x_min + 1.0
-
-            ys = [p[1] for p in pairs]
-            y_min = float(min(ys))
-            y_max = float(max(ys))
-            y_range = y_max - y_min
-            if y_range <= 0:
-                y_max = y_min + 1.0
-                y_range = 1.0
-            pad = y_range * 0.1
-            if y_min >= 0.0:
-                y_min = max(0.0, y_min - pad)
-            else:
-                y_min -= pad
-            y_max += pad
-
-            points = [{"x": x, "y": y} for x, y in pairs]
-            logger.info(
-                f"PXE chart: samplesN={n_points} fit={fit_type} "
-                f"x=[{x_min},{x_max}] y=[{y_min},{y_max}] "
-                f"data_x_first5={data_x[:5]} data_y_first5={data_y[:5]}"
-            )
-            return {
-                "samples": n_points,
-                "fit_type": fit_type,
-                "x_min": float(x_min),
-                "x_max": float(x_max),
-                "y_min": float(y_min),
-                "y_max": float(y_max),
-                "data_x": [float(v) if math.isfinite(v) else 0.0 for v in data_x],
-                "data_y": [float(v) if math.isfinite(v) else 0.0 for v in data_y],
-                "data_json": json.dumps([float(v) if math.isfinite(v) else 0.0 for v in data_y]),
-                "points": points,
-            }
-
-        self._enqueue_read("pxe", task)
+        self._enqueue_spectrum_read("pxe", client, task)
         return True
 
-    def _check_connection(self):
+    def _pausePollingForReconnect(self):
         """
-        Проверка "живости" соединения без блокирующих сетевых вызовов в GUI-потоке.
-        Если давно не было успешного I/O (чтение/запись), пробуем переподключиться через worker.
+        Worker восстанавливает соединение (канал признан мёртвым по транзакциям) — останавливаем
+        опрос, чтобы не засыпать очередь запросами; после connectFinished опрос запустится снова.
         """
-        if not self._is_connected or self._modbus_client is None:
-            return
-        if self._connection_in_progress:
-            return
-
-        now = time.time()
-        if self._last_modbus_ok_time <= 0:
-            return
-        
-        # Не проверяем соединение, если опрос приостановлен (при переключении экранов)
-        # Время паузы не должно учитываться при проверке соединения
-        if self._polling_paused:
-            return
-        
-        # Не проверяем соединение в течение 15 секунд после подключения/возобновления опроса
-        # Это дает время на первые чтения регистров и стабилизацию соединения
-        if self._polling_resumed_time > 0 and (now - self._polling_resumed_time) < 15.0:
-            return
-
-        # Если давно не было успешных ответов — считаем соединение "подвисшим"
-        if (now - self._last_modbus_ok_time) < 3.0:
-            return
-
-        # Сокет жив — не переподключаемся (ошибки отдельных регистров ≠ обрыв)
-        try:
-            mc = self._modbus_client
-            if mc is not None and mc.client is not None and mc.client.is_socket_open():
-                return
-        except Exception:
-            pass
-
-        # Не дергаем reconnect слишком часто
-        if (now - self._last_reconnect_attempt_time) < 3.0:
-            return
-
-        self._last_reconnect_attempt_time = now
-        logger.warning("Нет успешных ответов Modbus >3с, пробуем переподключиться (в фоне)")
-
-        # Останавливаем polling таймеры, чтобы не засыпать очередь запросами во время reconnect
-        # НО НЕ закрываем соединение - оно должно оставаться открытым
         self._reconnect_polling_stopped = True
-        try:
-            for t in self._polling_timers:
-                t.stop()
-        except Exception:
-            pass
+        self._bump_poll_generation("reconnect")
+        for t in self._polling_timers:
+            t.stop()
         for t in (
             self._water_chiller_setpoint_auto_update_timer,
             self._magnet_psu_setpoint_auto_update_timer,
@@ -4086,17 +4473,8 @@ class ModbusManager(QObject):
             self._xenon_setpoint_auto_update_timer,
             self._n2_setpoint_auto_update_timer,
         ):
-            try:
-                t.stop()
-            except Exception:
-                pass
-        
-        # Сбрасываем время возобновления опроса, чтобы после переподключения установилось новое время
-        self._polling_resumed_time = 0.0
-
+            t.stop()
         self._connection_in_progress = True
-        self._workerSetClient.emit(self._modbus_client)
-        self._workerConnect.emit()
     
     def _syncDeviceStates(self):
         """Синхронизация состояний всех устройств с Modbus"""
@@ -4111,11 +4489,9 @@ class ModbusManager(QObject):
         client = self._modbus_client
 
         def task():
-            # Сначала пробуем holding (03), потом input (04) как fallback
-            value = client.read_holding_register(1020)
-            if value is None:
-                value = client.read_input_register(1020)
-            return value
+            # Holding (03), fallback input (04); ответившая функция запоминается в register_map
+            regs = client.read_learned(1020, functions=(3, 4))
+            return regs[0] if regs else None
 
         self._enqueue_read("1020", task)
     
@@ -4150,9 +4526,6 @@ class ModbusManager(QObject):
             return
 
         client = self._modbus_client
-        # Сбрасываем сокет перед чтением реле, чтобы не читать старые данные
-        # client._flush_socket()
-        # Используем обычный pymodbus вместо прямого сокета (более стабильно)
         
         req_time = time.time()
         logger.debug(f"📤 [REQ] Запрос чтения реле 1021 отправлен в очередь в {req_time:.3f}")
@@ -4181,7 +4554,6 @@ class ModbusManager(QObject):
             return
 
         client = self._modbus_client
-        # Используем обычный pymodbus вместо прямого сокета (более стабильно)
         self._enqueue_read("1111", lambda: client.read_input_register(1111))
     
     def _readWaterChillerTemperature(self):
@@ -4648,7 +5020,6 @@ class ModbusManager(QObject):
         
 
         client = self._modbus_client
-        # Используем обычный pymodbus вместо прямого сокета (более стабильно)
         self._enqueue_read("1411", lambda: client.read_input_register(1411))
     
     def _readMagnetPSUCurrent(self):
@@ -4661,7 +5032,6 @@ class ModbusManager(QObject):
             return
 
         client = self._modbus_client
-        # Используем обычный pymodbus вместо прямого сокета (более стабильно)
         self._enqueue_read("1341", lambda: client.read_input_register(1341))
     
     def _readXenonPressure(self):
@@ -4674,7 +5044,6 @@ class ModbusManager(QObject):
             return
 
         client = self._modbus_client
-        # Используем обычный pymodbus вместо прямого сокета (более стабильно)
         self._enqueue_read("1611", lambda: client.read_input_register(1611))
     
     def _readN2Pressure(self):
@@ -4687,7 +5056,6 @@ class ModbusManager(QObject):
             return
 
         client = self._modbus_client
-        # Используем обычный pymodbus вместо прямого сокета (более стабильно)
         self._enqueue_read("1651", lambda: client.read_input_register(1651))
     
     def _readVacuumPressure(self):
@@ -4700,7 +5068,6 @@ class ModbusManager(QObject):
             return
 
         client = self._modbus_client
-        # Используем обычный pymodbus вместо прямого сокета (более стабильно)
         self._enqueue_read("1701", lambda: client.read_input_register(1701))
     
     def _readFan1131(self):
@@ -5950,10 +6317,7 @@ class ModbusManager(QObject):
         self._measured_cold_cell_ir_signal = value
         self._measured_cold_cell_ir_signal_user_interaction = True
         self.measuredColdCellIRSignalChanged.emit(value)
-        client = self._modbus_client
-        def task() -> bool:
-            return _write_measured_ir_uint32(client, 5021, value)
-        self._enqueue_write("measured_cold_cell_ir_signal", task, {"value": value})
+        self._enqueue_register_write("measured_cold_cell_ir_signal", _measured_ir_write_values(5021, value), {"value": value})
         return True
     
     @Slot(result=bool)
@@ -5976,10 +6340,7 @@ class ModbusManager(QObject):
         self._measured_hot_cell_ir_signal = value
         self._measured_hot_cell_ir_signal_user_interaction = True
         self.measuredHotCellIRSignalChanged.emit(value)
-        client = self._modbus_client
-        def task() -> bool:
-            return _write_measured_ir_uint32(client, 5031, value)
-        self._enqueue_write("measured_hot_cell_ir_signal", task, {"value": value})
+        self._enqueue_register_write("measured_hot_cell_ir_signal", _measured_ir_write_values(5031, value), {"value": value})
         return True
     
     @Slot(result=bool)
@@ -6003,11 +6364,7 @@ class ModbusManager(QObject):
         self._measured_water_1h_nmr_reference_signal_user_interaction = True
         self.measuredWater1HNMRReferenceSignalChanged.emit(value)
         register_value = _seop_scaled_to_register(value, _MEASURED_WATER_1H_NMR_SCALE)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(5041, register_value)
-            return bool(result)
-        self._enqueue_write("measured_water_1h_nmr_reference_signal", task, {"value": value})
+        self._enqueue_register_write("measured_water_1h_nmr_reference_signal", {5041: register_value}, {"value": value})
         return True
     
     @Slot(result=bool)
@@ -6031,11 +6388,7 @@ class ModbusManager(QObject):
         self._measured_water_t2_user_interaction = True
         self.measuredWaterT2Changed.emit(value_ms)
         register_value = _seop_scaled_to_register(value_ms, _MEASURED_T2_MS_SCALE)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(5051, register_value)
-            return bool(result)
-        self._enqueue_write("measured_water_t2", task, {"value_ms": value_ms})
+        self._enqueue_register_write("measured_water_t2", {5051: register_value}, {"value_ms": value_ms})
         return True
     
     @Slot(result=bool)
@@ -6059,11 +6412,7 @@ class ModbusManager(QObject):
         self._measured_hp_129xe_t2_user_interaction = True
         self.measuredHP129XeT2Changed.emit(value_ms)
         register_value = _seop_scaled_to_register(value_ms, _MEASURED_T2_MS_SCALE)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(5071, register_value)
-            return bool(result)
-        self._enqueue_write("measured_hp_129xe_t2", task, {"value_ms": value_ms})
+        self._enqueue_register_write("measured_hp_129xe_t2", {5071: register_value}, {"value_ms": value_ms})
         return True
     
     @Slot(result=bool)
@@ -6129,11 +6478,7 @@ class ModbusManager(QObject):
         self._additional_magnet_psu_current_proton_nmr_user_interaction = True
         self.additionalMagnetPSUCurrentProtonNMRChanged.emit(current_a)
         register_value = _seop_scaled_to_register(current_a, _ADDITIONAL_MAGNET_CURRENT_SCALE)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(6011, register_value)
-            return bool(result)
-        self._enqueue_write("additional_magnet_psu_current_proton_nmr", task, {"current_a": current_a})
+        self._enqueue_register_write("additional_magnet_psu_current_proton_nmr", {6011: register_value}, {"current_a": current_a})
         return True
     
     @Slot(result=bool)
@@ -6157,11 +6502,7 @@ class ModbusManager(QObject):
         self._additional_magnet_psu_current_129xe_nmr_user_interaction = True
         self.additionalMagnetPSUCurrent129XeNMRChanged.emit(current_a)
         register_value = _seop_scaled_to_register(current_a, _ADDITIONAL_MAGNET_CURRENT_SCALE)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(6021, register_value)
-            return bool(result)
-        self._enqueue_write("additional_magnet_psu_current_129xe_nmr", task, {"current_a": current_a})
+        self._enqueue_register_write("additional_magnet_psu_current_129xe_nmr", {6021: register_value}, {"current_a": current_a})
         return True
     
     @Slot(result=bool)
@@ -6185,11 +6526,7 @@ class ModbusManager(QObject):
         self._additional_operational_laser_psu_current_user_interaction = True
         self.additionalOperationalLaserPSUCurrentChanged.emit(current_a)
         register_value = _seop_scaled_to_register(current_a, _ADDITIONAL_LASER_CURRENT_SCALE)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(6031, register_value)
-            return bool(result)
-        self._enqueue_write("additional_operational_laser_psu_current", task, {"current_a": current_a})
+        self._enqueue_register_write("additional_operational_laser_psu_current", {6031: register_value}, {"current_a": current_a})
         return True
     
     @Slot(result=bool)
@@ -6213,11 +6550,7 @@ class ModbusManager(QObject):
         self._additional_rf_pulse_duration_user_interaction = True
         self.additionalRFPulseDurationChanged.emit(duration)
         register_value = int(duration)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(6041, register_value)
-            return bool(result)
-        self._enqueue_write("additional_rf_pulse_duration", task, {"duration": duration})
+        self._enqueue_register_write("additional_rf_pulse_duration", {6041: register_value}, {"duration": duration})
         return True
     
     @Slot(result=bool)
@@ -6241,11 +6574,7 @@ class ModbusManager(QObject):
         self._additional_resonance_frequency_user_interaction = True
         self.additionalResonanceFrequencyChanged.emit(frequency_khz)
         register_value = _seop_scaled_to_register(frequency_khz, _ADDITIONAL_SCALE_10)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(6051, register_value)
-            return bool(result)
-        self._enqueue_write("additional_resonance_frequency", task, {"frequency_khz": frequency_khz})
+        self._enqueue_register_write("additional_resonance_frequency", {6051: register_value}, {"frequency_khz": frequency_khz})
         return True
     
     @Slot(result=bool)
@@ -6269,11 +6598,7 @@ class ModbusManager(QObject):
         self._additional_proton_rf_pulse_power_user_interaction = True
         self.additionalProtonRFPulsePowerChanged.emit(power_percent)
         register_value = _seop_scaled_to_register(power_percent, _ADDITIONAL_SCALE_10)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(6061, register_value)
-            return bool(result)
-        self._enqueue_write("additional_proton_rf_pulse_power", task, {"power_percent": power_percent})
+        self._enqueue_register_write("additional_proton_rf_pulse_power", {6061: register_value}, {"power_percent": power_percent})
         return True
     
     @Slot(result=bool)
@@ -6297,11 +6622,7 @@ class ModbusManager(QObject):
         self._additional_hp_129xe_rf_pulse_power_user_interaction = True
         self.additionalHP129XeRFPulsePowerChanged.emit(power_percent)
         register_value = _seop_scaled_to_register(power_percent, _ADDITIONAL_SCALE_10)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(6071, register_value)
-            return bool(result)
-        self._enqueue_write("additional_hp_129xe_rf_pulse_power", task, {"power_percent": power_percent})
+        self._enqueue_register_write("additional_hp_129xe_rf_pulse_power", {6071: register_value}, {"power_percent": power_percent})
         return True
     
     @Slot(result=bool)
@@ -6325,11 +6646,7 @@ class ModbusManager(QObject):
         self._additional_step_size_b0_sweep_hp_129xe_user_interaction = True
         self.additionalStepSizeB0SweepHP129XeChanged.emit(step_size_a)
         register_value = _seop_scaled_to_register(step_size_a, _ADDITIONAL_STEP_SCALE)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(6081, register_value)
-            return bool(result)
-        self._enqueue_write("additional_step_size_b0_sweep_hp_129xe", task, {"step_size_a": step_size_a})
+        self._enqueue_register_write("additional_step_size_b0_sweep_hp_129xe", {6081: register_value}, {"step_size_a": step_size_a})
         return True
     
     @Slot(result=bool)
@@ -6353,11 +6670,7 @@ class ModbusManager(QObject):
         self._additional_step_size_b0_sweep_protons_user_interaction = True
         self.additionalStepSizeB0SweepProtonsChanged.emit(step_size_a)
         register_value = _seop_scaled_to_register(step_size_a, _ADDITIONAL_STEP_SCALE)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(6091, register_value)
-            return bool(result)
-        self._enqueue_write("additional_step_size_b0_sweep_protons", task, {"step_size_a": step_size_a})
+        self._enqueue_register_write("additional_step_size_b0_sweep_protons", {6091: register_value}, {"step_size_a": step_size_a})
         return True
     
     @Slot(result=bool)
@@ -6381,11 +6694,7 @@ class ModbusManager(QObject):
         self._additional_xe_alicats_pressure_user_interaction = True
         self.additionalXeAlicatsPressureChanged.emit(pressure_torr)
         register_value = _seop_scaled_to_register(pressure_torr, _ADDITIONAL_ALICATS_PRESSURE_SCALE)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(6101, register_value)
-            return bool(result)
-        self._enqueue_write("additional_xe_alicats_pressure", task, {"pressure_torr": pressure_torr})
+        self._enqueue_register_write("additional_xe_alicats_pressure", {6101: register_value}, {"pressure_torr": pressure_torr})
         return True
     
     @Slot(result=bool)
@@ -6409,11 +6718,7 @@ class ModbusManager(QObject):
         self._additional_nitrogen_alicats_pressure_user_interaction = True
         self.additionalNitrogenAlicatsPressureChanged.emit(pressure_torr)
         register_value = _seop_scaled_to_register(pressure_torr, _ADDITIONAL_ALICATS_PRESSURE_SCALE)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(6111, register_value)
-            return bool(result)
-        self._enqueue_write("additional_nitrogen_alicats_pressure", task, {"pressure_torr": pressure_torr})
+        self._enqueue_register_write("additional_nitrogen_alicats_pressure", {6111: register_value}, {"pressure_torr": pressure_torr})
         return True
     
     @Slot(result=bool)
@@ -6437,11 +6742,7 @@ class ModbusManager(QObject):
         self._additional_chiller_temp_setpoint_user_interaction = True
         self.additionalChillerTempSetpointChanged.emit(setpoint)
         register_value = _seop_scaled_to_register(setpoint, _ADDITIONAL_SCALE_10)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(6121, register_value)
-            return bool(result)
-        self._enqueue_write("additional_chiller_temp_setpoint", task, {"setpoint": setpoint})
+        self._enqueue_register_write("additional_chiller_temp_setpoint", {6121: register_value}, {"setpoint": setpoint})
         return True
     
     @Slot(result=bool)
@@ -6465,11 +6766,7 @@ class ModbusManager(QObject):
         self._additional_seop_resonance_frequency_user_interaction = True
         self.additionalSEOPResonanceFrequencyChanged.emit(frequency_nm)
         register_value = _seop_scaled_to_register(frequency_nm, _ADDITIONAL_NM_SCALE)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(6131, register_value)
-            return bool(result)
-        self._enqueue_write("additional_seop_resonance_frequency", task, {"frequency_nm": frequency_nm})
+        self._enqueue_register_write("additional_seop_resonance_frequency", {6131: register_value}, {"frequency_nm": frequency_nm})
         return True
     
     @Slot(result=bool)
@@ -6493,11 +6790,7 @@ class ModbusManager(QObject):
         self._additional_seop_resonance_frequency_tolerance_user_interaction = True
         self.additionalSEOPResonanceFrequencyToleranceChanged.emit(tolerance)
         register_value = _seop_scaled_to_register(tolerance, _ADDITIONAL_TOLERANCE_SCALE)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(6141, register_value)
-            return bool(result)
-        self._enqueue_write("additional_seop_resonance_frequency_tolerance", task, {"tolerance": tolerance})
+        self._enqueue_register_write("additional_seop_resonance_frequency_tolerance", {6141: register_value}, {"tolerance": tolerance})
         return True
     
     @Slot(result=bool)
@@ -6521,11 +6814,7 @@ class ModbusManager(QObject):
         self._additional_ir_spectrometer_number_of_scans_user_interaction = True
         self.additionalIRSpectrometerNumberOfScansChanged.emit(num_scans)
         register_value = int(num_scans)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(6151, register_value)
-            return bool(result)
-        self._enqueue_write("additional_ir_spectrometer_number_of_scans", task, {"num_scans": num_scans})
+        self._enqueue_register_write("additional_ir_spectrometer_number_of_scans", {6151: register_value}, {"num_scans": num_scans})
         return True
     
     @Slot(result=bool)
@@ -6549,11 +6838,7 @@ class ModbusManager(QObject):
         self._additional_ir_spectrometer_exposure_duration_user_interaction = True
         self.additionalIRSpectrometerExposureDurationChanged.emit(duration_ms)
         register_value = _seop_scaled_to_register(duration_ms, _ADDITIONAL_EXPOSURE_SCALE)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(6161, register_value)
-            return bool(result)
-        self._enqueue_write("additional_ir_spectrometer_exposure_duration", task, {"duration_ms": duration_ms})
+        self._enqueue_register_write("additional_ir_spectrometer_exposure_duration", {6161: register_value}, {"duration_ms": duration_ms})
         return True
     
     @Slot(result=bool)
@@ -6577,11 +6862,7 @@ class ModbusManager(QObject):
         self._additional_1h_reference_n_scans_user_interaction = True
         self.additional1HReferenceNScansChanged.emit(num_scans)
         register_value = int(num_scans)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(6171, register_value)
-            return bool(result)
-        self._enqueue_write("additional_1h_reference_n_scans", task, {"num_scans": num_scans})
+        self._enqueue_register_write("additional_1h_reference_n_scans", {6171: register_value}, {"num_scans": num_scans})
         return True
     
     @Slot(result=bool)
@@ -6605,11 +6886,7 @@ class ModbusManager(QObject):
         self._additional_1h_current_sweep_n_scans_user_interaction = True
         self.additional1HCurrentSweepNScansChanged.emit(num_scans)
         register_value = int(num_scans)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(6181, register_value)
-            return bool(result)
-        self._enqueue_write("additional_1h_current_sweep_n_scans", task, {"num_scans": num_scans})
+        self._enqueue_register_write("additional_1h_current_sweep_n_scans", {6181: register_value}, {"num_scans": num_scans})
         return True
     
     @Slot(result=bool)
@@ -6633,11 +6910,7 @@ class ModbusManager(QObject):
         self._additional_baseline_correction_min_frequency_user_interaction = True
         self.additionalBaselineCorrectionMinFrequencyChanged.emit(frequency_khz)
         register_value = _seop_scaled_to_register(frequency_khz, _ADDITIONAL_SCALE_10)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(6191, register_value)
-            return bool(result)
-        self._enqueue_write("additional_baseline_correction_min_frequency", task, {"frequency_khz": frequency_khz})
+        self._enqueue_register_write("additional_baseline_correction_min_frequency", {6191: register_value}, {"frequency_khz": frequency_khz})
         return True
     
     @Slot(result=bool)
@@ -6661,11 +6934,7 @@ class ModbusManager(QObject):
         self._additional_baseline_correction_max_frequency_user_interaction = True
         self.additionalBaselineCorrectionMaxFrequencyChanged.emit(frequency_khz)
         register_value = _seop_scaled_to_register(frequency_khz, _ADDITIONAL_SCALE_10)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(6201, register_value)
-            return bool(result)
-        self._enqueue_write("additional_baseline_correction_max_frequency", task, {"frequency_khz": frequency_khz})
+        self._enqueue_register_write("additional_baseline_correction_max_frequency", {6201: register_value}, {"frequency_khz": frequency_khz})
         return True
     
     @Slot(result=bool)
@@ -6851,11 +7120,7 @@ class ModbusManager(QObject):
         self._manual_mode_rf_pulse_frequency_user_interaction = True
         self.manualModeRFPulseFrequencyChanged.emit(frequency_khz)
         register_value = _seop_scaled_to_register(frequency_khz, _MANUAL_MODE_FREQ_SCALE)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(6301, register_value)
-            return bool(result)
-        self._enqueue_write("manual_mode_rf_pulse_frequency", task, {"frequency_khz": frequency_khz})
+        self._enqueue_register_write("manual_mode_rf_pulse_frequency", {6301: register_value}, {"frequency_khz": frequency_khz})
         return True
     
     @Slot(result=bool)
@@ -6879,11 +7144,7 @@ class ModbusManager(QObject):
         self._manual_mode_rf_pulse_power_user_interaction = True
         self.manualModeRFPulsePowerChanged.emit(power_percent)
         register_value = _seop_scaled_to_register(power_percent, _MANUAL_MODE_POWER_SCALE)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(6311, register_value)
-            return bool(result)
-        self._enqueue_write("manual_mode_rf_pulse_power", task, {"power_percent": power_percent})
+        self._enqueue_register_write("manual_mode_rf_pulse_power", {6311: register_value}, {"power_percent": power_percent})
         return True
     
     @Slot(result=bool)
@@ -6907,11 +7168,7 @@ class ModbusManager(QObject):
         self._manual_mode_rf_pulse_duration_user_interaction = True
         self.manualModeRFPulseDurationChanged.emit(duration_t2)
         register_value = int(round(duration_t2))
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(6321, register_value)
-            return bool(result)
-        self._enqueue_write("manual_mode_rf_pulse_duration", task, {"duration_t2": duration_t2})
+        self._enqueue_register_write("manual_mode_rf_pulse_duration", {6321: register_value}, {"duration_t2": duration_t2})
         return True
     
     @Slot(result=bool)
@@ -6935,11 +7192,7 @@ class ModbusManager(QObject):
         self._manual_mode_pre_acquisition_user_interaction = True
         self.manualModePreAcquisitionChanged.emit(duration_ms)
         register_value = int(round(duration_ms))
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(6331, register_value)
-            return bool(result)
-        self._enqueue_write("manual_mode_pre_acquisition", task, {"duration_ms": duration_ms})
+        self._enqueue_register_write("manual_mode_pre_acquisition", {6331: register_value}, {"duration_ms": duration_ms})
         return True
     
     @Slot(result=bool)
@@ -6964,11 +7217,7 @@ class ModbusManager(QObject):
         self._manual_mode_nmr_gain_user_interaction = True
         self.manualModeNMRGainChanged.emit(gain_index)
         register_value = int(gain_index)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(6341, register_value)
-            return bool(result)
-        self._enqueue_write("manual_mode_nmr_gain", task, {"gain_index": gain_index})
+        self._enqueue_register_write("manual_mode_nmr_gain", {6341: register_value}, {"gain_index": gain_index})
         return True
     
     @Slot(result=bool)
@@ -6994,11 +7243,7 @@ class ModbusManager(QObject):
         self._manual_mode_nmr_number_of_scans_user_interaction = True
         self.manualModeNMRNumberOfScansChanged.emit(num_scans)
         register_value = int(num_scans)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(6351, register_value)
-            return bool(result)
-        self._enqueue_write("manual_mode_nmr_number_of_scans", task, {"num_scans": num_scans})
+        self._enqueue_register_write("manual_mode_nmr_number_of_scans", {6351: register_value}, {"num_scans": num_scans})
         return True
     
     @Slot(result=bool)
@@ -7022,11 +7267,7 @@ class ModbusManager(QObject):
         self._manual_mode_nmr_recovery_user_interaction = True
         self.manualModeNMRRecoveryChanged.emit(duration_ms)
         register_value = int(round(duration_ms))
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(6361, register_value)
-            return bool(result)
-        self._enqueue_write("manual_mode_nmr_recovery", task, {"duration_ms": duration_ms})
+        self._enqueue_register_write("manual_mode_nmr_recovery", {6361: register_value}, {"duration_ms": duration_ms})
         return True
     
     @Slot(result=bool)
@@ -7050,11 +7291,7 @@ class ModbusManager(QObject):
         self._manual_mode_center_frequency_user_interaction = True
         self.manualModeCenterFrequencyChanged.emit(frequency_khz)
         register_value = _seop_scaled_to_register(frequency_khz, _MANUAL_MODE_FREQ_SCALE)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(6371, register_value)
-            return bool(result)
-        self._enqueue_write("manual_mode_center_frequency", task, {"frequency_khz": frequency_khz})
+        self._enqueue_register_write("manual_mode_center_frequency", {6371: register_value}, {"frequency_khz": frequency_khz})
         return True
     
     @Slot(result=bool)
@@ -7078,11 +7315,7 @@ class ModbusManager(QObject):
         self._manual_mode_frequency_span_user_interaction = True
         self.manualModeFrequencySpanChanged.emit(frequency_khz)
         register_value = _seop_scaled_to_register(frequency_khz, _MANUAL_MODE_FREQ_SCALE)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(6381, register_value)
-            return bool(result)
-        self._enqueue_write("manual_mode_frequency_span", task, {"frequency_khz": frequency_khz})
+        self._enqueue_register_write("manual_mode_frequency_span", {6381: register_value}, {"frequency_khz": frequency_khz})
         return True
     
     @Slot(result=bool)
@@ -7884,12 +8117,7 @@ class ModbusManager(QObject):
         self._laser_psu_voltage_setpoint_user_interaction = True
         self.laserPSUVoltageSetpointChanged.emit(voltage)
         register_value = _psu_voltage_volts_to_register(voltage)
-        client = self._modbus_client
-
-        def task() -> bool:
-            return bool(client.write_holding_register(1221, register_value))
-
-        self._enqueue_write("1221", task, {"voltage": voltage})
+        self._enqueue_register_write("1221", {1221: register_value}, {"voltage": voltage})
         return True
 
     @Slot(float, result=bool)
@@ -7931,12 +8159,7 @@ class ModbusManager(QObject):
         register_value = 1 if state else 0
         self._laser_psu_driver_on = state
         self.laserPSUDriverStateChanged.emit(state)
-        client = self._modbus_client
-
-        def task() -> bool:
-            return bool(client.write_holding_register(1251, register_value))
-
-        self._enqueue_write("1251", task, {"state": state})
+        self._enqueue_register_write("1251", {1251: register_value}, {"state": state})
         return True
     
     @Slot(float, result=bool)
@@ -7950,12 +8173,7 @@ class ModbusManager(QObject):
         self._magnet_psu_voltage_setpoint_user_interaction = True
         self.magnetPSUVoltageSetpointChanged.emit(voltage)
         register_value = _psu_voltage_volts_to_register(voltage)
-        client = self._modbus_client
-
-        def task() -> bool:
-            return bool(client.write_holding_register(1311, register_value))
-
-        self._enqueue_write("1311", task, {"voltage": voltage})
+        self._enqueue_register_write("1311", {1311: register_value}, {"voltage": voltage})
         return True
     
     @Slot(float, result=bool)
@@ -7968,11 +8186,7 @@ class ModbusManager(QObject):
             return False
         # Преобразуем ток в значение для регистра (умножаем на 100)
         register_value = int(current * 100)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(1331, register_value)
-            return bool(result)
-        self._enqueue_write("1331", task, {"current": current})
+        self._enqueue_register_write("1331", {1331: register_value}, {"current": current})
         return True
     
     @Slot(bool, result=bool)
@@ -7984,11 +8198,7 @@ class ModbusManager(QObject):
         if not self._is_connected or self._modbus_client is None:
             return False
         register_value = 1 if state else 0
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(1341, register_value)
-            return bool(result)
-        self._enqueue_write("1341", task, {"state": state})
+        self._enqueue_register_write("1341", {1341: register_value}, {"state": state})
         self._magnet_psu_driver_on = state
         self.magnetPSUDriverStateChanged.emit(state)
         return True
@@ -8114,11 +8324,7 @@ class ModbusManager(QObject):
         self._seop_laser_max_temp_user_interaction = True
         self.seopLaserMaxTempChanged.emit(temperature)
         register_value = _seop_scaled_to_register(temperature, _SEOP_TEMP_SCALE)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(3011, register_value)
-            return bool(result)
-        self._enqueue_write("seop_laser_max_temp", task, {"temperature": temperature})
+        self._enqueue_register_write("seop_laser_max_temp", {3011: register_value}, {"temperature": temperature})
         return True
     
     @Slot(result=bool)
@@ -8140,11 +8346,7 @@ class ModbusManager(QObject):
         self._seop_laser_min_temp_user_interaction = True
         self.seopLaserMinTempChanged.emit(temperature)
         register_value = _seop_scaled_to_register(temperature, _SEOP_TEMP_SCALE)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(3021, register_value)
-            return bool(result)
-        self._enqueue_write("seop_laser_min_temp", task, {"temperature": temperature})
+        self._enqueue_register_write("seop_laser_min_temp", {3021: register_value}, {"temperature": temperature})
         return True
     
     @Slot(result=bool)
@@ -8166,11 +8368,7 @@ class ModbusManager(QObject):
         self._seop_cell_max_temp_user_interaction = True
         self.seopCellMaxTempChanged.emit(temperature)
         register_value = _seop_scaled_to_register(temperature, _SEOP_TEMP_SCALE)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(3031, register_value)
-            return bool(result)
-        self._enqueue_write("seop_cell_max_temp", task, {"temperature": temperature})
+        self._enqueue_register_write("seop_cell_max_temp", {3031: register_value}, {"temperature": temperature})
         return True
     
     @Slot(result=bool)
@@ -8192,11 +8390,7 @@ class ModbusManager(QObject):
         self._seop_cell_min_temp_user_interaction = True
         self.seopCellMinTempChanged.emit(temperature)
         register_value = _seop_scaled_to_register(temperature, _SEOP_TEMP_SCALE)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(3041, register_value)
-            return bool(result)
-        self._enqueue_write("seop_cell_min_temp", task, {"temperature": temperature})
+        self._enqueue_register_write("seop_cell_min_temp", {3041: register_value}, {"temperature": temperature})
         return True
     
     @Slot(result=bool)
@@ -8218,11 +8412,7 @@ class ModbusManager(QObject):
         self._seop_ramp_temp_user_interaction = True
         self.seopRampTempChanged.emit(temperature)
         register_value = _seop_scaled_to_register(temperature, _SEOP_TEMP_SCALE)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(3051, register_value)
-            return bool(result)
-        self._enqueue_write("seop_ramp_temp", task, {"temperature": temperature})
+        self._enqueue_register_write("seop_ramp_temp", {3051: register_value}, {"temperature": temperature})
         return True
     
     @Slot(result=bool)
@@ -8244,11 +8434,7 @@ class ModbusManager(QObject):
         self._seop_temp_user_interaction = True
         self.seopTempChanged.emit(temperature)
         register_value = _seop_scaled_to_register(temperature, _SEOP_TEMP_SCALE)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(3061, register_value)
-            return bool(result)
-        self._enqueue_write("seop_temp", task, {"temperature": temperature})
+        self._enqueue_register_write("seop_temp", {3061: register_value}, {"temperature": temperature})
         return True
     
     @Slot(result=bool)
@@ -8270,11 +8456,7 @@ class ModbusManager(QObject):
         self._seop_cell_refill_temp_user_interaction = True
         self.seopCellRefillTempChanged.emit(temperature)
         register_value = _seop_scaled_to_register(temperature, _SEOP_TEMP_SCALE)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(3071, register_value)
-            return bool(result)
-        self._enqueue_write("seop_cell_refill_temp", task, {"temperature": temperature})
+        self._enqueue_register_write("seop_cell_refill_temp", {3071: register_value}, {"temperature": temperature})
         return True
     
     @Slot(result=bool)
@@ -8296,11 +8478,7 @@ class ModbusManager(QObject):
         self._seop_loop_time_user_interaction = True
         self.seopLoopTimeChanged.emit(time_seconds)
         register_value = int(time_seconds)  # Время в секундах - целое число
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(3081, register_value)
-            return bool(result)
-        self._enqueue_write("seop_loop_time", task, {"time_seconds": time_seconds})
+        self._enqueue_register_write("seop_loop_time", {3081: register_value}, {"time_seconds": time_seconds})
         return True
     
     @Slot(result=bool)
@@ -8388,11 +8566,7 @@ class ModbusManager(QObject):
         self._seop_process_duration_user_interaction = True
         self.seopProcessDurationChanged.emit(duration_seconds)
         register_value = int(duration_seconds)  # В секундах - целое число
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(3091, register_value)
-            return bool(result)
-        self._enqueue_write("seop_process_duration", task, {"duration_seconds": duration_seconds})
+        self._enqueue_register_write("seop_process_duration", {3091: register_value}, {"duration_seconds": duration_seconds})
         return True
     
     @Slot(result=bool)
@@ -8414,11 +8588,7 @@ class ModbusManager(QObject):
         self._seop_laser_max_output_power_user_interaction = True
         self.seopLaserMaxOutputPowerChanged.emit(power_w)
         register_value = _seop_scaled_to_register(power_w, _SEOP_POWER_SCALE)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(3101, register_value)
-            return bool(result)
-        self._enqueue_write("seop_laser_max_output_power", task, {"power_w": power_w})
+        self._enqueue_register_write("seop_laser_max_output_power", {3101: register_value}, {"power_w": power_w})
         return True
     
     @Slot(result=bool)
@@ -8440,11 +8610,7 @@ class ModbusManager(QObject):
         self._seop_laser_psu_max_current_user_interaction = True
         self.seopLaserPSUMaxCurrentChanged.emit(current_a)
         register_value = _seop_scaled_to_register(current_a, _SEOP_CURRENT_SCALE)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(3111, register_value)
-            return bool(result)
-        self._enqueue_write("seop_laser_psu_max_current", task, {"current_a": current_a})
+        self._enqueue_register_write("seop_laser_psu_max_current", {3111: register_value}, {"current_a": current_a})
         return True
     
     @Slot(result=bool)
@@ -8466,11 +8632,7 @@ class ModbusManager(QObject):
         self._seop_water_chiller_max_temp_user_interaction = True
         self.seopWaterChillerMaxTempChanged.emit(temperature)
         register_value = _seop_scaled_to_register(temperature, _SEOP_TEMP_SCALE)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(3121, register_value)
-            return bool(result)
-        self._enqueue_write("seop_water_chiller_max_temp", task, {"temperature": temperature})
+        self._enqueue_register_write("seop_water_chiller_max_temp", {3121: register_value}, {"temperature": temperature})
         return True
     
     @Slot(result=bool)
@@ -8492,11 +8654,7 @@ class ModbusManager(QObject):
         self._seop_water_chiller_min_temp_user_interaction = True
         self.seopWaterChillerMinTempChanged.emit(temperature)
         register_value = _seop_scaled_to_register(temperature, _SEOP_TEMP_SCALE)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(3131, register_value)
-            return bool(result)
-        self._enqueue_write("seop_water_chiller_min_temp", task, {"temperature": temperature})
+        self._enqueue_register_write("seop_water_chiller_min_temp", {3131: register_value}, {"temperature": temperature})
         return True
     
     @Slot(result=bool)
@@ -8518,11 +8676,7 @@ class ModbusManager(QObject):
         self._seop_xe_concentration_user_interaction = True
         self.seopXeConcentrationChanged.emit(concentration_mmol)
         register_value = _seop_scaled_to_register(concentration_mmol, _SEOP_XE_CONCENTRATION_SCALE)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(3141, register_value)
-            return bool(result)
-        self._enqueue_write("seop_xe_concentration", task, {"concentration_mmol": concentration_mmol})
+        self._enqueue_register_write("seop_xe_concentration", {3141: register_value}, {"concentration_mmol": concentration_mmol})
         return True
     
     @Slot(result=bool)
@@ -8544,11 +8698,7 @@ class ModbusManager(QObject):
         self._seop_water_proton_concentration_user_interaction = True
         self.seopWaterProtonConcentrationChanged.emit(concentration_mol)
         register_value = _seop_scaled_to_register(concentration_mol, _SEOP_WATER_PROTON_SCALE)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(3151, register_value)
-            return bool(result)
-        self._enqueue_write("seop_water_proton_concentration", task, {"concentration_mol": concentration_mol})
+        self._enqueue_register_write("seop_water_proton_concentration", {3151: register_value}, {"concentration_mol": concentration_mol})
         return True
     
     @Slot(result=bool)
@@ -8627,11 +8777,7 @@ class ModbusManager(QObject):
         self._seop_cell_number_user_interaction = True
         self.seopCellNumberChanged.emit(cell_number)
         register_value = int(cell_number)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(3171, register_value)
-            return bool(result)
-        self._enqueue_write("seop_cell_number", task, {"cell_number": cell_number})
+        self._enqueue_register_write("seop_cell_number", {3171: register_value}, {"cell_number": cell_number})
         return True
     
     @Slot(result=bool)
@@ -8653,11 +8799,7 @@ class ModbusManager(QObject):
         self._seop_refill_cycle_user_interaction = True
         self.seopRefillCycleChanged.emit(refill_cycle)
         register_value = int(refill_cycle)
-        client = self._modbus_client
-        def task() -> bool:
-            result = client.write_holding_register(3181, register_value)
-            return bool(result)
-        self._enqueue_write("seop_refill_cycle", task, {"refill_cycle": refill_cycle})
+        self._enqueue_register_write("seop_refill_cycle", {3181: register_value}, {"refill_cycle": refill_cycle})
         return True
     
     @Slot(result=bool)
@@ -0,0 +1,536 @@
+"""
+Транспорты ModbusClient: отправка кадра, приём ответа, закрытие и счётчики производительности.
+
+- PymodbusTransport — соединение через pymodbus ModbusTcpClient, обмен напрямую по его сокету;
+- SocketTransport — собственный TCP сокет, без pymodbus;
+- LoopbackTransport — в процессе, ответы из RegisterBank (бенчмарки верхних уровней без сети).
+
+Все три разбирают ответы одним RxBuffer, поэтому верхние уровни видят одинаковое поведение.
+"""
+from __future__ import annotations
+
+import logging
+import socket
+import time
+from typing import Optional
+
+from modbus_codec import RtuResponse, RxBuffer, crc16, with_crc
+
+logger = logging.getLogger(__name__)
+
+TRANSPORTS = ("pymodbus", "socket", "loopback")
+
+# Сколько recv без ожидания делает вычитка запоздавших ответов перед отправкой
+_DRAIN_MAX_READS = 8
+
+
+class TransportStats:
+    """Счётчики транспорта (с момента создания, переживают переподключения)."""
+
+    __slots__ = (
+        "opens", "frames_out", "frames_in", "bytes_out", "bytes_in",
+        "recv_calls", "timeouts", "crc_errors", "errors", "io_time", "stale_flushes",
+    )
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+        self.io_time = 0.0
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class SocketProfile:
+    """
+    Опции TCP сокета для потока мелких RTU кадров (8 байт запрос, 7..133 ответ).
+    None — оставить значение ОС. Умолчания выбраны по transport_bench.py: когда мост отдаёт
+    ответ двумя сегментами, без TCP_QUICKACK запрос стоит ~44 мс (Nagle у моста ждёт наш
+    отложенный ACK), с ним — ~70 мкс; уменьшение буферов выигрыша не даёт.
+
+    - nodelay: TCP_NODELAY — не копить мелкие кадры алгоритмом Nagle;
+    - quickack: TCP_QUICKACK (Linux) — ACK без задержки; ОС сбрасывает его, поэтому он
+      взводится заново после каждого recv;
+    - rcvbuf / sndbuf: SO_RCVBUF / SO_SNDBUF, байты;
+    - keepalive_*: SO_KEEPALIVE и интервалы (секунды / число проб).
+    """
+
+    def __init__(
+        self,
+        nodelay: bool = True,
+        quickack: bool = True,
+        rcvbuf: Optional[int] = None,
+        sndbuf: Optional[int] = None,
+        keepalive: bool = True,
+        keepalive_idle: int = 2,
+        keepalive_interval: int = 2,
+        keepalive_count: int = 3,
+    ):
+        self.nodelay = nodelay
+        self.quickack = quickack
+        self.rcvbuf = rcvbuf
+        self.sndbuf = sndbuf
+        self.keepalive = keepalive
+        self.keepalive_idle = keepalive_idle
+        self.keepalive_interval = keepalive_interval
+        self.keepalive_count = keepalive_count
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+    @property
+    def rearm_quickack(self) -> bool:
+        return self.quickack and hasattr(socket, "TCP_QUICKACK")
+
+
+DEFAULT_SOCKET_PROFILE = SocketProfile()
+
+
+def _set_option(sock, effective: dict, key: str, level: int, option: int, value: int) -> None:
+    try:
+        sock.setsockopt(level, option, value)
+        effective[key] = sock.getsockopt(level, option)
+    except OSError as e:
+        effective[key] = None
+        logger.debug(f"Опция сокета {key}={value} не поддерживается: {e}")
+
+
+def configure_socket(sock, profile: Optional[SocketProfile] = None) -> dict:
+    """
+    Применить profile к сокету. Возвращает действующие значения (как их вернул getsockopt;
+    SO_RCVBUF/SO_SNDBUF на Linux — удвоенные ядром), None — опция не поддерживается.
+    """
+    profile = profile or DEFAULT_SOCKET_PROFILE
+    effective: dict = {}
+    _set_option(sock, effective, "nodelay", socket.IPPROTO_TCP, socket.TCP_NODELAY, int(profile.nodelay))
+    if hasattr(socket, "TCP_QUICKACK"):
+        _set_option(sock, effective, "quickack", socket.IPPROTO_TCP, socket.TCP_QUICKACK, int(profile.quickack))
+    else:
+        effective["quickack"] = None
+    if profile.rcvbuf is not None:
+        _set_option(sock, effective, "rcvbuf", socket.SOL_SOCKET, socket.SO_RCVBUF, profile.rcvbuf)
+    else:
+        effective["rcvbuf"] = sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+    if profile.sndbuf is not None:
+        _set_option(sock, effective, "sndbuf", socket.SOL_SOCKET, socket.SO_SNDBUF, profile.sndbuf)
+    else:
+        effective["sndbuf"] = sock.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF)
+    _set_option(sock, effective, "keepalive", socket.SOL_SOCKET, socket.SO_KEEPALIVE, int(profile.keepalive))
+    if profile.keepalive:
+        if hasattr(socket, 'TCP_KEEPIDLE'):
+            # Linux: первый keep-alive через keepalive_idle, дальше каждые keepalive_interval
+            _set_option(sock, effective, "keepalive_idle", socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, profile.keepalive_idle)
+        elif hasattr(socket, 'TCP_KEEPALIVE'):
+            # macOS
+            _set_option(sock, effective, "keepalive_idle", socket.IPPROTO_TCP, socket.TCP_KEEPALIVE, profile.keepalive_idle)
+        if hasattr(socket, 'TCP_KEEPINTVL'):
+            _set_option(sock, effective, "keepalive_interval", socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, profile.keepalive_interval)
+        if hasattr(socket, 'TCP_KEEPCNT'):
+            _set_option(sock, effective, "keepalive_count", socket.IPPROTO_TCP, socket.TCP_KEEPCNT, profile.keepalive_count)
+        # Где интервалы не настраиваются (~75 с у ОС), соединение держат Modbus keep-alive запросы worker
+    logger.info(f"Опции TCP сокета: {effective}")
+    return effective
+
+
+class FrameTransport:
+    """
+    Интерфейс транспорта. После receive() в rx_first_byte / rx_bytes / rx_crc_error —
+    данные последней транзакции (для трассировки), в counters — накопленные счётчики.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self.counters = TransportStats()
+        self._rx = RxBuffer()
+        self.rx_first_byte = 0.0
+        self.rx_bytes = 0
+        self.rx_crc_error = False
+        self._crc_base = 0
+        # После таймаута в сокете может лежать запоздавший ответ: FC03/FC04 одной длины по содержимому
+        # не отличить, поэтому следующий send() один раз чистит буфер и вычитывает сокет без ожидания
+        self._stale_pending = False
+        # Второй ответ, который устройство может ещё прислать на повторённый запрос (expect_late_reply):
+        # (function, length, address, value, до какого time.monotonic)
+        self._late: Optional[tuple] = None
+        # Действующие опции сокета после open() (configure_socket)
+        self.socket_options: dict = {}
+
+    def open(self, timeout: float) -> bool:
+        raise NotImplementedError
+
+    def is_socket_open(self) -> bool:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        raise NotImplementedError
+
+    def _write(self, frame: bytes) -> None:
+        raise NotImplementedError
+
+    def _fill(self, remaining: float) -> int:
+        """Дочитать в приёмный буфер не дольше remaining секунд; 0 — ничего не пришло."""
+        raise NotImplementedError
+
+    def _drain(self) -> int:
+        """Вычитать из сокета всё, что уже пришло, не дожидаясь (сколько байт); данные не нужны."""
+        return 0
+
+    def expect_late_reply(
+        self, function: int, length: int, address: Optional[int], value: Optional[int], deadline: float
+    ) -> None:
+        """
+        Запрос отправлялся дважды, а ответ получен один: если опоздал ответ на первый кадр, до deadline
+        придёт второй. Следующий запрос той же формы (FC04 одного регистра — всегда 7 байт) перед
+        отправкой дождётся его и отбросит (settle_late_reply); запросы другой формы его просто не примут.
+        """
+        self._late = (function, length, address, value, deadline)
+
+    def settle_late_reply(
+        self, unit_id: int, function: int, length: int, address: Optional[int] = None, value: Optional[int] = None
+    ) -> None:
+        """Перед отправкой запроса такой формы: дождаться и отбросить второй ответ на повторённый запрос."""
+        late = self._late
+        if late is None or late[:4] != (function, length, address, value):
+            return
+        self._late = None
+        deadline = late[4]
+        rx = self._rx
+        counters = self.counters
+        started = time.monotonic()
+        try:
+            while True:
+                dropped = rx.drop_stale(unit_id, function, length, address, value)
+                if dropped is not None:
+                    if dropped:
+                        logger.debug(f"Отброшен второй ответ на повторённый запрос FC{function:02d}")
+                    return
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                counters.recv_calls += 1
+                n = self._fill(remaining)
+                if n == 0:
+                    return
+                counters.bytes_in += n
+        except OSError:
+            counters.errors += 1
+            raise
+        finally:
+            counters.io_time += time.monotonic() - started
+
+    def _discard_stale(self) -> None:
+        self._stale_pending = False
+        self._rx.clear()
+        n = self._drain()
+        self._rx.clear()
+        self.counters.stale_flushes += 1
+        if n:
+            self.counters.bytes_in += n
+            logger.debug(f"Отброшено {n} байт запоздавших ответов после таймаута")
+
+    def send(self, frame: bytes) -> None:
+        """Отправить кадр запроса. ConnectionError/OSError — обрыв."""
+        if self._stale_pending:
+            try:
+                self._discard_stale()
+            except OSError:
+                self.counters.errors += 1
+                raise
+        self.rx_first_byte = 0.0
+        self.rx_bytes = 0
+        self.rx_crc_error = False
+        self._crc_base = self._rx.crc_errors
+        started = time.monotonic()
+        try:
+            self._write(frame)
+        except OSError:
+            self.counters.errors += 1
+            raise
+        finally:
+            self.counters.io_time += time.monotonic() - started
+        self.counters.frames_out += 1
+        self.counters.bytes_out += len(frame)
+
+    def receive(
+        self,
+        unit_id: int,
+        function: int,
+        length: int,
+        address: Optional[int] = None,
+        value: Optional[int] = None,
+        *,
+        deadline: float,
+    ) -> Optional[RtuResponse]:
+        """
+        Ответ на последний send() или None, если до deadline (time.monotonic) его нет.
+        Чужие ответы отбрасываются по содержимому (RxBuffer.take_frame); запоздавшие ответы
+        после таймаута — при следующем send() (_stale_pending).
+        """
+        rx = self._rx
+        counters = self.counters
+        started = time.monotonic()
+        try:
+            while True:
+                resp = rx.take_frame(unit_id, function, length, address, value)
+                if resp is not None:
+                    counters.frames_in += 1
+                    return resp
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                counters.recv_calls += 1
+                n = self._fill(remaining)
+                if n == 0:
+                    break
+                if not self.rx_bytes:
+                    self.rx_first_byte = time.monotonic()
+                self.rx_bytes += n
+                counters.bytes_in += n
+        except OSError:
+            counters.errors += 1
+            raise
+        finally:
+            counters.io_time += time.monotonic() - started
+            if rx.crc_errors != self._crc_base:
+                counters.crc_errors += rx.crc_errors - self._crc_base
+                self._crc_base = rx.crc_errors
+                self.rx_crc_error = True
+        counters.timeouts += 1
+        self._stale_pending = True
+        return None
+
+    def stats(self) -> dict:
+        data = self.counters.as_dict()
+        data["transport"] = self.name
+        data["stale_frames"] = self._rx.stale_frames
+        if self.socket_options:
+            data["socket_options"] = dict(self.socket_options)
+        return data
+
+
+class SocketTransport(FrameTransport):
+    """Собственный TCP сокет (RTU over TCP), без pymodbus."""
+
+    name = "socket"
+
+    def __init__(self, host: str, port: int, profile: Optional[SocketProfile] = None):
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.profile = profile or DEFAULT_SOCKET_PROFILE
+        self._quickack = self.profile.rearm_quickack
+        self._sock: Optional[socket.socket] = None
+
+    def open(self, timeout: float) -> bool:
+        self.close()
+        self._sock = socket.create_connection((self.host, self.port), timeout=timeout)
+        self.socket_options = configure_socket(self._sock, self.profile)
+        self._rx.clear()
+        self._stale_pending = False
+        self._late = None
+        self.counters.opens += 1
+        return True
+
+    def is_socket_open(self) -> bool:
+        return self._sock is not None
+
+    def close(self) -> None:
+        sock, self._sock = self._sock, None
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def _socket(self):
+        if self._sock is None:
+            raise ConnectionError("Сокет недоступен")
+        return self._sock
+
+    def _write(self, frame: bytes) -> None:
+        self._socket().sendall(frame)
+
+    def _drain(self) -> int:
+        sock = self._sock
+        if sock is None:
+            return 0
+        sock.settimeout(0.0)
+        drained = 0
+        # Не больше одного буфера за раз: поток от устройства не должен держать отправку
+        for _ in range(_DRAIN_MAX_READS):
+            try:
+                n = self._rx.fill(sock)
+            except (BlockingIOError, socket.timeout):
+                break
+            if n == 0:
+                raise ConnectionError("Соединение закрыто устройством")
+            drained += n
+            self._rx.clear()
+        return drained
+
+    def _fill(self, remaining: float) -> int:
+        sock = self._socket()
+        sock.settimeout(remaining)
+        try:
+            n = self._rx.fill(sock)
+        except socket.timeout:
+            return 0
+        if n == 0:
+            raise ConnectionError("Соединение закрыто устройством")
+        if self._quickack:
+            # Linux сбрасывает TCP_QUICKACK после ACK — взводим снова для следующего ответа
+            try:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+            except OSError:
+                self._quickack = False
+        return n
+
+
+class PymodbusTransport(SocketTransport):
+    """Соединение открывает pymodbus ModbusTcpClient; обмен кадрами — по его сокету, как у SocketTransport."""
+
+    name = "pymodbus"
+
+    def __init__(self, host: str, port: int, framer: str = "rtu", profile: Optional[SocketProfile] = None):
+        super().__init__(host, port, profile)
+        self.framer = framer
+        self._client = None
+
+    def open(self, timeout: float) -> bool:
+        from pymodbus.client.tcp import ModbusTcpClient
+
+        self.close()
+        self._client = ModbusTcpClient(host=self.host, port=self.port, framer=self.framer, timeout=timeout)
+        connected = self._client.connect()
+        logger.info(f"Результат connect() с фреймером '{self.framer}': {connected}")
+        if not connected or not self._client.is_socket_open():
+            self.close()
+            return False
+        self._sock = self._find_socket(self._client)
+        if self._sock is None:
+            logger.warning("Не удалось найти сокет pymodbus клиента")
+            self.close()
+            return False
+        self.socket_options = configure_socket(self._sock, self.profile)
+        self._rx.clear()
+        self._stale_pending = False
+        self._late = None
+        self.counters.opens += 1
+        return True
+
+    @staticmethod
+    def _find_socket(client):
+        """Сокет pymodbus клиента: атрибут зависит от версии pymodbus."""
+        sock = getattr(client, 'socket', None)
+        if sock:
+            return sock
+        transport = getattr(client, 'transport', None)
+        for attr in ('socket', '_socket', 'sock', '_sock'):
+            sock = getattr(transport, attr, None)
+            if sock:
+                return sock
+        if hasattr(transport, 'get_socket'):
+            try:
+                return transport.get_socket()
+            except Exception:
+                return None
+        return None
+
+    def is_socket_open(self) -> bool:
+        return self._client is not None and self._sock is not None and self._client.is_socket_open()
+
+    def close(self) -> None:
+        client, self._client, self._sock = self._client, None, None
+        if client is not None:
+            try:
+                client.close()
+            except Exception:
+                pass
+
+
+class RegisterBank:
+    """
+    Регистры устройства в памяти для LoopbackTransport: holding (FC03/06/16) и input (FC04).
+    Адрес, которого нет в bank, отвечает Illegal Data Address, как у XeUS driver.
+    """
+
+    def __init__(self, holding: Optional[dict] = None, input_registers: Optional[dict] = None, unit_id: int = 1):
+        self.holding: dict[int, int] = dict(holding or {})
+        self.input: dict[int, int] = dict(input_registers or {})
+        self.unit_id = unit_id
+
+    def respond(self, frame: bytes) -> Optional[bytes]:
+        """Кадр ответа на кадр запроса; None — запрос не этому устройству или битый CRC (ответа нет)."""
+        if len(frame) < 8 or frame[0] != self.unit_id or crc16(frame[:-2]) != (frame[-2] | (frame[-1] << 8)):
+            return None
+        fn = frame[1]
+        address = (frame[2] << 8) | frame[3]
+        arg = (frame[4] << 8) | frame[5]
+        if fn in (3, 4):
+            table = self.holding if fn == 3 else self.input
+            if not 1 <= arg <= 125:
+                return self._exception(fn, 3)
+            try:
+                words = [table[address + i] & 0xFFFF for i in range(arg)]
+            except KeyError:
+                return self._exception(fn, 2)
+            body = bytearray((self.unit_id, fn, 2 * arg))
+            for w in words:
+                body += bytes(((w >> 8) & 0xFF, w & 0xFF))
+            return with_crc(bytes(body))
+        if fn == 6:
+            if address not in self.holding:
+                return self._exception(fn, 2)
+            self.holding[address] = arg
+            return frame
+        if fn == 16:
+            if len(frame) != 9 + 2 * arg or any(address + i not in self.holding for i in range(arg)):
+                return self._exception(fn, 2)
+            for i in range(arg):
+                self.holding[address + i] = (frame[7 + 2 * i] << 8) | frame[8 + 2 * i]
+            return with_crc(frame[:6])
+        return self._exception(fn, 1)
+
+    def _exception(self, function: int, code: int) -> bytes:
+        return with_crc(bytes((self.unit_id, function | 0x80, code)))
+
+
+class LoopbackTransport(FrameTransport):
+    """В процессе: send() сразу кладёт ответ RegisterBank в приёмный буфер."""
+
+    name = "loopback"
+
+    def __init__(self, bank: RegisterBank):
+        super().__init__()
+        self.bank = bank
+        self._open = False
+        self._pending: Optional[bytes] = None
+
+    def open(self, timeout: float) -> bool:
+        self._open = True
+        self._rx.clear()
+        self._stale_pending = False
+        self._late = None
+        self.counters.opens += 1
+        return True
+
+    def is_socket_open(self) -> bool:
+        return self._open
+
+    def close(self) -> None:
+        self._open = False
+
+    def _write(self, frame: bytes) -> None:
+        if not self._open:
+            raise ConnectionError("Loopback транспорт закрыт")
+        self._pending = self.bank.respond(frame)
+
+    def _fill(self, remaining: float) -> int:
+        data, self._pending = self._pending, None
+        if data is None:
+            # Устройство не ответило — ждать нечего, но deadline соблюдаем как настоящий сокет
+            time.sleep(remaining)
+            return 0
+        self._rx.feed(data)
+        return len(data)
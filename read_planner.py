@@ -0,0 +1,311 @@
+"""Планировщик batched-запросов: склеивает адреса в минимум непрерывных FC03/FC04 чтений и FC16 записей."""
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, Callable, Iterable, NamedTuple, Optional
+
+if TYPE_CHECKING:
+    from modbus_client import ModbusClient
+
+logger = logging.getLogger(__name__)
+
+# Modbus exception code 02 — устройство не знает часть адресов в запрошенном диапазоне
+ILLEGAL_DATA_ADDRESS = 2
+
+# Регистры на XeUS разнесены с шагом 10 (1211, 1221, …): пропуск до 20 адресов
+# дешевле лишнего round trip по Wi-Fi. Пропуск, в котором нашлась дыра карты (ReadHoles),
+# больше не склеивается — и после переподключения, и в следующей сессии (device_profile).
+DEFAULT_GAP_TOLERANCE = 20
+# Как IR/NMR stripes — 64 регистра устройство отдаёт одним FC04 стабильно.
+DEFAULT_MAX_SPAN = 64
+# Предел Modbus для одного FC16
+MAX_WRITE_SPAN = 123
+
+# Статусы записей ReadManyResult
+READ_OK = "ok"
+READ_MISSING = "missing"  # Illegal Data Address даже поодиночке
+READ_EXCEPTION = "exception"  # другой Modbus exception
+READ_NO_RESPONSE = "no_response"  # таймаут / обрыв / исчерпан бюджет
+
+
+class ReadSpan(NamedTuple):
+    """Один запрос: function, [address, address + count), адреса, которые реально нужны."""
+    function: int
+    address: int
+    count: int
+    wanted: tuple[int, ...]
+
+
+def _normalize(wanted: Iterable[tuple]) -> dict[int, list[int]]:
+    """(address, function) или (address, function, count) → {function: [адреса по возрастанию]}."""
+    by_fn: dict[int, set[int]] = {}
+    for entry in wanted:
+        address, function = int(entry[0]), int(entry[1])
+        count = int(entry[2]) if len(entry) > 2 else 1
+        addrs = by_fn.setdefault(function, set())
+        for a in range(address, address + max(1, count)):
+            addrs.add(a)
+    return {fn: sorted(addrs) for fn, addrs in by_fn.items()}
+
+
+def _span(function: int, addrs: list[int]) -> ReadSpan:
+    return ReadSpan(function, addrs[0], addrs[-1] - addrs[0] + 1, tuple(addrs))
+
+
+class ReadHoles:
+    """
+    Изученные дыры карты: (function, first, last) — среди адресов first..last есть такой, на который
+    устройство отвечает Illegal Data Address. Диапазон чтения, накрывающий дыру целиком, заведомо
+    не прочитается — plan_reads его не склеивает. Используется только из потока I/O.
+    """
+
+    def __init__(self):
+        self._holes: set[tuple[int, int, int]] = set()
+
+    def __len__(self) -> int:
+        return len(self._holes)
+
+    def add(self, function: int, first: int, last: int) -> None:
+        self._holes.add((int(function), int(first), int(last)))
+
+    def blocks(self, function: int, first: int, last: int) -> bool:
+        """Диапазон first..last накрывает известную дыру?"""
+        return any(fn == function and first <= lo and hi <= last for fn, lo, hi in self._holes)
+
+    def clear(self) -> None:
+        self._holes.clear()
+
+    # ----- сохранение между сессиями (device_profile) -----
+    def to_dict(self) -> dict:
+        by_fn: dict[str, list] = {}
+        for fn, lo, hi in sorted(self._holes):
+            by_fn.setdefault(str(fn), []).append([lo, hi])
+        return by_fn
+
+    def update_from_dict(self, data: dict) -> None:
+        try:
+            holes = {(int(fn), int(lo), int(hi)) for fn, ranges in data.items() for lo, hi in ranges}
+        except (TypeError, ValueError, AttributeError) as e:
+            logger.warning(f"Дыры карты чтения повреждены, игнорируем: {e}")
+            return
+        self._holes = holes
+
+
+def plan_reads(
+    wanted: Iterable[tuple],
+    *,
+    gap_tolerance: int = DEFAULT_GAP_TOLERANCE,
+    max_span: int = DEFAULT_MAX_SPAN,
+    span_limit: Optional[Callable[[int, int], int]] = None,
+    holes: Optional[ReadHoles] = None,
+) -> list[ReadSpan]:
+    """
+    Жадно склеивает соседние адреса одной функции, пока пропуск между ними
+    не больше gap_tolerance, а длина запроса не больше max_span
+    (или span_limit(function, начало диапазона) — подобранного лимита, см. span_tuner)
+    и диапазон не накрывает известную дыру карты (holes).
+    """
+    max_span = max(1, int(max_span))
+    gap_tolerance = max(0, int(gap_tolerance))
+    spans: list[ReadSpan] = []
+    for function, addrs in sorted(_normalize(wanted).items()):
+        group: list[int] = []
+        cap = max_span
+        for a in addrs:
+            if group and (
+                a - group[-1] - 1 > gap_tolerance
+                or a - group[0] + 1 > cap
+                or (holes is not None and holes.blocks(function, group[0], a))
+            ):
+                spans.append(_span(function, group))
+                group = []
+            if not group and span_limit is not None:
+                cap = max(1, int(span_limit(function, a)))
+            group.append(a)
+        if group:
+            spans.append(_span(function, group))
+    return spans
+
+
+def plan_writes(values: dict[int, int], *, max_span: int = MAX_WRITE_SPAN) -> list[tuple[int, list[int]]]:
+    """
+    {address: value} → [(address, [значения подряд]), ...] по возрастанию адреса.
+    Склеиваются только строго соседние адреса: пропуск нельзя «дописать», как при чтении.
+    """
+    max_span = max(1, int(max_span))
+    runs: list[tuple[int, list[int]]] = []
+    for address in sorted(values):
+        if runs:
+            start, run = runs[-1]
+            if address == start + len(run) and len(run) < max_span:
+                run.append(values[address])
+                continue
+        runs.append((address, [values[address]]))
+    return runs
+
+
+def split_span(span: ReadSpan) -> Optional[tuple[ReadSpan, ReadSpan]]:
+    """Делит диапазон по самому большому пропуску между нужными адресами (None — делить нечего)."""
+    wanted = span.wanted
+    if len(wanted) < 2:
+        return None
+    cut = max(range(1, len(wanted)), key=lambda i: wanted[i] - wanted[i - 1])
+    return _span(span.function, list(wanted[:cut])), _span(span.function, list(wanted[cut:]))
+
+
+class ReadPlan:
+    """
+    План чтения, который уточняется по ответам устройства: диапазон, на который
+    пришёл Illegal Data Address, делится пополам и больше целиком не запрашивается.
+    Если обе половины прочитались, дыра — в пропуске между ними: он запоминается в holes
+    и не склеивается заново после reset() (переподключение, подбор лимитов).
+    """
+
+    def __init__(
+        self,
+        wanted: Iterable[tuple],
+        *,
+        gap_tolerance: int = DEFAULT_GAP_TOLERANCE,
+        max_span: int = DEFAULT_MAX_SPAN,
+        span_limit: Optional[Callable[[int, int], int]] = None,
+        holes: Optional[ReadHoles] = None,
+    ):
+        self._wanted = tuple(tuple(w) for w in wanted)
+        self._gap_tolerance = gap_tolerance
+        self._max_span = max_span
+        self._span_limit = span_limit
+        self._holes = holes
+        self.spans: list[ReadSpan] = []
+        # (function, address), на которые устройство отвечает Illegal Data Address даже поодиночке
+        self.missing: set[tuple[int, int]] = set()
+        # {(function, address): exception_code} — прочие Modbus exception последнего execute()
+        self.exceptions: dict[tuple[int, int], int] = {}
+        self.reset()
+
+    def reset(self) -> None:
+        """Заново склеить диапазоны (после reconnect — прошивка могла смениться, после подбора лимитов)."""
+        self.spans = plan_reads(
+            self._wanted, gap_tolerance=self._gap_tolerance, max_span=self._max_span, span_limit=self._span_limit,
+            holes=self._holes,
+        )
+        self.missing.clear()
+
+    def execute(self, client: ModbusClient) -> dict[tuple[int, int], int]:
+        """Выполнить план через ModbusClient. Возвращает {(function, address): value}."""
+        values: dict[tuple[int, int], int] = {}
+        self.exceptions.clear()
+        refined: list[ReadSpan] = []
+        pending = list(self.spans)
+        changed = False
+        # (левая, правая половина) отвергнутых диапазонов — дыра в пропуске, если обе прочитаются целиком
+        cuts: list[tuple[ReadSpan, ReadSpan]] = []
+        read_ok: set[ReadSpan] = set()
+        while pending:
+            # Весь уровень плана — одним вызовом: конвейерный транспорт отправит его пачкой
+            results = client.read_spans([(s.function, s.address, s.count) for s in pending])
+            split: list[ReadSpan] = []
+            for span, (regs, exc_code) in zip(pending, results):
+                if regs is not None:
+                    for a in span.wanted:
+                        values[(span.function, a)] = int(regs[a - span.address])
+                    refined.append(span)
+                    read_ok.add(span)
+                elif exc_code == ILLEGAL_DATA_ADDRESS:
+                    changed = True
+                    parts = split_span(span)
+                    if parts is not None:
+                        split.extend(parts)
+                        cuts.append(parts)
+                    else:
+                        self.missing.update((span.function, a) for a in span.wanted)
+                else:
+                    # Таймаут / обрыв / другой exception — план не трогаем, повторим в следующем цикле
+                    if exc_code is not None:
+                        self.exceptions.update(((span.function, a), exc_code) for a in span.wanted)
+                    refined.append(span)
+            pending = split
+        if changed:
+            self.spans = sorted(refined)
+            if self._holes is not None:
+                self._learn_holes(cuts, read_ok)
+        return values
+
+    def _learn_holes(self, cuts: list[tuple[ReadSpan, ReadSpan]], read_ok: set[ReadSpan]) -> None:
+        holes = self._holes
+        for left, right in cuts:
+            first, last = left.address + left.count, right.address - 1
+            if left in read_ok and right in read_ok and first <= last:
+                holes.add(left.function, first, last)
+        # Адрес, которого нет и поодиночке, — тоже дыра: дальше читается отдельно, не роняя соседей
+        for fn, a in self.missing:
+            holes.add(fn, a, a)
+
+
+class ReadManyResult:
+    """
+    Результат ModbusClient.read_many: для каждой записи spec (в том же порядке) —
+    список регистров (или None) и статус READ_*; summary() — сводка ошибок на весь batch.
+    """
+
+    __slots__ = ("entries", "values", "status", "exception_codes")
+
+    def __init__(self, entries: list[tuple[int, int, int]]):
+        n = len(entries)
+        # (address, count, function)
+        self.entries = entries
+        self.values: list[Optional[list[int]]] = [None] * n
+        self.status: list[str] = [READ_NO_RESPONSE] * n
+        self.exception_codes: list[Optional[int]] = [None] * n
+
+    @classmethod
+    def from_plan(
+        cls, entries: list[tuple[int, int, int]], values: dict[tuple[int, int], int], plan: ReadPlan,
+    ) -> ReadManyResult:
+        """Разложить {(function, address): value} выполненного плана по записям spec."""
+        result = cls(entries)
+        for i, (address, count, function) in enumerate(entries):
+            keys = [(function, a) for a in range(address, address + count)]
+            regs = [values.get(k) for k in keys]
+            if None not in regs:
+                result.values[i] = regs
+                result.status[i] = READ_OK
+            elif any(k in plan.missing for k in keys):
+                result.status[i] = READ_MISSING
+                result.exception_codes[i] = ILLEGAL_DATA_ADDRESS
+            else:
+                code = next((plan.exceptions[k] for k in keys if k in plan.exceptions), None)
+                if code is not None:
+                    result.status[i] = READ_EXCEPTION
+                    result.exception_codes[i] = code
+        return result
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __getitem__(self, index: int) -> Optional[list[int]]:
+        return self.values[index]
+
+    def value(self, index: int) -> Optional[int]:
+        """Первый регистр записи (для одиночных чтений) или None."""
+        regs = self.values[index]
+        return regs[0] if regs else None
+
+    @property
+    def ok_count(self) -> int:
+        return self.status.count(READ_OK)
+
+    @property
+    def all_ok(self) -> bool:
+        return self.ok_count == len(self.entries)
+
+    def summary(self) -> dict:
+        """{"total", "ok", "missing": [...], "exception": {code: [...]}, "no_response": [...]} — записи как (address, count, function)."""
+        out: dict = {"total": len(self.entries), "ok": 0, "missing": [], "exception": {}, "no_response": []}
+        for entry, status, code in zip(self.entries, self.status, self.exception_codes):
+            if status == READ_OK:
+                out["ok"] += 1
+            elif status == READ_EXCEPTION:
+                out["exception"].setdefault(code, []).append(entry)
+            else:
+                out[status].append(entry)
+        return out
@@ -0,0 +1,87 @@
+"""
+Карта доступности регистров XeUS driver: какой функцией (FC04/FC03) отвечает адрес
+и какие (function, address) дают Illegal Data Address.
+
+Чтения с fallback (сначала FC04, потом FC03) по карте сразу идут рабочим путём.
+Отсутствующие адреса перепроверяются после переподключения и раз в reprobe_interval секунд.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+ILLEGAL_DATA_ADDRESS = 2
+
+# Как часто заново пробовать адреса, отвечавшие Illegal Data Address (прошивку могли обновить)
+DEFAULT_REPROBE_INTERVAL_S = 300.0
+
+
+class RegisterAvailability:
+    """Изученная карта на соединение. Используется только из потока I/O."""
+
+    def __init__(self, reprobe_interval: float = DEFAULT_REPROBE_INTERVAL_S):
+        self.reprobe_interval = reprobe_interval
+        self._functions: dict[int, int] = {}
+        self._missing: set[tuple[int, int]] = set()
+        self._probed_at = time.monotonic()
+        # Карта загружена из файла — первое подключение ей доверяет (тёплый старт)
+        self._warm = False
+
+    def __len__(self) -> int:
+        return len(self._functions) + len(self._missing)
+
+    def functions_for(self, address: int, functions: tuple[int, ...] = (4, 3)) -> tuple[int, ...]:
+        """Порядок функций для чтения адреса: изученная — единственная, иначе не отвергнутые по порядку."""
+        if time.monotonic() - self._probed_at > self.reprobe_interval:
+            self.reprobe()
+        fn = self._functions.get(address)
+        if fn is not None and fn in functions:
+            return (fn,)
+        return tuple(f for f in functions if (f, address) not in self._missing)
+
+    def observe(self, function: int, address: int, ok: bool, exception_code: Optional[int] = None) -> None:
+        """Учесть результат чтения адреса (таймаут ничего не меняет)."""
+        if ok:
+            self._functions[address] = function
+            self._missing.discard((function, address))
+        elif exception_code == ILLEGAL_DATA_ADDRESS:
+            self._missing.add((function, address))
+            if self._functions.get(address) == function:
+                del self._functions[address]
+
+    def is_missing(self, function: int, address: int) -> bool:
+        return (function, address) in self._missing
+
+    def reprobe(self) -> None:
+        """Дать отсутствующим адресам ещё шанс; изученные функции остаются подсказкой."""
+        self._missing.clear()
+        self._probed_at = time.monotonic()
+
+    def on_connect(self) -> None:
+        """Новое соединение: перепроверка, кроме первого подключения после загрузки из файла."""
+        if self._warm:
+            self._warm = False
+            self._probed_at = time.monotonic()
+            return
+        self.reprobe()
+
+    # ----- сохранение между сессиями (device_profile) -----
+    def to_dict(self) -> dict:
+        return {
+            "functions": {str(a): fn for a, fn in dict(self._functions).items()},
+            "missing": sorted([fn, a] for fn, a in set(self._missing)),
+        }
+
+    def update_from_dict(self, data: dict) -> None:
+        try:
+            functions = {int(a): int(fn) for a, fn in data.get("functions", {}).items()}
+            missing = {(int(fn), int(a)) for fn, a in data.get("missing", [])}
+        except (TypeError, ValueError, AttributeError) as e:
+            logger.warning(f"Карта регистров повреждена, игнорируем: {e}")
+            return
+        self._functions = functions
+        self._missing = missing
+        self._warm = bool(functions or missing)
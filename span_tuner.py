@@ -0,0 +1,182 @@
+"""
+Подбор максимального диапазона одного FC03/FC04 чтения, который прошивка отдаёт надёжно.
+
+Мост serial-over-TCP на части прошивок рвёт сокет на больших запросах, на других спокойно
+отдаёт 125 регистров. Лимит ищется двоичным поиском по каждой (function, область адресов):
+диапазон принят, если подряд confirm раз пришёл полный ответ; exception, повторный таймаут
+или обрыв сокета — слишком много (после обрыва — переподключение и поиск дальше вниз).
+
+Регистры XeUS идут через 10 (1021, 1031, …): Illegal Data Address (exception 2) значит, что
+диапазон задел дыру карты, а не что он слишком длинный, — такую область подбор пропускает.
+Лимит меньше MIN_SPAN_LIMIT не сохраняется и не загружается: он запретил бы склейку read_planner
+по всей области, а настоящий предел моста на порядок больше.
+
+Результат (SpanLimits) хранится на устройство и ограничивает склейку read_planner и чанки
+read_input_registers_direct. Stripes спектров IR/NMR/PXE не трогаются — их длина задана форматом.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Callable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Предел Modbus для FC03/FC04
+MAX_READ_COUNT = 125
+# Область адресов, в которой лимит считается одинаковым (1000..1999 — Screen01, 3000.. — SEOP, …)
+REGION_SIZE = 1000
+# Сколько раз подряд диапазон должен прочитаться, чтобы считаться надёжным
+DEFAULT_CONFIRM = 3
+# Меньше — скорее дыра карты или сбой подбора, чем предел моста
+MIN_SPAN_LIMIT = 16
+# Illegal Data Address
+_EXC_ILLEGAL_ADDRESS = 2
+
+
+class SpanHole(Exception):
+    """Пробный диапазон задел несуществующие адреса — предел длины в этой области не измерить."""
+
+
+def region_of(address: int) -> int:
+    return address // REGION_SIZE
+
+
+class SpanLimits:
+    """Подобранные лимиты {(function, область): регистров}. Используется только из потока I/O."""
+
+    def __init__(self):
+        self._limits: dict[tuple[int, int], int] = {}
+
+    def __len__(self) -> int:
+        return len(self._limits)
+
+    def get(self, function: int, address: int) -> Optional[int]:
+        return self._limits.get((function, region_of(address)))
+
+    def set(self, function: int, address: int, count: int) -> None:
+        self._limits[(function, region_of(address))] = max(1, min(MAX_READ_COUNT, int(count)))
+
+    def limit(self, function: int, address: int, default: int) -> int:
+        """Лимит для диапазона, начинающегося с address; default — область ещё не подбиралась."""
+        return self._limits.get((function, region_of(address)), default)
+
+    def clear(self) -> None:
+        self._limits.clear()
+
+    # ----- сохранение между сессиями -----
+    def to_dict(self) -> dict:
+        return {f"{fn}:{region}": count for (fn, region), count in sorted(self._limits.items())}
+
+    def update_from_dict(self, data: dict) -> None:
+        try:
+            limits = {}
+            for key, count in data.items():
+                fn, region = key.split(":")
+                if int(count) < MIN_SPAN_LIMIT:
+                    # Старые профили могли запомнить лимит, упёршийся в дыру карты
+                    continue
+                limits[(int(fn), int(region))] = min(MAX_READ_COUNT, int(count))
+        except (TypeError, ValueError, AttributeError) as e:
+            logger.warning(f"Лимиты диапазонов повреждены, игнорируем: {e}")
+            return
+        self._limits = limits
+
+
+def _span_ok(
+    read: Callable[[int, int, int], tuple],
+    recover: Callable[[], bool],
+    function: int,
+    address: int,
+    count: int,
+    confirm: int,
+) -> Optional[bool]:
+    """
+    True — confirm полных ответов подряд; False — диапазон слишком большой; None — связь не восстановить.
+    SpanHole — exception 2: диапазон задел дыру карты регистров.
+    """
+    for _ in range(confirm):
+        regs, exc_code = read(function, address, count)
+        if regs is not None and len(regs) >= count:
+            continue
+        if exc_code == _EXC_ILLEGAL_ADDRESS:
+            raise SpanHole(f"FC{function:02d} {address}+{count}")
+        if exc_code is not None:
+            return False
+        if not recover():
+            return None
+        # Таймаут без обрыва мог быть просто потерянным кадром — один повтор
+        regs, exc_code = read(function, address, count)
+        if regs is None or len(regs) < count:
+            return False if recover() else None
+    return True
+
+
+def tune_span(
+    read: Callable[[int, int, int], tuple],
+    recover: Callable[[], bool],
+    function: int,
+    address: int,
+    *,
+    high: int = MAX_READ_COUNT,
+    confirm: int = DEFAULT_CONFIRM,
+) -> Optional[int]:
+    """
+    Наибольший count из [1, high], который read(function, address, count) отдаёт надёжно.
+
+    Args:
+        read: (function, address, count) → (registers, exception_code), как ModbusClient.read_span
+        recover: Проверить связь после неудачи и при обрыве переподключиться; False — связи нет
+        function, address: Начало пробного диапазона (все адреса области должны существовать)
+
+    Returns:
+        Лимит, 0 — не читается даже один регистр, None — связь потеряна во время подбора
+
+    Raises:
+        SpanHole: Диапазон задел несуществующие адреса
+    """
+    low, high = 0, max(1, min(MAX_READ_COUNT, int(high)))
+    while low < high:
+        mid = (low + high + 1) // 2
+        ok = _span_ok(read, recover, function, address, mid, confirm)
+        if ok is None:
+            logger.warning(f"Подбор диапазона FC{function:02d} {address}: связь потеряна на {mid} регистрах")
+            return None
+        logger.debug(f"Подбор диапазона FC{function:02d} {address}+{mid}: {'ok' if ok else 'нет'}")
+        if ok:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+def tune_span_limits(
+    read: Callable[[int, int, int], tuple],
+    recover: Callable[[], bool],
+    probes: Iterable[tuple[int, int]],
+    limits: SpanLimits,
+    *,
+    confirm: int = DEFAULT_CONFIRM,
+) -> dict[str, int]:
+    """
+    Подобрать лимиты по пробам (function, address) — по одной на область — и записать в limits.
+    Области, где подбор прервался, упёрся в дыру карты или дал меньше MIN_SPAN_LIMIT, остаются прежними.
+    """
+    found: dict[str, int] = {}
+    for function, address in probes:
+        try:
+            count = tune_span(read, recover, function, address, confirm=confirm)
+        except SpanHole as e:
+            logger.info(f"Подбор диапазона {e}: несуществующие адреса в области, пропускаем")
+            continue
+        if count is None:
+            break
+        if count < MIN_SPAN_LIMIT:
+            logger.info(
+                f"Подбор диапазона FC{function:02d} {address}: {count} регистров меньше {MIN_SPAN_LIMIT}, "
+                f"лимит не сохраняем"
+            )
+            continue
+        limits.set(function, address, count)
+        found[f"{function}:{region_of(address)}"] = count
+        logger.info(f"Подобран лимит чтения FC{function:02d} область {region_of(address)}: {count} регистров")
+    return found
@@ -0,0 +1,436 @@
+"""
+Декодирование спектров IR/NMR/PXE вне потока I/O.
+
+Поток I/O только читает регистры и возвращает DecodeJob — функцию декодирования и сырые байты
+ответов (big-endian, как на шине). Подбор порядка float, baseline correction, масштабирование
+и сборка payload для QML идут в DecodePool (concurrent.futures), а шина в это время уже занята
+следующей транзакцией. Функции декодирования — верхнего уровня и принимают только bytes/int/str,
+поэтому годятся и для пула процессов.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import math
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from modbus_codec import FLOAT_ORDERS, RegisterBlock
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DECODE_WORKERS = 2
+
+
+class DecodeJob:
+    """Сырой результат чтения спектра: fn(*args) строит payload (или None) уже вне потока I/O."""
+
+    __slots__ = ("fn", "args")
+
+    def __init__(self, fn: Callable[..., Optional[dict]], *args: Any):
+        self.fn = fn
+        self.args = args
+
+    def run(self) -> Optional[dict]:
+        return self.fn(*self.args)
+
+
+class DecodePool:
+    """
+    Пул декодирования: kind="thread" (по умолчанию) или "process" — если декодирование
+    заметно держит GIL и тормозит GUI. Для "process" в собранном приложении нужен
+    multiprocessing.freeze_support() в main.py (вызывается первым делом); логи декодеров
+    из процессов пула не видны.
+    """
+
+    def __init__(self, kind: str = "thread", workers: int = DEFAULT_DECODE_WORKERS):
+        if kind == "thread":
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="spectrum-decode")
+        elif kind == "process":
+            self._executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            raise ValueError(f"Неизвестный тип пула декодирования: {kind}")
+        self.kind = kind
+
+    def submit(self, job: DecodeJob) -> Future:
+        return self._executor.submit(job.fn, *job.args)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _float_variants(reg1: int, reg2: int) -> dict:
+    """
+    Float из двух uint16 во всех популярных Modbus byte/word order.
+    A,B = bytes of reg1 (hi,lo); C,D = bytes of reg2 (hi,lo)
+    Variants: ABCD, BADC (swap bytes in words), CDAB (swap words), DCBA (full reverse)
+    """
+    pair = RegisterBlock.from_registers((reg1 & 0xFFFF, reg2 & 0xFFFF))
+    out: dict[str, float] = {}
+    for k in FLOAT_ORDERS:
+        v = pair.float_at(0, k)
+        if math.isfinite(v):
+            out[k] = v
+    return out
+
+
+def _float_with_key(reg1: int, reg2: int, key: str) -> float:
+    return float(_float_variants(reg1, reg2).get(key, float("nan")))
+
+
+def _float_ir(reg1: int, reg2: int) -> float:
+    """
+    IR float decode как в test_modbus.registers_to_float_ir:
+    swap byte1<->byte2 и byte3<->byte4.
+    """
+    try:
+        return RegisterBlock.from_registers((reg1 & 0xFFFF, reg2 & 0xFFFF)).float_at(0, "BADC")
+    except Exception:
+        return 0.0
+
+
+def _pick_in_range(variants: dict, lo: float, hi: float) -> float:
+    """Вариант float, попадающий в [lo, hi], ближе к центру диапазона; nan — такого нет."""
+    in_range = [v for v in variants.values() if lo <= v <= hi]
+    if not in_range:
+        return float("nan")
+    mid = (lo + hi) / 2.0
+    in_range.sort(key=lambda v: abs(v - mid))
+    return float(in_range[0])
+
+
+def decode_ir_spectrum(meta_raw: bytes, data_raw: bytes, n_points: int, known_order: Optional[str]) -> Optional[dict]:
+    """
+    IR payload из регистров 400..414 (meta_raw) и n_points точек stripes 420.. (data_raw).
+    known_order — порядок float метаданных, подобранный раньше (в т.ч. в прошлой сессии);
+    выбранный порядок возвращается в payload["meta_float_key"].
+    """
+    meta = RegisterBlock(meta_raw).registers()
+    data_regs = RegisterBlock(data_raw).registers(0, n_points)
+    status = int(meta[0])
+
+    if sum(1 for v in data_regs if v != 0) == 0:
+        logger.info("IR spectrum: data all zeros, skip apply")
+        return None
+
+    logger.info(
+        f"IR spectrum: pointsN={n_points} "
+        f"raw meta[0..4]={meta[0:5]} meta_hex={[hex(int(x)) for x in meta[0:5]]} "
+        f"data_length={len(data_regs)} data_first10={data_regs[0:10]} data_last10={data_regs[-10:] if len(data_regs) >= 10 else data_regs} "
+        f"data_nonzero_count={sum(1 for v in data_regs if int(v) != 0)}"
+    )
+    # Метаданные IR (как в test_modbus): устройство реально хранит x/y range в регистрах
+    # 401-408, но порядок слов/байт может отличаться. Подбираем вариант по x_min/x_max,
+    # чтобы далее декодировать остальные float (y_min/y_max/res_freq/freq/integral) в том же формате.
+    xmin_r1, xmin_r2 = int(meta[1]), int(meta[2])
+    xmax_r1, xmax_r2 = int(meta[3]), int(meta[4])
+    x_min_variants = _float_variants(xmin_r1, xmin_r2)
+    x_max_variants = _float_variants(xmax_r1, xmax_r2)
+    common_keys = sorted(set(x_min_variants.keys()) & set(x_max_variants.keys()))
+
+    meta_float_key = None
+    candidates = []
+    for k in common_keys:
+        xv0 = float(x_min_variants[k])
+        xv1 = float(x_max_variants[k])
+        if not (math.isfinite(xv0) and math.isfinite(xv1)):
+            continue
+        if xv1 <= xv0:
+            continue
+        if abs(xv0) > 1e6 or abs(xv1) > 1e6:
+            continue
+        rng = xv1 - xv0
+        if rng <= 0 or rng > 1e6:
+            continue
+        # IR обычно 792..798 (range ~6). Если несколько кандидатов — выбираем ближе к этому.
+        score = abs(rng - 6.0) + 0.1 * abs(xv0 - 792.0) + 0.1 * abs(xv1 - 798.0)
+        candidates.append((score, k, xv0, xv1))
+    if candidates:
+        candidates.sort(key=lambda t: t[0])
+        # Порядок, подобранный раньше, — если он здесь правдоподобен
+        chosen = next((c for c in candidates if c[1] == known_order), candidates[0])
+        _, meta_float_key, x_min, x_max = chosen
+    else:
+        # fallback (старое поведение)
+        x_min = 792.0
+        x_max = 798.0
+
+    y_min_r1, y_min_r2 = int(meta[5]), int(meta[6])
+    y_max_r1, y_max_r2 = int(meta[7]), int(meta[8])
+    res_r1, res_r2 = int(meta[9]), int(meta[10])
+    freq_r1, freq_r2 = int(meta[11]), int(meta[12])
+    int_r1, int_r2 = int(meta[13]), int(meta[14])
+    res_variants = _float_variants(res_r1, res_r2)
+    freq_variants = _float_variants(freq_r1, freq_r2)
+
+    if meta_float_key:
+        # Остальные float-метаданные — в том же формате
+        y_min_meta = _float_with_key(y_min_r1, y_min_r2, meta_float_key)
+        y_max_meta = _float_with_key(y_max_r1, y_max_r2, meta_float_key)
+        res_freq = _float_with_key(res_r1, res_r2, meta_float_key)
+        freq = _float_with_key(freq_r1, freq_r2, meta_float_key)
+        integral = _float_with_key(int_r1, int_r2, meta_float_key)
+
+        # Иногда отдельные поля могут приехать "битые". Тогда добираем res_freq/freq
+        # из вариантов, которые попадают в диапазон X.
+        if not (math.isfinite(res_freq) and x_min <= res_freq <= x_max):
+            rf2 = _pick_in_range(res_variants, x_min, x_max)
+            if math.isfinite(rf2):
+                res_freq = rf2
+        if not (math.isfinite(freq) and x_min <= freq <= x_max):
+            f2 = _pick_in_range(freq_variants, x_min, x_max)
+            if math.isfinite(f2):
+                freq = f2
+    else:
+        # Fallback: старый IR байтсвап (для некоторых полей может быть неверно, но лучше чем NaN)
+        y_min_meta = _float_ir(y_min_r1, y_min_r2)
+        y_max_meta = _float_ir(y_max_r1, y_max_r2)
+        # Для палок пробуем подобрать вариант, который попадает в диапазон X
+        res_freq = _pick_in_range(res_variants, x_min, x_max)
+        freq = _pick_in_range(freq_variants, x_min, x_max)
+        if not math.isfinite(res_freq):
+            res_freq = _float_ir(res_r1, res_r2)
+        if not math.isfinite(freq):
+            freq = _float_ir(freq_r1, freq_r2)
+        integral = _float_ir(int_r1, int_r2)
+
+    # y values (raw uint16 from device) — все pointsN точек, как aseq->points[]
+    y_values_raw_u16 = list(data_regs)
+
+    # Алгоритм обработки IR данных (как на устройстве):
+    # 1. Умножаем на 100 и делим на 65535 - получаем float массив
+    # 2. Вычисляем среднее m по первым n*0.2 точкам (20%) - как в устройстве: n = pointsN * 0.2
+    # 3. От каждой точки отнимаем среднее - данные смещаются в ноль, заодно ищем максимум
+    points_float = [float(v) * 100.0 / 65535.0 for v in y_values_raw_u16]
+    n = len(points_float)
+    n_avg = max(1, int(n * 0.2))
+    m = sum(points_float[:n_avg]) / float(n_avg)
+    logger.debug(f"IR spectrum: baseline correction - n={n}, n_avg={n_avg}, baseline={m:.6f}")
+
+    max_val = 0.0
+    imax = 0
+    for i in range(n):
+        f = points_float[i] - m
+        points_float[i] = f
+        if f > max_val:
+            max_val = f
+            imax = i
+
+    # Шаг 4: Масштабирование для отображения. На устройстве значения от -40 до 60, у нас после
+    # baseline correction примерно -0.1 до 0.13: коэффициент 460 даёт примерно -40..60
+    scale_factor = 460.0
+    y_values = [v * scale_factor for v in points_float]
+    logger.debug(f"IR spectrum: after baseline correction - max={max_val:.6f} at index={imax}")
+    logger.debug(
+        f"IR spectrum: after scaling (factor={scale_factor}) - max={max_val * scale_factor:.6f}, "
+        f"range=[{min(y_values):.6f}, {max(y_values):.6f}]"
+    )
+
+    # Точки для графика: все pointsN точек растягиваются на [x_min, x_max]
+    points = []
+    if len(y_values) >= 2 and x_max != x_min:
+        last = float(len(y_values) - 1)
+        for i, y in enumerate(y_values):
+            points.append({"x": x_min + (x_max - x_min) * float(i) / last, "y": float(y)})
+    else:
+        for i, y in enumerate(y_values):
+            points.append({"x": float(i), "y": float(y)})
+
+    # Для оси Y используем диапазон из обработанных данных (после baseline correction)
+    y_min = float(min(y_values))
+    y_max = float(max(y_values))
+    if math.isfinite(y_min) and math.isfinite(y_max):
+        y_range = y_max - y_min
+        if y_range > 0:
+            pad = y_range * 0.1
+            y_min -= pad
+            y_max += pad
+    else:
+        y_min = 0.0
+        y_max = 1.0
+        logger.debug("IR spectrum: processed data range invalid, using fallback")
+
+    for name, val in (
+        ("x_min", x_min),
+        ("x_max", x_max),
+        ("y_min", y_min),
+        ("y_max", y_max),
+        ("res_freq", res_freq),
+        ("freq", freq),
+        ("integral", integral),
+    ):
+        if not math.isfinite(val):
+            logger.debug(f"IR spectrum: {name} is not finite: {val}")
+
+    logger.debug(
+        f"IR spectrum decoded: status={status} x=[{x_min:.6f},{x_max:.6f}] "
+        f"y_axis=[{y_min:.6f},{y_max:.6f}] (autoscale from processed data) "
+        f"y_min_meta={y_min_meta:.6f} y_max_meta={y_max_meta:.6f} baseline={m:.6f} "
+        f"points={len(points)} (pointsN={n_points}) "
+        f"raw_u16_range=[{min(y_values_raw_u16)},{max(y_values_raw_u16)}] "
+        f"first10_y_values={y_values[:10]} last10_y_values={y_values[-10:]}"
+    )
+
+    # Только простые типы (int/float/str/list/dict), чтобы конвертировалось в QVariantMap
+    result = {
+        "status": status,
+        "x_min": float(x_min),
+        "x_max": float(x_max),
+        "y_min": float(y_min),
+        "y_max": float(y_max),
+        "res_freq": float(res_freq),
+        "freq": float(freq),
+        "integral": float(integral),
+        "meta_float_key": meta_float_key,
+        "x_min_regs": [xmin_r1, xmin_r2],
+        "x_max_regs": [xmax_r1, xmax_r2],
+        "y_min_regs": [y_min_r1, y_min_r2],
+        "y_max_regs": [y_max_r1, y_max_r2],
+        "y_min_meta": float(y_min_meta) if math.isfinite(y_min_meta) else None,
+        "y_max_meta": float(y_max_meta) if math.isfinite(y_max_meta) else None,
+        # Диагностика декодирования "палок" (409-410 / 411-412)
+        "res_freq_regs": [res_r1, res_r2],
+        "freq_regs": [freq_r1, freq_r2],
+        "x_min_variants": {k: float(v) for k, v in x_min_variants.items()},
+        "x_max_variants": {k: float(v) for k, v in x_max_variants.items()},
+        "res_freq_variants": {k: float(v) for k, v in res_variants.items()},
+        "freq_variants": {k: float(v) for k, v in freq_variants.items()},
+        "data_raw_u16": y_values_raw_u16,
+        "data_raw_i16": y_values_raw_u16,
+        "data": y_values,
+        # JSON-версия для надежного парсинга в QML (иногда QVariantList ведет себя странно)
+        "data_json": json.dumps(y_values),
+        "points": points,
+    }
+    logger.info(f"IR spectrum: returning payload with {len(result['data'])} data points, {len(result['points'])} graph points")
+    return result
+
+
+def decode_nmr_spectrum(meta_raw: bytes, data_raw: bytes, n_points: int) -> Optional[dict]:
+    """NMR payload из регистров 100..116 (meta_raw) и n_points float stripes 120.. (data_raw)."""
+    # STM32 u.w[0], u.w[1] → CDAB: все samples одним unpack_from
+    data_values = RegisterBlock(data_raw).floats("CDAB", 0, n_points)
+    finite_y = [v for v in data_values if math.isfinite(v)]
+    if not finite_y or all(v == 0.0 for v in finite_y):
+        logger.info("NMR spectrum: data all zeros/invalid, skip apply")
+        return None
+
+    x_min, x_max, y_min_meta, y_max_meta, freq, ampl, integral, t2 = (
+        v if math.isfinite(v) else float("nan") for v in RegisterBlock(meta_raw).floats("CDAB", 1, 8)
+    )
+
+    logger.info(
+        f"NMR spectrum: samplesN={n_points} "
+        f"x=[{x_min},{x_max}] freq={freq} ampl={ampl} "
+        f"data_first5={data_values[:5]} data_last5={data_values[-5:]}"
+    )
+
+    n = len(data_values)
+    if not (math.isfinite(x_min) and math.isfinite(x_max) and x_max > x_min):
+        # Driver X is freqStep*ptMin .. freqStep*(ptMin+n-1); keep a display fallback.
+        logger.info(f"NMR spectrum: invalid x range [{x_min},{x_max}], using 38000..44000")
+        x_min = 38000.0
+        x_max = 44000.0
+
+    y_data_min = float(min(finite_y))
+    y_data_max = float(max(finite_y))
+    # LCD PaintNMR: ymin=0, ymax=resultAmpl. Autoscale from data; keep 0 floor when non-negative.
+    y_axis_min = 0.0 if y_data_min >= 0.0 else y_data_min
+    y_axis_max = y_data_max
+    if math.isfinite(ampl) and ampl > y_axis_max:
+        y_axis_max = float(ampl)
+    y_range = y_axis_max - y_axis_min
+    if y_range <= 0:
+        y_axis_max = y_axis_min + 1.0
+        y_range = 1.0
+    pad = y_range * 0.1
+    if y_axis_min < 0.0:
+        y_axis_min -= pad
+    y_axis_max += pad
+
+    data = [float(v) if math.isfinite(v) else 0.0 for v in data_values]
+    if n >= 2:
+        points = [{"x": x_min + (x_max - x_min) * float(i) / float(n - 1), "y": y} for i, y in enumerate(data)]
+    else:
+        points = [{"x": float(i), "y": y} for i, y in enumerate(data)]
+
+    result = {
+        "samples": n_points,
+        "x_min": float(x_min),
+        "x_max": float(x_max),
+        "y_min": float(y_axis_min),
+        "y_max": float(y_axis_max),
+        "y_min_meta": float(y_min_meta) if math.isfinite(y_min_meta) else None,
+        "y_max_meta": float(y_max_meta) if math.isfinite(y_max_meta) else None,
+        "freq": float(freq) if math.isfinite(freq) else None,
+        "ampl": float(ampl) if math.isfinite(ampl) else None,
+        "integral": float(integral) if math.isfinite(integral) else None,
+        "t2": float(t2) if math.isfinite(t2) else None,
+        "data": data,
+        "data_json": json.dumps(data),
+        "points": points,
+    }
+    logger.info(
+        f"NMR spectrum: returning payload with {len(result['data'])} data points, "
+        f"{len(result['points'])} graph points"
+    )
+    return result
+
+
+def decode_pxe_chart(n_points: int, fit_type: int, x_raw: bytes, y_raw: bytes) -> Optional[dict]:
+    """PXE payload из n_points float X (stripes 520..) и Y (stripes 521..), порядок STM32 CDAB."""
+    data_x = [v if math.isfinite(v) else float("nan") for v in RegisterBlock(x_raw).floats("CDAB", 0, n_points)]
+    data_y = [v if math.isfinite(v) else float("nan") for v in RegisterBlock(y_raw).floats("CDAB", 0, n_points)]
+
+    pairs = [
+        (float(x), float(y))
+        for x, y in zip(data_x, data_y)
+        if math.isfinite(x) and math.isfinite(y)
+    ]
+    if not pairs:
+        logger.info("PXE chart: no finite X/Y points, skip apply")
+        return None
+
+    # PaintExp: xmin=data_x[0], xmax=data_x[n-1]; Draw() autoscales Y from data.
+    x_min = pairs[0][0]
+    x_max = pairs[-1][0]
+    if not (math.isfinite(x_min) and math.isfinite(x_max) and x_max > x_min):
+        xs = [p[0] for p in pairs]
+        x_min = float(min(xs))
+        x_max = float(max(xs))
+    if x_max <= x_min:
+        x_max = x_min + 1.0
+
+    ys = [p[1] for p in pairs]
+    y_min = float(min(ys))
+    y_max = float(max(ys))
+    y_range = y_max - y_min
+    if y_range <= 0:
+        y_max = y_min + 1.0
+        y_range = 1.0
+    pad = y_range * 0.1
+    if y_min >= 0.0:
+        y_min = max(0.0, y_min - pad)
+    else:
+        y_min -= pad
+    y_max += pad
+
+    points = [{"x": x, "y": y} for x, y in pairs]
+    logger.info(
+        f"PXE chart: samplesN={n_points} fit={fit_type} "
+        f"x=[{x_min},{x_max}] y=[{y_min},{y_max}] "
+        f"data_x_first5={data_x[:5]} data_y_first5={data_y[:5]}"
+    )
+    data_y_out = [float(v) if math.isfinite(v) else 0.0 for v in data_y]
+    return {
+        "samples": n_points,
+        "fit_type": fit_type,
+        "x_min": float(x_min),
+        "x_max": float(x_max),
+        "y_min": float(y_min),
+        "y_max": float(y_max),
+        "data_x": [float(v) if math.isfinite(v) else 0.0 for v in data_x],
+        "data_y": data_y_out,
+        "data_json": json.dumps(data_y_out),
+        "points": points,
+    }
@@ -0,0 +1,171 @@
+"""
+Очередь задач потока I/O с ключами: dict ключ → запись и FIFO на каждый уровень приоритета.
+
+Один ключ — не больше одной задачи в очереди. Повторная постановка заменяет задачу на месте
+(позиция в очереди сохраняется), подъём приоритета переносит её в конец более срочного FIFO,
+удаление по ключу — O(1). Удалённые и перенесённые записи остаются в FIFO помеченными
+и пропускаются при выборке; когда таких набирается больше живых, FIFO пересобираются.
+"""
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Any, Hashable, Iterator, Optional
+
+# Уровни приоритета: 0 — самый срочный
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+
+# Меньше этого числа мёртвых записей FIFO не пересобираются
+_COMPACT_MIN_DEAD = 64
+
+
+class _Entry:
+    # enqueued — первая постановка ключа, updated — последняя замена задачи (monotonic)
+    __slots__ = ("key", "value", "priority", "alive", "enqueued", "updated")
+
+    def __init__(self, key: Hashable, value: Any, priority: int, enqueued: float):
+        self.key = key
+        self.value = value
+        self.priority = priority
+        self.alive = True
+        self.enqueued = enqueued
+        self.updated = enqueued
+
+
+class KeyedTaskQueue:
+    """
+    Очередь с приоритетами и дедупликацией по ключу; все операции O(1) (выборка — амортизированно).
+    Используется только из потока I/O.
+    """
+
+    def __init__(self, levels: int = 2):
+        self._fifos: list[deque] = [deque() for _ in range(max(1, int(levels)))]
+        self._index: dict[Hashable, _Entry] = {}
+        self._dead = 0
+
+    @property
+    def levels(self) -> int:
+        return len(self._fifos)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __bool__(self) -> bool:
+        return bool(self._index)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._index
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._index.get(key)
+        return entry.value if entry is not None else default
+
+    def priority_of(self, key: Hashable) -> Optional[int]:
+        entry = self._index.get(key)
+        return entry.priority if entry is not None else None
+
+    def push(self, key: Hashable, value: Any, priority: int = PRIORITY_NORMAL) -> bool:
+        """
+        Поставить задачу. Если ключ уже в очереди — value заменяется на месте, а более срочный
+        priority поднимает задачу (менее срочный её не опускает). True — ключ был новым.
+        """
+        priority = self._level(priority)
+        entry = self._index.get(key)
+        if entry is None:
+            entry = _Entry(key, value, priority, time.monotonic())
+            self._index[key] = entry
+            self._fifos[priority].append(entry)
+            return True
+        entry.value = value
+        entry.updated = time.monotonic()
+        if priority < entry.priority:
+            self._move(entry, priority)
+        return False
+
+    def replace(self, key: Hashable, value: Any) -> bool:
+        """Заменить задачу ключа, не меняя её места в очереди. False — ключа нет."""
+        entry = self._index.get(key)
+        if entry is None:
+            return False
+        entry.value = value
+        entry.updated = time.monotonic()
+        return True
+
+    def promote(self, key: Hashable, priority: int = PRIORITY_HIGH) -> bool:
+        """Поднять задачу до priority (в конец его FIFO). False — ключа нет или она уже не ниже."""
+        entry = self._index.get(key)
+        priority = self._level(priority)
+        if entry is None or priority >= entry.priority:
+            return False
+        self._move(entry, priority)
+        return True
+
+    def remove(self, key: Hashable, default: Any = None) -> Any:
+        """Убрать задачу по ключу; возвращает её value (default — ключа не было)."""
+        entry = self._index.pop(key, None)
+        if entry is None:
+            return default
+        self._bury(entry)
+        return entry.value
+
+    def peek(self) -> Optional[tuple[Hashable, Any]]:
+        """(key, value) следующей задачи без извлечения; None — очередь пуста."""
+        entry = self._head()
+        return (entry.key, entry.value) if entry is not None else None
+
+    def peek_times(self) -> Optional[tuple[float, float]]:
+        """(enqueued, updated) следующей задачи по time.monotonic(); None — очередь пуста."""
+        entry = self._head()
+        return (entry.enqueued, entry.updated) if entry is not None else None
+
+    def pop(self) -> tuple[Hashable, Any]:
+        """Извлечь следующую задачу: самый срочный уровень, внутри уровня — FIFO."""
+        entry = self._head()
+        if entry is None:
+            raise IndexError("pop from empty KeyedTaskQueue")
+        self._fifos[entry.priority].popleft()
+        del self._index[entry.key]
+        entry.alive = False
+        return entry.key, entry.value
+
+    def items(self) -> Iterator[tuple[Hashable, Any]]:
+        """(key, value) в порядке выборки. Очередь во время обхода не менять."""
+        for fifo in self._fifos:
+            for entry in fifo:
+                if entry.alive:
+                    yield entry.key, entry.value
+
+    def clear(self) -> None:
+        for fifo in self._fifos:
+            fifo.clear()
+        self._index.clear()
+        self._dead = 0
+
+    # ----- внутреннее -----
+    def _level(self, priority: int) -> int:
+        return max(0, min(len(self._fifos) - 1, int(priority)))
+
+    def _move(self, entry: _Entry, priority: int) -> None:
+        self._bury(entry)
+        moved = _Entry(entry.key, entry.value, priority, entry.enqueued)
+        moved.updated = entry.updated
+        self._index[entry.key] = moved
+        self._fifos[priority].append(moved)
+
+    def _bury(self, entry: _Entry) -> None:
+        entry.alive = False
+        self._dead += 1
+        if self._dead > _COMPACT_MIN_DEAD and self._dead > len(self._index):
+            for i, fifo in enumerate(self._fifos):
+                self._fifos[i] = deque(e for e in fifo if e.alive)
+            self._dead = 0
+
+    def _head(self) -> Optional[_Entry]:
+        for fifo in self._fifos:
+            while fifo and not fifo[0].alive:
+                fifo.popleft()
+                self._dead -= 1
+            if fifo:
+                return fifo[0]
+        return None
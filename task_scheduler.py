@@ -0,0 +1,196 @@
+"""
+Планировщик задач потока I/O по классам обслуживания: записи пользователя, интерактивные чтения
+(проверка после записи, connect/resume), опрос управления (реле, клапаны, вентиляторы), опрос
+телеметрии, спектры и текст дисплея.
+
+У класса есть приоритет (0 — самый срочный), старение и необязательный срок. Старение: за каждые
+aging_s секунд ожидания задача поднимается на один уровень, поэтому поток записей не держит
+телеметрию бесконечно, а спектры не вытесняют опрос реле. Срок: задача, которую не успели выполнить
+за deadline_s с последней постановки, снимается до отправки на шину (результат уже никому не нужен,
+следующий опрос поставит её снова) и учитывается в счётчике expired класса.
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Hashable, Iterable, Optional
+
+from task_queue import KeyedTaskQueue
+
+USER_WRITES = "user_writes"
+INTERACTIVE_READS = "interactive_reads"
+CONTROL_POLLS = "control_polls"
+TELEMETRY_POLLS = "telemetry_polls"
+BULK_SPECTRA = "bulk_spectra"
+DISPLAY_TEXT = "display_text"
+
+
+class ServiceClass:
+    """Класс обслуживания: priority, aging_s (None — без старения), deadline_s (None — без срока)."""
+
+    __slots__ = ("name", "priority", "aging_s", "deadline_s")
+
+    def __init__(self, name: str, priority: int, aging_s: Optional[float] = None, deadline_s: Optional[float] = None):
+        self.name = name
+        self.priority = int(priority)
+        self.aging_s = aging_s
+        self.deadline_s = deadline_s
+
+
+DEFAULT_SERVICE_CLASSES = (
+    ServiceClass(USER_WRITES, 0),
+    ServiceClass(INTERACTIVE_READS, 1, aging_s=0.5),
+    ServiceClass(CONTROL_POLLS, 2, aging_s=0.5, deadline_s=3.0),
+    # Текст дисплея читается цепочкой по 10 раз/с — устаревший запрос бесполезен
+    ServiceClass(DISPLAY_TEXT, 3, aging_s=0.25, deadline_s=1.0),
+    ServiceClass(TELEMETRY_POLLS, 4, aging_s=0.5, deadline_s=5.0),
+    # Спектр читается секундами и запрашивается по кнопке — не снимается, но и не вытесняет опрос
+    ServiceClass(BULK_SPECTRA, 5, aging_s=1.0),
+)
+
+
+class _ClassStats:
+    __slots__ = ("served", "expired", "discarded", "wait_total", "wait_max")
+
+    def __init__(self):
+        self.served = 0
+        self.expired = 0
+        self.discarded = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+
+class ServiceScheduler:
+    """
+    KeyedTaskQueue на каждый класс и выбор следующего класса с учётом старения и сроков.
+    Ключ, поставленный через push, живёт только в одном классе. Используется только из потока I/O.
+    """
+
+    def __init__(self, classes: Iterable[ServiceClass] = DEFAULT_SERVICE_CLASSES):
+        ordered = sorted(classes, key=lambda c: c.priority)
+        self.classes: dict[str, ServiceClass] = {c.name: c for c in ordered}
+        self._queues = {name: KeyedTaskQueue(levels=1) for name in self.classes}
+        self._class_of: dict[Hashable, str] = {}
+        self._stats = {name: _ClassStats() for name in self.classes}
+
+    def __len__(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    def __bool__(self) -> bool:
+        return any(self._queues.values())
+
+    def queue(self, name: str) -> KeyedTaskQueue:
+        """Очередь класса — для операций над задачами одного класса (записи: замена, склейка)."""
+        return self._queues[name]
+
+    def class_of(self, key: Hashable) -> Optional[str]:
+        return self._class_of.get(key)
+
+    def push(self, name: str, key: Hashable, value: Any) -> bool:
+        """
+        Поставить задачу в класс name. Ключ уже ждёт в другом классе: более срочный name переносит
+        его туда, менее срочный — только заменяет задачу на месте. True — ключ был новым.
+        """
+        current = self._class_of.get(key)
+        if current is not None and key in self._queues[current]:
+            if current == name or self.classes[name].priority >= self.classes[current].priority:
+                self._queues[current].replace(key, value)
+                return False
+            self._queues[current].remove(key)
+            self._queues[name].push(key, value)
+            self._class_of[key] = name
+            return False
+        self._class_of[key] = name
+        return self._queues[name].push(key, value)
+
+    def remove(self, key: Hashable, default: Any = None) -> Any:
+        name = self._class_of.pop(key, None)
+        if name is None:
+            return default
+        return self._queues[name].remove(key, default)
+
+    def discard(self, predicate: Callable[[str, Hashable, Any], bool]) -> list[tuple[str, Hashable, Any]]:
+        """Снять без выполнения все задачи, для которых predicate(name, key, value); [(name, key, value), ...]."""
+        dropped = [
+            (name, key, value)
+            for name, q in self._queues.items()
+            for key, value in q.items()
+            if predicate(name, key, value)
+        ]
+        for name, key, _ in dropped:
+            self._queues[name].remove(key)
+            if self._class_of.get(key) == name:
+                del self._class_of[key]
+            self._stats[name].discarded += 1
+        return dropped
+
+    def next_class(
+        self,
+        on_expired: Optional[Callable[[str, Hashable, Any], None]] = None,
+        admit: Optional[Callable[[str, Hashable, Any], bool]] = None,
+    ) -> Optional[str]:
+        """
+        Класс, чья задача выполняется следующей (извлечь — pop), None — задач нет или все отложены.
+        Просроченные задачи с головы очередей снимаются и передаются в on_expired(name, key, value).
+        admit(name, key, value) — False откладывает класс в этом выборе (например, его категория
+        шины выбрала бюджет), выбирается следующий по рангу.
+        """
+        now = time.monotonic()
+        best = None
+        best_rank = None
+        for name, cls in self.classes.items():
+            q = self._queues[name]
+            times = q.peek_times()
+            while times is not None and cls.deadline_s is not None and now - times[1] > cls.deadline_s:
+                key, value = self._take(name)
+                self._stats[name].expired += 1
+                if on_expired is not None:
+                    on_expired(name, key, value)
+                times = q.peek_times()
+            if times is None:
+                continue
+            if admit is not None and not admit(name, *q.peek()):
+                continue
+            rank = cls.priority
+            if cls.aging_s:
+                rank -= (now - times[0]) / cls.aging_s
+            # При равенстве выигрывает класс с более срочным приоритетом (идёт раньше в classes)
+            if best_rank is None or rank < best_rank:
+                best, best_rank = name, rank
+        return best
+
+    def pop(self, name: str) -> tuple[Hashable, Any]:
+        """Извлечь задачу класса name для выполнения (учитывается время ожидания)."""
+        waited = time.monotonic() - self._queues[name].peek_times()[0]
+        stats = self._stats[name]
+        stats.served += 1
+        stats.wait_total += waited
+        stats.wait_max = max(stats.wait_max, waited)
+        return self._take(name)
+
+    def clear(self) -> None:
+        for q in self._queues.values():
+            q.clear()
+        self._class_of.clear()
+
+    def stats(self) -> dict:
+        """По классам: в очереди, выполнено, снято по сроку и как устаревшие, среднее и максимальное ожидание (мс)."""
+        result = {}
+        for name, stats in self._stats.items():
+            result[name] = {
+                "queued": len(self._queues[name]),
+                "served": stats.served,
+                "expired": stats.expired,
+                "discarded": stats.discarded,
+                "wait_avg_ms": stats.wait_total / stats.served * 1000.0 if stats.served else 0.0,
+                "wait_max_ms": stats.wait_max * 1000.0,
+            }
+        return result
+
+    def reset_stats(self) -> None:
+        self._stats = {name: _ClassStats() for name in self.classes}
+
+    def _take(self, name: str) -> tuple[Hashable, Any]:
+        key, value = self._queues[name].pop()
+        if self._class_of.get(key) == name:
+            del self._class_of[key]
+        return key, value
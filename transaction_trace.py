@@ -0,0 +1,146 @@
+"""
+Кольцевой буфер трассировки транзакций Modbus: на каждую транзакцию — адрес, функция, количество,
+время отправки / первого / последнего байта ответа, байты туда-обратно и исход.
+
+Колонки — заранее выделенные array, запись транзакции только перезаписывает ячейки слота
+(без объектов на транзакцию), поэтому трассировка остаётся включённой в production.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from array import array
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRACE_CAPACITY = 2048
+
+# Исходы транзакции
+OK = 0
+EXCEPTION = 1
+CRC_ERROR = 2
+TIMEOUT = 3
+RECONNECT = 4
+CONN_ERROR = 5
+# Ответа нет дольше p95 — кадр отправлен повторно (RetryPolicy), повтор — следующая запись
+RETRIED = 6
+
+OUTCOMES = ("ok", "exception", "crc_error", "timeout", "reconnect", "conn_error", "retried")
+
+
+class TransactionTrace:
+    """
+    Последние capacity транзакций. Время — time.monotonic() (в snapshot/dump добавляется wall-clock).
+    first_byte = 0 — после отправки не пришло ни байта.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_TRACE_CAPACITY):
+        self.capacity = max(1, int(capacity))
+        self.enabled = True
+        n = self.capacity
+        self._function = array("B", bytes(n))
+        self._address = array("H", bytes(2 * n))
+        self._quantity = array("H", bytes(2 * n))
+        self._outcome = array("B", bytes(n))
+        self._exception_code = array("B", bytes(n))
+        self._bytes_out = array("H", bytes(2 * n))
+        self._bytes_in = array("H", bytes(2 * n))
+        self._sent = array("d", bytes(8 * n))
+        self._first_byte = array("d", bytes(8 * n))
+        self._last_byte = array("d", bytes(8 * n))
+        # Всего записано транзакций (слот следующей — total % capacity)
+        self.total = 0
+        self._wall_offset = time.time() - time.monotonic()
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    def clear(self) -> None:
+        self.total = 0
+
+    def record(
+        self,
+        frame,
+        sent: float,
+        first_byte: float,
+        last_byte: float,
+        bytes_in: int,
+        outcome: int,
+        exception_code: int = 0,
+    ) -> None:
+        """Записать транзакцию по кадру запроса (адрес/функция/количество берутся из него)."""
+        if not self.enabled:
+            return
+        i = self.total % self.capacity
+        self._function[i] = frame[1]
+        self._address[i] = (frame[2] << 8) | frame[3]
+        self._quantity[i] = (frame[4] << 8) | frame[5] if frame[1] in (3, 4, 16) else 1
+        self._outcome[i] = outcome
+        self._exception_code[i] = exception_code & 0xFF
+        self._bytes_out[i] = min(len(frame), 0xFFFF)
+        self._bytes_in[i] = min(bytes_in, 0xFFFF)
+        self._sent[i] = sent
+        self._first_byte[i] = first_byte
+        self._last_byte[i] = last_byte
+        self.total += 1
+
+    def mark_last(self, outcome: int) -> None:
+        """Переписать исход последней транзакции (обрыв, после которого пошло переподключение)."""
+        if self.enabled and self.total:
+            self._outcome[(self.total - 1) % self.capacity] = outcome
+
+    def rate(self, window: float) -> dict:
+        """Запросов/с и байт/с (туда + обратно) за последние window секунд — фактическая нагрузка канала."""
+        since = time.monotonic() - window
+        requests = 0
+        nbytes = 0
+        for seq in range(self.total - 1, self.total - len(self) - 1, -1):
+            i = seq % self.capacity
+            if self._sent[i] < since:
+                break
+            requests += 1
+            nbytes += self._bytes_out[i] + self._bytes_in[i]
+        return {"window": window, "requests_per_s": requests / window, "bytes_per_s": nbytes / window}
+
+    def snapshot(self, last: Optional[int] = None) -> list[dict]:
+        """Транзакции от старых к новым (last — только последние N). Длительности в миллисекундах."""
+        count = len(self)
+        if last is not None:
+            count = min(count, max(0, int(last)))
+        out = []
+        for seq in range(self.total - count, self.total):
+            i = seq % self.capacity
+            sent = self._sent[i]
+            first = self._first_byte[i]
+            last_byte = self._last_byte[i]
+            out.append({
+                "seq": seq,
+                "time": sent + self._wall_offset,
+                "function": self._function[i],
+                "address": self._address[i],
+                "quantity": self._quantity[i],
+                "outcome": OUTCOMES[self._outcome[i]],
+                "exception_code": self._exception_code[i] or None,
+                "bytes_out": self._bytes_out[i],
+                "bytes_in": self._bytes_in[i],
+                "first_byte_ms": (first - sent) * 1000.0 if first else None,
+                "last_byte_ms": (last_byte - sent) * 1000.0,
+            })
+        return out
+
+    def dump(self, path: str) -> bool:
+        """Сохранить snapshot в файл: JSON Lines, одна транзакция на строку."""
+        records = self.snapshot()
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                for rec in records:
+                    f.write(json.dumps(rec))
+                    f.write("\n")
+            return True
+        except OSError as e:
+            logger.warning(f"Не удалось сохранить трассировку транзакций {path}: {e}")
+            return False
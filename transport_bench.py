@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк опций TCP сокета (SocketProfile): задержка FC04 запросов ModbusClient через
+SocketTransport к локальному стенду-заглушке (RegisterBank за TCP сервером) —
+с каждой опцией по очереди, чтобы DEFAULT_SOCKET_PROFILE выбирался по замерам.
+
+Запуск: python transport_bench.py [--requests 2000] [--split-reply] [--host H --port P]
+--split-reply — стенд отдаёт ответ двумя send() (как Wi-Fi мост, режущий RTU кадр),
+на этом сильнее всего видны Nagle и delayed ACK. С --host/--port стенд не поднимается,
+замер идёт против настоящего устройства.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import socket
+import threading
+import time
+
+from modbus_client import ModbusClient
+from modbus_transport import RegisterBank, SocketProfile
+
+PROFILES = {
+    "os-default": SocketProfile(nodelay=False, quickack=False, keepalive=False),
+    "nodelay": SocketProfile(nodelay=True, quickack=False),
+    "quickack": SocketProfile(nodelay=False, quickack=True),
+    "nodelay+quickack": SocketProfile(nodelay=True, quickack=True),
+    "nodelay+quickack+4k-buffers": SocketProfile(nodelay=True, quickack=True, rcvbuf=4096, sndbuf=4096),
+}
+
+
+class StandInServer:
+    """TCP сервер-заглушка устройства: RTU кадры из сокета → RegisterBank.respond()."""
+
+    def __init__(self, bank: RegisterBank, split_reply: bool = False):
+        self.bank = bank
+        self.split_reply = split_reply
+        self._listener = socket.create_server(("127.0.0.1", 0))
+        self.port = self._listener.getsockname()[1]
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _serve(self) -> None:
+        while True:
+            try:
+                conn, _ = self._listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn: socket.socket) -> None:
+        buf = bytearray()
+        with conn:
+            while True:
+                try:
+                    data = conn.recv(4096)
+                except OSError:
+                    return
+                if not data:
+                    return
+                buf += data
+                while len(buf) >= 8:
+                    # FC16: 7 байт заголовка + byte count + CRC; остальные запросы — 8 байт
+                    length = 9 + buf[6] if buf[1] == 16 else 8
+                    if len(buf) < length:
+                        break
+                    frame, buf = bytes(buf[:length]), buf[length:]
+                    reply = self.bank.respond(frame)
+                    if reply is None:
+                        continue
+                    if self.split_reply and len(reply) > 3:
+                        conn.sendall(reply[:3])
+                        conn.sendall(reply[3:])
+                    else:
+                        conn.sendall(reply)
+
+    def close(self) -> None:
+        self._listener.close()
+
+
+def measure(host: str, port: int, profile: SocketProfile, requests: int) -> dict:
+    client = ModbusClient(host, port, transport="socket", socket_profile=profile)
+    if not client.connect():
+        return {"error": "не удалось подключиться"}
+    # Фиксированный таймаут: замеряем задержку, а не адаптацию RTT
+    client.retry_policy.enabled = False
+    samples = []
+    lost = 0
+    for i in range(requests):
+        started = time.perf_counter()
+        if client.read_input_register(1000 + i % 64) is None:
+            lost += 1
+            continue
+        samples.append(time.perf_counter() - started)
+    options = client.transport_stats().get("socket_options", {})
+    client.disconnect()
+    samples.sort()
+    n = len(samples)
+    if not n:
+        return {"error": "нет ответов", "lost": lost}
+    return {
+        "p50_us": samples[n // 2] * 1e6,
+        "p95_us": samples[min(n - 1, int(0.95 * n))] * 1e6,
+        "p99_us": samples[min(n - 1, int(0.99 * n))] * 1e6,
+        "mean_us": sum(samples) / n * 1e6,
+        "lost": lost,
+        "options": options,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Задержка Modbus запросов с разными опциями TCP сокета")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--split-reply", action="store_true")
+    parser.add_argument("--host")
+    parser.add_argument("--port", type=int, default=503)
+    args = parser.parse_args()
+    logging.getLogger("modbus_client").setLevel(logging.WARNING)
+    logging.getLogger("modbus_transport").setLevel(logging.WARNING)
+
+    server = None
+    host, port = args.host, args.port
+    if host is None:
+        server = StandInServer(RegisterBank(input_registers={a: a for a in range(1000, 1064)}), args.split_reply)
+        host, port = "127.0.0.1", server.port
+    try:
+        print(f"{'профиль':<30}{'p50 мкс':>10}{'p95 мкс':>10}{'p99 мкс':>10}{'среднее':>10}{'потери':>8}")
+        for name, profile in PROFILES.items():
+            r = measure(host, port, profile, args.requests)
+            if "error" in r:
+                print(f"{name:<30}{r['error']}")
+                continue
+            print(f"{name:<30}{r['p50_us']:>10.0f}{r['p95_us']:>10.0f}{r['p99_us']:>10.0f}{r['mean_us']:>10.0f}{r['lost']:>8}")
+            print(f"{'':<30}{r['options']}")
+    finally:
+        if server is not None:
+            server.close()
+
+
+if __name__ == "__main__":
+    main()